@@ -0,0 +1,21 @@
+# Generated by Django 5.2.1 on 2026-10-18 00:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='contractor',
+            index=models.Index(fields=['city', 'state'], name='accounts_co_city_ea82d6_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='customer',
+            index=models.Index(fields=['city', 'state'], name='accounts_cu_city_72ae3a_idx'),
+        ),
+    ]
@@ -35,6 +35,12 @@ class Customer(models.Model):
     address = models.TextField(blank=True, null=True)  # Added address field
     customer_image = models.ImageField(upload_to="customer_images/", blank=True, null=True)
 
+    class Meta:
+        indexes = [
+            # Quick job feed: jobs posted by customers in the contractor's city
+            models.Index(fields=['city', 'state']),
+        ]
+
 # Extended model for Contractor
 class Contractor(models.Model):  # Fixed typo from 'Modle' to 'Model'
     # Contractor Type Choices for Dual-Track System
@@ -54,6 +60,11 @@ class Contractor(models.Model):  # Fixed typo from 'Modle' to 'Model'
     type = models.CharField(max_length=20, choices=ContractorType.choices, default=ContractorType.VERIFIED)
     trust_score = models.FloatField(default=0.0, help_text="Calculated trust score based on recommendations")
     
+    class Meta:
+        indexes = [
+            models.Index(fields=['city', 'state']),
+        ]
+    
     def __str__(self):
         return f"{self.user.first_name} {self.user.last_name} ({self.type})"
 
@@ -1,9 +1,13 @@
 # serializers.py
+import logging
+
 from rest_framework import serializers
 from .models import User, Customer, Contractor, Supervisor
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 from django.contrib.auth import authenticate
 
+logger = logging.getLogger(__name__)
+
 # Base User Serializer
 class UserBaseSerializer(serializers.ModelSerializer):
     class Meta:
@@ -171,7 +175,7 @@ class UserProfileSerializer(serializers.ModelSerializer):
             elif obj.role == User.Roles.SUPERVISOR and hasattr(obj, 'supervisor'):
                 return SupervisorSerializer(obj.supervisor).data
         except Exception as e:
-            print(f"Error in get_profile_data: {str(e)}")
+            logger.exception("Error in get_profile_data")
         return None
 
     def get_address(self, obj):
@@ -183,5 +187,5 @@ class UserProfileSerializer(serializers.ModelSerializer):
             elif hasattr(obj, 'supervisor'):
                 return getattr(obj.supervisor, 'address', None)
         except Exception as e:
-            print(f"Error in get_address: {str(e)}")
+            logger.exception("Error in get_address")
         return None
@@ -1,4 +1,6 @@
 # views.py
+import logging
+
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status, generics
@@ -21,6 +23,8 @@ from rest_framework_simplejwt.views import TokenObtainPairView
 from rest_framework.permissions import IsAuthenticated
 from .models import Customer, Contractor
 
+logger = logging.getLogger(__name__)
+
 class CustomerRegistrationView(APIView):
     def post(self, request):
         serializer = CustomerRegistrationSerializer(data=request.data)
@@ -56,7 +60,7 @@ class UserProfileView(APIView):
             serializer = UserProfileSerializer(request.user)
             return Response(serializer.data)
         except Exception as e:
-            print(f"Error in profile GET: {str(e)}")  # For debugging
+            logger.exception("Error in profile GET")
             return Response(
                 {"error": "Failed to retrieve profile"},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
@@ -94,7 +98,7 @@ class UserProfileView(APIView):
             return Response(UserProfileSerializer(user).data)
             
         except Exception as e:
-            print(f"Error in profile PUT: {str(e)}")  # For debugging
+            logger.exception("Error in profile PUT")
             return Response(
                 {"error": "Failed to update profile"},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
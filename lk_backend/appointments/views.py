@@ -5,6 +5,7 @@ from works.models import VirtualAppointment, PhysicalVisit
 from works.serializers import VirtualAppointmentSerializer, PhysicalVisitSerializer, VirtualAppointmentCreateSerializer
 from django.utils import timezone
 from accounts.models import Customer, Supervisor
+from trust_network.pagination import KeysetPagination
 
 class CustomerRequiredMixin:
     def check_customer(self):
@@ -28,6 +29,7 @@ class SupervisorRequiredMixin:
 class VirtualAppointmentListView(CustomerRequiredMixin, generics.ListCreateAPIView):
     serializer_class = VirtualAppointmentSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetPagination
     
     def get_serializer_class(self):
         if self.request.method == 'POST':
@@ -71,6 +73,7 @@ class VirtualAppointmentListView(CustomerRequiredMixin, generics.ListCreateAPIVi
 class PhysicalAppointmentListView(CustomerRequiredMixin, generics.ListCreateAPIView):
     serializer_class = PhysicalVisitSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetPagination
 
     def get_queryset(self):
         if 'customer' in self.request.path:
@@ -2,6 +2,9 @@
 ASGI config for lk_backend project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+It serves the whole API, including the quick job stream
+(/api/trust-network/quick-jobs/stream/), which needs it; e.g.
+``uvicorn lk_backend.asgi:application`` next to the WSGI server.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
@@ -0,0 +1,396 @@
+"""
+Request instrumentation and structured logging.
+
+Logging: the LOGGING setting sends every record through QueuedStreamHandler,
+which only puts it on a bounded queue (dropping it when full) so request
+threads never block on stdout; a background thread formats and writes it,
+as one JSON object per line with JsonFormatter. Requests are logged by
+InstrumentationMiddleware on the 'lk_backend.requests' logger: slow ones
+always (SLOW_REQUEST_MS), the rest sampled at REQUEST_LOG_SAMPLE_RATE.
+
+Timing: InstrumentationMiddleware opens a RequestTimings for each request and
+adds named spans to it:
+
+- app: the whole request, db: SQL time and query count (every connection runs
+  a query timer, which is a no-op outside requests), view: the view and
+  response rendering, serializer: TimedSerializerMixin.to_representation,
+  gemini: waiting for Gemini calls (trust_network.gemini_client); other code
+  can add spans with `with span('name'):`.
+
+The spans are returned in a Server-Timing header and each request's duration
+goes into a per-endpoint latency histogram, exported in the Prometheus text
+format at /metrics (see metrics_view). Histograms are per process: scrape
+every worker.
+"""
+import atexit
+import contextvars
+import copy
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import re
+import threading
+import time
+from contextlib import contextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import HttpRequest, HttpResponse, HttpResponseForbidden
+
+request_logger = logging.getLogger('lk_backend.requests')
+
+_current = contextvars.ContextVar('request_timings', default=None)
+
+# Latency histogram bucket bounds, in seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+# ---------------------------------------------------------------------- #
+# Spans
+# ---------------------------------------------------------------------- #
+
+class RequestTimings:
+    """Named spans of one request: total seconds and count for each"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.spans = {}
+        self._lock = threading.Lock()
+        self._active = set()
+
+    def add(self, name, seconds):
+        with self._lock:
+            total, count = self.spans.get(name, (0.0, 0))
+            self.spans[name] = (total + seconds, count + 1)
+
+    def milliseconds(self, name):
+        return round(self.spans.get(name, (0.0, 0))[0] * 1000, 2)
+
+    def count(self, name):
+        return self.spans.get(name, (0.0, 0))[1]
+
+
+def current_timings():
+    return _current.get()
+
+
+@contextmanager
+def span(name):
+    """
+    Time the block into the current request's span `name`. A no-op outside a
+    request, and nested spans of the same name are counted once.
+    """
+    timings = _current.get()
+    if timings is None or name in timings._active:
+        yield
+        return
+    timings._active.add(name)
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings._active.discard(name)
+        timings.add(name, time.perf_counter() - started)
+
+
+class TimedSerializerMixin:
+    """Times to_representation into the 'serializer' span"""
+
+    def to_representation(self, instance):
+        with span('serializer'):
+            return super().to_representation(instance)
+
+
+def _time_query(execute, sql, params, many, context):
+    timings = _current.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timings.add('db', time.perf_counter() - started)
+
+
+def install_query_timer(connection, **kwargs):
+    if _time_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_time_query)
+
+
+connection_created.connect(install_query_timer)
+
+
+# ---------------------------------------------------------------------- #
+# Latency histogram
+# ---------------------------------------------------------------------- #
+
+class LatencyHistogram:
+    """Cumulative request latency histogram per (method, endpoint, status class)"""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._series = {}  # labels -> [bucket counts..., sum, count]
+
+    def observe(self, labels, seconds):
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    series[i] += 1
+            series[-2] += seconds
+            series[-1] += 1
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+
+    def prometheus_text(self, name='http_request_duration_seconds'):
+        with self._lock:
+            series = {labels: list(values) for labels, values in self._series.items()}
+        lines = [
+            f'# HELP {name} Request latency by endpoint.',
+            f'# TYPE {name} histogram',
+        ]
+        for (method, endpoint, status), values in sorted(series.items()):
+            label = f'method="{method}",endpoint="{_escape(endpoint)}",status="{status}"'
+            for bound, count in zip(self.buckets, values):
+                lines.append(f'{name}_bucket{{{label},le="{bound}"}} {count}')
+            lines.append(f'{name}_bucket{{{label},le="+Inf"}} {values[-1]}')
+            lines.append(f'{name}_sum{{{label}}} {values[-2]:.6f}')
+            lines.append(f'{name}_count{{{label}}} {values[-1]}')
+        return '\n'.join(lines) + '\n'
+
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+latency_histogram = LatencyHistogram()
+
+
+# ---------------------------------------------------------------------- #
+# Middleware
+# ---------------------------------------------------------------------- #
+
+def _endpoint(request):
+    match = getattr(request, 'resolver_match', None)
+    return f'/{match.route}' if match is not None else 'unmatched'
+
+
+class InstrumentationMiddleware:
+    """Request spans, Server-Timing header, latency histogram and sampled request log"""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+        # Connections opened before this middleware was loaded
+        for connection in connections.all(initialized_only=True):
+            install_query_timer(connection)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        timings = RequestTimings()
+        token = _current.set(timings)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self._finish(request, response, timings)
+
+    async def __acall__(self, request):
+        timings = RequestTimings()
+        token = _current.set(timings)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self._finish(request, response, timings)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        timings = _current.get()
+        if timings is not None:
+            timings.view_started = time.perf_counter()
+
+    def _finish(self, request, response, timings):
+        finished = time.perf_counter()
+        view_started = getattr(timings, 'view_started', None)
+        if view_started is not None:
+            timings.add('view', finished - view_started)
+        duration = finished - timings.started
+        timings.add('app', duration)
+
+        response['Server-Timing'] = server_timing(timings)
+        endpoint = _endpoint(request)
+        latency_histogram.observe((request.method, endpoint, f'{response.status_code // 100}xx'), duration)
+        self._log(request, response, endpoint, timings, duration)
+        return response
+
+    def _log(self, request, response, endpoint, timings, duration):
+        slow = duration * 1000 >= settings.SLOW_REQUEST_MS
+        if not slow and random.random() >= settings.REQUEST_LOG_SAMPLE_RATE:
+            return
+        level = logging.WARNING if slow else logging.INFO
+        if not request_logger.isEnabledFor(level):
+            return
+        request_logger.log(level, '%s %s %s', request.method, request.path, response.status_code, extra={
+            'method': request.method,
+            'path': request.path,
+            'endpoint': endpoint,
+            'status': response.status_code,
+            'duration_ms': round(duration * 1000, 2),
+            'db_ms': timings.milliseconds('db'),
+            'queries': timings.count('db'),
+            'spans': {name: timings.milliseconds(name) for name in timings.spans},
+            'user_id': getattr(getattr(request, 'user', None), 'id', None),
+            'sampled': not slow,
+        })
+
+
+def server_timing(timings):
+    entries = []
+    for name in sorted(timings.spans):
+        entry = f'{name};dur={timings.milliseconds(name)}'
+        if name == 'db':
+            entry += f';desc="{timings.count(name)} queries"'
+        entries.append(entry)
+    return ', '.join(entries)
+
+
+def metrics_view(request):
+    """Prometheus text export; needs `Authorization: Bearer <METRICS_TOKEN>` when that is set"""
+    token = settings.METRICS_TOKEN
+    if token and request.headers.get('Authorization') != f'Bearer {token}':
+        return HttpResponseForbidden('Forbidden')
+    if not token and not settings.DEBUG:
+        return HttpResponseForbidden('Set METRICS_TOKEN to enable metrics')
+    text = latency_histogram.prometheus_text() + _logging_metrics()
+    return HttpResponse(text, content_type='text/plain; version=0.0.4')
+
+
+# ---------------------------------------------------------------------- #
+# Logging
+# ---------------------------------------------------------------------- #
+
+# Attributes every LogRecord has; anything else came in through extra=
+_RECORD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', None, None))) | {'message', 'asctime'}
+
+
+# Query parameters whose values never reach the log (EventSource clients
+# cannot set headers and send their credentials in the query string)
+_SENSITIVE_PARAM = re.compile(
+    r'([?&](?:token|ticket|access|refresh|password|api_key)=)[^&\s"\'\\]*', re.IGNORECASE
+)
+
+
+def redact(text):
+    """`text` with the values of sensitive query parameters replaced"""
+    return _SENSITIVE_PARAM.sub(r'\1[redacted]', text)
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    One JSON object per record, with the fields passed through extra=.
+    Request objects (Django attaches one to every 'django.request' record)
+    are logged as their method and path only, and sensitive query
+    parameters are redacted from every string.
+    """
+
+    def format(self, record):
+        data = {
+            'time': self.formatTime(record, '%Y-%m-%dT%H:%M:%S'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key in _RECORD_ATTRS or key.startswith('_'):
+                continue
+            if isinstance(value, HttpRequest):
+                data.setdefault('method', value.method)
+                data.setdefault('path', value.path)
+            else:
+                data[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            data['exception'] = record.exc_text
+        return redact(json.dumps(data, default=str, ensure_ascii=False))
+
+
+class PlainFormatter(logging.Formatter):
+    """The standard text format, with sensitive query parameters redacted"""
+
+    def format(self, record):
+        return redact(super().format(record))
+
+
+class SamplingFilter(logging.Filter):
+    """Keeps every WARNING and above and a `rate` fraction of lower records"""
+
+    def __init__(self, rate=1.0):
+        super().__init__()
+        self.rate = float(rate)
+
+    def filter(self, record):
+        return record.levelno >= logging.WARNING or self.rate >= 1 or random.random() < self.rate
+
+
+_queued_handlers = []
+
+
+class QueuedStreamHandler(logging.handlers.QueueHandler):
+    """
+    Puts records on a bounded queue for a background thread to format and
+    write to the stream; records that find the queue full are dropped.
+    """
+
+    def __init__(self, stream=None, max_queue=10000):
+        super().__init__(queue.Queue(max_queue))
+        self.target = logging.StreamHandler(stream)
+        self.dropped = 0
+        self.listener = logging.handlers.QueueListener(self.queue, self.target)
+        self.listener.start()
+        _queued_handlers.append(self)
+        atexit.register(self.listener.stop)
+
+    def setFormatter(self, fmt):
+        # Formatting happens on the listener thread
+        self.target.setFormatter(fmt)
+
+    def prepare(self, record):
+        # Render what cannot cross threads (arguments, exception info); the
+        # formatter still sees extra= fields
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def _logging_metrics():
+    dropped = sum(handler.dropped for handler in _queued_handlers)
+    return (
+        '# HELP log_records_dropped_total Log records dropped because the log queue was full.\n'
+        '# TYPE log_records_dropped_total counter\n'
+        f'log_records_dropped_total {dropped}\n'
+    )
@@ -0,0 +1,202 @@
+"""
+Query budgets: catch N+1 queries in development and tests.
+
+QueryBudgetMiddleware records the SQL each request runs and checks it against
+two limits:
+
+- the view's query budget: `query_budget = 8` on a class-based view, or the
+  @query_budget(8) decorator on a function view (above @api_view), otherwise
+  QUERY_BUDGET_DEFAULT;
+- QUERY_BUDGET_REPEAT_LIMIT: how many times one query shape (the SQL with its
+  literals and IN lists collapsed) may run. A shape repeated once per row of a
+  list is the N+1 signature, and is caught even when the total stays within
+  the budget on small test data.
+
+Transaction control (savepoints, BEGIN/COMMIT) is not counted. A request over
+a limit is logged on 'lk_backend.query_budget' or, with
+QUERY_BUDGET_ACTION='raise' (the default under `manage.py test`), fails with
+QueryBudgetExceeded. The middleware is on with DEBUG and in tests
+(QUERY_BUDGET_ENABLED).
+
+Tests can check code outside a request with QueryBudgetTestMixin, and the
+`query_report` management command runs every GET endpoint against the
+database and prints queries and milliseconds per endpoint.
+"""
+import contextvars
+import logging
+import re
+import time
+from collections import Counter
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+logger = logging.getLogger('lk_backend.query_budget')
+
+_current = contextvars.ContextVar('query_log', default=None)
+
+_TRANSACTION_CONTROL = re.compile(
+    r'\s*(?:SAVEPOINT|RELEASE SAVEPOINT|ROLLBACK TO SAVEPOINT|BEGIN|COMMIT|ROLLBACK)\b', re.IGNORECASE
+)
+_IN_LIST = re.compile(r'\bIN \((?:%s, )*%s\)')
+_LITERAL = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_SELECT_LIST = re.compile(r'^SELECT (?:DISTINCT )?.+? FROM ', re.DOTALL)
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+def query_shape(sql):
+    """sql with literals and IN lists collapsed, equal for every row of an N+1"""
+    return _LITERAL.sub('?', _IN_LIST.sub('IN (...)', sql))
+
+
+class QueryLog:
+    """
+    SQL run in the current context while the log is open, including the
+    sync_to_async threads it calls into. Logs nest: a query is recorded in
+    every open log of the context.
+    """
+
+    def __init__(self):
+        self.queries = []  # (sql, seconds)
+        self._parent = None
+        self._token = None
+
+    def __enter__(self):
+        self._parent = _current.get()
+        self._token = _current.set(self)
+        return self
+
+    def __exit__(self, *exc_info):
+        _current.reset(self._token)
+
+    def __len__(self):
+        return len(self.queries)
+
+    def add(self, sql, seconds):
+        log = self
+        while log is not None:
+            log.queries.append((sql, seconds))
+            log = log._parent
+
+    @property
+    def milliseconds(self):
+        return round(sum(seconds for _, seconds in self.queries) * 1000, 2)
+
+    def repeated(self, limit):
+        """(shape, count) of the query shapes run more than limit times, most frequent first"""
+        shapes = Counter(query_shape(sql) for sql, _ in self.queries)
+        return [(shape, count) for shape, count in shapes.most_common() if count > limit]
+
+    def problems(self, budget, repeat_limit):
+        """Descriptions of the limits the logged queries exceed"""
+        problems = []
+        if budget is not None and len(self) > budget:
+            problems.append(f'{len(self)} queries, budget {budget}')
+        for shape, count in self.repeated(repeat_limit):
+            problems.append(f"{count} x {_SELECT_LIST.sub('SELECT ... FROM ', shape)}")
+        return problems
+
+
+def _record_query(execute, sql, params, many, context):
+    log = _current.get()
+    if log is None or _TRANSACTION_CONTROL.match(sql):
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        log.add(sql, time.perf_counter() - started)
+
+
+def install_query_recorder(connection, **kwargs):
+    if _record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_record_query)
+
+
+connection_created.connect(install_query_recorder)
+for _connection in connections.all(initialized_only=True):
+    install_query_recorder(_connection)
+
+
+def query_budget(max_queries):
+    """Declare the query budget of a function view; put it above @api_view"""
+    def decorator(view):
+        view.query_budget = max_queries
+        return view
+    return decorator
+
+
+def view_budget(request):
+    """Query budget of the view that served request"""
+    match = getattr(request, 'resolver_match', None)
+    if match is not None:
+        view = match.func
+        # Function views, then class-based views (DRF's as_view sets cls)
+        for owner in (view, getattr(view, 'cls', None), getattr(view, 'view_class', None)):
+            budget = getattr(owner, 'query_budget', None)
+            if budget is not None:
+                return budget
+    return settings.QUERY_BUDGET_DEFAULT
+
+
+class QueryBudgetMiddleware:
+    """Log or raise when a request exceeds its view's query budget or repeats a query shape"""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        if not settings.QUERY_BUDGET_ENABLED:
+            return self.get_response(request)
+        with QueryLog() as log:
+            response = self.get_response(request)
+        self.check(request, log)
+        return response
+
+    async def __acall__(self, request):
+        if not settings.QUERY_BUDGET_ENABLED:
+            return await self.get_response(request)
+        with QueryLog() as log:
+            response = await self.get_response(request)
+        self.check(request, log)
+        return response
+
+    def check(self, request, log):
+        problems = log.problems(view_budget(request), settings.QUERY_BUDGET_REPEAT_LIMIT)
+        if not problems:
+            return
+        message = f"{request.method} {request.path} exceeds its query budget: " + '; '.join(problems)
+        if settings.QUERY_BUDGET_ACTION == 'raise':
+            raise QueryBudgetExceeded(message)
+        logger.warning(message, extra={'path': request.path, 'queries': len(log)})
+
+
+class QueryBudgetTestMixin:
+    """TestCase helper: `with self.assertQueryBudget(5):` fails on too many or repeated queries"""
+
+    def assertQueryBudget(self, budget=None, repeat_limit=None):
+        test = self
+
+        class Check(QueryLog):
+            def __exit__(self, exc_type, *exc_info):
+                super().__exit__(exc_type, *exc_info)
+                if exc_type is None:
+                    problems = self.problems(
+                        budget, settings.QUERY_BUDGET_REPEAT_LIMIT if repeat_limit is None else repeat_limit
+                    )
+                    if problems:
+                        test.fail('Query budget exceeded: ' + '; '.join(problems))
+
+        return Check()
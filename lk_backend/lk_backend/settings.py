@@ -12,6 +12,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 
 from pathlib import Path
 import os
+import sys
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
@@ -64,6 +65,8 @@ REST_FRAMEWORK = {
 
 
 MIDDLEWARE = [
+    'lk_backend.instrumentation.InstrumentationMiddleware',
+    'lk_backend.query_budget.QueryBudgetMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -181,3 +184,125 @@ GEMINI_API_KEY = os.getenv('GEMINI_API_KEY')
 # Trust Network Configuration
 TRUST_NETWORK_RATE_LIMIT_PER_HOUR = int(os.getenv('TRUST_NETWORK_RATE_LIMIT_PER_HOUR', 100))
 VOICE_QUERY_RATE_LIMIT_PER_HOUR = int(os.getenv('VOICE_QUERY_RATE_LIMIT_PER_HOUR', 50))
+
+# Trust scoring weights. TRUST_NETWORK_HOP_WEIGHTS[h - 1] multiplies the trust level
+# of an h-hop recommendation; hops beyond the list keep decaying by the last ratio.
+TRUST_NETWORK_HOP_WEIGHTS = [
+    float(weight) for weight in os.getenv('TRUST_NETWORK_HOP_WEIGHTS', '10,3').split(',')
+]
+TRUST_NETWORK_INDIRECT_SCORE_FACTOR = float(os.getenv('TRUST_NETWORK_INDIRECT_SCORE_FACTOR', 0.7))
+
+# In-memory trust graph (trust_network.graph): reloaded when the shared version in this
+# cache changes and at least every TRUST_GRAPH_TTL seconds (0 disables the TTL)
+TRUST_GRAPH_CACHE_ALIAS = os.getenv('TRUST_GRAPH_CACHE_ALIAS', 'default')
+TRUST_GRAPH_TTL = int(os.getenv('TRUST_GRAPH_TTL', 60))
+
+# Offline trust propagation index (python manage.py build_trust_index)
+TRUST_PROPAGATION_METHOD = os.getenv('TRUST_PROPAGATION_METHOD', 'khop')  # 'khop' or 'ppr'
+TRUST_PROPAGATION_MAX_HOPS = int(os.getenv('TRUST_PROPAGATION_MAX_HOPS', 3))
+TRUST_PROPAGATION_TOP_K = int(os.getenv('TRUST_PROPAGATION_TOP_K', 50))
+TRUST_PROPAGATION_DAMPING = float(os.getenv('TRUST_PROPAGATION_DAMPING', 0.85))
+TRUST_PROPAGATION_ITERATIONS = int(os.getenv('TRUST_PROPAGATION_ITERATIONS', 30))
+TRUST_PROPAGATION_TOLERANCE = float(os.getenv('TRUST_PROPAGATION_TOLERANCE', 1e-6))
+TRUST_PROPAGATION_PPR_SCALE = float(os.getenv('TRUST_PROPAGATION_PPR_SCALE', 100))
+
+# Recommendation path search ("recommended via X")
+TRUST_PATH_MAX_DEPTH = int(os.getenv('TRUST_PATH_MAX_DEPTH', 4))
+TRUST_PATH_MAX_PATHS = int(os.getenv('TRUST_PATH_MAX_PATHS', 3))
+TRUST_PATH_CACHE_SIZE = int(os.getenv('TRUST_PATH_CACHE_SIZE', 10000))
+
+# Denormalised contractor work history (trust_network.work_history)
+WORK_SUMMARY_RECENT_ITEMS = int(os.getenv('WORK_SUMMARY_RECENT_ITEMS', 10))
+
+# Parsed voice query cache (trust_network.nlp_cache): 'locmem', 'django' or 'none'
+NLP_QUERY_CACHE_BACKEND = os.getenv('NLP_QUERY_CACHE_BACKEND', 'locmem')
+NLP_QUERY_CACHE_ALIAS = os.getenv('NLP_QUERY_CACHE_ALIAS', 'default')
+NLP_QUERY_CACHE_TTL = int(os.getenv('NLP_QUERY_CACHE_TTL', 3600))
+NLP_QUERY_CACHE_MAX_ENTRIES = int(os.getenv('NLP_QUERY_CACHE_MAX_ENTRIES', 5000))
+
+# Services sent to Gemini: 'shortlist' (top-K local keyword matches) or 'full' catalog
+GEMINI_PROMPT_MODE = os.getenv('GEMINI_PROMPT_MODE', 'shortlist')
+GEMINI_SERVICE_SHORTLIST_SIZE = int(os.getenv('GEMINI_SERVICE_SHORTLIST_SIZE', 8))
+SERVICE_CATALOG_TTL = int(os.getenv('SERVICE_CATALOG_TTL', 300))
+SERVICE_CATALOG_DESCRIPTION_CHARS = int(os.getenv('SERVICE_CATALOG_DESCRIPTION_CHARS', 80))
+
+# Gemini client (trust_network.gemini_client): per-call deadline, worker threads and circuit breaker.
+# GEMINI_API_ENDPOINT points the client at a proxy or a local fake server (REST transport).
+GEMINI_API_ENDPOINT = os.getenv('GEMINI_API_ENDPOINT')
+GEMINI_TIMEOUT_SECONDS = float(os.getenv('GEMINI_TIMEOUT_SECONDS', 8))
+GEMINI_MAX_CONCURRENT_CALLS = int(os.getenv('GEMINI_MAX_CONCURRENT_CALLS', 8))
+GEMINI_BREAKER_FAILURES = int(os.getenv('GEMINI_BREAKER_FAILURES', 5))
+GEMINI_BREAKER_RESET_SECONDS = float(os.getenv('GEMINI_BREAKER_RESET_SECONDS', 30))
+
+# Batch voice query parsing (/parse-voice-queries/): queries per request and per Gemini prompt
+VOICE_BATCH_MAX_QUERIES = int(os.getenv('VOICE_BATCH_MAX_QUERIES', 500))
+GEMINI_BATCH_SIZE = int(os.getenv('GEMINI_BATCH_SIZE', 10))
+GEMINI_BATCH_TIMEOUT_SECONDS = float(os.getenv('GEMINI_BATCH_TIMEOUT_SECONDS', 20))
+
+# Contractor quick job feed (trust_network.localities): largest radius_km a contractor may ask for
+QUICK_JOB_FEED_MAX_RADIUS_KM = float(os.getenv('QUICK_JOB_FEED_MAX_RADIUS_KM', 100))
+
+# Push feed of new quick jobs (trust_network.job_feed), streamed by the ASGI application.
+# Broker: 'memory' (single process) or 'postgres' (LISTEN/NOTIFY across processes)
+QUICK_JOB_FEED_BROKER = os.getenv('QUICK_JOB_FEED_BROKER', 'memory')
+QUICK_JOB_FEED_HEARTBEAT_SECONDS = float(os.getenv('QUICK_JOB_FEED_HEARTBEAT_SECONDS', 15))
+QUICK_JOB_FEED_RETRY_MS = int(os.getenv('QUICK_JOB_FEED_RETRY_MS', 5000))
+QUICK_JOB_FEED_MAX_PENDING = int(os.getenv('QUICK_JOB_FEED_MAX_PENDING', 100))
+# Lifetime of the stream-only tickets EventSource clients pass as ?ticket=
+QUICK_JOB_STREAM_TICKET_SECONDS = int(os.getenv('QUICK_JOB_STREAM_TICKET_SECONDS', 60))
+
+# Tender bid leaderboard (works.leaderboard): cache and default weights of the weighted score
+BID_LEADERBOARD_CACHE_ALIAS = os.getenv('BID_LEADERBOARD_CACHE_ALIAS', 'default')
+BID_LEADERBOARD_CACHE_TTL = int(os.getenv('BID_LEADERBOARD_CACHE_TTL', 300))
+BID_SCORE_PRICE_WEIGHT = float(os.getenv('BID_SCORE_PRICE_WEIGHT', 0.6))
+BID_SCORE_RATING_WEIGHT = float(os.getenv('BID_SCORE_RATING_WEIGHT', 0.25))
+BID_SCORE_TRUST_WEIGHT = float(os.getenv('BID_SCORE_TRUST_WEIGHT', 0.15))
+
+# Logging and request instrumentation (lk_backend.instrumentation): JSON lines (or LOG_FORMAT=plain)
+# written to stderr from a background thread; records below WARNING are sampled at LOG_SAMPLE_RATE
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
+LOG_FORMAT = os.getenv('LOG_FORMAT', 'json')
+LOG_SAMPLE_RATE = float(os.getenv('LOG_SAMPLE_RATE', 1.0))
+LOG_QUEUE_SIZE = int(os.getenv('LOG_QUEUE_SIZE', 10000))
+# Request log: requests slower than SLOW_REQUEST_MS always, a REQUEST_LOG_SAMPLE_RATE fraction of the rest
+SLOW_REQUEST_MS = float(os.getenv('SLOW_REQUEST_MS', 1000))
+REQUEST_LOG_SAMPLE_RATE = float(os.getenv('REQUEST_LOG_SAMPLE_RATE', 0.01))
+# /metrics (Prometheus text format) needs this bearer token; without one it is only served with DEBUG
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+
+# Query budgets (lk_backend.query_budget), on in development and tests: a request running more queries
+# than its view's budget (QUERY_BUDGET_DEFAULT unless declared) or one query shape more than
+# QUERY_BUDGET_REPEAT_LIMIT times (N+1) is logged, or raises with QUERY_BUDGET_ACTION='raise'
+TESTING = sys.argv[1:2] == ['test']
+QUERY_BUDGET_ENABLED = os.getenv('QUERY_BUDGET_ENABLED', str(DEBUG or TESTING)).lower() == 'true'
+QUERY_BUDGET_ACTION = os.getenv('QUERY_BUDGET_ACTION', 'raise' if TESTING else 'log')
+QUERY_BUDGET_DEFAULT = int(os.getenv('QUERY_BUDGET_DEFAULT', 30))
+QUERY_BUDGET_REPEAT_LIMIT = int(os.getenv('QUERY_BUDGET_REPEAT_LIMIT', 5))
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'json': {'()': 'lk_backend.instrumentation.JsonFormatter'},
+        'plain': {
+            '()': 'lk_backend.instrumentation.PlainFormatter',
+            'fmt': '%(asctime)s %(levelname)s %(name)s: %(message)s',
+        },
+    },
+    'filters': {
+        'sampling': {'()': 'lk_backend.instrumentation.SamplingFilter', 'rate': LOG_SAMPLE_RATE},
+    },
+    'handlers': {
+        'queued': {
+            'class': 'lk_backend.instrumentation.QueuedStreamHandler',
+            'max_queue': LOG_QUEUE_SIZE,
+            'formatter': LOG_FORMAT,
+            'filters': ['sampling'],
+        },
+    },
+    'root': {'handlers': ['queued'], 'level': LOG_LEVEL},
+    'loggers': {
+        # Django's own handlers stay in place; its records also reach the root handler
+        'django': {'level': LOG_LEVEL},
+    },
+}
@@ -11,9 +11,11 @@ from .permissions import IsSupervisorOrAdminOrReadOnly
 from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
-import traceback
+import logging
 from django.core.exceptions import ObjectDoesNotExist
 
+logger = logging.getLogger(__name__)
+
 #--------------------------------------------------------------------------------------------------------------------
 
 class ServicesListCreateView(generics.ListCreateAPIView):
@@ -108,7 +110,7 @@ class ContractorServicesView(APIView):
         except Contractor.DoesNotExist:
             return Response({"error": "Contractor not found"}, status=status.HTTP_404_NOT_FOUND)
         except Exception as e:
-            print(f"Error fetching services for contractor {contractor_id}: {e}")
+            logger.exception("Error fetching services for contractor %s", contractor_id)
             return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 #---------------------------------------------------------------------------------------------------------------------------
@@ -116,18 +118,14 @@ class ContractorsForServicesView(APIView):
     def get(self, request, service_id):
         try:
             service = Services.objects.get(id=service_id)
-            print("✅ Found service:", service)
-
             serializer = ServicesContractorSerializer(service)
             return Response(serializer.data, status=status.HTTP_200_OK)
 
         except ObjectDoesNotExist:
-            print(f"❌ Service with ID {service_id} not found.")
             return Response({"error": "Service not found"}, status=status.HTTP_404_NOT_FOUND)
 
         except Exception as e:
-            print(f"🔥 Unexpected error while fetching contractors for service_id = {service_id}")
-            traceback.print_exc()
+            logger.exception("Unexpected error while fetching contractors for service %s", service_id)
             return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 #---------------------------------------------------------------------------------------------------------------------------
@@ -153,8 +151,7 @@ class SupervisorsForServiceView(APIView):
         except Services.DoesNotExist:
             return Response({"error": "Service not found"}, status=status.HTTP_404_NOT_FOUND)
         except Exception as e:
-            print(f"🔥 Error fetching supervisors for service {service_id}: {str(e)}")
-            traceback.print_exc()
+            logger.exception("Error fetching supervisors for service %s", service_id)
             return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 #---------------------------------------------------------------------------------------------------------------------------
@@ -0,0 +1,793 @@
+"""
+High-volume bulk seeding for load-testing datasets
+
+The per-domain seeders create one row at a time with faker values and
+per-row retries, which is fine for a demo database of a few hundred rows but
+not for the millions a load test needs. BulkSeeder fills the same tables in
+bulk instead:
+
+- Rows are generated in chunks of units (a user, an appointment, a tender
+  with its requirements, invitations and bids, a recommender with their
+  recommendations, a quick job with its interests). Every chunk draws from its
+  own random.Random seeded with (seed, step, chunk start), so the same seed,
+  counts and chunk size give the same rows whatever the number of workers.
+- Primary keys of every table other rows point at are allocated up front,
+  above the current maximum id, so a chunk knows the ids of the rows it
+  references without reading them back. Attributes another step needs (a
+  customer's city, a contractor's services, a user's name) are a fixed
+  function of the row's position rather than a random draw.
+- Chunks are written with PostgreSQL COPY, or elsewhere with batched
+  bulk_create-style INSERTs. Both keep the generated created_at values, which
+  auto_now_add would otherwise overwrite.
+- The chunks of a step run in parallel worker processes (PostgreSQL only;
+  SQLite allows a single writer); steps run one after another in foreign key
+  order.
+- TrustConnection follows a configurable graph shape (TrustGraphShape):
+  by default a power-law number of recommendations per user, and contractors
+  picked with Zipf popularity, so a few contractors collect most of them.
+
+Bulk inserts send no signals, so afterwards the sequences are reset, the
+trust scores recomputed (recompute_trust_scores), the work history rebuilt
+(rebuild_work_history) and the shared trust graph version bumped so running
+servers reload their graphs. The trust index is left to `build_trust_index`.
+
+Usage:
+    python -m seed_data.master_seeder --bulk --scale 10000 --workers 8
+"""
+
+import io
+import json
+import math
+import multiprocessing
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import time as day_time, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from .base_config import config, print_progress
+
+DEFAULT_CHUNK_SIZE = 2000
+INSERT_BATCH_SIZE = 1000
+
+# Fixed so their ids can be allocated ahead of the tenders step
+REQUIREMENTS_PER_TENDER = 4
+INVITES_PER_TENDER = 4
+
+FIRST_NAMES = [
+    'Aarav', 'Vivaan', 'Aditya', 'Arjun', 'Sai', 'Reyansh', 'Krishna', 'Ishaan', 'Rohan', 'Kabir',
+    'Ananya', 'Diya', 'Priya', 'Saanvi', 'Aadhya', 'Kavya', 'Meera', 'Pooja', 'Neha', 'Lakshmi',
+]
+LAST_NAMES = [
+    'Sharma', 'Verma', 'Gupta', 'Patel', 'Reddy', 'Iyer', 'Nair', 'Singh', 'Kumar', 'Das',
+    'Mehta', 'Joshi', 'Rao', 'Pillai', 'Chopra', 'Bose', 'Menon', 'Kulkarni', 'Shah', 'Mishra',
+]
+STREETS = ['MG Road', 'Station Road', 'Gandhi Nagar', 'Nehru Street', 'Park Avenue', 'Lake View', 'Temple Road']
+QUALIFICATIONS = [
+    'B.Tech in Civil Engineering', 'B.Tech in Electrical Engineering', 'M.Tech in Construction Management',
+    'Diploma in Civil Engineering', 'B.Arch Architecture', 'B.E. Civil Engineering',
+]
+COMMENTS = [
+    'Did a careful job and cleaned up afterwards.', 'On time and fairly priced.',
+    'Solved a problem two others could not.', 'Good communication throughout the work.',
+    'Would hire again for any repair.', '',
+]
+
+# Salts of the position-derived attributes (see spread)
+_NAME, _SURNAME, _CITY, _SKILLS = range(4)
+
+
+def spread(ordinal, salt, n):
+    """Deterministic value in range(n) for a row position, evenly spread over consecutive ordinals"""
+    return (((ordinal + 1) * 2654435761 + salt * 40503) % 4294967296) % n
+
+
+class TrustGraphShape:
+    """
+    Shape of the TrustConnection graph.
+
+    power_law: the number of recommendations a user gives follows a power law
+    P(k) ~ k^-degree_exponent (degree_exponent > 2, so the mean is finite),
+    and each recommendation goes to a contractor drawn with Zipf popularity
+    P(rank) ~ rank^-popularity_exponent. uniform: every user gives about the
+    mean number of recommendations, to contractors drawn uniformly.
+    """
+    KINDS = ('power_law', 'uniform')
+
+    def __init__(self, kind='power_law', degree_exponent=2.5, popularity_exponent=1.0, max_degree=500):
+        if kind not in self.KINDS:
+            raise ValueError(f"Unknown trust graph shape {kind!r}, expected one of {self.KINDS}")
+        if kind == 'power_law' and degree_exponent <= 2:
+            raise ValueError('degree_exponent must be above 2')
+        self.kind = kind
+        self.degree_exponent = degree_exponent
+        self.popularity_exponent = popularity_exponent if kind == 'power_law' else 0.0
+        self.max_degree = max_degree
+
+    def __repr__(self):
+        if self.kind == 'uniform':
+            return 'TrustGraphShape(uniform)'
+        return (f'TrustGraphShape(power_law, degree_exponent={self.degree_exponent}, '
+                f'popularity_exponent={self.popularity_exponent}, max_degree={self.max_degree})')
+
+    def degree(self, rng, mean):
+        """Number of recommendations of one user, averaging mean"""
+        weight = 1.0
+        if self.kind == 'power_law':
+            # Pareto weight with mean 1; rounding at random keeps the mean
+            alpha = self.degree_exponent - 1
+            weight = (alpha - 1) / alpha * (1 - rng.random()) ** (-1 / alpha)
+        return min(int(mean * weight + rng.random()), self.max_degree)
+
+    def rank(self, rng, n):
+        """Popularity rank in range(n) of a recommended contractor"""
+        s, u = self.popularity_exponent, rng.random()
+        if s == 0:
+            rank = u * n
+        elif s == 1:
+            rank = n ** u - 1
+        else:
+            # Inverse of the continuous Zipf CDF over [1, n + 1)
+            rank = (1 + u * ((n + 1) ** (1 - s) - 1)) ** (1 / (1 - s)) - 1
+        return min(int(rank), n - 1)
+
+
+class BulkPlan:
+    """
+    Everything a chunk needs to generate its rows: the counts, the ids
+    allocated to each table, the service catalog and the seed. Pickled to the
+    worker processes.
+    """
+
+    def __init__(self, counts, first_ids, catalog, localities, seed, graph_shape, chunk_size):
+        self.counts = counts
+        self.first_ids = first_ids
+        self.seed = seed
+        self.graph_shape = graph_shape
+        self.chunk_size = chunk_size
+        # Dates are relative to the start of the seeding day
+        self.anchor = timezone.localtime().replace(hour=0, minute=0, second=0, microsecond=0)
+        # Hashing every password would take longer than the rest of the seed
+        self.password = make_password('password123', salt=f'loadtest{seed}')
+
+        self.service_names = {service_id: name for service_id, name, _ in catalog}
+        self.service_ids = sorted(self.service_names)
+        # service id -> [(requirement id, category id, unit)]
+        self.requirements = {service_id: requirements for service_id, _, requirements in catalog}
+        self.tender_service_ids = [service_id for service_id in self.service_ids if self.requirements[service_id]]
+        ids_by_name = {name: service_id for service_id, name in self.service_names.items()}
+        self.skills = [
+            tuple(ids_by_name[name] for name in pattern if name in ids_by_name)
+            for pattern in config.contractor_skills
+        ]
+        self.localities = localities
+
+        # A visit for every few appointments, ids following the appointment's position
+        self.visit_every = max(1, counts['virtual_appointments'] // max(counts['physical_visits'], 1))
+        if not counts['physical_visits']:
+            self.visit_every = counts['virtual_appointments'] + 1
+        # Scatters popularity ranks over the contractors
+        self.contractor_stride = _coprime_stride(counts['contractors'])
+
+    @property
+    def total_users(self):
+        return self.counts['customers'] + self.counts['contractors'] + self.counts['supervisors']
+
+    def user_id(self, role, offset):
+        """Id of the user of the offset-th customer, contractor or supervisor"""
+        if role == 'contractors':
+            offset += self.counts['customers']
+        elif role == 'supervisors':
+            offset += self.counts['customers'] + self.counts['contractors']
+        return self.first_ids['users'] + offset
+
+    def name(self, user_ordinal):
+        return (FIRST_NAMES[spread(user_ordinal, _NAME, len(FIRST_NAMES))],
+                LAST_NAMES[spread(user_ordinal, _SURNAME, len(LAST_NAMES))])
+
+    def city(self, user_ordinal):
+        """Index into config.indian_cities"""
+        return spread(user_ordinal, _CITY, len(config.indian_cities))
+
+    def contractor_services(self, offset):
+        return self.skills[spread(offset, _SKILLS, len(self.skills))] if self.skills else ()
+
+    def visit_id(self, appointment):
+        """Physical visit id of the appointment-th virtual appointment, or None"""
+        if appointment % self.visit_every:
+            return None
+        index = appointment // self.visit_every
+        if index >= self.counts['physical_visits']:
+            return None
+        return self.first_ids['physical_visits'] + index
+
+    def chunks(self, total):
+        return [(start, min(start + self.chunk_size, total)) for start in range(0, total, self.chunk_size)]
+
+
+def _coprime_stride(n):
+    stride = 1000003
+    while n > 1 and math.gcd(stride, n) != 1:
+        stride += 2
+    return stride
+
+
+def _address(rng, city):
+    return f"{rng.randint(1, 999)}, {rng.choice(STREETS)}, {city}"
+
+
+def _moment(plan, rng, days_before, days_after=0):
+    """Random time of day within [anchor - days_before, anchor + days_after]"""
+    return plan.anchor + timedelta(seconds=rng.randint(-days_before * 86400, days_after * 86400))
+
+
+# ---------------------------------------------------------------------- #
+# Row builders: one per step, rows of each table as field -> value dicts
+# ---------------------------------------------------------------------- #
+
+def build_users(plan, rng, start, stop):
+    """Users with their customer, contractor or supervisor profile and contractor services"""
+    from accounts.models import User, Customer, Contractor, Supervisor
+    from needs.models import ContractorServices
+
+    customers, contractors = plan.counts['customers'], plan.counts['contractors']
+    users, profiles = [], {Customer: [], Contractor: [], Supervisor: []}
+    contractor_services = []
+    for ordinal in range(start, stop):
+        user_id = plan.first_ids['users'] + ordinal
+        first_name, last_name = plan.name(ordinal)
+        city, state = config.indian_cities[plan.city(ordinal)]
+        if ordinal < customers:
+            role, offset = User.Roles.CUSTOMER, ordinal
+        elif ordinal < customers + contractors:
+            role, offset = User.Roles.CONTRACTOR, ordinal - customers
+        else:
+            role, offset = User.Roles.SUPERVISOR, ordinal - customers - contractors
+        joined = _moment(plan, rng, 365, 0)
+        users.append({
+            'id': user_id,
+            'email': f'{first_name.lower()}.{last_name.lower()}.{user_id}@loadtest.localkonnect.com',
+            'password': plan.password,
+            'first_name': first_name,
+            'last_name': last_name,
+            'role': role,
+            'phone_number': f'+91-{rng.randint(6000000000, 9999999999)}',
+        })
+        profile = {'user_id': user_id, 'city': city, 'state': state, 'address': _address(rng, city)}
+
+        if role == User.Roles.CUSTOMER:
+            profiles[Customer].append(dict(profile, id=plan.first_ids['customers'] + offset))
+        elif role == User.Roles.CONTRACTOR:
+            contractor_id = plan.first_ids['contractors'] + offset
+            profiles[Contractor].append(dict(
+                profile, id=contractor_id,
+                rating=Decimal(str(round(rng.uniform(3.5, 5.0), 1))),
+                experience=rng.randint(1, 15),
+                type=rng.choice(['VERIFIED', 'COMMUNITY']),
+            ))
+            for service_id in plan.contractor_services(offset):
+                contractor_services.append({
+                    'contractor_id': contractor_id, 'service_id': service_id, 'added_on': joined
+                })
+        else:
+            profiles[Supervisor].append(dict(
+                profile, id=plan.first_ids['supervisors'] + offset,
+                rating=Decimal(str(round(rng.uniform(4.0, 5.0), 1))),
+                experience=rng.randint(5, 20),
+                qualification=rng.choice(QUALIFICATIONS),
+                total_consultations=rng.randint(20, 200),
+                verified=True,
+                bio=f'{first_name} has supervised residential projects in {city} for years.',
+            ))
+    return [(User, users), *profiles.items(), (ContractorServices, contractor_services)]
+
+
+def build_appointments(plan, rng, start, stop):
+    """Virtual appointments, with a physical visit for every few of them"""
+    from works.models import VirtualAppointment, PhysicalVisit
+
+    appointments, visits = [], []
+    for ordinal in range(start, stop):
+        customer = rng.randrange(plan.counts['customers'])
+        supervisor = rng.randrange(plan.counts['supervisors'])
+        service_id = rng.choice(plan.service_ids)
+        city, _ = config.indian_cities[plan.city(customer)]
+        visit_id = plan.visit_id(ordinal)
+
+        if visit_id is not None:
+            scheduled = _moment(plan, rng, 180, -7)
+            status = 'completed'
+        else:
+            scheduled = _moment(plan, rng, 180, 30)
+            status = 'scheduled' if scheduled > plan.anchor else rng.choice(
+                ['completed'] * 8 + ['cancelled', 'no_show']
+            )
+        created = scheduled - timedelta(days=rng.randint(1, 7))
+        appointment_id = plan.first_ids['virtual_appointments'] + ordinal
+        appointments.append({
+            'id': appointment_id,
+            'customer_id': plan.first_ids['customers'] + customer,
+            'supervisor_id': plan.first_ids['supervisors'] + supervisor,
+            'service_id': service_id,
+            'scheduled_time': scheduled,
+            'duration_minutes': rng.choice([30, 45, 60]),
+            'status': status,
+            'meeting_link': f'https://meet.localkonnect.com/{appointment_id}',
+            'notes': 'Discussed the scope of work and the budget.' if status == 'completed' else '',
+            'project_complexity': rng.choice(['simple', 'medium', 'complex']),
+            'physical_visit_required': visit_id is not None,
+            'estimated_budget_range': rng.choice(['10000-50000', '50000-200000', '200000-500000']),
+            'created_at': created,
+            'updated_at': scheduled if status != 'scheduled' else created,
+        })
+        if visit_id is not None:
+            visit_day = scheduled + timedelta(days=rng.randint(1, 6))
+            visits.append({
+                'id': visit_id,
+                'virtual_appointment_id': appointment_id,
+                'customer_id': plan.first_ids['customers'] + customer,
+                'supervisor_id': plan.first_ids['supervisors'] + supervisor,
+                'service_id': service_id,
+                'visit_address': _address(rng, city),
+                'scheduled_date': visit_day.date(),
+                'scheduled_time': day_time(rng.randint(9, 17), rng.choice([0, 30])),
+                'estimated_duration_hours': rng.randint(1, 4),
+                'visit_fee': Decimal(rng.choice([500, 750, 1000])),
+                'status': 'completed',
+                'payment_status': 'paid',
+                'supervisor_notes': 'Measured the site and listed the requirements.',
+                'customer_willing_for_tender': rng.random() < 0.7,
+                'created_at': scheduled,
+                'updated_at': visit_day,
+            })
+    return [(VirtualAppointment, appointments), (PhysicalVisit, visits)]
+
+
+def build_tenders(plan, rng, start, stop):
+    """Tenders with their requirements, invited contractors and the bids of those who accepted"""
+    from works.models import Tenders, TenderRequirement, TenderContractor, TenderBids
+
+    tenders, requirements, invites, bids = [], [], [], []
+    n_contractors = plan.counts['contractors']
+    for ordinal in range(start, stop):
+        tender_id = plan.first_ids['tenders'] + ordinal
+        customer = rng.randrange(plan.counts['customers'])
+        first_name, last_name = plan.name(customer)
+        city, _ = config.indian_cities[plan.city(customer)]
+        service_id = rng.choice(plan.tender_service_ids)
+        status = rng.choice(['published'] * 4 + ['in_progress'] * 2 + ['completed'] * 3 + ['cancelled'])
+        created = _moment(plan, rng, 180)
+        published = created + timedelta(hours=rng.randint(1, 24))
+        start_date = (published + timedelta(days=rng.randint(3, 14))).date()
+        budget = rng.randint(50, 500) * 1000
+
+        invited = rng.sample(range(n_contractors), min(INVITES_PER_TENDER, n_contractors))
+        accepted = []
+        for offset in invited:
+            invite_status = rng.choice(['accepted'] * 3 + ['invited', 'declined'])
+            contractor_id = plan.first_ids['contractors'] + offset
+            if invite_status == 'accepted':
+                accepted.append(contractor_id)
+            invites.append({
+                'tender_id': tender_id, 'contractor_id': contractor_id, 'status': invite_status,
+                'added_at': published, 'updated_at': published + timedelta(hours=rng.randint(1, 72)),
+            })
+        selected = accepted[0] if accepted and status in ('in_progress', 'completed') else None
+
+        tenders.append({
+            'id': tender_id,
+            'title': f"{plan.service_names[service_id]} Project - {first_name} {last_name}",
+            'description': f"{plan.service_names[service_id]} work at a {rng.choice(['flat', 'house', 'shop', 'office'])} in {city}.",
+            'customer_id': plan.first_ids['customers'] + customer,
+            'supervisor_id': plan.first_ids['supervisors'] + rng.randrange(plan.counts['supervisors']),
+            'service_id': service_id,
+            'location': _address(rng, city),
+            'start_date': start_date,
+            'end_date': start_date + timedelta(days=rng.randint(15, 90)),
+            'budget': Decimal(budget),
+            'selected_contractor_id': selected,
+            # Bids are open for the first weeks after publishing
+            'start_time': published,
+            'end_time': published + timedelta(days=rng.randint(14, 60)),
+            'status': status,
+            'priority': rng.choice(['low', 'medium', 'high', 'urgent']),
+            'created_at': created,
+            'updated_at': published,
+            'published_at': published,
+        })
+
+        catalog = plan.requirements[service_id]
+        chosen = rng.sample(catalog, min(REQUIREMENTS_PER_TENDER, len(catalog)))
+        for slot, (requirement_id, category_id, unit) in enumerate(chosen):
+            tender_requirement_id = plan.first_ids['tender_requirements'] + ordinal * REQUIREMENTS_PER_TENDER + slot
+            requirements.append({
+                'id': tender_requirement_id,
+                'tender_id': tender_id,
+                'requirement_id': requirement_id,
+                'category_id': category_id,
+                'quantity': Decimal(rng.randint(1, 200)),
+                'units': unit or '-',
+                'is_critical': rng.random() < 0.3,
+                'created_at': created,
+                'updated_at': created,
+            })
+            if status == 'cancelled':
+                continue
+            share = budget / len(chosen)
+            for contractor_id in accepted:
+                if rng.random() < 0.8:
+                    bid_time = published + timedelta(minutes=rng.randint(10, 14 * 24 * 60))
+                    bids.append({
+                        'tender_requirement_id': tender_requirement_id,
+                        'contractor_id': contractor_id,
+                        'bid_amount': Decimal(round(share * rng.uniform(0.8, 1.2))),
+                        'is_final': rng.random() < 0.7,
+                        'timestamp': bid_time,
+                        'updated_at': bid_time,
+                    })
+    return [(Tenders, tenders), (TenderRequirement, requirements), (TenderContractor, invites), (TenderBids, bids)]
+
+
+def build_trust_connections(plan, rng, start, stop):
+    """The recommendations of a range of users, shaped by plan.graph_shape"""
+    from trust_network.models import TrustConnection
+
+    shape = plan.graph_shape
+    n_contractors = plan.counts['contractors']
+    mean = plan.counts['trust_connections'] / plan.total_users
+    connections = []
+    for ordinal in range(start, stop):
+        recommender_id = plan.first_ids['users'] + ordinal
+        degree = min(shape.degree(rng, mean), n_contractors)
+        recommended = set()
+        for _ in range(degree * 4):
+            if len(recommended) >= degree:
+                break
+            offset = shape.rank(rng, n_contractors) * plan.contractor_stride % n_contractors
+            if plan.user_id('contractors', offset) != recommender_id:
+                recommended.add(offset)
+        for offset in sorted(recommended):
+            services = plan.contractor_services(offset)
+            created = _moment(plan, rng, 180)
+            connections.append({
+                'recommender_id': recommender_id,
+                'contractor_id': plan.first_ids['contractors'] + offset,
+                'comment': rng.choice(COMMENTS),
+                'trust_level': rng.choice([5, 6, 7, 7, 8, 8, 8, 9, 9, 10]),
+                'service_context_id': services[0] if services else None,
+                'created_at': created,
+                'updated_at': created,
+            })
+    return [(TrustConnection, connections)]
+
+
+def build_quick_jobs(plan, rng, start, stop):
+    """Quick jobs filed under their customer's locality, with contractor interest in the open ones"""
+    from trust_network.models import QuickJob, QuickJobInterest
+
+    jobs, interests = [], []
+    n_contractors = plan.counts['contractors']
+    for ordinal in range(start, stop):
+        job_id = plan.first_ids['quick_jobs'] + ordinal
+        customer = rng.randrange(plan.counts['customers'])
+        city_index = plan.city(customer)
+        city, _ = config.indian_cities[city_index]
+        service_id = rng.choice(plan.service_ids)
+        service_name = plan.service_names[service_id]
+        status = rng.choice(['OPEN'] * 4 + ['ASSIGNED'] * 2 + ['COMPLETED'] * 3 + ['CANCELLED'])
+        urgency = rng.choice(['LOW', 'MEDIUM', 'HIGH', 'URGENT'])
+        budget = rng.randint(5, 50) * 100
+        created = _moment(plan, rng, 90)
+
+        job = {
+            'id': job_id,
+            'customer_id': plan.user_id('customers', customer),
+            'service_id': service_id,
+            'title': f"Quick {service_name} Job - {rng.choice(['leak', 'fitting', 'repair', 'check', 'touch-up'])}",
+            'description': f"Need a {service_name.lower()} professional in {city}, {urgency.lower()} priority.",
+            'location': _address(rng, city),
+            'status': status,
+            'urgency': urgency,
+            'budget_suggestion': Decimal(budget),
+            'locality_id': plan.localities[city_index],
+            'raw_query': f"need {service_name.lower()} help {urgency.lower()} in {city}",
+            'parsed_intent': {'service': service_name, 'urgency': urgency, 'location_mentioned': city},
+            'created_at': created,
+            'updated_at': created,
+        }
+        if status in ('ASSIGNED', 'COMPLETED'):
+            job['assigned_contractor_id'] = plan.first_ids['contractors'] + rng.randrange(n_contractors)
+            job['assigned_at'] = created + timedelta(hours=rng.randint(1, 24))
+            job['updated_at'] = job['assigned_at']
+            if status == 'COMPLETED':
+                job['completed_at'] = job['assigned_at'] + timedelta(hours=rng.randint(2, 48))
+                job['updated_at'] = job['completed_at']
+        jobs.append(job)
+
+        if status == 'OPEN':
+            for offset in rng.sample(range(n_contractors), min(rng.randint(1, 4), n_contractors)):
+                interests.append({
+                    'quick_job_id': job_id,
+                    'contractor_id': plan.first_ids['contractors'] + offset,
+                    'message': 'Available today, can come over within the hour.',
+                    'proposed_price': Decimal(round(budget * rng.uniform(0.8, 1.2))),
+                    'created_at': created + timedelta(minutes=rng.randint(5, 600)),
+                })
+    return [(QuickJob, jobs), (QuickJobInterest, interests)]
+
+
+def seeded_models():
+    from accounts.models import User, Customer, Contractor, Supervisor
+    from needs.models import ContractorServices
+    from works.models import (
+        VirtualAppointment, PhysicalVisit, Tenders, TenderRequirement, TenderContractor, TenderBids
+    )
+    from trust_network.models import TrustConnection, QuickJob, QuickJobInterest
+
+    return [
+        User, Customer, Contractor, Supervisor, ContractorServices, VirtualAppointment, PhysicalVisit,
+        Tenders, TenderRequirement, TenderContractor, TenderBids, TrustConnection, QuickJob, QuickJobInterest,
+    ]
+
+
+# step name -> (units, row builder), in foreign key order
+STEPS = {
+    'users': (lambda plan: plan.total_users, build_users),
+    'appointments': (lambda plan: plan.counts['virtual_appointments'], build_appointments),
+    'tenders': (lambda plan: plan.counts['tenders'], build_tenders),
+    'trust_connections': (lambda plan: plan.total_users, build_trust_connections),
+    'quick_jobs': (lambda plan: plan.counts['quick_jobs'], build_quick_jobs),
+}
+
+
+def build_chunk(plan, step, start, stop):
+    """[(model, rows)] of units start..stop of step; the same for the same plan seed and chunk"""
+    rng = random.Random(f'{plan.seed}:{step}:{start}')
+    return STEPS[step][1](plan, rng, start, stop)
+
+
+# ---------------------------------------------------------------------- #
+# Writing
+# ---------------------------------------------------------------------- #
+
+def _copy_text(value):
+    """value in PostgreSQL COPY text format"""
+    if value is None:
+        return '\\N'
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    if isinstance(value, (dict, list)):
+        value = json.dumps(value)
+    elif hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return str(value).replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n').replace('\r', '\\r')
+
+
+def _copy(model, fields, objs):
+    quote = connection.ops.quote_name
+    sql = 'COPY {} ({}) FROM STDIN'.format(
+        quote(model._meta.db_table), ', '.join(quote(field.column) for field in fields)
+    )
+    data = ''.join(
+        '\t'.join(_copy_text(field.get_prep_value(getattr(obj, field.attname))) for field in fields) + '\n'
+        for obj in objs
+    )
+    with connection.cursor() as cursor:
+        driver_cursor = cursor.cursor
+        if hasattr(driver_cursor, 'copy_expert'):  # psycopg2
+            driver_cursor.copy_expert(sql, io.StringIO(data))
+        else:  # psycopg 3
+            with driver_cursor.copy(sql) as copy:
+                copy.write(data)
+
+
+def write_rows(model, rows, batch_size=INSERT_BATCH_SIZE):
+    """Insert rows (field -> value dicts), keeping their ids and timestamps"""
+    if not rows:
+        return
+    objs = [model(**row) for row in rows]
+    fields = [
+        field for field in model._meta.local_concrete_fields
+        if not (field.primary_key and 'id' not in rows[0])
+    ]
+    # Timestamps a row leaves unset get the save time, as auto_now(_add) would
+    now = timezone.now()
+    for field in fields:
+        if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False):
+            for obj in objs:
+                if getattr(obj, field.attname) is None:
+                    setattr(obj, field.attname, now)
+
+    if connection.vendor == 'postgresql':
+        _copy(model, fields, objs)
+        return
+    # bulk_create's batching, as a raw insert so generated timestamps are kept
+    batch_size = min(batch_size, connection.ops.bulk_batch_size(fields, objs) or batch_size)
+    for i in range(0, len(objs), batch_size):
+        model._base_manager._insert(objs[i:i + batch_size], fields=fields, raw=True)
+
+
+def run_chunk(plan, step, start, stop):
+    """Generate and write one chunk in a transaction; (units, rows) written"""
+    tables = build_chunk(plan, step, start, stop)
+    with transaction.atomic():
+        for model, rows in tables:
+            write_rows(model, rows)
+    return stop - start, sum(len(rows) for _, rows in tables)
+
+
+class StepProgress:
+    """Throttled progress lines for one step"""
+
+    def __init__(self, step, total, interval=2.0):
+        self.step = step
+        self.total = total
+        self.units = 0
+        self.rows = 0
+        self.interval = interval
+        self.started = self.printed = time.perf_counter()
+
+    def advance(self, units, rows):
+        self.units += units
+        self.rows += rows
+        now = time.perf_counter()
+        if now - self.printed >= self.interval or self.units >= self.total:
+            self.printed = now
+            rate = self.rows / max(now - self.started, 1e-9)
+            print_progress(f"   {self.step}: {self.rows:,} rows, {rate:,.0f} rows/s", self.units, self.total)
+
+
+class BulkSeeder:
+    """
+    Seeds counts of each kind of row (the master seeder's config keys) in
+    bulk. Existing rows are kept; new ids start above them.
+    """
+
+    def __init__(self, counts, seed=42, workers=None, chunk_size=DEFAULT_CHUNK_SIZE, graph_shape=None):
+        self.counts = {
+            'customers': counts['customers'],
+            'contractors': counts['contractors'],
+            'supervisors': counts['supervisors'],
+            'virtual_appointments': counts['virtual_appointments'],
+            'physical_visits': min(counts['physical_visits'], counts['virtual_appointments']),
+            'tenders': counts['tender_assistance'] + counts['standalone_tenders'],
+            'trust_connections': counts['trust_connections'],
+            'quick_jobs': counts['quick_jobs'],
+        }
+        if not all(self.counts[role] for role in ('customers', 'contractors', 'supervisors')):
+            raise ValueError('Bulk seeding needs at least one customer, contractor and supervisor')
+        self.seed = seed
+        self.chunk_size = chunk_size
+        self.graph_shape = graph_shape or TrustGraphShape()
+        if connection.vendor == 'sqlite':
+            # One writer at a time; parallel chunks would only wait on the lock
+            workers = 1
+        self.workers = workers or min(os.cpu_count() or 1, 8)
+        self.plan = None
+
+    def allocate_ids(self):
+        """First id of every table whose rows others reference, above the existing rows"""
+        from accounts.models import User, Customer, Contractor, Supervisor
+        from works.models import Tenders, TenderRequirement, VirtualAppointment, PhysicalVisit
+        from trust_network.models import QuickJob
+
+        counts = dict(
+            self.counts,
+            users=self.counts['customers'] + self.counts['contractors'] + self.counts['supervisors'],
+            tender_requirements=self.counts['tenders'] * REQUIREMENTS_PER_TENDER,
+        )
+        tables = {
+            'users': User, 'customers': Customer, 'contractors': Contractor, 'supervisors': Supervisor,
+            'virtual_appointments': VirtualAppointment, 'physical_visits': PhysicalVisit,
+            'tenders': Tenders, 'tender_requirements': TenderRequirement, 'quick_jobs': QuickJob,
+        }
+        first_ids = {}
+        for name, model in tables.items():
+            first_ids[name] = (model.objects.aggregate(last=Max('id'))['last'] or 0) + 1
+            print_progress(f"   {name}: ids {first_ids[name]}..{first_ids[name] + counts[name] - 1}")
+        return first_ids
+
+    def load_catalog(self):
+        """[(service id, name, [(requirement id, category id, unit)])], creating the catalog if there is none"""
+        from needs.models import Services, Requirements
+        from .services import ServicesSeeder
+
+        if not Services.objects.exists():
+            ServicesSeeder().create_services_and_requirements()
+        requirements = {}
+        for requirement_id, category_id, service_id, unit in Requirements.objects.order_by('id').values_list(
+            'id', 'category_id', 'category__service_id', 'default_unit'
+        ):
+            requirements.setdefault(service_id, []).append((requirement_id, category_id, unit))
+        return [
+            (service_id, name, requirements.get(service_id, []))
+            for service_id, name in Services.objects.order_by('id').values_list('id', 'name')
+        ]
+
+    def load_localities(self):
+        from trust_network.localities import get_locality
+
+        return [get_locality(city, state).id for city, state in config.indian_cities]
+
+    def prepare(self):
+        print_progress("🧮 Allocating ids...")
+        first_ids = self.allocate_ids()
+        catalog = self.load_catalog()
+        if not any(requirements for _, _, requirements in catalog):
+            raise ValueError('Bulk seeding needs services with requirements')
+        self.plan = BulkPlan(
+            self.counts, first_ids, catalog, self.load_localities(),
+            self.seed, self.graph_shape, self.chunk_size
+        )
+        return self.plan
+
+    def run_step(self, step):
+        plan = self.plan
+        total = STEPS[step][0](plan)
+        chunks = plan.chunks(total)
+        print_progress(f"📦 {step}: {total:,} units in {len(chunks)} chunks, {self.workers} worker(s)")
+        progress = StepProgress(step, total)
+        if self.workers == 1 or len(chunks) == 1:
+            for start, stop in chunks:
+                progress.advance(*run_chunk(plan, step, start, stop))
+            return progress.rows
+
+        # Forked workers must open their own connections
+        connection.close()
+        with ProcessPoolExecutor(self.workers, mp_context=_worker_context()) as pool:
+            futures = [pool.submit(run_chunk, plan, step, start, stop) for start, stop in chunks]
+            for future in as_completed(futures):
+                progress.advance(*future.result())
+        return progress.rows
+
+    def reset_sequences(self, models):
+        statements = connection.ops.sequence_reset_sql(no_style(), models)
+        with connection.cursor() as cursor:
+            for sql in statements:
+                cursor.execute(sql)
+
+    def refresh_derived_data(self):
+        """Rebuild what the skipped signals would have kept in step"""
+        from trust_network.graph import trust_graph
+
+        print_progress("📈 Recomputing trust scores...")
+        call_command('recompute_trust_scores', show=0)
+        print_progress("📚 Rebuilding work history...")
+        call_command('rebuild_work_history')
+        # Running servers reload their trust graphs
+        trust_graph.mark_changed()
+
+    def run(self):
+        """Seed every step; returns rows written per step"""
+        started = time.time()
+        print_progress("🚀 STARTING BULK SEED")
+        print_progress(f"Counts: {self.counts}")
+        print_progress(f"Seed: {self.seed}, chunk size: {self.chunk_size}, trust graph: {self.graph_shape!r}")
+        self.prepare()
+
+        written = {}
+        for step in STEPS:
+            step_started = time.time()
+            written[step] = self.run_step(step)
+            print_progress(f"✅ {step}: {written[step]:,} rows in {time.time() - step_started:.1f}s")
+
+        self.reset_sequences(seeded_models())
+        self.refresh_derived_data()
+        print_progress(f"✅ Bulk seed completed: {sum(written.values()):,} rows in {time.time() - started:.1f}s")
+        print_progress("   Run `python manage.py build_trust_index` to rebuild the trust index")
+        return written
+
+
+def _worker_context():
+    # fork shares the set-up Django process; elsewhere spawned workers set it
+    # up again when they import this module
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context('fork' if 'fork' in methods else None)
@@ -12,7 +12,10 @@ def clear_all_data():
     try:
         with transaction.atomic():
             # Import all models
-            from trust_network.models import TrustScoreLog, QuickJobInterest, QuickJob, TrustConnection
+            from trust_network.models import (
+                TrustScoreLog, QuickJobInterest, QuickJob, TrustConnection,
+                ContractorTrustAggregate, RecommenderNetworkSize
+            )
             from appointments.models import Appointment
             from works.models import (
                 TenderProgress, TenderMilestone, TenderAssignment, TenderCreationAssistance,
@@ -28,6 +31,9 @@ def clear_all_data():
                 (TrustScoreLog, "Trust Score Logs"),
                 (QuickJobInterest, "Quick Job Interests"),
                 (QuickJob, "Quick Jobs"),
+                # Derived from Trust Connections
+                (ContractorTrustAggregate, "Contractor Trust Aggregates"),
+                (RecommenderNetworkSize, "Recommender Network Sizes"),
                 (TrustConnection, "Trust Connections"),
                 
                 # Appointments
@@ -3,6 +3,7 @@ Main orchestrator for Local Konnect seed data generation
 Runs all seed data modules in correct order with error handling and progress tracking
 """
 
+import argparse
 import sys
 import time
 from datetime import datetime
@@ -16,6 +17,7 @@ from .services import ServicesSeeder
 from .appointments import AppointmentsSeeder
 from .tenders import TendersSeeder
 from .trust_network import TrustNetworkSeeder
+from .bulk import BulkSeeder, TrustGraphShape, DEFAULT_CHUNK_SIZE
 
 class LocalKonnectMasterSeeder:
     """Master seeder that orchestrates all seed data generation"""
@@ -307,6 +309,28 @@ class LocalKonnectMasterSeeder:
         
         return len(self.errors) == 0
 
+    def run_bulk_seed(self, scale=1, skip_cleanup=False, **options):
+        """
+        Seed scale times the configured counts in bulk (see bulk.py); options
+        are passed to BulkSeeder (seed, workers, chunk_size, graph_shape)
+        """
+        self.start_time = time.time()
+        counts = {name: count * scale for name, count in self.config.items()}
+
+        if not skip_cleanup:
+            if not self.cleanup_database():
+                print_progress("❌ Database cleanup failed. Aborting.")
+                return False
+
+        try:
+            self.data_created['bulk'] = BulkSeeder(counts, **options).run()
+        except Exception as e:
+            error_msg = f"❌ Bulk seeding failed: {str(e)}"
+            print_progress(error_msg)
+            self.errors.append(error_msg)
+            return False
+        return True
+
     def run_specific_modules(self, modules, skip_cleanup=False):
         """Run only specific modules"""
         print_progress(f"🚀 RUNNING SPECIFIC MODULES: {', '.join(modules)}")
@@ -321,19 +345,36 @@ class LocalKonnectMasterSeeder:
 
 def main():
     """Main entry point"""
+    parser = argparse.ArgumentParser(description='Seed the Local Konnect database')
+    parser.add_argument('--skip-cleanup', action='store_true', help='Keep existing data')
+    parser.add_argument('--cleanup-only', action='store_true', help='Only clean the database')
+    bulk = parser.add_argument_group('bulk mode, for load-testing datasets')
+    bulk.add_argument('--bulk', action='store_true', help='Seed in bulk instead of row by row')
+    bulk.add_argument('--scale', type=int, default=1, help='Multiply the configured counts')
+    bulk.add_argument('--seed', type=int, default=42, help='Random seed; equal seeds give equal data')
+    bulk.add_argument('--workers', type=int, help='Worker processes per table (default: CPUs, at most 8)')
+    bulk.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+    bulk.add_argument('--trust-graph', choices=TrustGraphShape.KINDS, default='power_law')
+    bulk.add_argument('--degree-exponent', type=float, default=2.5,
+                      help='Power-law exponent of recommendations per user')
+    bulk.add_argument('--popularity-exponent', type=float, default=1.0,
+                      help='Zipf exponent of contractor popularity')
+    args = parser.parse_args()
+    try:
+        graph_shape = TrustGraphShape(args.trust_graph, args.degree_exponent, args.popularity_exponent)
+    except ValueError as e:
+        parser.error(str(e))
+
     seeder = LocalKonnectMasterSeeder()
-    
-    # Check command line arguments
-    if len(sys.argv) > 1:
-        if sys.argv[1] == '--skip-cleanup':
-            success = seeder.run_complete_seed(skip_cleanup=True)
-        elif sys.argv[1] == '--cleanup-only':
-            success = seeder.cleanup_database()
-        else:
-            print_progress("Usage: python master_seeder.py [--skip-cleanup|--cleanup-only]")
-            sys.exit(1)
+    if args.cleanup_only:
+        success = seeder.cleanup_database()
+    elif args.bulk:
+        success = seeder.run_bulk_seed(
+            args.scale, skip_cleanup=args.skip_cleanup, seed=args.seed, workers=args.workers,
+            chunk_size=args.chunk_size, graph_shape=graph_shape
+        )
     else:
-        success = seeder.run_complete_seed()
+        success = seeder.run_complete_seed(skip_cleanup=args.skip_cleanup)
     
     sys.exit(0 if success else 1)
 
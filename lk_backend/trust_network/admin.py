@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import TrustConnection, QuickJob, QuickJobInterest, TrustScoreLog
+from .models import TrustConnection, Locality, QuickJob, QuickJobInterest, TrustScoreLog
 
 
 @admin.register(TrustConnection)
@@ -15,10 +15,17 @@ class QuickJobAdmin(admin.ModelAdmin):
     list_display = ('title', 'customer', 'service', 'status', 'urgency', 'assigned_contractor', 'created_at')
     list_filter = ('status', 'urgency', 'service', 'created_at')
     search_fields = ('title', 'description', 'customer__first_name', 'location')
-    raw_id_fields = ('customer', 'assigned_contractor')
+    raw_id_fields = ('customer', 'assigned_contractor', 'locality')
     readonly_fields = ('created_at', 'updated_at', 'assigned_at', 'completed_at')
 
 
+@admin.register(Locality)
+class LocalityAdmin(admin.ModelAdmin):
+    list_display = ('city', 'state', 'latitude', 'longitude', 'geohash')
+    search_fields = ('city', 'state')
+    readonly_fields = ('city_key', 'state_key', 'geohash')
+
+
 @admin.register(QuickJobInterest)
 class QuickJobInterestAdmin(admin.ModelAdmin):
     list_display = ('contractor', 'quick_job', 'proposed_price', 'created_at')
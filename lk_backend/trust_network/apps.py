@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class TrustNetworkConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'trust_network'
+
+    def ready(self):
+        # Register signal handlers
+        from . import signals  # noqa: F401
@@ -0,0 +1,239 @@
+"""
+Concurrent Gemini client used by GeminiNLPService.
+
+Model calls run on a small thread pool so a caller never waits longer than
+GEMINI_TIMEOUT_SECONDS: when the deadline passes the caller gets the
+rule-based fallback while the call finishes (and is cached) in the background.
+
+- Coalescing: identical in-flight queries (same normalised form) share one
+  model call, so a burst of repeats costs a single request.
+- Circuit breaker: after GEMINI_BREAKER_FAILURES consecutive failures or
+  overruns the breaker opens and queries go straight to the fallback for
+  GEMINI_BREAKER_RESET_SECONDS, after which one probe call is let through.
+- parse() is for sync views; aparse() does the same from async code.
+
+Building a prompt may read the Services catalog, so the pool threads hold
+Django database connections of their own. Like request threads, they close
+connections that broke or outlived CONN_MAX_AGE before and after each call;
+otherwise a database restart would fail every later catalog load on them and
+open the breaker.
+"""
+import asyncio
+import copy
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+
+from lk_backend.instrumentation import span
+from .nlp_cache import normalize_query, query_cache
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker with a single half-open probe"""
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold, reset_timeout):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return self.CLOSED
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return self.HALF_OPEN
+        return self.OPEN
+
+    def allow(self):
+        """Whether a call may go out now"""
+        with self._lock:
+            state = self.state
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            # A failed probe reopens straight away
+            if self._probing or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+            self._probing = False
+
+
+def _run_pooled(fn, args):
+    close_old_connections()
+    try:
+        return fn(*args)
+    finally:
+        close_old_connections()
+
+
+class GeminiClient:
+    """Deadline, coalescing and circuit breaking around GeminiNLPService._call_gemini"""
+
+    def __init__(self, service, timeout, max_workers, breaker, cache=query_cache):
+        self.service = service
+        self.timeout = timeout
+        self.breaker = breaker
+        self.cache = cache
+        self._executor = ThreadPoolExecutor(max_workers, thread_name_prefix='gemini')
+        self._inflight = {}  # normalised query -> Future
+        # Reentrant: a call that finishes at once runs its callbacks inside _start
+        self._lock = threading.RLock()
+        self.counters = dict.fromkeys(
+            ('requests', 'cache_hits', 'model_calls', 'coalesced', 'timeouts',
+             'errors', 'short_circuited', 'fallbacks'), 0
+        )
+
+    def _count(self, name):
+        with self._lock:
+            self.counters[name] += 1
+
+    def _submit(self, query):
+        """Future for the model call answering query, or None if the breaker is open"""
+        key = normalize_query(query)
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is not None:
+                self.counters['coalesced'] += 1
+                return future
+            future = self._start(self.service._call_gemini, (query, self.timeout), self.timeout)
+            if future is None:
+                return None
+            self._inflight[key] = future
+
+        def finished(done):
+            with self._lock:
+                self._inflight.pop(key, None)
+            if done.exception() is None:
+                self.cache.set('gemini', query, done.result())
+
+        future.add_done_callback(finished)
+        return future
+
+    def submit_call(self, fn, args, timeout):
+        """
+        Run another model call (e.g. a batch prompt) on the pool under the
+        circuit breaker. Returns a Future, or None if the breaker is open.
+        """
+        with self._lock:
+            return self._start(fn, args, timeout)
+
+    def _start(self, fn, args, timeout):
+        # Called with self._lock held
+        if not self.breaker.allow():
+            return None
+        self.counters['model_calls'] += 1
+        started = time.monotonic()
+        future = self._executor.submit(_run_pooled, fn, args)
+        future.add_done_callback(lambda done: self._record_outcome(started, timeout, done))
+        return future
+
+    def _record_outcome(self, started, timeout, future):
+        if future.exception() is not None:
+            self._count('errors')
+            self.breaker.record_failure()
+        # A late answer is still used, but counts against the model's health
+        elif time.monotonic() - started > timeout:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+
+    def _cached(self, query):
+        self._count('requests')
+        cached = self.cache.get('gemini', query)
+        if cached is not None:
+            self._count('cache_hits')
+            cached['original_query'] = query
+        return cached
+
+    def _result(self, query, result):
+        result = copy.deepcopy(result)
+        result['original_query'] = query
+        return result
+
+    def _failed(self, query, error):
+        if isinstance(error, (FutureTimeout, asyncio.TimeoutError)):
+            self._count('timeouts')
+        else:
+            logger.warning("Gemini parsing error: %s", error)
+        self._count('fallbacks')
+
+    def parse(self, query):
+        """Parse with Gemini within the deadline, falling back to rule-based parsing"""
+        cached = self._cached(query)
+        if cached is not None:
+            return cached
+
+        future = self._submit(query)
+        if future is None:
+            self._count('short_circuited')
+            self._count('fallbacks')
+            return self.service._fallback_parse(query)
+        try:
+            with span('gemini'):
+                result = future.result(timeout=self.timeout)
+            return self._result(query, result)
+        except Exception as e:
+            self._failed(query, e)
+            return self.service._fallback_parse(query)
+
+    async def aparse(self, query):
+        """parse() for async callers; the model call itself still runs on the pool"""
+        cached = await sync_to_async(self._cached)(query)
+        if cached is not None:
+            return cached
+
+        future = self._submit(query)
+        if future is None:
+            self._count('short_circuited')
+            self._count('fallbacks')
+            return await sync_to_async(self.service._fallback_parse)(query)
+        try:
+            # shield: a timed-out waiter must not cancel a call others are sharing
+            with span('gemini'):
+                result = await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(future)), self.timeout)
+            return self._result(query, result)
+        except Exception as e:
+            self._failed(query, e)
+            return await sync_to_async(self.service._fallback_parse)(query)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self.counters)
+            stats['in_flight'] = len(self._inflight)
+        stats['breaker'] = self.breaker.state
+        return stats
+
+
+def build_gemini_client(service, cache=query_cache):
+    return GeminiClient(
+        service,
+        timeout=settings.GEMINI_TIMEOUT_SECONDS,
+        max_workers=settings.GEMINI_MAX_CONCURRENT_CALLS,
+        breaker=CircuitBreaker(settings.GEMINI_BREAKER_FAILURES, settings.GEMINI_BREAKER_RESET_SECONDS),
+        cache=cache,
+    )
@@ -4,24 +4,151 @@ Supports multiple languages including Hindi, English, and Hinglish.
 """
 import google.generativeai as genai
 import json
+import logging
 import re
-from typing import Dict, Optional, List
+import textwrap
+import time
+from concurrent.futures import as_completed, TimeoutError as FutureTimeout
+from typing import Dict, Iterator, Optional, List, Tuple
+from asgiref.sync import sync_to_async
 from django.conf import settings
 from needs.models import Services
+from .nlp_cache import normalize_query, query_cache
+from .service_catalog import service_catalog, prompt_stats
+from .keyword_matcher import KeywordMatcher
+from .gemini_client import build_gemini_client
+
+logger = logging.getLogger(__name__)
+
+# Rule-based parser dictionaries, compiled once into _keyword_matcher below.
+# Order matters: the first service category / urgency level with a hit wins.
+
+# Service category detection with multilingual support
+SERVICE_PATTERNS = {
+    'electrical': [
+        'electric', 'bijli', 'ac', 'fan', 'light', 'wiring', 'switch', 'electrician',
+        'इलेक्ट्रिशियन', 'बिजली', 'वीज', 'વીજળી', 'ലൈറ്റ്', 'విద్యుత్'
+    ],
+    'plumbing': [
+        'plumber', 'paani', 'water', 'pipe', 'tap', 'bathroom', 'leak', 'नल',
+        'प्लंबर', 'पानी', 'પાણી', 'नळ', 'पाइप', 'টোকা', 'నీరు', 'குழாய்'
+    ],
+    'cleaning': [
+        'clean', 'safai', 'saaf', 'wash', 'jhadu', 'सफाई', 'साफ',
+        'સફાઈ', 'ಶುಚಿ', 'വൃത്തി', 'శుభ్రత', 'சுத்தம்'
+    ],
+    'painting': [
+        'paint', 'rang', 'wall', 'deewar', 'पेंट', 'रंग', 'दीवार',
+        'રંગ', 'ಬಣ್ಣ', 'നിറം', 'రంగు', 'வண்ணம்'
+    ],
+    'carpentry': [
+        'carpenter', 'wood', 'door', 'window', 'furniture', 'बढ़ई', 'दरवाजा',
+        'કારપેન્ટર', 'ದಾರು', 'മരം', 'చెక్క', 'மரம்', 'दरवाज़ा'
+    ],
+    'repairs': [
+        'repair', 'theek', 'fix', 'toot', 'kharab', 'टूट', 'खराब', 'ठीक',
+        'તૂટી', 'ಹಾನಿ', 'കേടായ', 'విరిగిన', 'உடைந்த'
+    ]
+}
+
+# Urgency detection with multilingual support
+URGENCY_KEYWORDS = {
+    'URGENT': [
+        'urgent', 'turant', 'abhi', 'immediately', 'asap', 'emergency',
+        'तुरंत', 'अभी', 'તુરંત', 'ತುರಂತ', 'ഉടനെ', 'వెంటనే', 'உடனே'
+    ],
+    'HIGH': [
+        'fast', 'jaldi', 'quick', 'soon', 'today', 'जल्दी', 'आज',
+        'જલ્દી', 'ಬೇಗ', 'വേഗം', 'త్వరగా', 'விரைவாக'
+    ],
+    'MEDIUM': [
+        'tomorrow', 'kal', 'this week', 'कल', 'इस सप्ताह',
+        'કાલે', 'ನಾಳೆ', 'നാളെ', 'రేపు', 'நாளை'
+    ],
+    'LOW': [
+        'sometime', 'next week', 'when possible', 'कभी भी', 'अगले सप्ताह',
+        'ક્યારેક', 'ಯಾವಾಗ', 'എപ്പോൾ', 'ఎప్పుడైనా', 'எப்போதாவது'
+    ]
+}
+
+# Language detection patterns
+LANGUAGE_PATTERNS = {
+    'hi': [  # Hindi
+        'chahiye', 'karna', 'theek', 'wala', 'paani', 'bijli', 'safai', 'hai', 'karvana',
+        'मुझे', 'चाहिए', 'करना', 'ठीक', 'वाला', 'पानी', 'बिजली', 'सफाई', 'है', 'नल'
+    ],
+    'mr': [  # Marathi
+        'मला', 'हवा', 'करणे', 'पाणी', 'वीज', 'साफसफाई', 'आहे', 'नळ'
+    ],
+    'gu': [  # Gujarati
+        'મને', 'જોઈએ', 'કરવું', 'પાણી', 'વીજળી', 'સફાઈ', 'છે', 'નળ'
+    ],
+    'ta': [  # Tamil
+        'எனக்கு', 'வேண்டும்', 'செய்ய', 'நீர்', 'மின்சாரம்', 'சுத்தம்', 'உள்ளது'
+    ],
+    'te': [  # Telugu
+        'నాకు', 'కావాలి', 'చేయాలి', 'నీరు', 'విద్యుత్', 'శుభ్రత', 'ఉంది'
+    ],
+    'kn': [  # Kannada
+        'ನನಗೆ', 'ಬೇಕು', 'ಮಾಡಲು', 'ನೀರು', 'ವಿದ್ಯುತ್', 'ಶುಚಿ', 'ಇದೆ'
+    ],
+    'bn': [  # Bengali
+        'আমার', 'লাগবে', 'করতে', 'পানি', 'বিদ্যুৎ', 'পরিষ্কার', 'আছে'
+    ],
+    'en': [  # English
+        'repair', 'fix', 'clean', 'paint', 'urgent', 'need', 'work', 'plumber', 'electrician'
+    ]
+}
+
+# Keywords reported by the rule-based parser, in order
+PARSER_KEYWORDS = [word for word_list in SERVICE_PATTERNS.values() for word in word_list]
+PARSER_KEYWORDS.extend(['urgent', 'fast', 'quick', 'repair', 'fix', 'need', 'chahiye'])
+
+# Shared by the single-query and batch Gemini prompts
+PROMPT_LANGUAGE_CONTEXT = textwrap.indent("""\
+Language Context:
+- "theek karna/karvana" = repair/fix
+- "urgent/turant" = urgent
+- "wala/wali" = person who does (electrician, plumber, etc.)
+- "chahiye" = need/want
+- "AC" = Air Conditioner
+- "paani" = water
+- "bijli" = electricity
+- "safai" = cleaning
+
+Common Patterns:
+- "AC theek karne wala chahiye" = Need AC repair person
+- "Plumber urgent chahiye" = Need plumber urgently
+- "Ghar ki safai karvani hai" = Need house cleaning
+- "Painting work urgent" = Urgent painting work needed
+""", ' ' * 8)
+
+_keyword_matcher = KeywordMatcher(
+    {'service': SERVICE_PATTERNS, 'urgency': URGENCY_KEYWORDS, 'language': LANGUAGE_PATTERNS},
+    PARSER_KEYWORDS
+)
 
 
 class GeminiNLPService:
-    def __init__(self):
+    def __init__(self, api_key=None, api_endpoint=None, cache=query_cache):
         # Configure Gemini API
         # In production, add GEMINI_API_KEY to Django settings
-        api_key = getattr(settings, 'GEMINI_API_KEY', None)
+        api_key = api_key or getattr(settings, 'GEMINI_API_KEY', None)
+        api_endpoint = api_endpoint or getattr(settings, 'GEMINI_API_ENDPOINT', None)
         if api_key:
-            genai.configure(api_key=api_key)
+            if api_endpoint:
+                # Custom endpoint (proxy or local fake server), reached over REST
+                genai.configure(api_key=api_key, transport='rest', client_options={'api_endpoint': api_endpoint})
+            else:
+                genai.configure(api_key=api_key)
             # Use the correct model name for current Gemini API
             self.model = genai.GenerativeModel('gemini-1.5-flash')
         else:
             self.model = None
-            print("Warning: GEMINI_API_KEY not configured. Using fallback parsing.")
+            logger.warning("GEMINI_API_KEY not configured. Using fallback parsing.")
+        # Deadlines, circuit breaker and coalescing of identical queries
+        self.cache = cache
+        self.client = build_gemini_client(self, cache)
     
     def parse_voice_query(self, query: str) -> Dict:
         """
@@ -38,18 +165,52 @@ class GeminiNLPService:
         else:
             return self._fallback_parse(query)
     
+    async def aparse_voice_query(self, query: str) -> Dict:
+        """parse_voice_query for async callers"""
+        if self.model:
+            return await self.client.aparse(query)
+        return await sync_to_async(self._fallback_parse)(query)
+    
     def _parse_with_gemini(self, query: str) -> Dict:
-        """Parse using Gemini AI with structured prompt"""
+        """Parse using Gemini AI within the call deadline, reusing cached and in-flight results"""
+        return self.client.parse(query)
+    
+    def _call_gemini(self, query: str, timeout: Optional[float] = None) -> Dict:
+        """Parse using Gemini AI with structured prompt; raises on any failure"""
+        mode = settings.GEMINI_PROMPT_MODE
+        prompt, services_sent = self._build_prompt(query, mode)
+        
+        started = time.perf_counter()
+        try:
+            # No SDK retries: failures go to the client's circuit breaker and fallback
+            response = self.model.generate_content(
+                prompt, request_options={'timeout': timeout, 'retry': None} if timeout else None
+            )
+        except Exception:
+            prompt_stats.record(mode, len(prompt), services_sent, time.perf_counter() - started, error=True)
+            raise
+        prompt_stats.record(mode, len(prompt), services_sent, time.perf_counter() - started)
         
-        # Get available services for context
-        services = Services.objects.all()
-        service_list = [{"id": s.id, "name": s.name, "description": s.description} for s in services]
+        parsed_data = self._response_json(response)
+        
+        # Validate and enhance the response
+        return self._validate_and_enhance_response(parsed_data, query)
+    
+    def _build_prompt(self, query: str, mode: str = 'shortlist') -> Tuple[str, int]:
+        """
+        Prompt for a query and the number of services it lists.
+        
+        'shortlist' sends a compact digest of the services matching the query
+        locally (or just service names when nothing matches); 'full' embeds the
+        whole catalog as before.
+        """
+        services_text, services_sent = self._prompt_services([query], mode)
         
         prompt = f"""
         You are an AI assistant for a local services platform in India. Parse the following user query into structured job data.
 
-        Available Services:
-        {json.dumps(service_list, indent=2)}
+        Available Services (id | name | description):
+        {services_text}
 
         User Query: "{query}"
 
@@ -69,120 +230,202 @@ class GeminiNLPService:
             "original_query": "{query}"
         }}
 
-        Language Context:
-        - "theek karna/karvana" = repair/fix
-        - "urgent/turant" = urgent
-        - "wala/wali" = person who does (electrician, plumber, etc.)
-        - "chahiye" = need/want
-        - "AC" = Air Conditioner
-        - "paani" = water
-        - "bijli" = electricity
-        - "safai" = cleaning
-
-        Common Patterns:
-        - "AC theek karne wala chahiye" = Need AC repair person
-        - "Plumber urgent chahiye" = Need plumber urgently
-        - "Ghar ki safai karvani hai" = Need house cleaning
-        - "Painting work urgent" = Urgent painting work needed
-
+{PROMPT_LANGUAGE_CONTEXT}
         Return only valid JSON without any markdown formatting or additional text.
         """
+        return prompt, services_sent
+    
+    def _prompt_services(self, queries: List[str], mode: str) -> Tuple[str, int]:
+        """Services section of a prompt for the given queries, and how many it lists"""
+        if mode == 'full':
+            catalog = service_catalog.ensure_loaded()
+            return catalog.full_catalog_json, len(catalog.services)
+        
+        candidates = {}
+        for query in queries:
+            for service in service_catalog.shortlist(query):
+                candidates.setdefault(service['id'], service)
+        if candidates:
+            return service_catalog.digest(candidates.values()), len(candidates)
+        # Nothing matched locally: let the model choose from names alone
+        return service_catalog.names(), len(service_catalog.services)
+    
+    def _response_json(self, response):
+        """JSON body of a model response, without any markdown fence"""
+        response_text = response.text.strip()
+        if response_text.startswith('```json'):
+            response_text = response_text[7:]
+        if response_text.endswith('```'):
+            response_text = response_text[:-3]
+        return json.loads(response_text.strip())
+    
+    def _call_gemini_batch(self, queries: List[str], timeout: Optional[float] = None) -> Dict[int, Dict]:
+        """
+        Parse several queries with one Gemini prompt; raises on any failure.
+        
+        Returns {position in queries: parsed data} for the items the model answered.
+        """
+        prompt, services_sent = self._build_batch_prompt(queries, settings.GEMINI_PROMPT_MODE)
         
+        started = time.perf_counter()
         try:
-            response = self.model.generate_content(prompt)
-            
-            # Clean response text (remove markdown if present)
-            response_text = response.text.strip()
-            if response_text.startswith('```json'):
-                response_text = response_text[7:]
-            if response_text.endswith('```'):
-                response_text = response_text[:-3]
-            response_text = response_text.strip()
-            
-            # Parse JSON response
-            parsed_data = json.loads(response_text)
-            
-            # Validate and enhance the response
-            return self._validate_and_enhance_response(parsed_data, query)
-            
-        except Exception as e:
-            print(f"Gemini parsing error: {str(e)}")
-            # Fallback to rule-based parsing
-            return self._fallback_parse(query)
+            response = self.model.generate_content(
+                prompt, request_options={'timeout': timeout, 'retry': None} if timeout else None
+            )
+        except Exception:
+            prompt_stats.record('batch', len(prompt), services_sent, time.perf_counter() - started, error=True)
+            raise
+        prompt_stats.record('batch', len(prompt), services_sent, time.perf_counter() - started)
+        
+        items = self._response_json(response)
+        if not isinstance(items, list):
+            raise ValueError('Expected a JSON array of parsed queries')
+        
+        results = {}
+        for item in items:
+            position = item.pop('index', None) if isinstance(item, dict) else None
+            if isinstance(position, int) and 0 <= position < len(queries) and position not in results:
+                results[position] = self._validate_and_enhance_response(item, queries[position])
+        return results
     
-    def _fallback_parse(self, query: str) -> Dict:
-        """Fallback rule-based parsing when Gemini is not available"""
+    def _build_batch_prompt(self, queries: List[str], mode: str = 'shortlist') -> Tuple[str, int]:
+        """Prompt parsing several queries at once, and the number of services it lists"""
+        services_text, services_sent = self._prompt_services(queries, mode)
+        numbered_queries = '\n'.join(
+            f"        {position}. {json.dumps(query, ensure_ascii=False)}"
+            for position, query in enumerate(queries)
+        )
         
-        query_lower = query.lower()
+        prompt = f"""
+        You are an AI assistant for a local services platform in India. Parse each of the following user queries into structured job data.
+
+        Available Services (id | name | description):
+        {services_text}
+
+        User Queries:
+{numbered_queries}
+
+        Return a JSON array with one object per query, each with the following structure:
+        {{
+            "index": <number of the query above>,
+            "service_category": "electrical|plumbing|cleaning|painting|repairs|other",
+            "service_id": <matching service ID from the list above, or null>,
+            "urgency": "LOW|MEDIUM|HIGH|URGENT",
+            "suggested_title": "Brief job title in English",
+            "suggested_description": "Detailed description in English",
+            "keywords": ["list", "of", "relevant", "keywords"],
+            "location_mentioned": "any location mentioned in query or null",
+            "budget_mentioned": "any budget amount mentioned or null",
+            "time_preference": "any time mentioned (today, tomorrow, ASAP, etc.) or null",
+            "confidence": 0.85,
+            "language_detected": "hindi|english|hinglish|other"
+        }}
+
+{PROMPT_LANGUAGE_CONTEXT}
+        Return only a valid JSON array without any markdown formatting or additional text.
+        """
+        return prompt, services_sent
+    
+    def parse_voice_queries(self, queries: List[str]) -> Iterator[Tuple[List[int], Dict, str]]:
+        """
+        Parse many queries, yielding (indices, parsed data, source) as results
+        become available. Equivalent queries (same normalised form) are parsed
+        once and reported together with all their indices. Sources are 'cache',
+        'gemini' (several queries per prompt, prompts run concurrently) and
+        'fallback' for whatever Gemini did not answer in time.
+        """
+        groups = {}
+        for index, query in enumerate(queries):
+            groups.setdefault(normalize_query(query), []).append(index)
         
-        # Enhanced service category detection with multilingual support
-        service_patterns = {
-            'electrical': [
-                'electric', 'bijli', 'ac', 'fan', 'light', 'wiring', 'switch', 'electrician',
-                'इलेक्ट्रिशियन', 'बिजली', 'वीज', 'વીજળી', 'ലൈറ്റ്', 'విద్యుత్'
-            ],
-            'plumbing': [
-                'plumber', 'paani', 'water', 'pipe', 'tap', 'bathroom', 'leak', 'नल',
-                'प्लंबर', 'पानी', 'પાણી', 'नळ', 'पाइप', 'টোকা', 'నీరు', 'குழாய்'
-            ],
-            'cleaning': [
-                'clean', 'safai', 'saaf', 'wash', 'jhadu', 'सफाई', 'साफ',
-                'સફાઈ', 'ಶುಚಿ', 'വൃത്തി', 'శుభ్రత', 'சுத்தம்'
-            ],
-            'painting': [
-                'paint', 'rang', 'wall', 'deewar', 'पेंट', 'रंग', 'दीवार',
-                'રંગ', 'ಬಣ್ಣ', 'നിറം', 'రంగు', 'வண்ணம்'
-            ],
-            'carpentry': [
-                'carpenter', 'wood', 'door', 'window', 'furniture', 'बढ़ई', 'दरवाजा',
-                'કારપેન્ટર', 'ದಾರು', 'മരം', 'చెక్క', 'மரம்', 'दरवाज़ा'
-            ],
-            'repairs': [
-                'repair', 'theek', 'fix', 'toot', 'kharab', 'टूट', 'खराब', 'ठीक',
-                'તૂટી', 'ಹಾನಿ', 'കേടായ', 'విరిగిన', 'உடைந்த'
-            ]
-        }
+        pending = []
+        for indices in groups.values():
+            cached = self.cache.get('gemini', queries[indices[0]]) if self.model else None
+            if cached is not None:
+                yield indices, cached, 'cache'
+            else:
+                pending.append(indices)
         
-        detected_service = 'other'
-        for category, keywords in service_patterns.items():
-            if any(keyword in query_lower for keyword in keywords):
-                detected_service = category
-                break
+        if self.model and pending:
+            unanswered = []
+            yield from self._parse_batches_with_gemini(queries, pending, unanswered)
+            pending = unanswered
         
-        # Enhanced urgency detection with multilingual support
-        urgency_keywords = {
-            'URGENT': [
-                'urgent', 'turant', 'abhi', 'immediately', 'asap', 'emergency',
-                'तुरंत', 'अभी', 'તુરંત', 'ತುರಂತ', 'ഉടനെ', 'వెంటనే', 'உடனே'
-            ],
-            'HIGH': [
-                'fast', 'jaldi', 'quick', 'soon', 'today', 'जल्दी', 'आज',
-                'જલ્દી', 'ಬೇಗ', 'വേഗം', 'త్వరగా', 'விரைவாக'
-            ],
-            'MEDIUM': [
-                'tomorrow', 'kal', 'this week', 'कल', 'इस सप्ताह',
-                'કાલે', 'ನಾಳೆ', 'നാളെ', 'రేపు', 'நாளை'
-            ],
-            'LOW': [
-                'sometime', 'next week', 'when possible', 'कभी भी', 'अगले सप्ताह',
-                'ક્યારેક', 'ಯಾವಾಗ', 'എപ്പോൾ', 'ఎప్పుడైనా', 'எப்போதாவது'
-            ]
-        }
+        # Rule-based parse for the rest, resolving each detected category to a service once
+        services_by_category = {}
+        
+        def match_service(category):
+            if category not in services_by_category:
+                services_by_category[category] = self._match_service(category)
+            return services_by_category[category]
         
-        detected_urgency = 'MEDIUM'  # default
-        for urgency, keywords in urgency_keywords.items():
-            if any(keyword in query_lower for keyword in keywords):
-                detected_urgency = urgency
+        for indices in pending:
+            yield indices, self._fallback_parse(queries[indices[0]], match_service), 'fallback'
+    
+    def _parse_batches_with_gemini(self, queries, pending, unanswered):
+        """Send pending query groups to Gemini in chunks, appending unanswered groups to unanswered"""
+        batch_size = settings.GEMINI_BATCH_SIZE
+        timeout = settings.GEMINI_BATCH_TIMEOUT_SECONDS
+        futures = {}
+        for start in range(0, len(pending), batch_size):
+            chunk = pending[start:start + batch_size]
+            future = self.client.submit_call(
+                self._call_gemini_batch, ([queries[indices[0]] for indices in chunk], timeout), timeout
+            )
+            if future is None:
+                # Circuit breaker open: the rest goes to the rule-based parser
+                unanswered.extend(pending[start:])
                 break
+            futures[future] = chunk
         
-        # Extract keywords from query
-        keywords = []
-        all_keywords = [word for word_list in service_patterns.values() for word in word_list]
-        all_keywords.extend(['urgent', 'fast', 'quick', 'repair', 'fix', 'need', 'chahiye'])
+        try:
+            for future in as_completed(list(futures), timeout=timeout):
+                chunk = futures.pop(future)
+                try:
+                    results = future.result()
+                except Exception as e:
+                    logger.warning("Gemini batch parsing error: %s", e)
+                    unanswered.extend(chunk)
+                    continue
+                for position, indices in enumerate(chunk):
+                    parsed = results.get(position)
+                    if parsed is None:
+                        unanswered.append(indices)
+                        continue
+                    self.cache.set('gemini', queries[indices[0]], parsed)
+                    yield indices, parsed, 'gemini'
+        except FutureTimeout:
+            for chunk in futures.values():
+                unanswered.extend(chunk)
+    
+    def _fallback_parse(self, query: str, match_service=None) -> Dict:
+        """Fallback rule-based parsing, reusing cached results for equivalent queries"""
+        cached = self.cache.get('fallback', query)
+        if cached is not None:
+            cached['original_query'] = query
+            return cached
         
-        for word in all_keywords:
-            if word in query_lower:
-                keywords.append(word)
+        parsed_data = self._rule_based_parse(query, match_service)
+        self.cache.set('fallback', query, parsed_data)
+        return parsed_data
+    
+    def _rule_based_parse(self, query: str, match_service=None) -> Dict:
+        """
+        Fallback rule-based parsing when Gemini is not available.
+        
+        match_service overrides the category -> service lookup, so batches can
+        resolve each category once.
+        """
+        
+        query_lower = query.lower()
+        
+        # One pass over the query finds every service, urgency and language keyword
+        matches = _keyword_matcher.match(query_lower)
+        detected_service = matches.first_group('service', 'other')
+        detected_urgency = matches.first_group('urgency', 'MEDIUM')
+        
+        # Extract keywords from query
+        keywords = matches.keywords()
         
         # Generate contextual title and description based on detected service
         service_context = {
@@ -247,14 +490,34 @@ class GeminiNLPService:
         suggested_description = random.choice(context['descriptions'])
         
         # Add specific keywords to title if found
-        if 'ac' in query_lower:
+        if 'ac' in matches:
             suggested_title = 'AC Repair/Service Needed'
-        elif 'tap' in query_lower or 'नल' in query_lower:
+        elif 'tap' in matches or 'नल' in matches:
             suggested_title = 'Tap Repair Required'
-        elif 'door' in query_lower or 'दरवाजा' in query_lower:
+        elif 'door' in matches or 'दरवाजा' in matches:
             suggested_title = 'Door Repair/Installation'
         
         # Try to find matching service ID with improved matching
+        service_id, service_name = (match_service or self._match_service)(detected_service)
+        
+        return {
+            'service_category': detected_service,
+            'service_id': service_id,
+            'service_name': service_name,
+            'urgency': detected_urgency,
+            'suggested_title': suggested_title,
+            'suggested_description': suggested_description,
+            'keywords': keywords,
+            'location_mentioned': None,
+            'budget_mentioned': None,
+            'time_preference': None,
+            'confidence': 0.65,  # Lower confidence for rule-based
+            'language_detected': matches.best_group('language', 'en'),
+            'original_query': query
+        }
+    
+    def _match_service(self, detected_service: str) -> Tuple[Optional[int], Optional[str]]:
+        """(id, name) of the service best matching a detected category"""
         service_id = None
         service_name = None
         try:
@@ -296,71 +559,9 @@ class GeminiNLPService:
                 service_name = matching_service.name
                 
         except Exception as e:
-            print(f"Error finding service: {e}")
-            pass
-        
-        return {
-            'service_category': detected_service,
-            'service_id': service_id,
-            'service_name': service_name,
-            'urgency': detected_urgency,
-            'suggested_title': suggested_title,
-            'suggested_description': suggested_description,
-            'keywords': keywords,
-            'location_mentioned': None,
-            'budget_mentioned': None,
-            'time_preference': None,
-            'confidence': 0.65,  # Lower confidence for rule-based
-            'language_detected': self._detect_language(query),
-            'original_query': query
-        }
-    
-    def _detect_language(self, query: str) -> str:
-        """Enhanced language detection for Indian languages"""
-        
-        # Language patterns
-        language_patterns = {
-            'hi': [  # Hindi
-                'chahiye', 'karna', 'theek', 'wala', 'paani', 'bijli', 'safai', 'hai', 'karvana',
-                'मुझे', 'चाहिए', 'करना', 'ठीक', 'वाला', 'पानी', 'बिजली', 'सफाई', 'है', 'नल'
-            ],
-            'mr': [  # Marathi
-                'मला', 'हवा', 'करणे', 'पाणी', 'वीज', 'साफसफाई', 'आहे', 'नळ'
-            ],
-            'gu': [  # Gujarati
-                'મને', 'જોઈએ', 'કરવું', 'પાણી', 'વીજળી', 'સફાઈ', 'છે', 'નળ'
-            ],
-            'ta': [  # Tamil
-                'எனக்கு', 'வேண்டும்', 'செய்ய', 'நீர்', 'மின்சாரம்', 'சுத்தம்', 'உள்ளது'
-            ],
-            'te': [  # Telugu
-                'నాకు', 'కావాలి', 'చేయాలి', 'నీరు', 'విద్యుత్', 'శుభ్రత', 'ఉంది'
-            ],
-            'kn': [  # Kannada
-                'ನನಗೆ', 'ಬೇಕು', 'ಮಾಡಲು', 'ನೀರು', 'ವಿದ್ಯುತ್', 'ಶುಚಿ', 'ಇದೆ'
-            ],
-            'bn': [  # Bengali
-                'আমার', 'লাগবে', 'করতে', 'পানি', 'বিদ্যুৎ', 'পরিষ্কার', 'আছে'
-            ],
-            'en': [  # English
-                'repair', 'fix', 'clean', 'paint', 'urgent', 'need', 'work', 'plumber', 'electrician'
-            ]
-        }
-        
-        query_lower = query.lower()
-        language_scores = {}
-        
-        for lang, words in language_patterns.items():
-            score = sum(1 for word in words if word in query_lower)
-            if score > 0:
-                language_scores[lang] = score
-        
-        if language_scores:
-            detected_lang = max(language_scores, key=language_scores.get)
-            return detected_lang
+            logger.exception("Error finding service")
         
-        # Default to English if no pattern matches
-        return 'en'
+        return service_id, service_name
     
     def _validate_and_enhance_response(self, parsed_data: Dict, original_query: str) -> Dict:
         """Validate and enhance Gemini response"""
@@ -386,16 +587,18 @@ class GeminiNLPService:
         
         # Validate service_id exists
         if parsed_data.get('service_id'):
-            try:
-                Services.objects.get(id=parsed_data['service_id'])
-            except Services.DoesNotExist:
+            service = service_catalog.get(parsed_data['service_id'])
+            if service is None:
                 parsed_data['service_id'] = None
+            else:
+                parsed_data.setdefault('service_name', service['name'])
         
         return parsed_data
     
-    def get_service_suggestions(self, query: str) -> List[Dict]:
-        """Get service suggestions based on query"""
-        parsed = self.parse_voice_query(query)
+    def get_service_suggestions(self, query: str, parsed: Optional[Dict] = None) -> List[Dict]:
+        """Get service suggestions based on query, or on its already parsed intent"""
+        if parsed is None:
+            parsed = self.parse_voice_query(query)
         service_category = parsed.get('service_category', '')
         
         # Find matching services
@@ -0,0 +1,244 @@
+"""
+In-memory trust graph built from TrustConnection rows.
+
+The graph is loaded once per process and kept current by the TrustConnection
+signal handlers in signals.py, so network lookups do not need to hit the
+database on every request.
+
+Signals only reach the process that made the write, so every write also bumps
+a version number in a Django cache (TRUST_GRAPH_CACHE_ALIAS), and a process
+whose graph was loaded at another version reloads it on next use. Writes that
+send no signals (queryset.update(), bulk_create, the bulk seeder) do not bump
+it: call mark_changed() after them. As a backstop the graph is also reloaded
+every TRUST_GRAPH_TTL seconds. The version is only shared between processes
+when the cache is (e.g. Redis); with the default per-process local memory
+cache, other processes catch up through the TTL alone.
+"""
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+from .models import TrustConnection
+
+
+class TrustGraph:
+    """
+    Adjacency-list view of the trust network.
+
+    Edges point from a recommender (User id) to a contractor (Contractor id)
+    and carry the trust level. Because contractors are users too, we also keep
+    the contractor -> user mapping so 2nd degree hops can be followed.
+
+    ttl and cache_alias enable the reloads described above; a graph built
+    without them is loaded once and never reloaded.
+    """
+
+    VERSION_KEY = 'trust_graph:version'
+
+    def __init__(self, ttl=None, cache_alias=None):
+        self._lock = threading.RLock()
+        self._loaded = False
+        self.out_edges = {}         # recommender user id -> {contractor id: trust_level}
+        self.in_edges = {}          # contractor id -> {recommender user id: trust_level}
+        self.contractor_users = {}  # contractor id -> contractor's user id
+        self.user_contractors = {}  # contractor's user id -> contractor id
+        self.version = 0
+        self.ttl = ttl
+        self.cache_alias = cache_alias
+        self.loaded_at = None
+        self.shared_version = None  # shared version the loaded graph reflects
+
+    @property
+    def is_loaded(self):
+        return self._loaded
+
+    def load(self, rows=None):
+        """
+        (Re)build the graph.
+
+        rows: iterable of (recommender_id, contractor_id, contractor_user_id, trust_level).
+        Defaults to every TrustConnection in the database.
+        """
+        # Read before the rows, so a write that lands meanwhile triggers another reload
+        shared_version = self._read_shared_version()
+        if rows is None:
+            rows = TrustConnection.objects.values_list(
+                'recommender_id', 'contractor_id', 'contractor__user_id', 'trust_level'
+            ).iterator(chunk_size=5000)
+
+        out_edges, in_edges, contractor_users = {}, {}, {}
+        for recommender_id, contractor_id, contractor_user_id, trust_level in rows:
+            out_edges.setdefault(recommender_id, {})[contractor_id] = trust_level
+            in_edges.setdefault(contractor_id, {})[recommender_id] = trust_level
+            contractor_users[contractor_id] = contractor_user_id
+
+        with self._lock:
+            self.out_edges = out_edges
+            self.in_edges = in_edges
+            self.contractor_users = contractor_users
+            self.user_contractors = {user_id: contractor_id for contractor_id, user_id in contractor_users.items()}
+            self._loaded = True
+            self.loaded_at = time.monotonic()
+            self.shared_version = shared_version
+            self.version += 1
+        return self
+
+    def ensure_loaded(self):
+        """Load the graph, or reload it if it is stale"""
+        shared_version = self._read_shared_version()
+        if not self._is_current(shared_version):
+            with self._lock:
+                if not self._is_current(shared_version):
+                    self.load()
+        return self
+
+    def _is_current(self, shared_version):
+        if not self._loaded:
+            return False
+        if self.ttl and time.monotonic() - self.loaded_at > self.ttl:
+            return False
+        return shared_version == self.shared_version
+
+    def _read_shared_version(self):
+        if self.cache_alias is None:
+            return None
+        return caches[self.cache_alias].get(self.VERSION_KEY, 0)
+
+    def mark_changed(self):
+        """
+        Bump the shared version so every process reloads its graph; returns
+        the new version (None without a cache).
+        """
+        if self.cache_alias is None:
+            return None
+        cache = caches[self.cache_alias]
+        cache.add(self.VERSION_KEY, 0, None)
+        try:
+            return cache.incr(self.VERSION_KEY)
+        except ValueError:
+            # Evicted between add and incr
+            cache.set(self.VERSION_KEY, 1, None)
+            return 1
+
+    def reset(self):
+        """Drop the loaded graph; it is rebuilt lazily on next use."""
+        with self._lock:
+            self.out_edges, self.in_edges, self.contractor_users = {}, {}, {}
+            self.user_contractors = {}
+            self._loaded = False
+            self.version += 1
+
+    # ------------------------------------------------------------------ #
+    # Mutations (called from signal handlers once the write has committed)
+    # ------------------------------------------------------------------ #
+
+    def add_edge(self, recommender_id, contractor_id, contractor_user_id, trust_level):
+        with self._lock:
+            shared_version = self.mark_changed()
+            if not self._loaded:
+                return
+            self.out_edges.setdefault(recommender_id, {})[contractor_id] = trust_level
+            self.in_edges.setdefault(contractor_id, {})[recommender_id] = trust_level
+            self.contractor_users[contractor_id] = contractor_user_id
+            self.user_contractors[contractor_user_id] = contractor_id
+            self.version += 1
+            self._applied(shared_version)
+
+    def remove_edge(self, recommender_id, contractor_id):
+        with self._lock:
+            shared_version = self.mark_changed()
+            if not self._loaded:
+                return
+            targets = self.out_edges.get(recommender_id)
+            if targets is not None:
+                targets.pop(contractor_id, None)
+                if not targets:
+                    del self.out_edges[recommender_id]
+            sources = self.in_edges.get(contractor_id)
+            if sources is not None:
+                sources.pop(recommender_id, None)
+                if not sources:
+                    del self.in_edges[contractor_id]
+            self.version += 1
+            self._applied(shared_version)
+
+    def _applied(self, shared_version):
+        # This change is in the graph: it stays current unless other
+        # processes changed the network since it was loaded
+        if shared_version is not None and self.shared_version == shared_version - 1:
+            self.shared_version = shared_version
+
+    # ------------------------------------------------------------------ #
+    # Queries
+    # ------------------------------------------------------------------ #
+
+    def trust_level(self, recommender_id, contractor_id):
+        """Direct trust level from a user to a contractor, or None."""
+        return self.out_edges.get(recommender_id, {}).get(contractor_id)
+
+    def first_degree(self, user_id):
+        """Contractors the user recommended directly, as {contractor_id: trust_level}."""
+        with self._lock:
+            return dict(self.out_edges.get(user_id, {}))
+
+    def trusted_people(self, user_id):
+        """User ids of the contractors this user recommended (their 1st degree people)."""
+        with self._lock:
+            return {
+                self.contractor_users[contractor_id]
+                for contractor_id in self.out_edges.get(user_id, {})
+                if contractor_id in self.contractor_users
+            }
+
+    def second_degree_levels(self, user_id, contractor_id, trusted_people=None):
+        """
+        Recommendations of contractor_id made by the user's trusted people,
+        as {recommender_id: trust_level}.
+        """
+        if trusted_people is None:
+            trusted_people = self.trusted_people(user_id)
+        with self._lock:
+            sources = self.in_edges.get(contractor_id, {})
+            if len(sources) < len(trusted_people):
+                return {r: level for r, level in sources.items() if r in trusted_people}
+            return {r: sources[r] for r in trusted_people if r in sources}
+
+    def network_contractors(self, user_id):
+        """
+        Returns (first_degree, second_degree) contractor id sets for a user.
+        Second degree excludes anything already in first degree.
+        """
+        first_degree = set(self.first_degree(user_id))
+        second_degree = set()
+        with self._lock:
+            for person_id in self.trusted_people(user_id):
+                second_degree.update(self.out_edges.get(person_id, ()))
+        second_degree -= first_degree
+        return first_degree, second_degree
+
+    def upstream_users(self, user_ids, max_depth):
+        """
+        The given users plus everyone who reaches one of them through at most
+        max_depth recommendations (i.e. whose network includes them).
+        """
+        seen = set(user_ids)
+        frontier = set(user_ids)
+        with self._lock:
+            for _ in range(max_depth):
+                next_frontier = set()
+                for user_id in frontier:
+                    contractor_id = self.user_contractors.get(user_id)
+                    if contractor_id is None:
+                        continue
+                    next_frontier.update(self.in_edges.get(contractor_id, ()))
+                frontier = next_frontier - seen
+                if not frontier:
+                    break
+                seen |= frontier
+        return seen
+
+
+# Process-level instance used by utils and views
+trust_graph = TrustGraph(settings.TRUST_GRAPH_TTL, settings.TRUST_GRAPH_CACHE_ALIAS)
@@ -0,0 +1,253 @@
+"""
+Push feed of new quick jobs to the contractors who can take them.
+
+Contractors subscribe to topics (service_id, locality_id): every service they
+provide in their locality, and in the localities around it with radius_km (a
+Locality is a normalised city/state pair, see localities.py). A new OPEN quick
+job is published once its transaction commits, under the topic of its service
+and locality, and the broker hands it to the subscriptions in this process's
+topic index for that topic only; nothing is queried or matched per contractor.
+
+Brokers (settings.QUICK_JOB_FEED_BROKER):
+
+- 'memory': publishes straight to this process's topic index. Enough when the
+  jobs are created in the same process that serves the stream (tests, a single
+  ASGI server serving the whole API).
+- 'postgres': publishes with NOTIFY, which PostgreSQL only delivers once the
+  transaction commits; every process holding subscriptions LISTENs on a
+  dedicated connection in a background thread and feeds its own topic index.
+  Use it when the WSGI servers that create jobs are not the ASGI server that
+  streams them, or with several ASGI workers.
+
+Subscriptions hold an asyncio queue and are served by the ASGI streaming view
+(`quick_job_stream`); publishers may run in any thread.
+
+EventSource clients cannot send an Authorization header, so they open the
+stream with a StreamTicket in the query string: a JWT that expires after
+QUICK_JOB_STREAM_TICKET_SECONDS and that the API's JWT authentication does
+not accept, so a ticket leaked through a URL is worth little.
+"""
+import asyncio
+import json
+import logging
+import select
+import threading
+import time
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, connections
+from rest_framework_simplejwt.tokens import Token
+
+logger = logging.getLogger(__name__)
+
+
+def job_topic(job):
+    return (job.service_id, job.locality_id)
+
+
+def job_message(job):
+    """What a subscriber receives for a new job"""
+    return {
+        'id': job.id,
+        'title': job.title,
+        'description': job.description,
+        'location': job.location,
+        'service': job.service_id,
+        'service_name': job.service.name,
+        'locality': job.locality_id,
+        'urgency': job.urgency,
+        'budget_suggestion': None if job.budget_suggestion is None else str(job.budget_suggestion),
+        'status': job.status,
+        'created_at': job.created_at.isoformat(),
+    }
+
+
+class Subscription:
+    """One stream's topics and queue of pending messages, owned by its event loop"""
+
+    def __init__(self, topics, max_pending):
+        self.topics = frozenset(topics)
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue()
+        self.max_pending = max_pending
+        self.dropped = 0
+
+    def deliver(self, message):
+        """Thread-safe: queue message on the subscription's event loop"""
+        try:
+            self.loop.call_soon_threadsafe(self._put, message)
+        except RuntimeError:
+            pass  # loop closed: the stream is gone and will unsubscribe
+
+    def _put(self, message):
+        # A stalled client keeps only the newest messages
+        if self.queue.qsize() >= self.max_pending:
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(message)
+
+    async def get(self, timeout):
+        """Next message, or None after timeout seconds"""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class TopicIndex:
+    """topic -> subscriptions of this process"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = {}
+
+    def add(self, subscription):
+        with self._lock:
+            for topic in subscription.topics:
+                self._subscribers.setdefault(topic, set()).add(subscription)
+
+    def remove(self, subscription):
+        with self._lock:
+            for topic in subscription.topics:
+                subscribers = self._subscribers.get(topic)
+                if subscribers is not None:
+                    subscribers.discard(subscription)
+                    if not subscribers:
+                        del self._subscribers[topic]
+
+    def deliver(self, topic, message):
+        """Hand message to the subscriptions of topic; returns how many"""
+        with self._lock:
+            subscribers = list(self._subscribers.get(topic, ()))
+        for subscription in subscribers:
+            subscription.deliver(message)
+        return len(subscribers)
+
+    def stats(self):
+        with self._lock:
+            subscriptions = set().union(*self._subscribers.values()) if self._subscribers else set()
+            return {'topics': len(self._subscribers), 'subscriptions': len(subscriptions)}
+
+
+class InMemoryBroker:
+    """Single-process broker: publish delivers to the local topic index"""
+    name = 'memory'
+
+    def __init__(self):
+        self.index = TopicIndex()
+
+    def subscribe(self, topics):
+        subscription = Subscription(topics, settings.QUICK_JOB_FEED_MAX_PENDING)
+        self.index.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        self.index.remove(subscription)
+
+    def publish(self, topic, message):
+        self.index.deliver(tuple(topic), message)
+
+
+class PostgresBroker(InMemoryBroker):
+    """
+    Multi-process broker over PostgreSQL LISTEN/NOTIFY.
+
+    publish() sends NOTIFY on the caller's connection; the listener thread,
+    started by the first subscription of the process, receives every
+    notification and delivers it to the local topic index.
+    """
+    name = 'postgres'
+    channel = 'quick_job_feed'
+    poll_seconds = 5
+    retry_seconds = 5
+
+    def __init__(self):
+        super().__init__()
+        self._listener = None
+        self._listener_lock = threading.Lock()
+
+    def subscribe(self, topics):
+        self._start_listener()
+        return super().subscribe(topics)
+
+    def publish(self, topic, message):
+        payload = json.dumps({'topic': list(topic), 'message': message}, separators=(',', ':'))
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT pg_notify(%s, %s)', [self.channel, payload])
+
+    def _start_listener(self):
+        with self._listener_lock:
+            if self._listener is None or not self._listener.is_alive():
+                self._listener = threading.Thread(
+                    target=self._listen_forever, name='quick-job-feed-listener', daemon=True
+                )
+                self._listener.start()
+
+    def _received(self, payload):
+        try:
+            data = json.loads(payload)
+            self.index.deliver(tuple(data['topic']), data['message'])
+        except (ValueError, KeyError, TypeError):
+            logger.warning('Ignoring malformed quick job feed notification: %r', payload[:200])
+
+    def _listen_forever(self):
+        while True:
+            try:
+                self._listen()
+            except Exception:
+                logger.exception('Quick job feed listener lost its connection; reconnecting')
+            time.sleep(self.retry_seconds)
+
+    def _listen(self):
+        # A raw connection of its own, outside Django's per-thread handling
+        wrapper = connections['default']
+        raw = wrapper.get_new_connection(wrapper.get_connection_params())
+        try:
+            raw.autocommit = True
+            raw.cursor().execute(f'LISTEN {self.channel}')
+            if hasattr(raw, 'notifies') and callable(raw.notifies):
+                # psycopg 3
+                for notify in raw.notifies():
+                    self._received(notify.payload)
+            else:
+                # psycopg2
+                while True:
+                    if select.select([raw], [], [], self.poll_seconds)[0]:
+                        raw.poll()
+                        while raw.notifies:
+                            self._received(raw.notifies.pop(0).payload)
+        finally:
+            raw.close()
+
+
+BROKERS = {broker.name: broker for broker in (InMemoryBroker, PostgresBroker)}
+
+
+def build_broker():
+    backend = settings.QUICK_JOB_FEED_BROKER
+    if backend not in BROKERS:
+        raise ValueError(f"Unknown QUICK_JOB_FEED_BROKER '{backend}'")
+    return BROKERS[backend]()
+
+
+# Process-level broker used by the quick job signals and the stream view
+broker = build_broker()
+
+
+def publish_job(job):
+    """Announce a new OPEN job to the contractors subscribed to its topic"""
+    if job.locality_id is None or job.status != job.JobStatus.OPEN:
+        return
+    try:
+        broker.publish(job_topic(job), job_message(job))
+    except Exception:
+        # The job is saved either way; pollers and reconnecting streams still see it
+        logger.exception('Could not publish quick job %s to the feed', job.id)
+
+
+class StreamTicket(Token):
+    """Short-lived JWT that only opens the quick job stream"""
+    token_type = 'quick_job_stream'
+    lifetime = timedelta(seconds=settings.QUICK_JOB_STREAM_TICKET_SECONDS)
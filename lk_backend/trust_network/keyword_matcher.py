@@ -0,0 +1,138 @@
+"""
+Multi-keyword substring matching for the rule-based query parser.
+
+The keyword dictionaries (service categories, urgency levels, languages) are
+compiled once into an Aho-Corasick automaton, so a single pass over the query
+finds every keyword it contains, overlapping ones included. KeywordMatcher
+then answers the parser's questions from that one set of hits with the same
+results as testing `keyword in query` for each keyword in turn.
+"""
+from collections import deque
+
+
+class KeywordAutomaton:
+    """Aho-Corasick automaton reporting which keywords occur in a text"""
+
+    def __init__(self, keywords):
+        # State 0 is the root; goto[state] maps a character to the next state
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [()]
+        for keyword in dict.fromkeys(keywords):
+            if keyword:
+                self._add(keyword)
+        self._link()
+
+    def _add(self, keyword):
+        state = 0
+        for char in keyword:
+            next_state = self.goto[state].get(char)
+            if next_state is None:
+                next_state = len(self.goto)
+                self.goto[state][char] = next_state
+                self.goto.append({})
+                self.fail.append(0)
+                self.output.append(())
+            state = next_state
+        self.output[state] += (keyword,)
+
+    def _link(self):
+        """
+        Breadth-first pass setting failure links, merging outputs along them and
+        turning goto into a full transition table, so matching never has to
+        follow failure links.
+        """
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            children = list(self.goto[state].items())
+            # Transitions the state lacks are those of its failure state, which is
+            # shallower and so already complete
+            self.goto[state] = {**self.goto[self.fail[state]], **self.goto[state]}
+            for char, next_state in children:
+                queue.append(next_state)
+                link = self.goto[self.fail[state]].get(char, 0)
+                self.fail[next_state] = link
+                self.output[next_state] += self.output[link]
+
+    def find(self, text):
+        """Set of keywords occurring anywhere in text"""
+        goto, output = self.goto, self.output
+        found = set()
+        state = 0
+        for char in text:
+            state = goto[state].get(char, 0)
+            if output[state]:
+                found.update(output[state])
+        return found
+
+
+class KeywordMatch:
+    """What one pass over a (lowercased) query found"""
+
+    def __init__(self, matcher, hits):
+        self._matcher = matcher
+        self.hits = hits
+
+    def __contains__(self, keyword):
+        return keyword in self.hits
+
+    def first_group(self, groups, default):
+        """First group (in dictionary order) with any keyword in the query"""
+        ranks = self._matcher.group_ranks[groups]
+        best = min((ranks[keyword] for keyword in self.hits if keyword in ranks), default=None)
+        return default if best is None else self._matcher.group_order[groups][best]
+
+    def best_group(self, groups, default):
+        """Group with the most keyword occurrences in its list; ties go to the earlier group"""
+        counts = self._matcher.group_counts[groups]
+        order = self._matcher.group_order[groups]
+        scores = [0] * len(order)
+        for keyword in self.hits:
+            for rank in counts.get(keyword, ()):
+                scores[rank] += 1
+        best = max(scores)
+        return order[scores.index(best)] if best else default
+
+    def keywords(self):
+        """Hits in keyword list order, repeated as often as they are listed"""
+        positions = self._matcher.keyword_positions
+        found = sorted(
+            position for keyword in self.hits for position in positions.get(keyword, ())
+        )
+        return [self._matcher.keyword_list[position] for position in found]
+
+
+class KeywordMatcher:
+    """
+    Compiled keyword dictionaries.
+
+    groups maps a name ('service', 'urgency', 'language') to a dict of
+    {group value: [keywords]}; keyword_list is the ordered list reported by
+    KeywordMatch.keywords().
+    """
+
+    def __init__(self, groups, keyword_list=()):
+        self.keyword_list = list(keyword_list)
+        self.keyword_positions = {}
+        for position, keyword in enumerate(self.keyword_list):
+            self.keyword_positions.setdefault(keyword, []).append(position)
+
+        self.group_order = {}   # groups -> [group values in dictionary order]
+        self.group_ranks = {}   # groups -> {keyword: index of the first group listing it}
+        self.group_counts = {}  # groups -> {keyword: [group index per listing]}
+        all_keywords = list(self.keyword_list)
+        for groups_name, patterns in groups.items():
+            self.group_order[groups_name] = list(patterns)
+            ranks, counts = {}, {}
+            for rank, words in enumerate(patterns.values()):
+                for word in words:
+                    ranks.setdefault(word, rank)
+                    counts.setdefault(word, []).append(rank)
+            self.group_ranks[groups_name] = ranks
+            self.group_counts[groups_name] = counts
+            all_keywords.extend(counts)
+        self.automaton = KeywordAutomaton(all_keywords)
+
+    def match(self, text):
+        return KeywordMatch(self, self.automaton.find(text))
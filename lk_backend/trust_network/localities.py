@@ -0,0 +1,164 @@
+"""
+Localities for the contractor quick job feed.
+
+A Locality is a city/state pair matched on normalised keys ("New  Delhi",
+"new delhi." and "NEW DELHI" are one place), with optional coordinates and
+their geohash. QuickJob.locality is set from the customer's city when the job
+is created, so the feed filters on the (service, locality, status, created_at)
+index instead of joining customer profiles on city and state strings.
+
+Radius search: the localities within radius_km of the contractor's are found
+through the geohash index (the 3x3 block of cells around it, at a precision
+whose cells are at least radius_km tall and wide; cells narrow away from the
+equator), then checked by great-circle distance. Localities without coordinates only ever match themselves; load
+coordinates with `python manage.py import_localities`.
+"""
+import math
+
+from django.conf import settings
+from django.db.models import Q
+
+_BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+GEOHASH_PRECISION = 6
+EARTH_RADIUS_KM = 6371.0
+_KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+
+def place_key(value):
+    """Normalised city or state name used to match localities"""
+    return ' '.join((value or '').casefold().replace('.', ' ').split())
+
+
+# ---------------------------------------------------------------------- #
+# Geohash
+# ---------------------------------------------------------------------- #
+
+def geohash_encode(latitude, longitude, precision=GEOHASH_PRECISION):
+    lat_range, lon_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars, bits, bit_count, even = [], 0, 0, True
+    while len(chars) < precision:
+        value, bounds = (longitude, lon_range) if even else (latitude, lat_range)
+        middle = (bounds[0] + bounds[1]) / 2
+        bits <<= 1
+        if value >= middle:
+            bits |= 1
+            bounds[0] = middle
+        else:
+            bounds[1] = middle
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(_BASE32[bits])
+            bits, bit_count = 0, 0
+    return ''.join(chars)
+
+
+def geohash_bounds(geohash):
+    """((min_lat, max_lat), (min_lon, max_lon)) of a geohash cell"""
+    lat_range, lon_range = [-90.0, 90.0], [-180.0, 180.0]
+    even = True
+    for char in geohash:
+        bits = _BASE32.index(char)
+        for shift in range(4, -1, -1):
+            bounds = lon_range if even else lat_range
+            middle = (bounds[0] + bounds[1]) / 2
+            if bits >> shift & 1:
+                bounds[0] = middle
+            else:
+                bounds[1] = middle
+            even = not even
+    return tuple(lat_range), tuple(lon_range)
+
+
+def geohash_block(geohash):
+    """The cell and its eight neighbours"""
+    (min_lat, max_lat), (min_lon, max_lon) = geohash_bounds(geohash)
+    height, width = max_lat - min_lat, max_lon - min_lon
+    centre_lat, centre_lon = (min_lat + max_lat) / 2, (min_lon + max_lon) / 2
+    cells = set()
+    for dlat in (-1, 0, 1):
+        latitude = centre_lat + dlat * height
+        if not -90 <= latitude <= 90:
+            continue
+        for dlon in (-1, 0, 1):
+            longitude = (centre_lon + dlon * width + 180) % 360 - 180
+            cells.add(geohash_encode(latitude, longitude, len(geohash)))
+    return cells
+
+
+def cell_size_km(precision, latitude=0.0):
+    """(height, width) in km of a geohash cell at a latitude"""
+    lon_bits = (5 * precision + 1) // 2
+    lat_bits = 5 * precision // 2
+    height = 180 / 2 ** lat_bits * _KM_PER_DEGREE
+    width = 360 / 2 ** lon_bits * _KM_PER_DEGREE * math.cos(math.radians(latitude))
+    return height, width
+
+
+def precision_for_radius(radius_km, latitude=0.0):
+    """Finest precision whose cells are at least radius_km tall and wide around latitude"""
+    # Widths are taken at the edge of the radius furthest from the equator
+    furthest = min(abs(latitude) + radius_km / _KM_PER_DEGREE, 90.0)
+    for precision in range(GEOHASH_PRECISION, 0, -1):
+        if min(cell_size_km(precision, furthest)) >= radius_km:
+            return precision
+    return 1
+
+
+def distance_km(lat1, lon1, lat2, lon2):
+    """Great-circle (haversine) distance"""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi, dlambda = phi2 - phi1, math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+# ---------------------------------------------------------------------- #
+# Localities
+# ---------------------------------------------------------------------- #
+
+def get_locality(city, state, create=True):
+    """Locality for a city/state pair, created on first use; None for a blank city"""
+    from .models import Locality
+
+    city_key, state_key = place_key(city), place_key(state)
+    if not city_key:
+        return None
+    if not create:
+        return Locality.objects.filter(city_key=city_key, state_key=state_key).first()
+    locality, _ = Locality.objects.get_or_create(
+        city_key=city_key, state_key=state_key,
+        defaults={'city': city.strip(), 'state': (state or '').strip()},
+    )
+    return locality
+
+
+def locality_for_user(user_id):
+    """Locality of a customer's profile city, or None without a profile"""
+    from accounts.models import Customer
+
+    place = Customer.objects.filter(user_id=user_id).values_list('city', 'state').first()
+    return get_locality(*place) if place else None
+
+
+def nearby_locality_ids(locality, radius_km=0):
+    """Ids of locality and of every locality with coordinates within radius_km of it"""
+    from .models import Locality
+
+    ids = [locality.id]
+    if not radius_km or locality.latitude is None or locality.longitude is None:
+        return ids
+    radius_km = min(radius_km, settings.QUICK_JOB_FEED_MAX_RADIUS_KM)
+    precision = precision_for_radius(radius_km, locality.latitude)
+    cells = geohash_block(locality.geohash[:precision])
+    in_cells = Q()
+    for cell in cells:
+        in_cells |= Q(geohash__startswith=cell)
+    candidates = Locality.objects.filter(in_cells).exclude(id=locality.id).values_list(
+        'id', 'latitude', 'longitude'
+    )
+    ids.extend(
+        locality_id for locality_id, latitude, longitude in candidates
+        if distance_km(locality.latitude, locality.longitude, latitude, longitude) <= radius_km
+    )
+    return ids
@@ -0,0 +1,354 @@
+"""
+End-to-end API benchmark: drive the real URL routes through the test client
+(JWT authentication, middleware, views, serializers, SQL) over seeded data and
+record throughput, latency percentiles and query counts per scenario.
+
+Scenarios: tender_list, tender_search, bid_submission, quick_job_feed,
+trusted_contractors, voice_parsing (Gemini replaced by the fake server of
+load_test_gemini, no query cache) and appointment_lists. Requests are made one
+at a time, so throughput is that of a single client; write scenarios run each
+request in a transaction that is rolled back, and the data is left as found.
+
+Data comes from seed_data.master_seeder. --seed N wipes the database and
+seeds it with the seeder's default counts multiplied by N (10, 100, 1000),
+through the bulk seeder with --bulk (practical from 100 on; the same
+--random-seed gives the same data); without it the current data is used. The
+dataset's row counts are stored with the results so runs on different data
+are not compared by mistake.
+
+    python manage.py benchmark_api --seed 100 --output benchmarks/run.json
+    python manage.py benchmark_api --seed 1000 --bulk --output benchmarks/run-1000x.json
+    python manage.py benchmark_api --baseline benchmarks/baseline-100x.json --fail-on-regression
+
+Store a run made on reference hardware as the baseline and compare later runs
+against it: a scenario regresses when its p95 latency grows or its throughput
+drops by more than --tolerance, or when it runs more queries per request. Run
+with DEBUG off; DEBUG keeps every query in memory and slows requests down.
+"""
+import json
+import math
+import random
+import statistics
+import threading
+import time
+from collections import Counter, namedtuple
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Count
+from django.test.utils import override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from accounts.models import User, Customer, Contractor, Supervisor
+from works.models import Tenders, TenderRequirement, TenderBids, TenderContractor, VirtualAppointment, PhysicalVisit
+from trust_network import views as trust_network_views
+from trust_network.gemini_service import GeminiNLPService
+from trust_network.models import QuickJob, TrustConnection
+from trust_network.nlp_cache import DisabledQueryCache
+from lk_backend.query_budget import QueryLog
+from .load_test_gemini import QUERIES, FakeGeminiServer
+
+# Default scale factors of the seeded datasets the benchmark is run on
+SCALES = (10, 100, 1000)
+
+# One request of a scenario; prepare() runs before it, inside its transaction, untimed
+Call = namedtuple('Call', 'user method url data prepare', defaults=(None, None))
+
+
+def _pick(rng, queryset, count):
+    """Up to count rows of queryset, sampled reproducibly"""
+    ids = list(queryset.order_by('pk').values_list('pk', flat=True)[:count * 10])
+    rng.shuffle(ids)
+    return list(queryset.model.objects.filter(pk__in=ids[:count]).order_by('pk'))
+
+
+# -------------------------------------------------------------------------- #
+# Scenarios: (rng) -> list of Calls, cycled through for the requested count
+# -------------------------------------------------------------------------- #
+
+def tender_list(rng):
+    customers = _pick(rng, User.objects.filter(role=User.Roles.CUSTOMER), 20)
+    statuses = [None, 'published', 'in_progress']
+    return [
+        Call(user, 'get', '/api/tenders/', {'limit': 20, **({'status': status} if status else {})})
+        for user in customers for status in statuses
+    ]
+
+
+def tender_search(rng):
+    customers = _pick(rng, User.objects.filter(role=User.Roles.CUSTOMER), 20)
+    words = sorted({
+        word for title in Tenders.objects.values_list('title', flat=True)[:200]
+        for word in title.split() if len(word) > 3
+    })
+    rng.shuffle(words)
+    return [
+        Call(rng.choice(customers), 'get', '/api/tenders/', {'search': word, 'limit': 20})
+        for word in words[:50]
+    ] if customers else []
+
+
+def bid_submission(rng):
+    """Assigned contractors (re)submit a full set of bids on tenders opened for bidding"""
+    tenders = list(Tenders.objects.annotate(
+        contractors=Count('tender_contractors', distinct=True),
+        requirements=Count('tender_requirements', distinct=True),
+    ).filter(contractors__gt=0, requirements__gt=0).order_by('-requirements', 'pk')[:10])
+    calls = []
+    now = timezone.now()
+    for tender in tenders:
+        requirement_ids = list(TenderRequirement.objects.filter(tender=tender).values_list('id', flat=True))
+        bids = [
+            {'requirement_id': requirement_id, 'bid_amount': f'{rng.randint(500, 50000)}.00'}
+            for requirement_id in requirement_ids
+        ]
+        for link in TenderContractor.objects.filter(tender=tender).select_related('contractor__user')[:10]:
+            def prepare(tender=tender, contractor=link.contractor):
+                Tenders.objects.filter(pk=tender.pk).update(
+                    start_time=now - timedelta(hours=1), end_time=now + timedelta(days=1)
+                )
+                TenderBids.objects.filter(contractor=contractor, tender_requirement__tender=tender).delete()
+            calls.append(Call(
+                link.contractor.user, 'post', f'/api/tenders/{tender.pk}/submit-bids/', {'bids': bids}, prepare
+            ))
+    rng.shuffle(calls)
+    return calls
+
+
+def quick_job_feed(rng):
+    contractors = _pick(rng, User.objects.filter(role=User.Roles.CONTRACTOR), 30)
+    return [Call(user, 'get', '/api/trust-network/quick-jobs/', {'limit': 20}) for user in contractors]
+
+
+def trusted_contractors(rng):
+    recommenders = _pick(rng, User.objects.filter(
+        pk__in=TrustConnection.objects.values('recommender_id')
+    ), 30)
+    return [Call(user, 'get', '/api/trust-network/trusted-contractors/') for user in recommenders]
+
+
+def voice_parsing(rng):
+    customers = _pick(rng, User.objects.filter(role=User.Roles.CUSTOMER), 10)
+    return [
+        Call(user, 'post', '/api/trust-network/parse-voice-query/', {'text_query': query})
+        for user in customers for query in QUERIES
+    ]
+
+
+def appointment_lists(rng):
+    calls = []
+    for customer in _pick(rng, Customer.objects.filter(virtual_appointments__isnull=False).distinct(), 10):
+        calls.append(Call(customer.user, 'get', '/api/appointments/virtual/customer/'))
+        calls.append(Call(customer.user, 'get', '/api/visits/physical/customer/'))
+    for supervisor in _pick(rng, Supervisor.objects.filter(virtual_appointments__isnull=False).distinct(), 10):
+        calls.append(Call(supervisor.user, 'get', '/api/appointments/virtual/supervisor/'))
+        calls.append(Call(supervisor.user, 'get', '/api/visits/physical/supervisor/'))
+    return calls
+
+
+SCENARIOS = {
+    scenario.__name__: scenario for scenario in (
+        tender_list, tender_search, bid_submission, quick_job_feed,
+        trusted_contractors, voice_parsing, appointment_lists,
+    )
+}
+
+
+# -------------------------------------------------------------------------- #
+# Measurement
+# -------------------------------------------------------------------------- #
+
+def percentile(sorted_values, percent):
+    """Nearest-rank percentile of an ascending list"""
+    return sorted_values[max(0, math.ceil(percent / 100 * len(sorted_values)) - 1)]
+
+
+def dataset():
+    """Row counts of the data the benchmark ran on"""
+    return {
+        'users': User.objects.count(),
+        'customers': Customer.objects.count(),
+        'contractors': Contractor.objects.count(),
+        'tenders': Tenders.objects.count(),
+        'tender_bids': TenderBids.objects.count(),
+        'quick_jobs': QuickJob.objects.count(),
+        'trust_connections': TrustConnection.objects.count(),
+        'virtual_appointments': VirtualAppointment.objects.count(),
+        'physical_visits': PhysicalVisit.objects.count(),
+    }
+
+
+class Runner:
+    def __init__(self):
+        self.clients = {}
+
+    def client(self, user):
+        if user.pk not in self.clients:
+            client = APIClient()
+            client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user)}')
+            self.clients[user.pk] = client
+        return self.clients[user.pk]
+
+    def call(self, call):
+        """(seconds, queries, status) of one request, rolled back"""
+        client = self.client(call.user)
+        with transaction.atomic():
+            if call.prepare:
+                call.prepare()
+            with QueryLog() as log:
+                started = time.perf_counter()
+                if call.method == 'get':
+                    response = client.get(call.url, call.data)
+                else:
+                    response = getattr(client, call.method)(call.url, call.data, format='json')
+                elapsed = time.perf_counter() - started
+            transaction.set_rollback(True)
+        return elapsed, len(log), response.status_code
+
+    def run(self, calls, requests, warmup):
+        for i in range(min(warmup, requests)):
+            self.call(calls[i % len(calls)])
+        latencies, queries, statuses = [], [], Counter()
+        started = time.perf_counter()
+        for i in range(requests):
+            elapsed, count, status_code = self.call(calls[i % len(calls)])
+            latencies.append(elapsed)
+            queries.append(count)
+            statuses[status_code] += 1
+        total = time.perf_counter() - started
+        latencies.sort()
+        return {
+            'requests': requests,
+            'errors': sum(count for status_code, count in statuses.items() if status_code >= 400),
+            'statuses': {str(status_code): count for status_code, count in sorted(statuses.items())},
+            'throughput_rps': round(requests / total, 2),
+            'mean_ms': round(statistics.fmean(latencies) * 1000, 2),
+            'p50_ms': round(percentile(latencies, 50) * 1000, 2),
+            'p95_ms': round(percentile(latencies, 95) * 1000, 2),
+            'p99_ms': round(percentile(latencies, 99) * 1000, 2),
+            'queries_mean': round(statistics.fmean(queries), 2),
+            'queries_max': max(queries),
+        }
+
+
+def compare(results, baseline, tolerance):
+    """(scenario, problems) for every scenario of results that is also in baseline"""
+    comparison = []
+    for name, current in results['scenarios'].items():
+        previous = baseline.get('scenarios', {}).get(name)
+        if previous is None:
+            continue
+        problems = []
+        if current['p95_ms'] > previous['p95_ms'] * (1 + tolerance):
+            problems.append(f"p95 {previous['p95_ms']} -> {current['p95_ms']} ms")
+        if current['throughput_rps'] < previous['throughput_rps'] * (1 - tolerance):
+            problems.append(f"throughput {previous['throughput_rps']} -> {current['throughput_rps']}/s")
+        if current['queries_max'] > previous['queries_max']:
+            problems.append(f"queries {previous['queries_max']} -> {current['queries_max']}")
+        comparison.append((name, problems))
+    return comparison
+
+
+class Command(BaseCommand):
+    help = 'Benchmark the API end to end over seeded data and compare against a stored baseline'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--seed', type=int, metavar='SCALE',
+            help=f'Wipe the database and seed it at SCALE times the seeder defaults (e.g. {SCALES})'
+        )
+        parser.add_argument('--bulk', action='store_true',
+                            help='Seed with the bulk seeder (seed_data/bulk.py), for large scales')
+        parser.add_argument('--scenario', action='append', choices=sorted(SCENARIOS),
+                            help='Scenario to run (repeatable; default all)')
+        parser.add_argument('--requests', type=int, default=200, help='Timed requests per scenario')
+        parser.add_argument('--warmup', type=int, default=20, help='Untimed requests per scenario first')
+        parser.add_argument('--gemini-latency', type=float, default=300, help='Fake Gemini latency in ms')
+        parser.add_argument('--random-seed', type=int, default=42)
+        parser.add_argument('--output', help='Write the results to this JSON file')
+        parser.add_argument('--baseline', help='Compare against the results in this JSON file')
+        parser.add_argument('--tolerance', type=float, default=0.2,
+                            help='Allowed p95 growth and throughput drop against the baseline (0.2 = 20%%)')
+        parser.add_argument('--fail-on-regression', action='store_true')
+
+    def handle(self, *args, **options):
+        if options['seed']:
+            self.seed(options['seed'], options['bulk'], options['random_seed'])
+        if settings.DEBUG:
+            self.stdout.write(self.style.WARNING('DEBUG is on: timings include query logging'))
+
+        server = FakeGeminiServer(options['gemini_latency'] / 1000, 0, 0.0, options['random_seed'])
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        real_gemini = trust_network_views.gemini_service
+        trust_network_views.gemini_service = GeminiNLPService(
+            api_key='fake-key', api_endpoint=server.endpoint, cache=DisabledQueryCache()
+        )
+        results = {
+            'created_at': timezone.now().isoformat(),
+            'database': connection.vendor,
+            'scale': options['seed'],
+            'dataset': dataset(),
+            'settings': {name: options[name] for name in ('requests', 'warmup', 'gemini_latency', 'random_seed')},
+            'scenarios': {},
+        }
+        runner = Runner()
+        try:
+            with override_settings(QUERY_BUDGET_ENABLED=False, ALLOWED_HOSTS=['*']):
+                self.stdout.write(
+                    f"{'scenario':<22} {'rps':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'queries':>8} {'errors':>7}"
+                )
+                for name in options['scenario'] or SCENARIOS:
+                    calls = SCENARIOS[name](random.Random(options['random_seed']))
+                    if not calls:
+                        self.stdout.write(f"{name:<22} skipped: no data for it")
+                        continue
+                    result = results['scenarios'][name] = runner.run(calls, options['requests'], options['warmup'])
+                    self.stdout.write(
+                        f"{name:<22} {result['throughput_rps']:>8.1f} {result['p50_ms']:>8.1f} "
+                        f"{result['p95_ms']:>8.1f} {result['p99_ms']:>8.1f} {result['queries_mean']:>8.1f} "
+                        f"{result['errors']:>7}"
+                    )
+        finally:
+            trust_network_views.gemini_service = real_gemini
+            server.shutdown()
+
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(results, f, indent=2)
+            self.stdout.write(f"Results written to {options['output']}")
+        if options['baseline']:
+            self.report_comparison(results, options)
+        self.stdout.write(self.style.SUCCESS('Done'))
+
+    def seed(self, scale, bulk, random_seed):
+        from seed_data.master_seeder import LocalKonnectMasterSeeder
+
+        seeder = LocalKonnectMasterSeeder()
+        if bulk:
+            success = seeder.run_bulk_seed(scale, seed=random_seed)
+        else:
+            seeder.config = {name: count * scale for name, count in seeder.config.items()}
+            success = seeder.run_complete_seed()
+        if not success:
+            raise CommandError('Seeding failed; see the errors above')
+
+    def report_comparison(self, results, options):
+        with open(options['baseline']) as f:
+            baseline = json.load(f)
+        if baseline.get('dataset') != results['dataset']:
+            self.stdout.write(self.style.WARNING(
+                f"The baseline ran on different data: {baseline.get('dataset')}"
+            ))
+        regressions = []
+        for name, problems in compare(results, baseline, options['tolerance']):
+            if problems:
+                regressions.append(name)
+                self.stdout.write(self.style.ERROR(f"{name:<22} regressed: {'; '.join(problems)}"))
+            else:
+                self.stdout.write(self.style.SUCCESS(f"{name:<22} within baseline"))
+        if regressions and options['fail_on_regression']:
+            raise CommandError(f"Regressions in: {', '.join(regressions)}")
@@ -0,0 +1,121 @@
+"""
+Benchmark the compiled keyword matcher used by the rule-based query parser
+against the original per-keyword `in` loops.
+
+Runs both over a corpus of mixed Hindi, English and Hinglish queries, checks
+that they agree on service category, urgency, keywords and language, and
+reports queries per second for each.
+
+    python manage.py benchmark_keyword_matcher --rounds 2000
+"""
+import random
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from trust_network.gemini_service import (
+    SERVICE_PATTERNS, URGENCY_KEYWORDS, LANGUAGE_PATTERNS, _keyword_matcher
+)
+
+CORPUS = [
+    'AC theek karne wala chahiye urgent',
+    'Plumber urgent chahiye, paani leak ho raha hai',
+    'Ghar ki safai karvani hai kal tak',
+    'Painting work urgent',
+    'Need an electrician today, the fan switch is broken',
+    'bathroom tap is leaking since yesterday, need plumber asap',
+    'deewar ka rang kharab ho gaya hai, next week tak paint karna hai',
+    'door ki kundi toot gayi, carpenter chahiye jaldi',
+    'मुझे नल ठीक करवाना है, पानी बह रहा है',
+    'बिजली का काम तुरंत चाहिए',
+    'घर की सफाई कल करनी है',
+    'दरवाज़ा टूट गया है, बढ़ई चाहिए',
+    'मला नळ दुरुस्त करायचा आहे, पाणी गळत आहे',
+    'મને પાણી નો નળ ઠીક કરવો છે',
+    'எனக்கு குழாய் சரி செய்ய வேண்டும், உடனே',
+    'నాకు విద్యుత్ పని కావాలి, వెంటనే',
+    'ನನಗೆ ನೀರು ಸಮಸ್ಯೆ ಇದೆ, ಬೇಗ ಬನ್ನಿ',
+    'আমার বাড়িতে পানি লাগবে, পরিষ্কার করতে হবে',
+    'Looking for someone to fix furniture sometime when possible',
+    'wiring check karna hai, light baar baar jaa rahi hai',
+]
+
+
+# -------------------------------------------------------------------------- #
+# Original implementation, kept here as the benchmark baseline
+# -------------------------------------------------------------------------- #
+
+def loop_analyse(query):
+    query_lower = query.lower()
+
+    detected_service = 'other'
+    for category, keywords in SERVICE_PATTERNS.items():
+        if any(keyword in query_lower for keyword in keywords):
+            detected_service = category
+            break
+
+    detected_urgency = 'MEDIUM'
+    for urgency, keywords in URGENCY_KEYWORDS.items():
+        if any(keyword in query_lower for keyword in keywords):
+            detected_urgency = urgency
+            break
+
+    keywords = []
+    all_keywords = [word for word_list in SERVICE_PATTERNS.values() for word in word_list]
+    all_keywords.extend(['urgent', 'fast', 'quick', 'repair', 'fix', 'need', 'chahiye'])
+    for word in all_keywords:
+        if word in query_lower:
+            keywords.append(word)
+
+    language_scores = {}
+    for lang, words in LANGUAGE_PATTERNS.items():
+        score = sum(1 for word in words if word in query_lower)
+        if score > 0:
+            language_scores[lang] = score
+    language = max(language_scores, key=language_scores.get) if language_scores else 'en'
+
+    return detected_service, detected_urgency, keywords, language
+
+
+def matcher_analyse(query):
+    matches = _keyword_matcher.match(query.lower())
+    return (
+        matches.first_group('service', 'other'),
+        matches.first_group('urgency', 'MEDIUM'),
+        matches.keywords(),
+        matches.best_group('language', 'en'),
+    )
+
+
+class Command(BaseCommand):
+    help = 'Benchmark the compiled keyword matcher against the original keyword loops'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rounds', type=int, default=1000, help='Passes over the query corpus')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        queries = list(CORPUS)
+        # Mixed queries built from corpus fragments, to cover more combinations
+        for _ in range(len(CORPUS) * 4):
+            queries.append(' '.join(rng.sample(CORPUS, 2)))
+
+        mismatches = [query for query in queries if loop_analyse(query) != matcher_analyse(query)]
+        if mismatches:
+            raise CommandError(f"Matcher disagrees with the original loops on: {mismatches[:5]}")
+        self.stdout.write(f"Results identical on {len(queries)} queries")
+
+        results = {}
+        for name, analyse in (('loops', loop_analyse), ('matcher', matcher_analyse)):
+            started = time.perf_counter()
+            for _ in range(options['rounds']):
+                for query in queries:
+                    analyse(query)
+            elapsed = time.perf_counter() - started
+            results[name] = options['rounds'] * len(queries) / elapsed
+            self.stdout.write(f"{name:<8} {results[name]:>10,.0f} queries/s")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Speedup: {results['matcher'] / results['loops']:.1f}x"
+        ))
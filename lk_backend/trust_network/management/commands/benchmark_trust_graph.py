@@ -0,0 +1,218 @@
+"""
+Benchmark the in-memory trust graph against the original per-contractor ORM
+queries.
+
+Builds a synthetic trust network inside a transaction (rolled back at the end
+unless --keep is given), then times calculate_network_trust_score,
+find_trusted_contractors_for_service and get_recommendation_path on both paths.
+
+    python manage.py benchmark_trust_graph --edges 100000
+"""
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Avg
+from django.test.utils import CaptureQueriesContext
+
+from accounts.models import User, Contractor
+from trust_network import utils
+from trust_network.graph import trust_graph
+from trust_network.models import TrustConnection
+
+
+# -------------------------------------------------------------------------- #
+# Original ORM implementations, kept here as the benchmark baseline
+# -------------------------------------------------------------------------- #
+
+def orm_calculate_network_trust_score(contractor, requesting_user):
+    base_score = contractor.trust_score or 0.0
+    first_degree_recs = TrustConnection.objects.filter(
+        recommender=requesting_user, contractor=contractor
+    )
+    if first_degree_recs.exists():
+        return first_degree_recs.first().trust_level * 10 + base_score
+
+    user_trusted_people = TrustConnection.objects.filter(
+        recommender=requesting_user
+    ).values_list('contractor__user_id', flat=True)
+    second_degree_recs = TrustConnection.objects.filter(
+        recommender__id__in=user_trusted_people, contractor=contractor
+    )
+    if second_degree_recs.exists():
+        avg_trust = second_degree_recs.aggregate(Avg('trust_level'))['trust_level__avg']
+        return (avg_trust * 3) + base_score
+    return base_score
+
+
+def orm_find_trusted_contractors_for_service(requesting_user, service=None, max_results=10):
+    first_degree_contractors = TrustConnection.objects.filter(
+        recommender=requesting_user
+    ).values_list('contractor_id', flat=True)
+    user_trusted_people = TrustConnection.objects.filter(
+        recommender=requesting_user
+    ).values_list('contractor__user_id', flat=True)
+    second_degree_contractors = TrustConnection.objects.filter(
+        recommender__id__in=user_trusted_people
+    ).exclude(
+        contractor_id__in=first_degree_contractors
+    ).values_list('contractor_id', flat=True)
+
+    network_contractor_ids = list(first_degree_contractors) + list(second_degree_contractors)
+    if not network_contractor_ids:
+        return []
+
+    contractors = Contractor.objects.filter(id__in=network_contractor_ids).select_related('user')
+    trusted_contractors = []
+    for contractor in contractors:
+        trusted_contractors.append({
+            'contractor': contractor,
+            'network_trust_score': orm_calculate_network_trust_score(contractor, requesting_user),
+            'is_first_degree': contractor.id in first_degree_contractors
+        })
+    trusted_contractors.sort(key=lambda x: x['network_trust_score'], reverse=True)
+    return trusted_contractors[:max_results]
+
+
+def orm_get_recommendation_path(recommender, contractor):
+    direct = TrustConnection.objects.filter(recommender=recommender, contractor=contractor).first()
+    if direct:
+        return [recommender.first_name, contractor.user.first_name]
+
+    user_trusted_people = TrustConnection.objects.filter(
+        recommender=recommender
+    ).values_list('contractor__user_id', flat=True)
+    indirect = TrustConnection.objects.filter(
+        recommender__id__in=user_trusted_people, contractor=contractor
+    ).first()
+    if indirect:
+        return [recommender.first_name, indirect.recommender.first_name, contractor.user.first_name]
+    return []
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = "Compare query counts and latency of the in-memory trust graph against the ORM path"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--edges', type=int, default=100000, help='Number of TrustConnection rows')
+        parser.add_argument('--users', type=int, default=5000, help='Number of plain (customer) users')
+        parser.add_argument('--contractors', type=int, default=2000, help='Number of contractors')
+        parser.add_argument('--samples', type=int, default=50, help='Lookups per operation')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--keep', action='store_true', help='Keep the synthetic data instead of rolling back')
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        try:
+            with transaction.atomic():
+                users, contractors = self._build_network(rng, options)
+                self._run(rng, users, contractors, options['samples'])
+                if not options['keep']:
+                    raise Rollback()
+        except Rollback:
+            self.stdout.write("Synthetic data rolled back.")
+        finally:
+            # The graph may hold rows that were never committed, and with
+            # --keep running servers have to reload theirs
+            trust_graph.reset()
+            trust_graph.mark_changed()
+
+    def _build_network(self, rng, options):
+        self.stdout.write(
+            f"Building network: {options['users']} users, {options['contractors']} contractors, "
+            f"{options['edges']} edges"
+        )
+        token = f"{options['seed']}-{int(time.time())}"
+
+        User.objects.bulk_create([
+            User(email=f"bench-{token}-u{i}@bench.local", first_name=f"U{i}", password='!')
+            for i in range(options['users'] + options['contractors'])
+        ], batch_size=2000)
+        users = list(User.objects.filter(email__startswith=f"bench-{token}-").order_by('id'))
+
+        contractor_users = users[options['users']:]
+        Contractor.objects.bulk_create([
+            Contractor(user=user, city='Bench', state='Bench', address='-', trust_score=rng.uniform(0, 10))
+            for user in contractor_users
+        ], batch_size=2000)
+        contractors = list(
+            Contractor.objects.filter(user__in=contractor_users).select_related('user')
+        )
+
+        max_edges = len(users) * len(contractors)
+        target = min(options['edges'], max_edges)
+        edges = set()
+        while len(edges) < target:
+            recommender = rng.choice(users)
+            contractor = rng.choice(contractors)
+            if contractor.user_id != recommender.id:
+                edges.add((recommender.id, contractor.id))
+
+        TrustConnection.objects.bulk_create([
+            TrustConnection(recommender_id=r, contractor_id=c, trust_level=rng.randint(1, 10))
+            for r, c in edges
+        ], batch_size=5000)
+        return users, contractors
+
+    def _run(self, rng, users, contractors, samples):
+        started = time.perf_counter()
+        with CaptureQueriesContext(connection) as ctx:
+            trust_graph.load()
+        self.stdout.write(
+            f"Graph load: {(time.perf_counter() - started) * 1000:.1f} ms, {len(ctx.captured_queries)} queries"
+        )
+
+        requesters = [u for u in users if u.id in trust_graph.out_edges] or users
+        cases = [(rng.choice(requesters), rng.choice(contractors)) for _ in range(samples)]
+
+        operations = [
+            ('calculate_network_trust_score',
+             lambda u, c: orm_calculate_network_trust_score(c, u),
+             lambda u, c: utils.calculate_network_trust_score(c, u)),
+            ('find_trusted_contractors_for_service',
+             lambda u, c: orm_find_trusted_contractors_for_service(u),
+             lambda u, c: utils.find_trusted_contractors_for_service(u)),
+            ('get_recommendation_path',
+             lambda u, c: orm_get_recommendation_path(u, c),
+             lambda u, c: utils.get_recommendation_path(u, c)),
+        ]
+
+        header = f"{'operation':<40}{'path':<8}{'queries/call':>14}{'mean ms':>12}{'p95 ms':>12}"
+        self.stdout.write(header)
+        self.stdout.write('-' * len(header))
+        for name, orm_fn, graph_fn in operations:
+            for label, fn in (('orm', orm_fn), ('graph', graph_fn)):
+                timings, queries = self._measure(fn, cases)
+                self.stdout.write(
+                    f"{name:<40}{label:<8}{queries / len(cases):>14.1f}"
+                    f"{statistics.mean(timings):>12.3f}{self._p95(timings):>12.3f}"
+                )
+
+    def _measure(self, fn, cases):
+        timings = []
+        query_count = 0
+
+        def count_queries(execute, sql, params, many, context):
+            nonlocal query_count
+            query_count += 1
+            return execute(sql, params, many, context)
+
+        # execute_wrapper rather than CaptureQueriesContext: the ORM path can
+        # exceed the 9000 entry queries_log limit
+        with connection.execute_wrapper(count_queries):
+            for user, contractor in cases:
+                started = time.perf_counter()
+                fn(user, contractor)
+                timings.append((time.perf_counter() - started) * 1000)
+        return timings, query_count
+
+    @staticmethod
+    def _p95(values):
+        ordered = sorted(values)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
@@ -0,0 +1,148 @@
+"""
+Run EXPLAIN on the hot list/filter queries of the works, trust_network and
+appointments views and report, per query, which indexes the plan uses and
+which tables it reads with a sequential scan.
+
+Run it against seeded data (see seed_data/README.md); parameters are taken from
+existing rows. On small tables PostgreSQL rightly prefers sequential scans, so
+--analyze refreshes the planner statistics first and --force-index disables
+sequential scans for the session to check that a usable index exists.
+
+    python manage.py explain_hot_queries --analyze
+    python manage.py explain_hot_queries --force-index --verbose
+"""
+import re
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from accounts.models import Customer, Contractor
+from needs.models import ContractorServices
+from works.models import Tenders, TenderContractor, TenderBids, VirtualAppointment, PhysicalVisit
+from trust_network.models import QuickJob, TrustConnection
+
+# PostgreSQL text plans and SQLite EXPLAIN QUERY PLAN rows
+_INDEX_SCAN = re.compile(
+    r'(?:Index Only Scan|Index Scan|Bitmap Index Scan)(?: Backward)? (?:using|on) (\w+)'
+    r'|USING (?:COVERING )?INDEX (\w+)'
+    r'|USING (INTEGER PRIMARY KEY)'
+)
+_SEQ_SCAN = re.compile(r'Seq Scan on (\w+)|SCAN (\w+)(?! USING)(?:\s|$)')
+
+
+def _sample(queryset, field, default=0):
+    value = queryset.values_list(field, flat=True).first()
+    return default if value is None else value
+
+
+def hot_queries():
+    """(name, queryset) for the query shapes the list views run"""
+    contractor_id = _sample(TenderContractor.objects.filter(status='accepted'), 'contractor_id')
+    contractor = Contractor.objects.filter(id=contractor_id).first() or Contractor(city='', state='')
+    customer_id = _sample(Tenders.objects.all(), 'customer_id')
+    supervisor_id = _sample(VirtualAppointment.objects.all(), 'supervisor_id')
+    quick_job_customer_id = _sample(QuickJob.objects.all(), 'customer_id')
+    assigned_contractor_id = _sample(QuickJob.objects.exclude(assigned_contractor=None), 'assigned_contractor_id')
+    tender_id = _sample(TenderBids.objects.all(), 'tender_requirement__tender_id')
+    now = timezone.now()
+
+    return [
+        ('quick job feed (contractor)', QuickJob.objects.filter(
+            customer__customer__city=contractor.city,
+            customer__customer__state=contractor.state,
+            service_id__in=ContractorServices.objects.filter(
+                contractor_id=contractor_id
+            ).values_list('service_id', flat=True),
+            status='OPEN',
+        ).order_by('-created_at')),
+        ('my quick jobs', QuickJob.objects.filter(customer_id=quick_job_customer_id).order_by('-created_at')),
+        ('contractor assigned quick jobs', QuickJob.objects.filter(
+            assigned_contractor_id=assigned_contractor_id, status='ASSIGNED'
+        )),
+        ('tender list by status', Tenders.objects.filter(status='published').order_by('-created_at', '-id')),
+        ('customer tenders', Tenders.objects.filter(customer_id=customer_id).order_by('-created_at', '-id')),
+        ('supervisor tenders', Tenders.objects.filter(
+            supervisor_id=_sample(Tenders.objects.all(), 'supervisor_id')
+        ).exclude(status='draft').order_by('-created_at')),
+        ('contractor accepted tenders', TenderContractor.objects.filter(
+            contractor_id=contractor_id, status='accepted'
+        ).order_by('added_at')),
+        ('contractor bids on a tender', TenderBids.objects.filter(
+            contractor_id=contractor_id, tender_requirement__tender_id=tender_id
+        )),
+        ('final bids for a tender', TenderBids.objects.filter(
+            tender_requirement__tender_id=tender_id, is_final=True
+        ).values('contractor_id').distinct()),
+        ('contractor recommendations', TrustConnection.objects.filter(contractor_id=contractor_id)),
+        ('supervisor upcoming virtual appointments', VirtualAppointment.objects.filter(
+            supervisor_id=supervisor_id, status__in=['scheduled', 'confirmed'], scheduled_time__gte=now
+        ).order_by('scheduled_time')),
+        ('customer upcoming virtual appointments', VirtualAppointment.objects.filter(
+            customer_id=_sample(VirtualAppointment.objects.all(), 'customer_id'),
+            status__in=['scheduled', 'confirmed'], scheduled_time__gte=now
+        ).order_by('scheduled_time')),
+        ('supervisor physical visits', PhysicalVisit.objects.filter(
+            supervisor_id=_sample(PhysicalVisit.objects.all(), 'supervisor_id'),
+            scheduled_date__gte=(now - timezone.timedelta(days=30)).date()
+        ).order_by('scheduled_date', 'scheduled_time')),
+        ('contractors in a city', Contractor.objects.filter(city=contractor.city, state=contractor.state)),
+        ('customers in a city', Customer.objects.filter(city=contractor.city, state=contractor.state)),
+    ]
+
+
+def analyse_plan(plan):
+    """(index names used, tables read by sequential scan) from an EXPLAIN output"""
+    indexes = sorted({next(name for name in match if name) for match in _INDEX_SCAN.findall(plan)})
+    seq_scans = sorted({next(name for name in match if name) for match in _SEQ_SCAN.findall(plan)})
+    return indexes, seq_scans
+
+
+class Command(BaseCommand):
+    help = 'EXPLAIN the hot view queries and report index usage versus sequential scans'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--analyze', action='store_true', help='Refresh planner statistics first')
+        parser.add_argument(
+            '--force-index', action='store_true',
+            help='Disable sequential scans for the session to check an index can be used (PostgreSQL)'
+        )
+        parser.add_argument('--verbose', action='store_true', help='Print the full plans')
+        parser.add_argument('--strict', action='store_true', help='Fail if any query uses a sequential scan')
+
+    def handle(self, *args, **options):
+        postgres = connection.vendor == 'postgresql'
+        if not Tenders.objects.exists() and not QuickJob.objects.exists():
+            self.stdout.write(self.style.WARNING(
+                'No tenders or quick jobs found; seed the database first for representative plans'
+            ))
+        with connection.cursor() as cursor:
+            if options['analyze']:
+                cursor.execute('ANALYZE')
+            if postgres and options['force_index']:
+                cursor.execute('SET enable_seqscan = off')
+
+        queries = hot_queries()
+        sequential = []
+        for name, queryset in queries:
+            plan = queryset.explain()
+            indexes, seq_scans = analyse_plan(plan)
+            if seq_scans:
+                sequential.append(name)
+                verdict = self.style.WARNING(f"seq scan on {', '.join(seq_scans)}")
+            else:
+                verdict = self.style.SUCCESS('indexed')
+            self.stdout.write(f"{name:<42} {verdict}")
+            self.stdout.write(f"{'':<42} indexes: {', '.join(indexes) or '-'}")
+            if options['verbose']:
+                self.stdout.write(plan + '\n')
+
+        if postgres and options['force_index']:
+            with connection.cursor() as cursor:
+                cursor.execute('RESET enable_seqscan')
+
+        if sequential and options['strict']:
+            raise CommandError(f"Sequential scans in: {', '.join(sequential)}")
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(queries) - len(sequential)} of {len(queries)} queries avoid sequential scans"
+        ))
@@ -0,0 +1,86 @@
+"""
+Compare the Gemini prompt built from the full Services catalog with the
+shortlisted catalog digest.
+
+For each query, prints the services shortlisted and the prompt size in both
+modes. With --call (and GEMINI_API_KEY set) the prompts are also sent to
+Gemini and the average latency per mode is reported.
+
+    python manage.py gemini_prompt_report
+    python manage.py gemini_prompt_report "plumber urgent chahiye" --call
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from trust_network.gemini_service import gemini_service
+from trust_network.service_catalog import service_catalog, prompt_stats
+
+SAMPLE_QUERIES = [
+    'AC theek karne wala chahiye urgent',
+    'Plumber urgent chahiye, paani leak ho raha hai',
+    'Ghar ki safai karvani hai',
+    'Need someone to paint the bedroom walls',
+    'दरवाजा टूट गया है, बढ़ई चाहिए',
+]
+MODES = ('full', 'shortlist')
+
+
+class Command(BaseCommand):
+    help = 'Report Gemini prompt size (and optionally latency) for the full and shortlisted service catalog'
+
+    def add_arguments(self, parser):
+        parser.add_argument('queries', nargs='*', help='Queries to check (defaults to a built-in sample)')
+        parser.add_argument('--call', action='store_true', help='Send the prompts to Gemini and time them')
+
+    def handle(self, *args, **options):
+        queries = options['queries'] or SAMPLE_QUERIES
+        if options['call'] and gemini_service.model is None:
+            raise CommandError('--call needs GEMINI_API_KEY to be configured')
+
+        service_catalog.invalidate()
+        catalog = service_catalog.ensure_loaded()
+        self.stdout.write(
+            f"Catalog: {len(catalog.services)} services, digest built in "
+            f"{catalog.build_seconds * 1000:.1f} ms"
+        )
+
+        totals = {mode: 0 for mode in MODES}
+        for query in queries:
+            shortlist = service_catalog.shortlist(query)
+            self.stdout.write(f"\n{query}")
+            self.stdout.write(f"  shortlist: {', '.join(s['name'] for s in shortlist) or '-'}")
+            for mode in MODES:
+                prompt, services_sent = gemini_service._build_prompt(query, mode)
+                totals[mode] += len(prompt)
+                self.stdout.write(
+                    f"  {mode:<9} {len(prompt):>7} chars (~{len(prompt) // 4} tokens), "
+                    f"{services_sent} services"
+                )
+
+        full, shortlisted = (totals[mode] / len(queries) for mode in MODES)
+        self.stdout.write(
+            f"\nAverage prompt: {full:.0f} chars full, {shortlisted:.0f} chars shortlisted "
+            f"({(1 - shortlisted / full) * 100:.0f}% smaller)"
+        )
+
+        if options['call']:
+            self._time_calls(queries)
+
+        self.stdout.write(self.style.SUCCESS('Done'))
+
+    def _time_calls(self, queries):
+        from django.test.utils import override_settings
+
+        prompt_stats.reset()
+        for mode in MODES:
+            with override_settings(GEMINI_PROMPT_MODE=mode):
+                for query in queries:
+                    try:
+                        gemini_service._call_gemini(query)
+                    except Exception as e:
+                        self.stdout.write(self.style.WARNING(f"{mode}: {query!r} failed: {e}"))
+
+        for mode, stats in prompt_stats.summary().items():
+            self.stdout.write(
+                f"{mode:<9} {stats['calls']} calls, {stats['errors']} errors, "
+                f"avg {stats['avg_latency_ms']} ms, avg ~{stats['avg_prompt_tokens']} prompt tokens"
+            )
@@ -0,0 +1,47 @@
+"""
+Load locality coordinates for quick job radius search from a CSV file with
+city, state, latitude and longitude columns (header row required).
+
+Existing localities are matched on their normalised city and state and get
+their coordinates updated; unknown ones are created.
+
+    python manage.py import_localities localities.csv
+"""
+import csv
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from trust_network.localities import get_locality
+
+
+class Command(BaseCommand):
+    help = 'Import city/state coordinates for quick job radius search'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV file with city, state, latitude, longitude columns')
+
+    def handle(self, *args, **options):
+        try:
+            with open(options['path'], newline='', encoding='utf-8') as f:
+                rows = list(csv.DictReader(f))
+        except OSError as e:
+            raise CommandError(str(e))
+
+        imported = skipped = 0
+        with transaction.atomic():
+            for row in rows:
+                try:
+                    latitude, longitude = float(row['latitude']), float(row['longitude'])
+                except (KeyError, TypeError, ValueError):
+                    skipped += 1
+                    continue
+                locality = get_locality(row.get('city', ''), row.get('state', ''))
+                if locality is None:
+                    skipped += 1
+                    continue
+                locality.latitude, locality.longitude = latitude, longitude
+                locality.save()
+                imported += 1
+
+        self.stdout.write(self.style.SUCCESS(f"Imported {imported} localities ({skipped} rows skipped)"))
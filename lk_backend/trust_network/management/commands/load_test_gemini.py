@@ -0,0 +1,168 @@
+"""
+Load test the Gemini client against a local fake Gemini server.
+
+Starts an HTTP server on 127.0.0.1 that answers generateContent requests after a
+configurable latency, failing a share of them, then fires concurrent voice
+queries (with many repeats) through a GeminiNLPService pointed at it.
+Reports how many model calls were made, coalesced requests, timeouts,
+fallbacks, the breaker state and caller latency percentiles.
+
+    python manage.py load_test_gemini --requests 500 --concurrency 50 --latency 800 --error-rate 0.1
+"""
+import json
+import random
+import re
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.test.utils import override_settings
+
+from trust_network.gemini_service import GeminiNLPService
+from trust_network.nlp_cache import DisabledQueryCache, QueryCache, LocalMemoryBackend
+
+QUERIES = [
+    'AC theek karne wala chahiye urgent',
+    'Plumber urgent chahiye',
+    'Ghar ki safai karvani hai',
+    'Painting work urgent',
+    'बिजली का काम तुरंत चाहिए',
+    'door repair needed tomorrow',
+    'water tank cleaning this week',
+    'fan not working, need electrician today',
+]
+
+_USER_QUERY = re.compile(r'User Query: "(.*?)"')
+_BATCH_QUERY = re.compile(r'^\s*(\d+)\. (".*")$', re.MULTILINE)
+
+
+def _parsed(query):
+    return {
+        'service_category': 'other',
+        'service_id': None,
+        'urgency': 'MEDIUM',
+        'suggested_title': 'Service Request',
+        'suggested_description': query,
+        'keywords': [],
+        'confidence': 0.9,
+        'language_detected': 'other',
+    }
+
+
+class FakeGeminiServer(ThreadingHTTPServer):
+    """Answers generateContent calls (single or batch prompts) with a canned parse after simulated latency"""
+    daemon_threads = True
+
+    def __init__(self, latency, jitter, error_rate, seed):
+        super().__init__(('127.0.0.1', 0), FakeGeminiHandler)
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rng = random.Random(seed)
+        self.calls = 0
+        self.failures = 0
+        self.lock = threading.Lock()
+
+    @property
+    def endpoint(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+
+class FakeGeminiHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        server = self.server
+        body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+        with server.lock:
+            server.calls += 1
+            delay = max(0.0, server.rng.gauss(server.latency, server.jitter))
+            fail = server.rng.random() < server.error_rate
+            server.failures += int(fail)
+        time.sleep(delay)
+
+        if fail:
+            self._send(503, {'error': {'code': 503, 'message': 'Simulated overload', 'status': 'UNAVAILABLE'}})
+            return
+
+        prompt = body['contents'][0]['parts'][0]['text']
+        batch = _BATCH_QUERY.findall(prompt)
+        if batch:
+            answer = [dict(_parsed(json.loads(query)), index=int(index)) for index, query in batch]
+        else:
+            match = _USER_QUERY.search(prompt)
+            answer = _parsed(match.group(1) if match else '')
+        self._send(200, {
+            'candidates': [{
+                'content': {'role': 'model', 'parts': [{'text': json.dumps(answer)}]},
+                'finishReason': 'STOP',
+                'index': 0,
+            }]
+        })
+
+    def _send(self, status_code, payload):
+        data = json.dumps(payload).encode()
+        self.send_response(status_code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class Command(BaseCommand):
+    help = 'Load test the Gemini client (deadlines, circuit breaker, coalescing) against a fake Gemini server'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200, help='Voice queries to send')
+        parser.add_argument('--concurrency', type=int, default=20, help='Concurrent callers')
+        parser.add_argument('--latency', type=float, default=500, help='Mean fake model latency in ms')
+        parser.add_argument('--jitter', type=float, default=150, help='Latency standard deviation in ms')
+        parser.add_argument('--error-rate', type=float, default=0.0, help='Share of model calls that fail')
+        parser.add_argument('--timeout', type=float, default=2.0, help='Client deadline in seconds')
+        parser.add_argument('--cache', action='store_true', help='Keep the parsed query cache on (off by default)')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        server = FakeGeminiServer(
+            options['latency'] / 1000, options['jitter'] / 1000, options['error_rate'], options['seed']
+        )
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+
+        cache = QueryCache(LocalMemoryBackend(1000), 3600) if options['cache'] else DisabledQueryCache()
+        with override_settings(GEMINI_TIMEOUT_SECONDS=options['timeout']):
+            service = GeminiNLPService(api_key='fake-key', api_endpoint=server.endpoint, cache=cache)
+
+        rng = random.Random(options['seed'])
+        queries = [rng.choice(QUERIES) for _ in range(options['requests'])]
+
+        def call(query):
+            started = time.perf_counter()
+            try:
+                service.parse_voice_query(query)
+            finally:
+                connections.close_all()
+            return time.perf_counter() - started
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(options['concurrency']) as pool:
+            latencies = sorted(pool.map(call, queries))
+        elapsed = time.perf_counter() - started
+        server.shutdown()
+
+        stats = service.client.stats()
+        self.stdout.write(f"Requests:        {len(queries)} in {elapsed:.2f}s ({len(queries) / elapsed:.0f}/s)")
+        self.stdout.write(f"Model calls:     {server.calls} received by the fake server ({server.failures} failed)")
+        for name in ('cache_hits', 'coalesced', 'timeouts', 'errors', 'short_circuited', 'fallbacks'):
+            self.stdout.write(f"{name.replace('_', ' ').capitalize() + ':':<17}{stats[name]}")
+        self.stdout.write(f"Breaker:         {stats['breaker']}")
+        self.stdout.write(
+            f"Latency (ms):    p50 {statistics.median(latencies) * 1000:.0f}, "
+            f"p95 {latencies[int(len(latencies) * 0.95) - 1] * 1000:.0f}, "
+            f"max {latencies[-1] * 1000:.0f}"
+        )
+        self.stdout.write(self.style.SUCCESS('Done'))
@@ -0,0 +1,178 @@
+"""
+Request every GET endpoint of lk_backend/urls.py and print, per endpoint, the
+status, the number of queries, the most repeated query shape (the N+1
+signature), SQL and total milliseconds, and whether the view's query budget
+holds (see lk_backend.query_budget).
+
+Run it against seeded data (see seed_data/README.md). Requests are made as one
+user (--user, or the first user of --role) with URL parameters taken from rows
+that user can see where possible, and are rolled back afterwards since some
+GET views create rows. Endpoints whose parameters have no row are skipped.
+
+    python manage.py query_report --role contractor
+    python manage.py query_report --filter tenders --param tender_id=12 --strict
+"""
+import re
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test.utils import override_settings
+from django.urls import URLPattern, URLResolver, get_resolver
+from django.urls.resolvers import RoutePattern
+from rest_framework.test import APIClient
+
+from accounts.models import User, Contractor
+from needs.models import Services
+from works.models import Tenders, TenderContractor, PhysicalVisit
+from trust_network.models import QuickJob
+from lk_backend.query_budget import QueryLog, view_budget
+
+# Sample rows for URL parameters that are not a view's own pk
+PARAM_MODELS = {
+    'tender_id': Tenders,
+    'contractor_id': Contractor,
+    'service_id': Services,
+    'job_id': QuickJob,
+    'visit_id': PhysicalVisit,
+}
+_PARAMETER = re.compile(r'<(?:\w+:)?(\w+)>')
+
+
+def get_routes(resolver=None, prefix=''):
+    """(route, view) of every route() pattern, admin excluded"""
+    routes = []
+    for pattern in (resolver or get_resolver()).url_patterns:
+        if not isinstance(pattern.pattern, RoutePattern):
+            continue  # regex patterns: admin, static files
+        route = prefix + str(pattern.pattern)
+        if isinstance(pattern, URLResolver):
+            if getattr(pattern, 'app_name', None) != 'admin':
+                routes.extend(get_routes(pattern, route))
+        elif isinstance(pattern, URLPattern):
+            routes.append((route, pattern.callback))
+    return routes
+
+
+def view_model(view):
+    view_class = getattr(view, 'cls', None) or getattr(view, 'view_class', None)
+    queryset = getattr(view_class, 'queryset', None)
+    if queryset is not None:
+        return queryset.model
+    serializer_class = getattr(view_class, 'serializer_class', None)
+    meta = getattr(serializer_class, 'Meta', None)
+    return getattr(meta, 'model', None)
+
+
+def user_samples(user):
+    """URL parameter values related to user, where it has such rows"""
+    samples = {}
+    contractor = getattr(user, 'contractor', None)
+    tenders = Tenders.objects.none()
+    if contractor is not None:
+        samples['contractor_id'] = contractor.id
+        tenders = Tenders.objects.filter(
+            id__in=TenderContractor.objects.filter(contractor=contractor).values('tender_id')
+        )
+        samples['job_id'] = QuickJob.objects.filter(assigned_contractor=contractor).values_list('id', flat=True).first()
+    elif hasattr(user, 'customer'):
+        tenders = Tenders.objects.filter(customer=user.customer)
+        samples['job_id'] = QuickJob.objects.filter(customer=user).values_list('id', flat=True).first()
+    elif hasattr(user, 'supervisor'):
+        tenders = Tenders.objects.filter(supervisor=user.supervisor)
+        samples['visit_id'] = PhysicalVisit.objects.filter(
+            supervisor=user.supervisor
+        ).values_list('id', flat=True).first()
+    samples['tender_id'] = tenders.order_by('-id').values_list('id', flat=True).first()
+    return {name: value for name, value in samples.items() if value is not None}
+
+
+def fill_route(route, view, params):
+    """(url, None) with the parameters of route filled in, or (None, name of a parameter with no value)"""
+    missing = []
+
+    def value(match):
+        name = match.group(1)
+        value = params.get(name)
+        if value is None:
+            model = view_model(view) if name == 'pk' else PARAM_MODELS.get(name)
+            value = model and model.objects.order_by('-pk').values_list('pk', flat=True).first()
+        if value is None:
+            missing.append(name)
+            return match.group(0)
+        return str(value)
+
+    url = '/' + _PARAMETER.sub(value, route)
+    return (None, missing[0]) if missing else (url, None)
+
+
+def _shorten(text, width=160):
+    return text if len(text) <= width else text[:width - 3] + '...'
+
+
+class Command(BaseCommand):
+    help = 'Print queries and milliseconds of every GET endpoint, flagging query budget overruns'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', help='Email of the user to request as')
+        parser.add_argument(
+            '--role', type=str.upper, choices=User.Roles.values, default=User.Roles.CUSTOMER,
+            help='Request as the first user of this role (ignored with --user)'
+        )
+        parser.add_argument('--param', action='append', default=[], metavar='NAME=VALUE',
+                            help='URL parameter value, e.g. tender_id=12 (repeatable)')
+        parser.add_argument('--filter', default='', help='Only routes containing this text')
+        parser.add_argument('--strict', action='store_true', help='Fail if any endpoint exceeds its budget')
+
+    def handle(self, *args, **options):
+        if options['user']:
+            user = User.objects.filter(email=options['user']).first()
+        else:
+            user = User.objects.filter(role=options['role']).order_by('id').first()
+        if user is None:
+            raise CommandError('No such user; seed the database first or pass --user')
+        params = user_samples(user)
+        for param in options['param']:
+            name, _, value = param.partition('=')
+            params[name] = value
+
+        routes = [(route, view) for route, view in get_routes() if options['filter'] in route]
+        client = APIClient(raise_request_exception=False)
+        client.force_authenticate(user)
+        self.stdout.write(f"As {user.email} ({user.role}), parameters {params}\n")
+        self.stdout.write(f"{'endpoint':<62} {'status':>6} {'queries':>7} {'repeat':>6} {'sql ms':>8} {'ms':>8}  budget")
+
+        over = []
+        # The middleware's own checks would duplicate the report
+        with override_settings(QUERY_BUDGET_ENABLED=False, ALLOWED_HOSTS=['*']):
+            for route, view in routes:
+                url, missing = fill_route(route, view, params)
+                if url is None:
+                    self.stdout.write(f"{'/' + route:<62} {'skip':>6}  no sample for {missing}")
+                    continue
+                # Roll back what GET views write
+                with transaction.atomic(), QueryLog() as log:
+                    started = time.perf_counter()
+                    response = client.get(url)
+                    elapsed = (time.perf_counter() - started) * 1000
+                    transaction.set_rollback(True)
+                if response.status_code == 405:
+                    self.stdout.write(f"{url:<62} {'skip':>6}  no GET")
+                    continue
+                budget = view_budget(response.wsgi_request)
+                problems = log.problems(budget, settings.QUERY_BUDGET_REPEAT_LIMIT)
+                repeated = log.repeated(0)
+                if problems:
+                    over.append(url)
+                    verdict = self.style.WARNING('; '.join(_shorten(problem) for problem in problems))
+                else:
+                    verdict = self.style.SUCCESS(f'ok ({budget})')
+                self.stdout.write(
+                    f"{url:<62} {response.status_code:>6} {len(log):>7} {repeated[0][1] if repeated else 0:>6} "
+                    f"{log.milliseconds:>8.1f} {elapsed:>8.1f}  {verdict}"
+                )
+
+        if over and options['strict']:
+            raise CommandError(f"Over budget: {', '.join(over)}")
+        self.stdout.write(self.style.SUCCESS(f"{len(over)} of {len(routes)} endpoints over budget"))
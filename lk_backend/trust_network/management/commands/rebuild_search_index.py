@@ -0,0 +1,25 @@
+"""
+Recreate the full-text search indexes for tenders and quick jobs (tsvector
+column, triggers and GIN/trigram indexes on PostgreSQL; FTS5 tables and
+triggers on SQLite) and re-index every row.
+
+The indexes are kept current by database triggers; run this if they were
+dropped, e.g. after a SQLite migration rebuilt an indexed table.
+
+    python manage.py rebuild_search_index
+"""
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from trust_network.search import tender_search, quick_job_search
+
+
+class Command(BaseCommand):
+    help = 'Recreate the tender and quick job full-text search indexes'
+
+    def handle(self, *args, **options):
+        with connection.schema_editor() as schema_editor:
+            for index in (tender_search, quick_job_search):
+                index.install(schema_editor)
+                self.stdout.write(f"Indexed {index.names['table']}")
+        self.stdout.write(self.style.SUCCESS('Search indexes rebuilt'))
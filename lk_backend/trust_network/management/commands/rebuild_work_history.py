@@ -0,0 +1,20 @@
+"""
+Rebuild the denormalised work history (CompletedWork and the contractor /
+customer work summaries) from Tenders and QuickJob.
+
+The tables are kept current by signals; run this after bulk imports or
+queryset.update() calls that bypass them.
+
+    python manage.py rebuild_work_history
+"""
+from django.core.management.base import BaseCommand
+
+from trust_network.work_history import rebuild_work_summaries
+
+
+class Command(BaseCommand):
+    help = 'Rebuild contractor work history summaries from completed tenders and quick jobs'
+
+    def handle(self, *args, **options):
+        count = rebuild_work_summaries()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt work history from {count} completed jobs"))
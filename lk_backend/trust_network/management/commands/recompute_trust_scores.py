@@ -0,0 +1,96 @@
+"""
+Fully recompute contractor trust scores from TrustConnection rows.
+
+Trust scores are maintained incrementally by the TrustConnection signals; this
+rebuilds the ContractorTrustAggregate / RecommenderNetworkSize tables from
+scratch, or with --check only reports where the incremental values drifted.
+
+    python manage.py recompute_trust_scores --check
+    python manage.py recompute_trust_scores --contractor 12 --contractor 15
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.models import Contractor
+from trust_network import scoring
+from trust_network.models import ContractorTrustAggregate, RecommenderNetworkSize
+
+
+class Command(BaseCommand):
+    help = 'Recompute contractor trust scores and compare them with the incremental values'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check', action='store_true',
+            help='Only report mismatches, do not write anything (exit code 1 on drift)'
+        )
+        parser.add_argument(
+            '--contractor', type=int, action='append', dest='contractors',
+            help='Limit to this contractor id (repeatable)'
+        )
+        parser.add_argument('--show', type=int, default=20, help='Mismatches to print')
+
+    def handle(self, *args, **options):
+        contractors = Contractor.objects.order_by('id')
+        if options['contractors']:
+            contractors = contractors.filter(id__in=options['contractors'])
+        contractor_ids = list(contractors.values_list('id', flat=True))
+
+        sums, network_sizes = scoring.compute_trust_aggregates(
+            contractor_ids if options['contractors'] else None
+        )
+        mismatches = self.find_mismatches(contractor_ids, sums, network_sizes)
+
+        self.stdout.write(
+            f"Checked {len(contractor_ids)} contractors and {len(network_sizes)} recommenders: "
+            f"{len(mismatches)} mismatches"
+        )
+        for line in mismatches[:options['show']]:
+            self.stdout.write(f"  {line}")
+
+        if options['check']:
+            if mismatches:
+                raise CommandError(f"{len(mismatches)} trust score mismatches found")
+            return
+
+        changed = scoring.apply_trust_aggregates(
+            contractor_ids, sums, network_sizes, reason="Full trust score recomputation"
+        )
+        self.stdout.write(self.style.SUCCESS(f"Updated {len(changed)} contractor trust scores"))
+
+    def find_mismatches(self, contractor_ids, sums, network_sizes):
+        mismatches = []
+
+        stored_sizes = dict(
+            RecommenderNetworkSize.objects.filter(
+                recommender_id__in=network_sizes
+            ).values_list('recommender_id', 'network_size')
+        )
+        for recommender_id, network_size in sorted(network_sizes.items()):
+            stored = stored_sizes.get(recommender_id, 0)
+            if stored != network_size:
+                mismatches.append(
+                    f"recommender {recommender_id}: network size {stored} != {network_size}"
+                )
+
+        aggregates = ContractorTrustAggregate.objects.in_bulk(contractor_ids, field_name='contractor_id')
+        scores = dict(Contractor.objects.filter(id__in=contractor_ids).values_list('id', 'trust_score'))
+        for contractor_id in contractor_ids:
+            expected = ContractorTrustAggregate(contractor_id=contractor_id)
+            (expected.recommendation_count, expected.sum_trust,
+             expected.sum_trust_network, expected.sum_network) = sums.get(contractor_id, (0, 0, 0, 0))
+
+            aggregate = aggregates.get(contractor_id) or ContractorTrustAggregate(contractor_id=contractor_id)
+            stored_sums = (aggregate.recommendation_count, aggregate.sum_trust,
+                           aggregate.sum_trust_network, aggregate.sum_network)
+            expected_sums = (expected.recommendation_count, expected.sum_trust,
+                             expected.sum_trust_network, expected.sum_network)
+            if stored_sums != expected_sums:
+                mismatches.append(f"contractor {contractor_id}: sums {stored_sums} != {expected_sums}")
+
+            stored_score = scores.get(contractor_id) or 0.0
+            expected_score = expected.calculate_trust_score()
+            if abs(stored_score - expected_score) > scoring.SCORE_TOLERANCE:
+                mismatches.append(
+                    f"contractor {contractor_id}: trust_score {stored_score:.4f} != {expected_score:.4f}"
+                )
+        return mismatches
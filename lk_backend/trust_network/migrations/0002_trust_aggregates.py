@@ -0,0 +1,81 @@
+# Generated by Django 5.2.1 on 2026-10-17 23:32
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_trust_aggregates(apps, schema_editor):
+    """Seed the running sums from existing recommendations (scores are left as stored)"""
+    TrustConnection = apps.get_model('trust_network', 'TrustConnection')
+    ContractorTrustAggregate = apps.get_model('trust_network', 'ContractorTrustAggregate')
+    RecommenderNetworkSize = apps.get_model('trust_network', 'RecommenderNetworkSize')
+
+    network_sizes = dict(
+        TrustConnection.objects.order_by().values('recommender_id').annotate(
+            size=models.Count('id')
+        ).values_list('recommender_id', 'size')
+    )
+    RecommenderNetworkSize.objects.bulk_create(
+        [
+            RecommenderNetworkSize(recommender_id=recommender_id, network_size=size)
+            for recommender_id, size in network_sizes.items()
+        ],
+        batch_size=500
+    )
+
+    sums = {}
+    rows = TrustConnection.objects.order_by().values_list('contractor_id', 'recommender_id', 'trust_level')
+    for contractor_id, recommender_id, trust_level in rows.iterator(chunk_size=5000):
+        network_size = network_sizes[recommender_id]
+        contractor_sums = sums.setdefault(contractor_id, [0, 0, 0, 0])
+        contractor_sums[0] += 1
+        contractor_sums[1] += trust_level
+        contractor_sums[2] += trust_level * network_size
+        contractor_sums[3] += network_size
+    ContractorTrustAggregate.objects.bulk_create(
+        [
+            ContractorTrustAggregate(
+                contractor_id=contractor_id,
+                recommendation_count=count,
+                sum_trust=sum_trust,
+                sum_trust_network=sum_trust_network,
+                sum_network=sum_network,
+            )
+            for contractor_id, (count, sum_trust, sum_trust_network, sum_network) in sums.items()
+        ],
+        batch_size=500
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+        ('trust_network', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContractorTrustAggregate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('recommendation_count', models.PositiveIntegerField(default=0)),
+                ('sum_trust', models.BigIntegerField(default=0, help_text='Sum of trust levels')),
+                ('sum_trust_network', models.BigIntegerField(default=0, help_text='Sum of trust level x recommender network size')),
+                ('sum_network', models.BigIntegerField(default=0, help_text='Sum of recommender network sizes')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('contractor', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='trust_aggregate', to='accounts.contractor')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='RecommenderNetworkSize',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('network_size', models.PositiveIntegerField(default=0)),
+                ('recommender', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='trust_network_size', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.RunPython(backfill_trust_aggregates, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.1 on 2026-10-17 23:36
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+        ('trust_network', '0002_trust_aggregates'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrustIndexChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('recommender_id', models.BigIntegerField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='TrustIndexEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rank', models.PositiveSmallIntegerField()),
+                ('score', models.FloatField(help_text='Propagated network trust score')),
+                ('hops', models.PositiveSmallIntegerField(help_text='Shortest recommendation chain length')),
+                ('recommendation_count', models.PositiveIntegerField(default=1, help_text='Recommendations reaching the contractor at that distance')),
+                ('computed_at', models.DateTimeField(auto_now=True)),
+                ('connector', models.ForeignKey(blank=True, help_text='Most trusted last-hop recommender, empty for direct recommendations', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('contractor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='accounts.contractor')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='trust_index_entries', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['user', 'rank'],
+                'indexes': [models.Index(fields=['user', 'rank'], name='trust_netwo_user_id_da0558_idx')],
+                'unique_together': {('user', 'contractor')},
+            },
+        ),
+    ]
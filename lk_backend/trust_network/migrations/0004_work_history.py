@@ -0,0 +1,73 @@
+# Generated by Django 5.2.1 on 2026-10-17 23:41
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_work_history(apps, schema_editor):
+    from trust_network.work_history import rebuild_work_summaries
+    rebuild_work_summaries(apps)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+        ('trust_network', '0003_trust_index'),
+        ('works', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContractorWorkSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('completed_tenders', models.PositiveIntegerField(default=0)),
+                ('completed_quick_jobs', models.PositiveIntegerField(default=0)),
+                ('last_completed_at', models.DateTimeField(blank=True, null=True)),
+                ('recent_work', models.JSONField(default=list)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('contractor', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='work_summary', to='accounts.contractor')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='CompletedWork',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('work_type', models.CharField(choices=[('tender', 'Tender'), ('quick_job', 'Quick Job')], max_length=20)),
+                ('work_id', models.PositiveIntegerField(help_text='Tenders or QuickJob id')),
+                ('title', models.CharField(max_length=255)),
+                ('service_name', models.CharField(max_length=255)),
+                ('customer_name', models.CharField(max_length=100)),
+                ('location', models.CharField(max_length=255)),
+                ('budget', models.FloatField(blank=True, null=True)),
+                ('completed_at', models.DateTimeField()),
+                ('contractor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='completed_work', to='accounts.contractor')),
+                ('customer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='completed_work', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['contractor', '-completed_at', '-id'], name='trust_netwo_contrac_4767e5_idx'), models.Index(fields=['customer', 'contractor', '-completed_at', '-id'], name='trust_netwo_custome_955c6d_idx')],
+                'unique_together': {('work_type', 'work_id')},
+            },
+        ),
+        migrations.CreateModel(
+            name='CustomerContractorWorkSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('completed_tenders', models.PositiveIntegerField(default=0)),
+                ('completed_quick_jobs', models.PositiveIntegerField(default=0)),
+                ('last_completed_at', models.DateTimeField(blank=True, null=True)),
+                ('recent_work', models.JSONField(default=list)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('contractor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='customer_work_summaries', to='accounts.contractor')),
+                ('customer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='contractor_work_summaries', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['customer', '-last_completed_at', '-id'], name='trust_netwo_custome_6e7645_idx')],
+                'unique_together': {('customer', 'contractor')},
+            },
+        ),
+        migrations.RunPython(backfill_work_history, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,25 @@
+# Full-text search index for quick jobs (see trust_network/search.py)
+
+from django.db import migrations
+
+
+def install_search(apps, schema_editor):
+    from trust_network.search import quick_job_search
+    quick_job_search.install(schema_editor, apps)
+
+
+def uninstall_search(apps, schema_editor):
+    from trust_network.search import quick_job_search
+    quick_job_search.uninstall(schema_editor, apps)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('needs', '0001_initial'),
+        ('trust_network', '0004_work_history'),
+    ]
+
+    operations = [
+        migrations.RunPython(install_search, uninstall_search),
+    ]
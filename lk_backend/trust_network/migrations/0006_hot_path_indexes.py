@@ -0,0 +1,37 @@
+# Generated by Django 5.2.1 on 2026-10-18 00:03
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_hot_path_indexes'),
+        ('needs', '0001_initial'),
+        ('trust_network', '0005_quick_job_search'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='quickjob',
+            index=models.Index(fields=['status', 'service', '-created_at'], name='trust_netwo_status_b99aa1_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='quickjob',
+            index=models.Index(fields=['customer', '-created_at'], name='trust_netwo_custome_4bab25_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='quickjob',
+            index=models.Index(fields=['assigned_contractor', 'status'], name='trust_netwo_assigne_a7e5ca_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='quickjob',
+            index=models.Index(condition=models.Q(('status', 'OPEN')), fields=['service', '-created_at'], name='quickjob_open_service_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='trustconnection',
+            index=models.Index(fields=['contractor', 'recommender'], name='trust_netwo_contrac_65b052_idx'),
+        ),
+    ]
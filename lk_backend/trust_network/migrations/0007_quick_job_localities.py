@@ -0,0 +1,71 @@
+# Generated by Django 5.2.1 on 2026-10-18 00:05
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_localities(apps, schema_editor):
+    """File existing quick jobs under their customer's current city"""
+    from trust_network.localities import place_key
+
+    Customer = apps.get_model('accounts', 'Customer')
+    Locality = apps.get_model('trust_network', 'Locality')
+    QuickJob = apps.get_model('trust_network', 'QuickJob')
+
+    places = {
+        user_id: (city, state)
+        for user_id, city, state in Customer.objects.values_list('user_id', 'city', 'state')
+    }
+    localities = {}
+    for user_id in QuickJob.objects.values_list('customer_id', flat=True).distinct():
+        city, state = places.get(user_id, ('', ''))
+        key = (place_key(state), place_key(city))
+        if not key[1]:
+            continue
+        if key not in localities:
+            localities[key], _ = Locality.objects.get_or_create(
+                state_key=key[0], city_key=key[1],
+                defaults={'city': city.strip(), 'state': state.strip()},
+            )
+        QuickJob.objects.filter(customer_id=user_id).update(locality=localities[key])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_hot_path_indexes'),
+        ('needs', '0001_initial'),
+        ('trust_network', '0006_hot_path_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Locality',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('city', models.CharField(max_length=40)),
+                ('state', models.CharField(max_length=40)),
+                ('city_key', models.CharField(help_text='Normalised city name', max_length=40)),
+                ('state_key', models.CharField(help_text='Normalised state name', max_length=40)),
+                ('latitude', models.FloatField(blank=True, null=True)),
+                ('longitude', models.FloatField(blank=True, null=True)),
+                ('geohash', models.CharField(blank=True, db_index=True, help_text='Geohash of the coordinates, for radius search', max_length=12)),
+            ],
+            options={
+                'verbose_name_plural': 'localities',
+                'unique_together': {('state_key', 'city_key')},
+            },
+        ),
+        migrations.AddField(
+            model_name='quickjob',
+            name='locality',
+            field=models.ForeignKey(blank=True, help_text="Customer's locality when the job was posted", null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='quick_jobs', to='trust_network.locality'),
+        ),
+        migrations.AddIndex(
+            model_name='quickjob',
+            index=models.Index(fields=['service', 'locality', 'status', '-created_at'], name='trust_netwo_service_8e31f7_idx'),
+        ),
+        migrations.RunPython(backfill_localities, migrations.RunPython.noop),
+    ]
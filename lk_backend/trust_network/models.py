@@ -2,6 +2,7 @@ from django.db import models
 from django.core.validators import MinValueValidator, MaxValueValidator
 from accounts.models import User, Contractor
 from needs.models import Services
+from .localities import geohash_encode, place_key
 
 
 class TrustConnection(models.Model):
@@ -43,11 +44,48 @@ class TrustConnection(models.Model):
     class Meta:
         unique_together = ('recommender', 'contractor')
         ordering = ['-created_at']
+        indexes = [
+            # Connector lookups: a contractor's recommenders within a network
+            models.Index(fields=['contractor', 'recommender']),
+        ]
     
     def __str__(self):
         return f"{self.recommender.first_name} recommends {self.contractor.user.first_name}"
 
 
+class Locality(models.Model):
+    """
+    A city/state pair, matched on normalised keys, with optional coordinates.
+    Quick jobs are filed under their customer's locality (see localities.py).
+    """
+    city = models.CharField(max_length=40)
+    state = models.CharField(max_length=40)
+    city_key = models.CharField(max_length=40, help_text="Normalised city name")
+    state_key = models.CharField(max_length=40, help_text="Normalised state name")
+    latitude = models.FloatField(null=True, blank=True)
+    longitude = models.FloatField(null=True, blank=True)
+    geohash = models.CharField(
+        max_length=12, blank=True, db_index=True,
+        help_text="Geohash of the coordinates, for radius search"
+    )
+    
+    class Meta:
+        unique_together = ('state_key', 'city_key')
+        verbose_name_plural = 'localities'
+    
+    def save(self, *args, **kwargs):
+        self.city_key = place_key(self.city)
+        self.state_key = place_key(self.state)
+        if self.latitude is not None and self.longitude is not None:
+            self.geohash = geohash_encode(self.latitude, self.longitude)
+        else:
+            self.geohash = ''
+        super().save(*args, **kwargs)
+    
+    def __str__(self):
+        return f"{self.city}, {self.state}"
+
+
 class QuickJob(models.Model):
     """
     Lightweight alternative to Tender for small, urgent tasks.
@@ -99,6 +137,14 @@ class QuickJob(models.Model):
         blank=True,
         help_text="Suggested budget range"
     )
+    locality = models.ForeignKey(
+        Locality,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='quick_jobs',
+        help_text="Customer's locality when the job was posted"
+    )
     
     # Assignment details
     assigned_contractor = models.ForeignKey(
@@ -127,6 +173,19 @@ class QuickJob(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'service', '-created_at']),
+            models.Index(fields=['customer', '-created_at']),
+            models.Index(fields=['assigned_contractor', 'status']),
+            # Contractor feed: jobs in their services and localities
+            models.Index(fields=['service', 'locality', 'status', '-created_at']),
+            # Contractor feed of open jobs in their services
+            models.Index(
+                fields=['service', '-created_at'],
+                condition=models.Q(status='OPEN'),
+                name='quickjob_open_service_idx',
+            ),
+        ]
     
     def __str__(self):
         return f"{self.title} by {self.customer.first_name}"
@@ -186,3 +245,199 @@ class TrustScoreLog(models.Model):
     
     def __str__(self):
         return f"{self.contractor.user.first_name}: {self.old_score} → {self.new_score}"
+
+
+class ContractorTrustAggregate(models.Model):
+    """
+    Running sums behind Contractor.trust_score, maintained incrementally as
+    TrustConnection rows change (see scoring.py).
+
+    Each recommendation is weighted by 1 + 0.1 * (recommender's network size), so
+    trust_score = (sum_trust + 0.1 * sum_trust_network) / (recommendation_count + 0.1 * sum_network)
+    """
+    contractor = models.OneToOneField(
+        Contractor,
+        on_delete=models.CASCADE,
+        related_name='trust_aggregate'
+    )
+    recommendation_count = models.PositiveIntegerField(default=0)
+    sum_trust = models.BigIntegerField(
+        default=0,
+        help_text="Sum of trust levels"
+    )
+    sum_trust_network = models.BigIntegerField(
+        default=0,
+        help_text="Sum of trust level x recommender network size"
+    )
+    sum_network = models.BigIntegerField(
+        default=0,
+        help_text="Sum of recommender network sizes"
+    )
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    NETWORK_WEIGHT = 0.1
+    
+    def __str__(self):
+        return f"Trust aggregate for contractor {self.contractor_id}"
+    
+    def calculate_trust_score(self):
+        total_weight = self.recommendation_count + self.NETWORK_WEIGHT * self.sum_network
+        if total_weight <= 0:
+            return 0.0
+        return (self.sum_trust + self.NETWORK_WEIGHT * self.sum_trust_network) / total_weight
+
+
+class RecommenderNetworkSize(models.Model):
+    """
+    Number of recommendations a user has given, used to weight their
+    recommendations in ContractorTrustAggregate.
+    """
+    recommender = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        related_name='trust_network_size'
+    )
+    network_size = models.PositiveIntegerField(default=0)
+    
+    def __str__(self):
+        return f"{self.recommender_id}: {self.network_size} recommendations"
+
+
+class TrustIndexEntry(models.Model):
+    """
+    Precomputed top-K trusted contractors for a user, built offline by the
+    trust propagation job (see propagation.py).
+    """
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='trust_index_entries'
+    )
+    contractor = models.ForeignKey(
+        Contractor,
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    rank = models.PositiveSmallIntegerField()
+    score = models.FloatField(help_text="Propagated network trust score")
+    hops = models.PositiveSmallIntegerField(help_text="Shortest recommendation chain length")
+    recommendation_count = models.PositiveIntegerField(
+        default=1,
+        help_text="Recommendations reaching the contractor at that distance"
+    )
+    connector = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+',
+        help_text="Most trusted last-hop recommender, empty for direct recommendations"
+    )
+    computed_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        unique_together = ('user', 'contractor')
+        ordering = ['user', 'rank']
+        indexes = [
+            models.Index(fields=['user', 'rank']),
+        ]
+    
+    def __str__(self):
+        return f"#{self.rank} for user {self.user_id}: contractor {self.contractor_id}"
+
+
+class TrustIndexChange(models.Model):
+    """
+    Append-only log of recommenders whose recommendations changed since the
+    last trust index refresh. Not a foreign key, so deleted users are kept.
+    """
+    recommender_id = models.BigIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    def __str__(self):
+        return f"Trust change by user {self.recommender_id}"
+
+
+class CompletedWork(models.Model):
+    """
+    A completed tender or quick job, denormalised for the work history
+    endpoints. Maintained from Tenders/QuickJob saves (see work_history.py).
+    """
+    
+    class WorkType(models.TextChoices):
+        TENDER = 'tender', 'Tender'
+        QUICK_JOB = 'quick_job', 'Quick Job'
+    
+    work_type = models.CharField(max_length=20, choices=WorkType.choices)
+    work_id = models.PositiveIntegerField(help_text="Tenders or QuickJob id")
+    contractor = models.ForeignKey(
+        Contractor,
+        on_delete=models.CASCADE,
+        related_name='completed_work'
+    )
+    customer = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='completed_work'
+    )
+    title = models.CharField(max_length=255)
+    service_name = models.CharField(max_length=255)
+    customer_name = models.CharField(max_length=100)
+    location = models.CharField(max_length=255)
+    budget = models.FloatField(null=True, blank=True)
+    completed_at = models.DateTimeField()
+    
+    class Meta:
+        unique_together = ('work_type', 'work_id')
+        indexes = [
+            models.Index(fields=['contractor', '-completed_at', '-id']),
+            models.Index(fields=['customer', 'contractor', '-completed_at', '-id']),
+        ]
+    
+    def __str__(self):
+        return f"{self.work_type} {self.work_id} by contractor {self.contractor_id}"
+
+
+class ContractorWorkSummary(models.Model):
+    """Completed work counts and most recent items per contractor"""
+    contractor = models.OneToOneField(
+        Contractor,
+        on_delete=models.CASCADE,
+        related_name='work_summary'
+    )
+    completed_tenders = models.PositiveIntegerField(default=0)
+    completed_quick_jobs = models.PositiveIntegerField(default=0)
+    last_completed_at = models.DateTimeField(null=True, blank=True)
+    recent_work = models.JSONField(default=list)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"Work summary for contractor {self.contractor_id}"
+
+
+class CustomerContractorWorkSummary(models.Model):
+    """Completed work counts and most recent items per (customer, contractor)"""
+    customer = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='contractor_work_summaries'
+    )
+    contractor = models.ForeignKey(
+        Contractor,
+        on_delete=models.CASCADE,
+        related_name='customer_work_summaries'
+    )
+    completed_tenders = models.PositiveIntegerField(default=0)
+    completed_quick_jobs = models.PositiveIntegerField(default=0)
+    last_completed_at = models.DateTimeField(null=True, blank=True)
+    recent_work = models.JSONField(default=list)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        unique_together = ('customer', 'contractor')
+        indexes = [
+            models.Index(fields=['customer', '-last_completed_at', '-id']),
+        ]
+    
+    def __str__(self):
+        return f"Work summary for customer {self.customer_id} / contractor {self.contractor_id}"
@@ -0,0 +1,256 @@
+"""
+Cache for parsed voice/text queries.
+
+Users repeat the same requests with small spelling differences ("AC theek karne
+wala chahiye", "ac thik karne vala chaiye"), so results are keyed on a
+normalised form of the query: Unicode-normalised, casefolded, punctuation and
+extra whitespace removed, and the spelling variants of common romanised Hindi
+words folded together. Other words are kept as they are, so that "pool
+cleaning" and "pull cleaning" stay apart.
+
+Backends (settings.NLP_QUERY_CACHE_BACKEND):
+- 'locmem': per-process LRU with TTL, the fastest option
+- 'django': any configured Django cache (e.g. Redis), shared between processes
+- 'none': disables caching
+
+Every cached result is tied to a generation number that is bumped when the
+Services table changes (see signals.py), which invalidates all entries. With
+'locmem' only the process that saved the service sees the bump, so use the
+'django' backend when running several workers.
+"""
+import copy
+import hashlib
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+
+# Signs that only change the spelling of Devanagari words
+_DEVANAGARI_FOLDS = str.maketrans({
+    '\u093c': None,      # nukta
+    '\u0901': '\u0902',  # chandrabindu -> anusvara
+    '\u200c': None,      # zero width non-joiner
+    '\u200d': None,      # zero width joiner
+})
+
+# Romanised Hindi: long vowels and w/v are spelled freely
+_LATIN_FOLDS = [
+    (re.compile(r'aa+'), 'a'),
+    (re.compile(r'(ee|ii)+'), 'i'),
+    (re.compile(r'(oo|uu)+'), 'u'),
+    (re.compile(r'w'), 'v'),
+    (re.compile(r'([a-z])\1+'), r'\1'),
+]
+
+# Spellings the folds above do not reach, mapped to one canonical form
+_LATIN_SPELLINGS = {
+    'chaiye': 'chahiye',
+    'chahie': 'chahiye',
+    'chaheye': 'chahiye',
+    'chahye': 'chahiye',
+    'thek': 'thik',
+    'jaldy': 'jaldi',
+    'turent': 'turant',
+    'bijly': 'bijli',
+    'plumbr': 'plumber',
+}
+
+_WHITESPACE = re.compile(r'\s+')
+_LATIN_WORD = re.compile(r'^[a-z]+$')
+
+
+def _fold(word):
+    for pattern, replacement in _LATIN_FOLDS:
+        word = pattern.sub(replacement, word)
+    return _LATIN_SPELLINGS.get(word, word)
+
+
+# Romanised Hindi words whose spellings are folded together, as folded. The
+# folds only apply to these: on English words they merge different requests
+# ("pool"/"pull", "wall"/"vall"). Words whose folded forms would meet another
+# word's (kaam "work" and kam "less") are left out.
+_HINGLISH_WORDS = {_fold(word) for word in (
+    'aaj', 'abhi', 'bahut', 'batti', 'bijli', 'chahiye', 'darwaja', 'darwaza', 'deewar', 'dena',
+    'garam', 'ghar', 'hai', 'hain', 'jaldi', 'jhadu', 'ka', 'kal', 'kar', 'karna', 'karne', 'karo',
+    'karwa', 'karwana', 'karwani', 'ke', 'kharab', 'ki', 'ko', 'lagwana', 'lakdi', 'mera', 'mere',
+    'meri', 'mistri', 'mujhe', 'nahi', 'nahin', 'nal', 'paani', 'pankha', 'raha', 'rahi', 'rang',
+    'saaf', 'safai', 'shaam', 'subah', 'tanki', 'thanda', 'theek', 'toot', 'toota', 'tooti',
+    'turant', 'wala', 'wale', 'wali',
+)}
+
+
+def _fold_latin(word):
+    folded = _fold(word)
+    if folded in _HINGLISH_WORDS:
+        return folded
+    return _LATIN_SPELLINGS.get(word, word)
+
+
+def normalize_query(query):
+    """Normalised form of a query, used as the cache key"""
+    # Decompose first so precomposed nukta letters lose their nukta too
+    text = unicodedata.normalize('NFKD', query or '').casefold()
+    text = unicodedata.normalize('NFC', text.translate(_DEVANAGARI_FOLDS))
+    # Drop punctuation and symbols but keep combining marks (Indic vowel signs)
+    text = ''.join(' ' if unicodedata.category(char)[0] in 'PS' else char for char in text)
+    words = [
+        _fold_latin(word) if _LATIN_WORD.match(word) else word
+        for word in _WHITESPACE.split(text.strip())
+        if word
+    ]
+    return ' '.join(words)
+
+
+class LocalMemoryBackend:
+    """Per-process LRU cache with a TTL per entry"""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class DjangoCacheBackend:
+    """Stores entries in a configured Django cache; eviction is up to that cache"""
+
+    def __init__(self, alias):
+        self.cache = caches[alias]
+
+    def get(self, key):
+        return self.cache.get(key)
+
+    def set(self, key, value, ttl):
+        self.cache.set(key, value, ttl)
+
+    def clear(self):
+        # Other data may share the cache; entries are dropped by bumping the generation instead
+        pass
+
+    def __len__(self):
+        return 0
+
+
+class QueryCache:
+    """
+    Normalised-query cache in front of the NLP parsers, with hit/miss counters.
+
+    kind separates results of different parsers (e.g. 'gemini' and 'fallback').
+    Values are deep-copied in and out, so callers may mutate what they get.
+    """
+    GENERATION_KEY = 'nlp_query_cache:generation'
+
+    def __init__(self, backend, ttl):
+        self.backend = backend
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    @property
+    def shared(self):
+        return isinstance(self.backend, DjangoCacheBackend)
+
+    def _current_generation(self):
+        if self.shared:
+            return self.backend.cache.get(self.GENERATION_KEY, 0)
+        return self._generation
+
+    def _key(self, kind, query):
+        digest = hashlib.sha1(normalize_query(query).encode('utf-8')).hexdigest()
+        return f"nlp_query_cache:{self._current_generation()}:{kind}:{digest}"
+
+    def get(self, kind, query):
+        value = self.backend.get(self._key(kind, query))
+        with self._lock:
+            if value is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return copy.deepcopy(value)
+
+    def set(self, kind, query, value):
+        self.backend.set(self._key(kind, query), copy.deepcopy(value), self.ttl)
+
+    def invalidate(self):
+        """Drop every cached result"""
+        with self._lock:
+            self._generation += 1
+        if self.shared:
+            try:
+                self.backend.cache.incr(self.GENERATION_KEY)
+            except ValueError:
+                self.backend.cache.set(self.GENERATION_KEY, 1, None)
+        self.backend.clear()
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'backend': type(self.backend).__name__,
+            'entries': len(self.backend),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+        }
+
+
+class DisabledQueryCache:
+    """Stand-in used when NLP_QUERY_CACHE_BACKEND is 'none'"""
+    hits = misses = 0
+
+    def get(self, kind, query):
+        return None
+
+    def set(self, kind, query, value):
+        pass
+
+    def invalidate(self):
+        pass
+
+    def stats(self):
+        return {'backend': None, 'entries': 0, 'hits': 0, 'misses': 0, 'hit_rate': 0.0}
+
+
+def build_query_cache():
+    backend = settings.NLP_QUERY_CACHE_BACKEND
+    if backend == 'none':
+        return DisabledQueryCache()
+    if backend == 'django':
+        return QueryCache(DjangoCacheBackend(settings.NLP_QUERY_CACHE_ALIAS), settings.NLP_QUERY_CACHE_TTL)
+    if backend == 'locmem':
+        return QueryCache(LocalMemoryBackend(settings.NLP_QUERY_CACHE_MAX_ENTRIES), settings.NLP_QUERY_CACHE_TTL)
+    raise ValueError(f"Unknown NLP_QUERY_CACHE_BACKEND '{backend}'")
+
+
+# Process-level instance used by gemini_service
+query_cache = build_query_cache()
@@ -0,0 +1,170 @@
+"""
+Keyset (seek) pagination.
+
+Instead of OFFSET, the client passes back an opaque cursor holding the sort key
+of the last row it saw, and the next page starts strictly after it. Pages stay
+cheap however deep the client scrolls and do not shift when rows are added.
+
+The sort key is any order_by of plain (non-null) fields or annotations, ending
+in id so it is unique, e.g. ('-created_at', '-id') or ('priority_rank', 'id').
+"""
+import base64
+import binascii
+import datetime
+import json
+from decimal import Decimal
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import connections
+from django.db.models import Q
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+def _cursor_value(value):
+    # Full precision isoformat: a rounded timestamp would skip or repeat rows
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+def encode_cursor(values):
+    raw = json.dumps([_cursor_value(value) for value in values], separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor, size):
+    """Returns the list of sort key values; raises ValueError for malformed cursors"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+        if not isinstance(values, list) or len(values) != size:
+            raise ValueError
+        return values
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise ValueError(f"Invalid cursor '{cursor}'")
+
+
+def keyset_ordering(ordering):
+    """ordering with an id tiebreak (in the direction of its last field) if it lacks one"""
+    ordering = tuple(ordering)
+    if not ordering or ordering[-1].lstrip('-') not in ('id', 'pk'):
+        descending = bool(ordering) and ordering[-1].startswith('-')
+        ordering += ('-id' if descending else 'id',)
+    return ordering
+
+
+def _after(ordering, values):
+    """Rows strictly after the given sort key"""
+    condition, equal = Q(), Q()
+    for order, value in zip(ordering, values):
+        field = order.lstrip('-')
+        lookup = 'lt' if order.startswith('-') else 'gt'
+        condition |= equal & Q(**{f'{field}__{lookup}': value})
+        equal &= Q(**{field: value})
+    return condition
+
+
+def keyset_page(queryset, ordering, cursor=None, limit=20):
+    """
+    One page of queryset in the given order_by fields.
+
+    Returns (rows, next_cursor); next_cursor is None on the last page.
+    Raises ValueError for malformed cursors and for cursors whose values do
+    not fit the sort fields (e.g. a number for a timestamp).
+    """
+    ordering = keyset_ordering(ordering)
+    queryset = queryset.order_by(*ordering)
+    if cursor:
+        values = decode_cursor(cursor, len(ordering))
+        try:
+            queryset = queryset.filter(_after(ordering, values))
+        except (TypeError, DjangoValidationError):
+            raise ValueError(f"Invalid cursor '{cursor}'")
+
+    rows = list(queryset[:limit + 1])
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(getattr(last, order.lstrip('-')) for order in ordering)
+    return rows, next_cursor
+
+
+def estimate_count(queryset):
+    """
+    Row count estimated by the Postgres planner from table statistics, without
+    running COUNT(*). Other databases get an exact count.
+    """
+    if queryset.query.is_empty():
+        return 0
+    if connections[queryset.db].vendor != 'postgresql':
+        return queryset.count()
+    plan = json.loads(queryset.order_by().values('pk').explain(format='json'))
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+class KeysetPagination(BasePagination):
+    """
+    Opt-in keyset pagination for generic list views.
+
+    Only active when the request has a `cursor` parameter (empty for the first
+    page), so clients that expect a plain list keep getting one. Pages follow
+    the queryset's order_by (default newest first) and the response is
+    {results, next_cursor, next}. `count=exact` adds an X-Total-Count header,
+    `count=approximate` an X-Approximate-Count header from estimate_count().
+    """
+    cursor_query_param = 'cursor'
+    limit_query_param = 'limit'
+    count_query_param = 'count'
+    default_limit = 20
+    max_limit = 100
+    default_ordering = ('-created_at', '-id')
+
+    @classmethod
+    def requested(cls, request):
+        return cls.cursor_query_param in request.query_params
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if not self.requested(request):
+            return None
+        try:
+            limit = int(request.query_params.get(self.limit_query_param, self.default_limit))
+        except ValueError:
+            raise ValidationError({'error': 'limit must be an integer'})
+        limit = min(max(limit, 1), self.max_limit)
+
+        ordering = queryset.query.order_by or self.default_ordering
+        try:
+            rows, self.next_cursor = keyset_page(
+                queryset, ordering, request.query_params[self.cursor_query_param], limit
+            )
+        except ValueError as e:
+            raise ValidationError({'error': str(e)})
+
+        self.request = request
+        self.headers = {}
+        count = request.query_params.get(self.count_query_param)
+        if count == 'exact':
+            self.headers['X-Total-Count'] = str(queryset.count())
+        elif count == 'approximate':
+            self.headers['X-Approximate-Count'] = str(estimate_count(queryset))
+        return rows
+
+    def get_next_link(self):
+        if self.next_cursor is None:
+            return None
+        return replace_query_param(
+            self.request.build_absolute_uri(), self.cursor_query_param, self.next_cursor
+        )
+
+    def get_paginated_response(self, data):
+        return Response({
+            'results': data,
+            'next_cursor': self.next_cursor,
+            'next': self.get_next_link(),
+        }, headers=self.headers)
@@ -0,0 +1,248 @@
+"""
+Shortest recommendation paths over the in-memory trust graph.
+
+A path is a chain of users [user, connector, ..., contractor's user] where each
+user recommended the contractor profile of the next one. Among the shortest
+paths (up to TRUST_PATH_MAX_DEPTH recommendations) we return the N most trusted,
+ranked by the product of trust_level / 10 along the chain.
+
+Single lookups use a bidirectional BFS; batched lookups for a page of results
+share one forward BFS from the user. Results are kept in an LRU cache keyed by
+(user, contractor) that is dropped whenever the graph version changes.
+"""
+import heapq
+import math
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+
+from .graph import trust_graph
+
+MAX_TRUST_LEVEL = 10
+
+
+class PathCache:
+    """LRU cache of path results tied to one version of the trust graph"""
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.version = None
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, version, key):
+        with self._lock:
+            if version != self.version:
+                self._entries.clear()
+                self.version = version
+            result = self._entries.get(key)
+            if result is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return result
+
+    def set(self, version, key, result):
+        with self._lock:
+            if version != self.version:
+                return
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.version = None
+
+
+path_cache = PathCache(settings.TRUST_PATH_CACHE_SIZE)
+
+
+def _edge_weight(graph, from_user_id, to_user_id):
+    contractor_id = graph.user_contractors[to_user_id]
+    return graph.out_edges[from_user_id][contractor_id] / MAX_TRUST_LEVEL
+
+
+def _successors(graph, user_id):
+    return [
+        graph.contractor_users[contractor_id]
+        for contractor_id in graph.out_edges.get(user_id, ())
+    ]
+
+
+def _predecessors(graph, user_id):
+    contractor_id = graph.user_contractors.get(user_id)
+    if contractor_id is None:
+        return []
+    return list(graph.in_edges.get(contractor_id, ()))
+
+
+def _best_paths(node, links, weight, max_paths, memo):
+    """
+    Top max_paths chains from node following links (a {node: [next nodes]} DAG)
+    to the end of the DAG, as [(log_weight, (node, ...))], best first.
+    """
+    if node in memo:
+        return memo[node]
+    next_nodes = links.get(node)
+    if not next_nodes:
+        memo[node] = [(0.0, (node,))]
+        return memo[node]
+
+    candidates = []
+    for next_node in next_nodes:
+        step = math.log(weight(node, next_node))
+        for log_weight, path in _best_paths(next_node, links, weight, max_paths, memo):
+            candidates.append((log_weight + step, (node,) + path))
+    memo[node] = heapq.nsmallest(max_paths, candidates, key=lambda c: (-c[0], c[1]))
+    return memo[node]
+
+
+def _rank(candidates, max_paths):
+    best = heapq.nsmallest(max_paths, candidates, key=lambda c: (-c[0], c[1]))
+    return tuple((math.exp(log_weight), list(path)) for log_weight, path in best)
+
+
+def shortest_paths(graph, user_id, target_user_id, max_paths, max_depth):
+    """
+    Bidirectional BFS from user_id to target_user_id.
+
+    Returns up to max_paths (trust_weight, [user ids]) tuples, best first, all of
+    the shortest length found within max_depth recommendations.
+    """
+    if user_id == target_user_id:
+        return ()
+
+    forward_parents = {user_id: []}
+    backward_children = {target_user_id: []}
+    forward_layer, backward_layer = [user_id], [target_user_id]
+    forward_depth = backward_depth = 0
+    meeting = []
+
+    while forward_layer and backward_layer and forward_depth + backward_depth < max_depth:
+        # Expand whichever frontier is smaller
+        if len(forward_layer) <= len(backward_layer):
+            next_layer = {}
+            for node in forward_layer:
+                for child in _successors(graph, node):
+                    if child in forward_parents and child not in next_layer:
+                        continue
+                    next_layer.setdefault(child, []).append(node)
+            forward_parents.update(next_layer)
+            forward_layer = list(next_layer)
+            forward_depth += 1
+            meeting = [node for node in forward_layer if node in backward_children]
+        else:
+            next_layer = {}
+            for node in backward_layer:
+                for parent in _predecessors(graph, node):
+                    if parent in backward_children and parent not in next_layer:
+                        continue
+                    next_layer.setdefault(parent, []).append(node)
+            backward_children.update(next_layer)
+            backward_layer = list(next_layer)
+            backward_depth += 1
+            meeting = [node for node in backward_layer if node in forward_parents]
+        if meeting:
+            break
+
+    if not meeting:
+        return ()
+
+    # Both BFS trees only hold shortest-distance links, so every chain through a
+    # meeting node is a shortest path.
+    weight = lambda a, b: _edge_weight(graph, a, b)
+    reverse_weight = lambda a, b: _edge_weight(graph, b, a)
+    forward_memo, backward_memo = {}, {}
+    candidates = []
+    for node in meeting:
+        heads = _best_paths(node, forward_parents, reverse_weight, max_paths, forward_memo)
+        tails = _best_paths(node, backward_children, weight, max_paths, backward_memo)
+        for head_weight, head in heads:
+            for tail_weight, tail in tails:
+                candidates.append((head_weight + tail_weight, head[::-1] + tail[1:]))
+    return _rank(candidates, max_paths)
+
+
+def shortest_paths_from(graph, user_id, target_user_ids, max_paths, max_depth):
+    """
+    Batched version of shortest_paths: one forward BFS from user_id serves every
+    target. Returns {target_user_id: paths}.
+    """
+    targets = set(target_user_ids)
+    targets.discard(user_id)
+    parents = {user_id: []}
+    layer = [user_id]
+    depth = 0
+    while layer and depth < max_depth and not targets.issubset(parents):
+        next_layer = {}
+        for node in layer:
+            for child in _successors(graph, node):
+                if child in parents and child not in next_layer:
+                    continue
+                next_layer.setdefault(child, []).append(node)
+        parents.update(next_layer)
+        layer = list(next_layer)
+        depth += 1
+
+    reverse_weight = lambda a, b: _edge_weight(graph, b, a)
+    memo = {}
+    results = {}
+    for target_user_id in target_user_ids:
+        if target_user_id == user_id or target_user_id not in parents:
+            results[target_user_id] = ()
+            continue
+        heads = _best_paths(target_user_id, parents, reverse_weight, max_paths, memo)
+        results[target_user_id] = _rank(
+            [(log_weight, path[::-1]) for log_weight, path in heads], max_paths
+        )
+    return results
+
+
+def find_paths(user_id, contractor_id, max_paths=None, max_depth=None, graph=None):
+    """
+    Up to max_paths shortest recommendation paths from a user to a contractor,
+    as (trust_weight, [user ids]) tuples ending with the contractor's user.
+    """
+    return find_paths_bulk(user_id, [contractor_id], max_paths, max_depth, graph)[contractor_id]
+
+
+def find_paths_bulk(user_id, contractor_ids, max_paths=None, max_depth=None, graph=None):
+    """find_paths for many contractors at once: {contractor_id: paths}"""
+    graph = (graph or trust_graph).ensure_loaded()
+    max_paths = max_paths or settings.TRUST_PATH_MAX_PATHS
+    max_depth = max_depth or settings.TRUST_PATH_MAX_DEPTH
+    version = graph.version
+
+    results, missing = {}, []
+    for contractor_id in contractor_ids:
+        cached = path_cache.get(version, (user_id, contractor_id, max_paths, max_depth))
+        if cached is not None:
+            results[contractor_id] = cached
+        else:
+            missing.append(contractor_id)
+    if not missing:
+        return results
+
+    with graph._lock:
+        target_users = {
+            contractor_id: graph.contractor_users.get(contractor_id)
+            for contractor_id in missing
+        }
+        reachable = [user for user in target_users.values() if user is not None]
+        if len(reachable) == 1:
+            found = {reachable[0]: shortest_paths(graph, user_id, reachable[0], max_paths, max_depth)}
+        else:
+            found = shortest_paths_from(graph, user_id, reachable, max_paths, max_depth)
+
+    for contractor_id, target_user_id in target_users.items():
+        paths = found.get(target_user_id, ()) if target_user_id is not None else ()
+        results[contractor_id] = paths
+        path_cache.set(version, (user_id, contractor_id, max_paths, max_depth), paths)
+    return results
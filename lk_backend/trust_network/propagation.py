@@ -0,0 +1,246 @@
+"""
+Offline multi-hop trust propagation.
+
+Scores every contractor reachable from a user through chains of recommendations
+and stores the top-K per user in TrustIndexEntry, so the trusted-contractors
+endpoint reads a precomputed list instead of walking the network per request.
+
+Two methods are available (settings.TRUST_PROPAGATION_METHOD):
+
+- 'khop': breadth-first over up to TRUST_PROPAGATION_MAX_HOPS hops. A contractor
+  first reached at hop h scores hop_weight(h) * the average trust level of the
+  recommendations reaching it from hop h - 1, plus its base trust_score. With two
+  hops this is the same formula as utils.calculate_network_trust_score.
+- 'ppr': personalized PageRank from the user over the trust-weighted graph,
+  computed by sparse power iteration. Score = base trust_score + PageRank mass
+  of the contractor * TRUST_PROPAGATION_PPR_SCALE.
+
+Either way candidates are limited to TRUST_PROPAGATION_MAX_HOPS, which is also
+how far upstream a change is propagated by refresh_trust_index().
+"""
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max, Q
+
+from accounts.models import Contractor, User
+from .graph import TrustGraph
+from .models import TrustConnection, TrustIndexEntry, TrustIndexChange
+
+METHODS = ('khop', 'ppr')
+
+
+def hop_weight(hops):
+    """Weight of an h-hop recommendation, from settings.TRUST_NETWORK_HOP_WEIGHTS"""
+    weights = settings.TRUST_NETWORK_HOP_WEIGHTS
+    if hops <= len(weights):
+        return weights[hops - 1]
+    if len(weights) < 2 or not weights[-2]:
+        return 0.0
+    # Keep decaying by the ratio of the last two configured weights
+    return weights[-1] * (weights[-1] / weights[-2]) ** (hops - len(weights))
+
+
+class TrustPropagator:
+    """
+    Scores contractors for one user at a time over a loaded TrustGraph.
+
+    base_scores: {contractor_id: trust_score}
+    """
+
+    def __init__(self, graph, base_scores, method=None, max_hops=None, top_k=None):
+        self.graph = graph
+        self.base_scores = base_scores
+        self.method = method or settings.TRUST_PROPAGATION_METHOD
+        if self.method not in METHODS:
+            raise ValueError(f"Unknown trust propagation method '{self.method}'")
+        self.max_hops = max_hops or settings.TRUST_PROPAGATION_MAX_HOPS
+        self.top_k = top_k or settings.TRUST_PROPAGATION_TOP_K
+        self._out_weights = {}
+
+    def reach(self, user_id):
+        """
+        Breadth-first walk of the user's network.
+
+        Returns {contractor_id: (hops, trust_levels, connector_id)} where hops is
+        the shortest chain length, trust_levels the recommendations reaching the
+        contractor at that distance and connector_id the most trusted last-hop
+        recommender (None for direct recommendations).
+        """
+        graph = self.graph
+        reached = {}
+        visited_users = {user_id}
+        frontier = {user_id}
+        for hops in range(1, self.max_hops + 1):
+            layer = {}
+            for person_id in frontier:
+                for contractor_id, trust_level in graph.out_edges.get(person_id, {}).items():
+                    if contractor_id not in reached:
+                        layer.setdefault(contractor_id, []).append((trust_level, person_id))
+            if not layer:
+                break
+
+            for contractor_id, recommendations in layer.items():
+                # Most trusted connector, ties going to the lowest user id
+                _, connector_id = max(recommendations, key=lambda rec: (rec[0], -rec[1]))
+                reached[contractor_id] = (
+                    hops,
+                    [trust_level for trust_level, _ in recommendations],
+                    connector_id if hops > 1 else None,
+                )
+
+            frontier = {
+                graph.contractor_users[contractor_id]
+                for contractor_id in layer
+                if contractor_id in graph.contractor_users
+            } - visited_users
+            visited_users |= frontier
+        return reached
+
+    def personalized_pagerank(self, user_id):
+        """
+        Personalized PageRank vector for user_id as {user_id: mass}.
+
+        Walks follow recommendations with probability proportional to trust
+        level and restart at the source with probability 1 - damping; mass
+        reaching users without recommendations also returns to the source.
+        """
+        graph = self.graph
+        damping = settings.TRUST_PROPAGATION_DAMPING
+        vector = {user_id: 1.0}
+        for _ in range(settings.TRUST_PROPAGATION_ITERATIONS):
+            next_vector = {}
+            dangling = 0.0
+            for node, mass in vector.items():
+                edges = graph.out_edges.get(node)
+                if not edges:
+                    dangling += mass
+                    continue
+                share = damping * mass / self._out_weight(node)
+                for contractor_id, trust_level in edges.items():
+                    target = graph.contractor_users[contractor_id]
+                    next_vector[target] = next_vector.get(target, 0.0) + share * trust_level
+            next_vector[user_id] = next_vector.get(user_id, 0.0) + (1 - damping) + damping * dangling
+
+            delta = sum(
+                abs(next_vector.get(node, 0.0) - vector.get(node, 0.0))
+                for node in vector.keys() | next_vector.keys()
+            )
+            vector = next_vector
+            if delta < settings.TRUST_PROPAGATION_TOLERANCE:
+                break
+        return vector
+
+    def _out_weight(self, user_id):
+        weight = self._out_weights.get(user_id)
+        if weight is None:
+            weight = self._out_weights[user_id] = sum(self.graph.out_edges[user_id].values())
+        return weight
+
+    def score_user(self, user_id):
+        """Top-K contractors for a user, best first, as a list of dicts"""
+        reached = self.reach(user_id)
+        if self.method == 'ppr' and reached:
+            pagerank = self.personalized_pagerank(user_id)
+            scale = settings.TRUST_PROPAGATION_PPR_SCALE
+
+        entries = []
+        for contractor_id, (hops, trust_levels, connector_id) in reached.items():
+            base_score = self.base_scores.get(contractor_id) or 0.0
+            if self.method == 'ppr':
+                contractor_user_id = self.graph.contractor_users[contractor_id]
+                score = base_score + pagerank.get(contractor_user_id, 0.0) * scale
+            else:
+                average_trust = sum(trust_levels) / len(trust_levels)
+                score = base_score + hop_weight(hops) * average_trust
+            entries.append({
+                'contractor_id': contractor_id,
+                'score': score,
+                'hops': hops,
+                'recommendation_count': len(trust_levels),
+                'connector_id': connector_id,
+            })
+
+        entries.sort(key=lambda entry: (-entry['score'], entry['contractor_id']))
+        return entries[:self.top_k]
+
+
+def record_trust_change(*recommender_ids):
+    """Note that these users' recommendations changed, for the next refresh"""
+    TrustIndexChange.objects.bulk_create(
+        [TrustIndexChange(recommender_id=recommender_id) for recommender_id in recommender_ids]
+    )
+
+
+def pending_changes(user_id):
+    """
+    Change log rows of the user and of the users they recommend since the last
+    refresh. While there are any, the user's index misses or misranks part of
+    their 1st and 2nd degree network.
+    """
+    recommended_users = TrustConnection.objects.filter(recommender_id=user_id).values('contractor__user_id')
+    return TrustIndexChange.objects.filter(
+        Q(recommender_id=user_id) | Q(recommender_id__in=recommended_users)
+    )
+
+
+def build_trust_index(user_ids=None, method=None, graph=None, batch_size=500):
+    """
+    Recompute TrustIndexEntry rows for user_ids, or for every user with a
+    network (and everyone currently indexed) when None. Returns users processed.
+    """
+    if graph is None:
+        graph = TrustGraph().load()
+    propagator = TrustPropagator(
+        graph,
+        dict(Contractor.objects.values_list('id', 'trust_score')),
+        method=method
+    )
+
+    if user_ids is None:
+        user_ids = set(graph.out_edges)
+        user_ids.update(TrustIndexEntry.objects.values_list('user_id', flat=True).distinct())
+    user_ids = sorted(user_ids)
+
+    processed = 0
+    for start in range(0, len(user_ids), batch_size):
+        batch = list(User.objects.filter(id__in=user_ids[start:start + batch_size]).values_list('id', flat=True))
+        entries = []
+        for user_id in batch:
+            for rank, entry in enumerate(propagator.score_user(user_id), start=1):
+                entries.append(TrustIndexEntry(user_id=user_id, rank=rank, **entry))
+
+        with transaction.atomic():
+            TrustIndexEntry.objects.filter(user_id__in=batch).delete()
+            TrustIndexEntry.objects.bulk_create(entries, batch_size=1000)
+        processed += len(batch)
+    return processed
+
+
+def rebuild_trust_index(method=None, batch_size=500):
+    """Full rebuild; also clears the change log it covers"""
+    last_change_id = TrustIndexChange.objects.aggregate(last=Max('id'))['last']
+    processed = build_trust_index(method=method, batch_size=batch_size)
+    if last_change_id is not None:
+        TrustIndexChange.objects.filter(id__lte=last_change_id).delete()
+    return processed
+
+
+def refresh_trust_index(method=None, batch_size=500):
+    """
+    Incremental refresh: recompute only users whose network includes someone
+    whose recommendations changed since the last run. Returns users processed.
+    """
+    last_change_id = TrustIndexChange.objects.aggregate(last=Max('id'))['last']
+    if last_change_id is None:
+        return 0
+
+    changes = TrustIndexChange.objects.filter(id__lte=last_change_id)
+    changed_users = set(changes.values_list('recommender_id', flat=True).distinct())
+
+    # Loaded after reading the log, so later changes are at worst recomputed twice
+    graph = TrustGraph().load()
+    affected_users = graph.upstream_users(changed_users, settings.TRUST_PROPAGATION_MAX_HOPS - 1)
+    processed = build_trust_index(affected_users, method=method, graph=graph, batch_size=batch_size)
+
+    changes.delete()
+    return processed
@@ -0,0 +1,274 @@
+"""
+Incremental maintenance of Contractor.trust_score.
+
+Each contractor keeps running sums in ContractorTrustAggregate, and each
+recommender keeps their network size in RecommenderNetworkSize. A recommendation
+is weighted by 1 + 0.1 * (recommender's network size), so when a TrustConnection
+changes we only adjust the sums of the affected contractor, plus the other
+contractors of the same recommender whose weight moved with the network size,
+instead of rescanning every recommendation.
+
+compute_trust_aggregates() does the full recomputation and is used to backfill
+and to check the incremental values (see the recompute_trust_scores command).
+"""
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery
+
+from accounts.models import Contractor
+from .models import (
+    TrustConnection, TrustScoreLog, ContractorTrustAggregate, RecommenderNetworkSize
+)
+
+LOG_BATCH_SIZE = 500
+SCORE_TOLERANCE = 1e-9
+
+
+def _other_connections(recommender_id, contractor_id):
+    return TrustConnection.objects.filter(
+        recommender_id=recommender_id
+    ).exclude(contractor_id=contractor_id)
+
+
+def _shift_network_size(recommender_id, contractor_id, delta):
+    """
+    Move the recommender's network size by delta for every contractor they
+    recommended apart from contractor_id. Returns those contractor ids.
+    """
+    others = _other_connections(recommender_id, contractor_id)
+    contractor_ids = list(others.values_list('contractor_id', flat=True))
+    if contractor_ids:
+        trust_level = others.filter(
+            contractor_id=OuterRef('contractor_id')
+        ).values('trust_level')[:1]
+        ContractorTrustAggregate.objects.filter(contractor_id__in=contractor_ids).update(
+            sum_network=F('sum_network') + delta,
+            sum_trust_network=F('sum_trust_network') + Subquery(trust_level) * delta,
+        )
+    return contractor_ids
+
+
+def connection_added(recommender_id, contractor_id, trust_level):
+    """Account for a new recommendation"""
+    with transaction.atomic():
+        size, _ = RecommenderNetworkSize.objects.select_for_update().get_or_create(
+            recommender_id=recommender_id
+        )
+        size.network_size = F('network_size') + 1
+        size.save(update_fields=['network_size'])
+        size.refresh_from_db(fields=['network_size'])
+        network_size = size.network_size
+
+        affected = _shift_network_size(recommender_id, contractor_id, 1)
+
+        ContractorTrustAggregate.objects.get_or_create(contractor_id=contractor_id)
+        ContractorTrustAggregate.objects.filter(contractor_id=contractor_id).update(
+            recommendation_count=F('recommendation_count') + 1,
+            sum_trust=F('sum_trust') + trust_level,
+            sum_trust_network=F('sum_trust_network') + trust_level * network_size,
+            sum_network=F('sum_network') + network_size,
+        )
+
+        refresh_trust_scores([contractor_id] + affected, reason="New recommendation received")
+
+
+def connection_changed(recommender_id, contractor_id, old_trust_level, new_trust_level):
+    """Account for a recommendation whose trust level was edited"""
+    delta = new_trust_level - old_trust_level
+    if not delta:
+        return
+    with transaction.atomic():
+        network_size = RecommenderNetworkSize.objects.filter(
+            recommender_id=recommender_id
+        ).values_list('network_size', flat=True).first() or 0
+        ContractorTrustAggregate.objects.filter(contractor_id=contractor_id).update(
+            sum_trust=F('sum_trust') + delta,
+            sum_trust_network=F('sum_trust_network') + delta * network_size,
+        )
+        refresh_trust_scores([contractor_id], reason="Recommendation updated")
+
+
+def connection_removed(recommender_id, contractor_id, trust_level):
+    """
+    Account for a single deleted recommendation. Must run after the row is gone,
+    and only for deletes of one row: rows deleted together in one query must be
+    resynchronised (resync_recommender), since each contractor's sums may then
+    be recomputed without rows whose own removal has not been applied yet.
+
+    If the stored network size does not match what is left in the database, the
+    affected contractors are recomputed from scratch instead.
+    """
+    with transaction.atomic():
+        size = RecommenderNetworkSize.objects.select_for_update().filter(
+            recommender_id=recommender_id
+        ).first()
+        remaining = TrustConnection.objects.filter(recommender_id=recommender_id).count()
+
+        if size is None or size.network_size != remaining + 1:
+            resync_recommender(recommender_id, extra_contractor_ids=[contractor_id])
+            return
+
+        network_size = size.network_size
+        size.network_size = remaining
+        size.save(update_fields=['network_size'])
+
+        affected = _shift_network_size(recommender_id, contractor_id, -1)
+
+        ContractorTrustAggregate.objects.filter(contractor_id=contractor_id).update(
+            recommendation_count=F('recommendation_count') - 1,
+            sum_trust=F('sum_trust') - trust_level,
+            sum_trust_network=F('sum_trust_network') - trust_level * network_size,
+            sum_network=F('sum_network') - network_size,
+        )
+
+        refresh_trust_scores([contractor_id] + affected, reason="Recommendation removed")
+
+
+def resync_recommender(recommender_id, extra_contractor_ids=()):
+    """
+    Recompute the network size of a recommender and the scores of every
+    contractor their weight feeds into. Missing users/contractors are skipped,
+    so this is safe to run after cascading deletes.
+    """
+    contractor_ids = set(extra_contractor_ids)
+    contractor_ids.update(
+        TrustConnection.objects.filter(
+            recommender_id=recommender_id
+        ).values_list('contractor_id', flat=True)
+    )
+    contractor_ids = list(
+        Contractor.objects.filter(id__in=contractor_ids).values_list('id', flat=True)
+    )
+    sums, network_sizes = compute_trust_aggregates(contractor_ids)
+    network_sizes.setdefault(recommender_id, 0)
+    apply_trust_aggregates(
+        contractor_ids, sums, network_sizes, reason="Trust score resynchronised"
+    )
+
+
+# ---------------------------------------------------------------------- #
+# Score refresh and full recomputation
+# ---------------------------------------------------------------------- #
+
+def refresh_trust_scores(contractor_ids, reason, calculation_method='incremental'):
+    """
+    Copy the aggregate-based score onto Contractor.trust_score for the given
+    contractors and write one batch of TrustScoreLog rows for those that changed.
+    """
+    contractor_ids = set(contractor_ids)
+    if not contractor_ids:
+        return []
+
+    aggregates = {
+        aggregate.contractor_id: aggregate
+        for aggregate in ContractorTrustAggregate.objects.filter(contractor_id__in=contractor_ids)
+    }
+    changed, logs = [], []
+    for contractor in Contractor.objects.filter(id__in=contractor_ids).only('id', 'trust_score'):
+        aggregate = aggregates.get(contractor.id)
+        new_score = aggregate.calculate_trust_score() if aggregate else 0.0
+        old_score = contractor.trust_score or 0.0
+        if abs(new_score - old_score) <= SCORE_TOLERANCE:
+            continue
+
+        contractor.trust_score = new_score
+        changed.append(contractor)
+        logs.append(TrustScoreLog(
+            contractor=contractor,
+            old_score=old_score,
+            new_score=new_score,
+            reason=reason,
+            calculation_details={
+                'total_recommendations': aggregate.recommendation_count if aggregate else 0,
+                'calculation_method': 'weighted_average_with_network_bonus',
+                'update_method': calculation_method,
+            }
+        ))
+
+    Contractor.objects.bulk_update(changed, ['trust_score'], batch_size=LOG_BATCH_SIZE)
+    TrustScoreLog.objects.bulk_create(logs, batch_size=LOG_BATCH_SIZE)
+    return changed
+
+
+def compute_trust_aggregates(contractor_ids=None):
+    """
+    Recompute the running sums from TrustConnection rows.
+
+    Returns (sums, network_sizes) where sums maps contractor id to
+    [recommendation_count, sum_trust, sum_trust_network, sum_network] and
+    network_sizes maps recommender id to their number of recommendations.
+    Restricted to contractor_ids (and their recommenders) when given.
+    """
+    connections = TrustConnection.objects.order_by()
+    network_counts = TrustConnection.objects.order_by()
+    if contractor_ids is not None:
+        connections = connections.filter(contractor_id__in=contractor_ids)
+        network_counts = network_counts.filter(
+            recommender_id__in=connections.values('recommender_id')
+        )
+    network_sizes = dict(
+        network_counts.values('recommender_id').annotate(
+            size=Count('id')
+        ).values_list('recommender_id', 'size')
+    )
+
+    sums = {}
+    rows = connections.values_list('contractor_id', 'recommender_id', 'trust_level')
+    for contractor_id, recommender_id, trust_level in rows.iterator(chunk_size=5000):
+        network_size = network_sizes[recommender_id]
+        contractor_sums = sums.setdefault(contractor_id, [0, 0, 0, 0])
+        contractor_sums[0] += 1
+        contractor_sums[1] += trust_level
+        contractor_sums[2] += trust_level * network_size
+        contractor_sums[3] += network_size
+    return sums, network_sizes
+
+
+def apply_trust_aggregates(contractor_ids, sums, network_sizes, reason):
+    """
+    Store recomputed sums and network sizes, then refresh the trust scores.
+    Contractors in contractor_ids without any recommendation are reset to zero.
+    """
+    with transaction.atomic():
+        existing = {
+            aggregate.contractor_id: aggregate
+            for aggregate in ContractorTrustAggregate.objects.filter(contractor_id__in=contractor_ids)
+        }
+        to_create, to_update = [], []
+        for contractor_id in contractor_ids:
+            count, sum_trust, sum_trust_network, sum_network = sums.get(contractor_id, (0, 0, 0, 0))
+            aggregate = existing.get(contractor_id)
+            if aggregate is None:
+                aggregate = ContractorTrustAggregate(contractor_id=contractor_id)
+                to_create.append(aggregate)
+            else:
+                to_update.append(aggregate)
+            aggregate.recommendation_count = count
+            aggregate.sum_trust = sum_trust
+            aggregate.sum_trust_network = sum_trust_network
+            aggregate.sum_network = sum_network
+        ContractorTrustAggregate.objects.bulk_create(to_create, batch_size=LOG_BATCH_SIZE)
+        ContractorTrustAggregate.objects.bulk_update(
+            to_update,
+            ['recommendation_count', 'sum_trust', 'sum_trust_network', 'sum_network'],
+            batch_size=LOG_BATCH_SIZE
+        )
+
+        existing_sizes = {
+            size.recommender_id: size
+            for size in RecommenderNetworkSize.objects.filter(recommender_id__in=network_sizes)
+        }
+        to_create, to_update = [], []
+        for recommender_id, network_size in network_sizes.items():
+            size = existing_sizes.get(recommender_id)
+            if size is None:
+                if network_size:
+                    to_create.append(RecommenderNetworkSize(
+                        recommender_id=recommender_id, network_size=network_size
+                    ))
+            elif size.network_size != network_size:
+                size.network_size = network_size
+                to_update.append(size)
+        RecommenderNetworkSize.objects.bulk_create(to_create, batch_size=LOG_BATCH_SIZE)
+        RecommenderNetworkSize.objects.bulk_update(to_update, ['network_size'], batch_size=LOG_BATCH_SIZE)
+
+        return refresh_trust_scores(contractor_ids, reason, calculation_method='full_recompute')
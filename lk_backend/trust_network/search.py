@@ -0,0 +1,306 @@
+"""
+Full-text search over tenders and quick jobs.
+
+Each indexed table gets its title, service name, location and description
+indexed by the database itself, kept current by triggers (so queryset.update()
+and service renames are covered too):
+
+- PostgreSQL: a `search_vector` tsvector column (weighted title > service >
+  location > description) with a GIN index, plus a pg_trgm GIN index on
+  location for fuzzy place names.
+- SQLite (local development and tests): an FTS5 table `<table>_search` keyed
+  by rowid = row id, ranked with bm25().
+
+The column and tables live outside the Django models and are created by the
+works and trust_network migrations through SearchIndex.install(). Other
+databases get no index: their searches fall back to unranked icontains
+filters on the same columns. On SQLite a
+migration that rebuilds an indexed table drops its triggers; run
+`python manage.py rebuild_search_index` afterwards.
+
+The 'simple' text search configuration is used on purpose: queries mix Hindi,
+English and Hinglish, which language stemmers would mangle.
+"""
+import re
+
+from django.apps import apps as global_apps
+from django.db import connection
+from django.db.models import BooleanField, FloatField, Q, TextField, Value
+from django.db.models.expressions import RawSQL
+
+SEARCH_CONFIG = 'simple'
+HIGHLIGHT_START = '<b>'
+HIGHLIGHT_STOP = '</b>'
+
+# Whitespace and query-syntax punctuation; anything else (Devanagari vowel
+# signs included) stays inside a term
+_TERM_SEPARATORS = re.compile(r"[\s.,;:!?()\[\]{}\"'`*^&|<>!@#$%+=~\\/-]+")
+
+
+def search_terms(text):
+    return [term for term in _TERM_SEPARATORS.split(text.lower()) if term]
+
+
+class SearchIndex:
+    """Database full-text index over one model's title, description, location and service name"""
+
+    COLUMNS = ('title', 'service', 'location', 'description')
+    # bm25 column weights on SQLite, matching the tsvector weights A-D
+    BM25_WEIGHTS = '10.0, 5.0, 2.0, 1.0'
+
+    def __init__(self, model_label):
+        self.model_label = model_label
+
+    def _names(self, apps):
+        model = apps.get_model(self.model_label)
+        service = model._meta.get_field('service')
+        return {
+            'table': model._meta.db_table,
+            'fts': f'{model._meta.db_table}_search',
+            'service_table': service.related_model._meta.db_table,
+            'service_column': service.column,
+        }
+
+    @property
+    def names(self):
+        return self._names(global_apps)
+
+    # ------------------------------------------------------------------ #
+    # Schema
+    # ------------------------------------------------------------------ #
+
+    def install(self, schema_editor, apps=global_apps):
+        """Create (or recreate) the search column/table, triggers and indexes and index every row"""
+        vendor = schema_editor.connection.vendor
+        names = self._names(apps)
+        if vendor == 'postgresql':
+            statements = self._postgres_install_sql(**names)
+        elif vendor == 'sqlite':
+            statements = self._sqlite_uninstall_sql(**names) + self._sqlite_install_sql(**names)
+        else:
+            return
+        for statement in statements:
+            schema_editor.execute(statement, params=None)
+
+    def uninstall(self, schema_editor, apps=global_apps):
+        vendor = schema_editor.connection.vendor
+        names = self._names(apps)
+        if vendor == 'postgresql':
+            statements = self._postgres_uninstall_sql(**names)
+        elif vendor == 'sqlite':
+            statements = self._sqlite_uninstall_sql(**names)
+        else:
+            return
+        for statement in statements:
+            schema_editor.execute(statement, params=None)
+
+    def _postgres_install_sql(self, table, fts, service_table, service_column):
+        return [
+            'CREATE EXTENSION IF NOT EXISTS pg_trgm',
+            f'ALTER TABLE {table} ADD COLUMN IF NOT EXISTS search_vector tsvector',
+            f"""
+            CREATE OR REPLACE FUNCTION {table}_search_vector() RETURNS trigger AS $$
+            BEGIN
+                NEW.search_vector :=
+                    setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(NEW.title, '')), 'A') ||
+                    setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(
+                        (SELECT name FROM {service_table} WHERE id = NEW.{service_column}), ''
+                    )), 'B') ||
+                    setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(NEW.location, '')), 'C') ||
+                    setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(NEW.description, '')), 'D');
+                RETURN NEW;
+            END
+            $$ LANGUAGE plpgsql
+            """,
+            f'DROP TRIGGER IF EXISTS {table}_search_vector ON {table}',
+            f"""
+            CREATE TRIGGER {table}_search_vector
+            BEFORE INSERT OR UPDATE OF title, description, location, {service_column} ON {table}
+            FOR EACH ROW EXECUTE FUNCTION {table}_search_vector()
+            """,
+            # A renamed service re-indexes its rows (the no-op update fires the trigger above)
+            f"""
+            CREATE OR REPLACE FUNCTION {table}_service_renamed() RETURNS trigger AS $$
+            BEGIN
+                UPDATE {table} SET {service_column} = {service_column} WHERE {service_column} = NEW.id;
+                RETURN NULL;
+            END
+            $$ LANGUAGE plpgsql
+            """,
+            f'DROP TRIGGER IF EXISTS {table}_service_renamed ON {service_table}',
+            f"""
+            CREATE TRIGGER {table}_service_renamed
+            AFTER UPDATE OF name ON {service_table}
+            FOR EACH ROW WHEN (OLD.name IS DISTINCT FROM NEW.name)
+            EXECUTE FUNCTION {table}_service_renamed()
+            """,
+            f'UPDATE {table} SET title = title',
+            f'CREATE INDEX IF NOT EXISTS {table}_search_vector_idx ON {table} USING gin (search_vector)',
+            f'CREATE INDEX IF NOT EXISTS {table}_location_trgm_idx ON {table} USING gin (location gin_trgm_ops)',
+        ]
+
+    def _postgres_uninstall_sql(self, table, fts, service_table, service_column):
+        return [
+            f'DROP TRIGGER IF EXISTS {table}_service_renamed ON {service_table}',
+            f'DROP FUNCTION IF EXISTS {table}_service_renamed()',
+            f'DROP TRIGGER IF EXISTS {table}_search_vector ON {table}',
+            f'DROP FUNCTION IF EXISTS {table}_search_vector()',
+            f'DROP INDEX IF EXISTS {table}_location_trgm_idx',
+            f'ALTER TABLE {table} DROP COLUMN IF EXISTS search_vector',
+        ]
+
+    def _sqlite_install_sql(self, table, fts, service_table, service_column):
+        columns = ', '.join(self.COLUMNS)
+        values = (
+            f"NEW.id, NEW.title, coalesce((SELECT name FROM {service_table} "
+            f"WHERE id = NEW.{service_column}), ''), NEW.location, NEW.description"
+        )
+        return [
+            # M* keeps Devanagari and other Indic vowel signs inside words
+            f"CREATE VIRTUAL TABLE {fts} USING fts5("
+            f"{columns}, tokenize=\"unicode61 remove_diacritics 2 categories 'L* N* Co M*'\")",
+            f"""
+            CREATE TRIGGER {fts}_insert AFTER INSERT ON {table} BEGIN
+                INSERT INTO {fts}(rowid, {columns}) VALUES ({values});
+            END
+            """,
+            f"""
+            CREATE TRIGGER {fts}_update
+            AFTER UPDATE OF title, description, location, {service_column} ON {table} BEGIN
+                DELETE FROM {fts} WHERE rowid = OLD.id;
+                INSERT INTO {fts}(rowid, {columns}) VALUES ({values});
+            END
+            """,
+            f"""
+            CREATE TRIGGER {fts}_delete AFTER DELETE ON {table} BEGIN
+                DELETE FROM {fts} WHERE rowid = OLD.id;
+            END
+            """,
+            f"""
+            CREATE TRIGGER {fts}_service_renamed AFTER UPDATE OF name ON {service_table} BEGIN
+                UPDATE {fts} SET service = NEW.name
+                WHERE rowid IN (SELECT id FROM {table} WHERE {service_column} = NEW.id);
+            END
+            """,
+            f"""
+            INSERT INTO {fts}(rowid, {columns})
+            SELECT t.id, t.title, coalesce(s.name, ''), t.location, t.description
+            FROM {table} t LEFT JOIN {service_table} s ON s.id = t.{service_column}
+            """,
+        ]
+
+    def _sqlite_uninstall_sql(self, table, fts, service_table, service_column):
+        return [
+            f'DROP TRIGGER IF EXISTS {fts}_insert',
+            f'DROP TRIGGER IF EXISTS {fts}_update',
+            f'DROP TRIGGER IF EXISTS {fts}_delete',
+            f'DROP TRIGGER IF EXISTS {fts}_service_renamed',
+            f'DROP TABLE IF EXISTS {fts}',
+        ]
+
+    # ------------------------------------------------------------------ #
+    # Queries
+    # ------------------------------------------------------------------ #
+
+    def search(self, queryset, text):
+        """
+        queryset narrowed to rows matching every term of text (as a prefix),
+        annotated with search_rank (higher is better) and search_highlight
+        (description excerpt with matches in <b></b>). On PostgreSQL rows whose
+        location is a fuzzy (trigram) match for text are included as well.
+
+        Text without any terms leaves queryset unfiltered, with a zero rank.
+        On databases without an index every term must be contained in one of
+        the columns, and rows are neither ranked nor highlighted.
+        """
+        terms = search_terms(text)
+        if not terms:
+            return self._unranked(queryset)
+        vendor = connection.vendor
+        if vendor == 'postgresql':
+            return self._postgres_search(queryset, text, terms)
+        if vendor == 'sqlite':
+            return self._sqlite_search(queryset, terms)
+        return self._contains_search(queryset, terms)
+
+    def _unranked(self, queryset):
+        return queryset.annotate(
+            search_rank=Value(0.0, output_field=FloatField()),
+            search_highlight=Value(None, output_field=TextField()),
+        )
+
+    def _contains_search(self, queryset, terms):
+        condition = Q()
+        for term in terms:
+            condition &= (
+                Q(title__icontains=term) | Q(description__icontains=term) |
+                Q(location__icontains=term) | Q(service__name__icontains=term)
+            )
+        return self._unranked(queryset.filter(condition))
+
+    def _postgres_search(self, queryset, text, terms):
+        table = self.names['table']
+        # Each term quoted as a prefix lexeme: 'term':* & 'other':*
+        tsquery = ' & '.join(f"'{term}':*" for term in terms)
+        query_sql = f"to_tsquery('{SEARCH_CONFIG}', %s)"
+        options = f'StartSel={HIGHLIGHT_START}, StopSel={HIGHLIGHT_STOP}, MaxWords=30, MinWords=10'
+        return queryset.filter(
+            RawSQL(
+                # %% is a literal %: <% is pg_trgm's word similarity operator
+                f'({table}.search_vector @@ {query_sql} OR %s <%% {table}.location)',
+                (tsquery, text),
+                output_field=BooleanField(),
+            )
+        ).annotate(
+            search_rank=RawSQL(
+                f'ts_rank_cd({table}.search_vector, {query_sql}) + word_similarity(%s, {table}.location)',
+                (tsquery, text),
+                output_field=FloatField(),
+            ),
+            search_highlight=RawSQL(
+                f"ts_headline('{SEARCH_CONFIG}', {table}.description, {query_sql}, %s)",
+                (tsquery, options),
+                output_field=TextField(),
+            ),
+        )
+
+    def _sqlite_search(self, queryset, terms):
+        table, fts = self.names['table'], self.names['fts']
+        # Each term quoted as a prefix: "term"* "other"* (all must match)
+        match = ' '.join('"{}"*'.format(term.replace('"', '""')) for term in terms)
+        description = self.COLUMNS.index('description')
+        return queryset.filter(
+            RawSQL(
+                f'{table}.id IN (SELECT rowid FROM {fts} WHERE {fts} MATCH %s)',
+                (match,),
+                output_field=BooleanField(),
+            )
+        ).annotate(
+            search_rank=RawSQL(
+                f'(SELECT -bm25({fts}, {self.BM25_WEIGHTS}) FROM {fts} '
+                f'WHERE {fts} MATCH %s AND rowid = {table}.id)',
+                (match,),
+                output_field=FloatField(),
+            ),
+            search_highlight=RawSQL(
+                f"(SELECT snippet({fts}, {description}, %s, %s, '…', 24) FROM {fts} "
+                f"WHERE {fts} MATCH %s AND rowid = {table}.id)",
+                (HIGHLIGHT_START, HIGHLIGHT_STOP, match),
+                output_field=TextField(),
+            ),
+        )
+
+
+class SearchResultMixin:
+    """Adds search_rank and search_highlight to the representation of searched rows"""
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        if hasattr(instance, 'search_rank'):
+            data['search_rank'] = instance.search_rank
+            data['search_highlight'] = instance.search_highlight
+        return data
+
+
+tender_search = SearchIndex('works.Tenders')
+quick_job_search = SearchIndex('trust_network.QuickJob')
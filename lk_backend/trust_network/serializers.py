@@ -1,6 +1,8 @@
 from rest_framework import serializers
 from django.db.models import Q
 from .models import TrustConnection, QuickJob, QuickJobInterest, TrustScoreLog
+from .search import SearchResultMixin
+from lk_backend.instrumentation import TimedSerializerMixin
 from accounts.serializers import UserBaseSerializer, ContractorSerializer
 from accounts.models import Customer, Contractor
 from needs.serializers import ServicesSerializer
@@ -140,7 +142,7 @@ class QuickJobInterestSerializer(serializers.ModelSerializer):
         return data
 
 
-class QuickJobSerializer(serializers.ModelSerializer):
+class QuickJobSerializer(TimedSerializerMixin, SearchResultMixin, serializers.ModelSerializer):
     customer_details = UserBaseSerializer(source='customer', read_only=True)
     service_details = ServicesSerializer(source='service', read_only=True)
     assigned_contractor_details = ContractorSerializer(source='assigned_contractor', read_only=True)
@@ -213,7 +215,7 @@ class TrustScoreLogSerializer(serializers.ModelSerializer):
         read_only_fields = ('created_at',)
 
 
-class TrustedContractorRecommendationSerializer(serializers.Serializer):
+class TrustedContractorRecommendationSerializer(TimedSerializerMixin, serializers.Serializer):
     """Serializer for trusted contractor recommendations"""
     contractor = ContractorSerializer(read_only=True)
     trust_score = serializers.FloatField(read_only=True)
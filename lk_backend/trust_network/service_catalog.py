@@ -0,0 +1,240 @@
+"""
+Compact digest of the Services catalog for the Gemini prompt.
+
+Instead of serialising every service with its full description into each
+prompt, the catalog is loaded once into a digest (id, name and a truncated
+description per service) with a keyword index over names and descriptions.
+Each query is matched against the index locally and only the top-K candidate
+services are sent to the model.
+
+The digest is rebuilt when Services change (see signals.py) and after
+SERVICE_CATALOG_TTL seconds, so other worker processes pick up changes too.
+
+PromptStats records prompt size and Gemini latency per prompt mode
+('shortlist' or the original 'full' catalog, selected with GEMINI_PROMPT_MODE)
+so the two can be compared on real traffic.
+"""
+import json
+import math
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+
+from needs.models import Services
+from .nlp_cache import normalize_query
+
+# Words that carry no signal about which service is wanted
+_STOP_WORDS = set(normalize_query(' '.join([
+    'a', 'an', 'and', 'are', 'at', 'for', 'from', 'i', 'in', 'is', 'it', 'my', 'need',
+    'of', 'on', 'or', 'please', 'service', 'services', 'the', 'to', 'with', 'work',
+    'hai', 'ka', 'ke', 'ki', 'ko', 'mera', 'meri', 'mujhe', 'chahiye', 'vala', 'vali',
+    'karna', 'karne', 'karvana', 'karvani',
+])).split())
+
+# Hindi/Hinglish terms mapped to the English words used in service names and
+# descriptions. Keys are normalised below, so spelling variants match too.
+_QUERY_SYNONYMS = {
+    'ac': ['ac', 'air', 'conditioner', 'hvac'],
+    'bijli': ['electrical', 'electrician', 'wiring'],
+    'paani': ['water', 'plumbing', 'plumber'],
+    'nal': ['tap', 'plumbing'],
+    'theek': ['repair'],
+    'kharab': ['repair'],
+    'toot': ['repair'],
+    'safai': ['cleaning'],
+    'saaf': ['cleaning'],
+    'jhadu': ['cleaning'],
+    'rang': ['painting', 'paint'],
+    'deewar': ['wall', 'painting'],
+    'darwaza': ['door', 'carpentry'],
+    'darwaja': ['door', 'carpentry'],
+    'lakdi': ['wood', 'carpentry'],
+    'बिजली': ['electrical', 'electrician'],
+    'पानी': ['water', 'plumbing'],
+    'नल': ['tap', 'plumbing'],
+    'प्लंबर': ['plumber', 'plumbing'],
+    'इलेक्ट्रिशियन': ['electrician', 'electrical'],
+    'सफाई': ['cleaning'],
+    'साफ': ['cleaning'],
+    'रंग': ['painting'],
+    'पेंट': ['painting'],
+    'दरवाजा': ['door', 'carpentry'],
+    'बढई': ['carpenter', 'carpentry'],
+    'ठीक': ['repair'],
+    'खराब': ['repair'],
+}
+_QUERY_SYNONYMS = {normalize_query(word): terms for word, terms in _QUERY_SYNONYMS.items()}
+
+# Name matches count more than description matches
+_NAME_WEIGHT = 3.0
+_DESCRIPTION_WEIGHT = 1.0
+# Suffixes stripped as a crude stem ("plumber"/"plumbing", "electrician"/"electrical")
+_SUFFIXES = ('ician', 'ical', 'ing', 'ers', 'er', 'ed', 'ry', 's')
+
+
+def _stem(word):
+    for suffix in _SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            return word[:-len(suffix)]
+    return word
+
+
+def _terms(text):
+    """Index terms of a text: normalised words minus stop words, plus their stems"""
+    terms = set()
+    for word in normalize_query(text).split():
+        if word in _STOP_WORDS or len(word) < 2:
+            continue
+        terms.add(word)
+        terms.add(_stem(word))
+    return terms
+
+
+def _query_terms(query):
+    words = normalize_query(query).split()
+    expanded = list(words)
+    for word in words:
+        expanded.extend(_QUERY_SYNONYMS.get(word, ()))
+    return _terms(' '.join(expanded))
+
+
+def _summary(description, max_chars):
+    description = ' '.join((description or '').split())
+    if len(description) <= max_chars:
+        return description
+    return description[:max_chars].rsplit(' ', 1)[0] + '...'
+
+
+class ServiceCatalog:
+    """In-memory digest of Services with a weighted keyword index"""
+
+    def __init__(self, ttl, description_chars):
+        self.ttl = ttl
+        self.description_chars = description_chars
+        self.services = {}        # id -> {'id', 'name', 'summary'}
+        self.index = {}           # term -> {service_id: weight}
+        self.full_catalog_json = ''
+        self.built_at = None
+        self.build_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def invalidate(self):
+        with self._lock:
+            self.built_at = None
+
+    def ensure_loaded(self):
+        with self._lock:
+            if self.built_at is None or time.monotonic() - self.built_at > self.ttl:
+                self._build()
+        return self
+
+    def _build(self):
+        started = time.perf_counter()
+        rows = list(Services.objects.order_by('id').values_list('id', 'name', 'description'))
+
+        services = {}
+        index = defaultdict(dict)
+        for service_id, name, description in rows:
+            services[service_id] = {
+                'id': service_id,
+                'name': name,
+                'summary': _summary(description, self.description_chars),
+            }
+            for term in _terms(description):
+                index[term][service_id] = _DESCRIPTION_WEIGHT
+            for term in _terms(name):
+                index[term][service_id] = _NAME_WEIGHT
+
+        # Rare terms say more about a service than ones shared by half the catalog
+        total = max(len(services), 1)
+        for postings in index.values():
+            idf = math.log(1 + total / len(postings))
+            for service_id in postings:
+                postings[service_id] *= idf
+
+        self.services = services
+        self.index = dict(index)
+        # What the prompt used to embed, kept to report the size difference
+        self.full_catalog_json = json.dumps(
+            [{'id': i, 'name': n, 'description': d} for i, n, d in rows], indent=2
+        )
+        self.built_at = time.monotonic()
+        self.build_seconds = time.perf_counter() - started
+
+    def get(self, service_id):
+        """Digest entry for a service id (int or numeric string), or None"""
+        try:
+            service_id = int(service_id)
+        except (TypeError, ValueError):
+            return None
+        return self.ensure_loaded().services.get(service_id)
+
+    def shortlist(self, query, k=None):
+        """Up to k services best matching the query, best first"""
+        self.ensure_loaded()
+        k = k or settings.GEMINI_SERVICE_SHORTLIST_SIZE
+        if len(self.services) <= k:
+            return list(self.services.values())
+
+        scores = defaultdict(float)
+        for term in _query_terms(query):
+            for service_id, weight in self.index.get(term, {}).items():
+                scores[service_id] += weight
+        best = sorted(scores, key=lambda service_id: (-scores[service_id], service_id))[:k]
+        return [self.services[service_id] for service_id in best]
+
+    def digest(self, services):
+        """Prompt text for the given services, one compact line each"""
+        return '\n'.join(
+            f"{service['id']} | {service['name']} | {service['summary']}" for service in services
+        )
+
+    def names(self):
+        """Prompt text listing every service by id and name only"""
+        self.ensure_loaded()
+        return '\n'.join(f"{service['id']} | {service['name']}" for service in self.services.values())
+
+
+class PromptStats:
+    """Prompt size and Gemini latency, per prompt mode"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._modes = defaultdict(lambda: {
+                'calls': 0, 'errors': 0, 'prompt_chars': 0, 'services_sent': 0, 'latency': 0.0,
+            })
+
+    def record(self, mode, prompt_chars, services_sent, latency, error=False):
+        with self._lock:
+            entry = self._modes[mode]
+            entry['calls'] += 1
+            entry['errors'] += int(error)
+            entry['prompt_chars'] += prompt_chars
+            entry['services_sent'] += services_sent
+            entry['latency'] += latency
+
+    def summary(self):
+        with self._lock:
+            summary = {}
+            for mode, entry in self._modes.items():
+                calls = entry['calls']
+                summary[mode] = {
+                    'calls': calls,
+                    'errors': entry['errors'],
+                    'avg_prompt_chars': round(entry['prompt_chars'] / calls),
+                    # Rough token estimate (~4 characters per token)
+                    'avg_prompt_tokens': round(entry['prompt_chars'] / calls / 4),
+                    'avg_services_sent': round(entry['services_sent'] / calls, 1),
+                    'avg_latency_ms': round(entry['latency'] / calls * 1000, 1),
+                }
+            return summary
+
+
+service_catalog = ServiceCatalog(settings.SERVICE_CATALOG_TTL, settings.SERVICE_CATALOG_DESCRIPTION_CHARS)
+prompt_stats = PromptStats()
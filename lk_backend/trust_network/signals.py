@@ -0,0 +1,172 @@
+"""
+Signal handlers that keep derived trust network state in sync with
+TrustConnection rows, the denormalised work history in sync with Tenders,
+QuickJob, Services and User rows, quick job localities, the push feed of new
+quick jobs, and the parsed query cache and service catalog digest in sync
+with Services.
+"""
+from django.db import transaction
+from django.db.models import QuerySet
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from needs.models import Services
+from . import job_feed, localities, scoring, work_history
+from .graph import trust_graph
+from .propagation import record_trust_change
+from .models import TrustConnection, QuickJob
+from .nlp_cache import query_cache
+from .service_catalog import service_catalog
+
+
+@receiver(pre_save, sender=TrustConnection)
+def trust_connection_pre_save(sender, instance, raw=False, **kwargs):
+    """Remember the stored edge so post_save can tell what changed"""
+    instance._previous_edge = None
+    if raw or instance._state.adding or instance.pk is None:
+        return
+    instance._previous_edge = TrustConnection.objects.filter(pk=instance.pk).values_list(
+        'recommender_id', 'contractor_id', 'trust_level'
+    ).first()
+
+
+@receiver(post_save, sender=TrustConnection)
+def trust_connection_saved(sender, instance, created, raw=False, **kwargs):
+    """Update the contractor trust aggregates and the in-memory trust graph"""
+    recommender_id = instance.recommender_id
+    contractor_id = instance.contractor_id
+    contractor_user_id = instance.contractor.user_id
+    trust_level = instance.trust_level
+
+    if not raw:
+        previous = getattr(instance, '_previous_edge', None)
+        if created or previous is None:
+            scoring.connection_added(recommender_id, contractor_id, trust_level)
+        elif previous[:2] == (recommender_id, contractor_id):
+            scoring.connection_changed(recommender_id, contractor_id, previous[2], trust_level)
+        else:
+            # Moved to another recommender or contractor. The row is already
+            # counted at its new place, so recompute both ends from the table
+            old_recommender_id, old_contractor_id = previous[:2]
+            scoring.resync_recommender(
+                old_recommender_id, extra_contractor_ids=[old_contractor_id, contractor_id]
+            )
+            if old_recommender_id != recommender_id:
+                scoring.resync_recommender(recommender_id, extra_contractor_ids=[contractor_id])
+            record_trust_change(old_recommender_id)
+            transaction.on_commit(
+                lambda: trust_graph.remove_edge(old_recommender_id, old_contractor_id)
+            )
+
+        record_trust_change(recommender_id)
+
+    transaction.on_commit(
+        lambda: trust_graph.add_edge(recommender_id, contractor_id, contractor_user_id, trust_level)
+    )
+
+
+@receiver(post_delete, sender=TrustConnection)
+def trust_connection_deleted(sender, instance, origin=None, **kwargs):
+    """Update the contractor trust aggregates and the in-memory trust graph"""
+    recommender_id = instance.recommender_id
+    contractor_id = instance.contractor_id
+
+    if isinstance(origin, TrustConnection):
+        scoring.connection_removed(recommender_id, contractor_id, instance.trust_level)
+    elif isinstance(origin, QuerySet) and origin.model is TrustConnection:
+        # post_delete only runs once every row of the query is gone, so the
+        # running sums cannot be adjusted one row at a time: other recommenders'
+        # rows may already be missing from a contractor's recomputed sums
+        scoring.resync_recommender(recommender_id, extra_contractor_ids=[contractor_id])
+    else:
+        # Cascade from a user or contractor: their rows may already be gone,
+        # so recompute from what is left once the delete has committed.
+        transaction.on_commit(
+            lambda: scoring.resync_recommender(recommender_id, extra_contractor_ids=[contractor_id])
+        )
+
+    record_trust_change(recommender_id)
+
+    transaction.on_commit(
+        lambda: trust_graph.remove_edge(recommender_id, contractor_id)
+    )
+
+
+@receiver(post_save, sender='works.Tenders')
+def tender_saved(sender, instance, raw=False, **kwargs):
+    """Keep the denormalised work history in step with tender completion"""
+    if raw:
+        return
+    work_history.sync_completed_work(
+        work_history.TENDER, instance.id, work_history.tender_work_fields(instance)
+    )
+
+
+@receiver(post_delete, sender='works.Tenders')
+def tender_deleted(sender, instance, **kwargs):
+    tender_id, contractor_id = instance.id, instance.selected_contractor_id
+    transaction.on_commit(
+        lambda: work_history.forget_completed_work(work_history.TENDER, tender_id, contractor_id)
+    )
+
+
+@receiver(pre_save, sender=QuickJob)
+def quick_job_pre_save(sender, instance, raw=False, **kwargs):
+    """File new quick jobs under the customer's locality for the contractor feed"""
+    if raw or not instance._state.adding or instance.locality_id is not None:
+        return
+    instance.locality = localities.locality_for_user(instance.customer_id)
+
+
+@receiver(post_save, sender=QuickJob)
+def quick_job_saved(sender, instance, created, raw=False, **kwargs):
+    """Keep the denormalised work history in step with quick job completion and push new jobs to the feed"""
+    if raw:
+        return
+    work_history.sync_completed_work(
+        work_history.QUICK_JOB, instance.id, work_history.quick_job_work_fields(instance)
+    )
+    if created:
+        transaction.on_commit(lambda: job_feed.publish_job(instance))
+
+
+@receiver(post_delete, sender=QuickJob)
+def quick_job_deleted(sender, instance, **kwargs):
+    job_id, contractor_id = instance.id, instance.assigned_contractor_id
+    transaction.on_commit(
+        lambda: work_history.forget_completed_work(work_history.QUICK_JOB, job_id, contractor_id)
+    )
+
+
+@receiver(pre_save, sender=Services)
+def service_pre_save(sender, instance, raw=False, **kwargs):
+    """Remember the stored name so post_save can tell a rename"""
+    instance._previous_name = None
+    if raw or instance._state.adding or instance.pk is None:
+        return
+    instance._previous_name = Services.objects.filter(pk=instance.pk).values_list('name', flat=True).first()
+
+
+@receiver(post_save, sender=Services)
+def service_saved(sender, instance, raw=False, **kwargs):
+    previous_name = getattr(instance, '_previous_name', None)
+    if not raw and previous_name is not None and previous_name != instance.name:
+        work_history.rename_service(previous_name, instance.name)
+
+
+@receiver(post_save, sender='accounts.User')
+def user_saved(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    """Keep customer names in the work history in step with the user's"""
+    if raw or created:
+        return
+    if update_fields is not None and not {'first_name', 'last_name'} & set(update_fields):
+        return
+    work_history.rename_customer(instance)
+
+
+@receiver(post_save, sender=Services)
+@receiver(post_delete, sender=Services)
+def services_changed(sender, **kwargs):
+    """Parsed queries embed service ids, so drop them when the catalog changes"""
+    query_cache.invalidate()
+    service_catalog.invalidate()
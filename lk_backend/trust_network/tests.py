@@ -1,3 +1,1541 @@
-from django.test import TestCase
+import importlib
+import importlib.util
+import json
+import math
+import random
+import re
+import threading
+import time
+from contextlib import redirect_stdout
+from io import StringIO
+from types import SimpleNamespace
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.apps import apps
+from django.core.cache import caches
+from django.core.management import call_command
+from django.db import connection, connections, models
+from django.http import HttpResponse
+from django.test import AsyncClient, RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import ResolverMatch
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from accounts.models import User, Customer, Contractor, Supervisor
+from lk_backend.query_budget import (
+    QueryBudgetExceeded, QueryBudgetMiddleware, QueryBudgetTestMixin, query_budget, view_budget
+)
+from needs.models import Services, ContractorServices
+from works.models import Tenders
+from .gemini_client import CircuitBreaker, GeminiClient
+from .gemini_service import (
+    GeminiNLPService, LANGUAGE_PATTERNS, PARSER_KEYWORDS, SERVICE_PATTERNS, URGENCY_KEYWORDS
+)
+from .graph import TrustGraph, trust_graph
+from .job_feed import StreamTicket
+from .keyword_matcher import KeywordAutomaton, KeywordMatcher
+from .management.commands.benchmark_api import compare, percentile
+from .management.commands.benchmark_keyword_matcher import CORPUS, loop_analyse, matcher_analyse
+from .management.commands.explain_hot_queries import analyse_plan, hot_queries
+from .localities import (
+    geohash_block, geohash_bounds, geohash_encode, get_locality, nearby_locality_ids, place_key,
+    precision_for_radius
+)
+from .nlp_cache import LocalMemoryBackend, QueryCache, normalize_query
+from .models import (
+    TrustConnection, QuickJob, CompletedWork, ContractorTrustAggregate, ContractorWorkSummary,
+    CustomerContractorWorkSummary, Locality, RecommenderNetworkSize, TrustIndexEntry
+)
+from .pagination import encode_cursor, keyset_page
+from .paths import find_paths, find_paths_bulk, path_cache
+from .propagation import refresh_trust_index
+from .scoring import compute_trust_aggregates
+from .search import quick_job_search, tender_search
+from .service_catalog import service_catalog
+from .views import _stream_feed, contractor_feed
+from .work_history import rebuild_work_summaries
+
+
+class TrustedContractorsViewTests(TestCase):
+    url = '/api/trust-network/trusted-contractors/'
+
+    def setUp(self):
+        trust_graph.reset()
+        self.user = User.objects.create_user(
+            email='seeker@example.com', first_name='Seeker'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def make_contractor(self, name):
+        user = User.objects.create_user(
+            email=f'{name.lower()}@example.com', first_name=name, role=User.Roles.CONTRACTOR
+        )
+        return Contractor.objects.create(user=user, city='Pune', state='Maharashtra', address='Main road')
+
+    def build_network(self, direct, indirect_per_friend, prefix=''):
+        """Recommend `direct` contractors, each of whom recommends further contractors"""
+        for i in range(direct):
+            friend = self.make_contractor(f'{prefix}Friend{i}')
+            TrustConnection.objects.create(recommender=self.user, contractor=friend, trust_level=8)
+            for j in range(indirect_per_friend):
+                contractor = self.make_contractor(f'{prefix}Pro{i}x{j}')
+                TrustConnection.objects.create(recommender=friend.user, contractor=contractor, trust_level=6)
+
+    def count_queries(self, **params):
+        trust_graph.reset()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        return response, len(queries.captured_queries)
+
+    def test_query_count_does_not_grow_with_network(self):
+        self.build_network(direct=2, indirect_per_friend=2)
+        _, small = self.count_queries(limit=100)
+
+        self.build_network(direct=10, indirect_per_friend=4, prefix='More')
+        response, large = self.count_queries(limit=100)
+
+        self.assertEqual(len(response.data), 56)
+        self.assertEqual(small, large)
+        self.assertLessEqual(large, 5)
+
+    def test_direct_recommendations_rank_first_with_paths(self):
+        self.build_network(direct=1, indirect_per_friend=1)
+        response, _ = self.count_queries()
+
+        self.assertEqual(response.data[0]['direct_recommendations'], 1)
+        self.assertEqual(response.data[0]['connection_path'], ['Seeker', 'Friend0'])
+        self.assertEqual(response.data[1]['indirect_recommendations'], 1)
+        self.assertEqual(response.data[1]['connection_path'], ['Seeker', 'Friend0', 'Pro0x0'])
+
+    def test_pagination(self):
+        self.build_network(direct=3, indirect_per_friend=3)
+        first, _ = self.count_queries(page=1, limit=5)
+        second, _ = self.count_queries(page=2, limit=5)
+        last, _ = self.count_queries(page=3, limit=5)
+
+        ids = [rec['contractor']['id'] for rec in first.data + second.data + last.data]
+        self.assertEqual(len(first.data), 5)
+        self.assertEqual(len(last.data), 2)
+        self.assertEqual(len(set(ids)), 12)
+
+    def test_invalid_pagination(self):
+        response = self.client.get(self.url, {'page': 'two'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_reads_precomputed_index(self):
+        self.build_network(direct=10, indirect_per_friend=4)
+        trust_graph.reset()
+        refresh_trust_index()
+
+        response, queries = self.count_queries(limit=100)
+        self.assertEqual(len(response.data), 50)
+        self.assertLessEqual(queries, 3)
+
+        _, queries = self.count_queries(page=99, limit=10)
+        self.assertLessEqual(queries, 3)
+
+    def test_new_recommendations_show_before_the_index_refresh(self):
+        self.build_network(direct=2, indirect_per_friend=1)
+        refresh_trust_index()
+        friend = Contractor.objects.get(user__first_name='Friend0')
+
+        newcomer = self.make_contractor('Newcomer')
+        TrustConnection.objects.create(recommender=self.user, contractor=newcomer, trust_level=9)
+        second_degree = self.make_contractor('Referral')
+        TrustConnection.objects.create(recommender=friend.user, contractor=second_degree, trust_level=7)
+
+        response, _ = self.count_queries(limit=100)
+        names = [rec['contractor']['user']['first_name'] for rec in response.data]
+        self.assertIn('Newcomer', names)
+        self.assertIn('Referral', names)
+
+        # Once refreshed, the index has them too
+        refresh_trust_index()
+        self.assertEqual(
+            set(TrustIndexEntry.objects.filter(user=self.user).values_list('contractor__user__first_name', flat=True)),
+            set(names)
+        )
+        response, _ = self.count_queries(limit=100)
+        self.assertEqual([rec['contractor']['user']['first_name'] for rec in response.data][:1], ['Newcomer'])
+
+
+class TrustAggregateTests(TestCase):
+    """The incrementally maintained aggregates must match a full recomputation"""
+
+    def setUp(self):
+        self.users = [
+            User.objects.create_user(email=f'user{i}@example.com', first_name=f'User{i}') for i in range(3)
+        ]
+        self.contractors = [
+            Contractor.objects.create(
+                user=User.objects.create_user(
+                    email=f'pro{i}@example.com', first_name=f'Pro{i}', role=User.Roles.CONTRACTOR
+                ),
+                city='Pune', state='Maharashtra', address='Main road'
+            )
+            for i in range(4)
+        ]
+
+    def recommend(self, user, contractor, trust_level):
+        return TrustConnection.objects.create(recommender=user, contractor=contractor, trust_level=trust_level)
+
+    def assert_matches_full_recompute(self):
+        sums, network_sizes = compute_trust_aggregates()
+        aggregates = {aggregate.contractor_id: aggregate for aggregate in ContractorTrustAggregate.objects.all()}
+        for contractor in Contractor.objects.all():
+            aggregate = aggregates.get(contractor.id)
+            stored = [
+                aggregate.recommendation_count, aggregate.sum_trust,
+                aggregate.sum_trust_network, aggregate.sum_network,
+            ] if aggregate else [0, 0, 0, 0]
+            self.assertEqual(stored, sums.get(contractor.id, [0, 0, 0, 0]), contractor)
+            expected_score = aggregate.calculate_trust_score() if aggregate else 0.0
+            self.assertAlmostEqual(contractor.trust_score, expected_score)
+        stored_sizes = {
+            size.recommender_id: size.network_size
+            for size in RecommenderNetworkSize.objects.all() if size.network_size
+        }
+        self.assertEqual(stored_sizes, network_sizes)
+
+    def build(self):
+        a, b, c = self.users
+        p0, p1, p2, p3 = self.contractors
+        return [
+            self.recommend(a, p0, 8), self.recommend(a, p1, 6), self.recommend(a, p2, 9),
+            self.recommend(b, p0, 5), self.recommend(b, p3, 7),
+            self.recommend(c, p0, 10),
+        ]
+
+    def test_creates(self):
+        for connection in self.build():
+            self.assert_matches_full_recompute()
+        self.assertGreater(Contractor.objects.get(id=self.contractors[0].id).trust_score, 0)
+
+    def test_trust_level_edits(self):
+        connections = self.build()
+        connections[0].trust_level = 3
+        connections[0].save()
+        self.assert_matches_full_recompute()
+        # Moved to another contractor
+        connections[3].contractor = self.contractors[2]
+        connections[3].save()
+        self.assert_matches_full_recompute()
+
+    def test_single_deletes(self):
+        connections = self.build()
+        for connection in (connections[1], connections[5], connections[0]):
+            connection.delete()
+            self.assert_matches_full_recompute()
+
+    def test_queryset_deletes_across_recommenders(self):
+        connections = self.build()
+        # One query removes one of user0's recommendations and both of user1's;
+        # post_delete runs once all of them are gone
+        TrustConnection.objects.filter(id__in=[connections[i].id for i in (0, 3, 4)]).delete()
+        self.assert_matches_full_recompute()
+        self.assertEqual(
+            ContractorTrustAggregate.objects.get(contractor=self.contractors[0]).recommendation_count, 1
+        )
+
+        TrustConnection.objects.all().delete()
+        self.assert_matches_full_recompute()
+
+
+class TrustGraphTests(SimpleTestCase):
+    # (recommender, contractor, contractor's user, trust level). User 1 recommends
+    # contractors 10 (user 2) and 11 (user 3); 10 and 12 recommend each other.
+    ROWS = [
+        (1, 10, 2, 8), (1, 11, 3, 6), (2, 12, 4, 7), (3, 12, 4, 5), (3, 13, 5, 9), (4, 10, 2, 4),
+    ]
+
+    def setUp(self):
+        self.graph = TrustGraph().load(self.ROWS)
+
+    def test_queries(self):
+        graph = self.graph
+        self.assertEqual(graph.trust_level(1, 10), 8)
+        self.assertIsNone(graph.trust_level(1, 12))
+        self.assertEqual(graph.trusted_people(1), {2, 3})
+        self.assertEqual(graph.second_degree_levels(1, 12), {2: 7, 3: 5})
+        self.assertEqual(graph.network_contractors(1), ({10, 11}, {12, 13}))
+        # The cycle through users 2 and 4 brings contractor 10 back, already 1st degree
+        self.assertEqual(graph.network_contractors(2), ({12}, {10}))
+
+    def test_upstream_users(self):
+        self.assertEqual(self.graph.upstream_users({4}, 1), {2, 3, 4})
+        self.assertEqual(self.graph.upstream_users({4}, 2), {1, 2, 3, 4})
+        self.assertEqual(self.graph.upstream_users({5}, 0), {5})
+        self.assertEqual(self.graph.upstream_users({1}, 3), {1})
+
+    def test_add_and_remove_edges(self):
+        graph = self.graph
+        version = graph.version
+        graph.add_edge(1, 12, 4, 9)
+        self.assertEqual(graph.network_contractors(1), ({10, 11, 12}, {13}))
+        graph.add_edge(1, 12, 4, 3)
+        self.assertEqual(graph.trust_level(1, 12), 3)
+
+        graph.remove_edge(3, 13)
+        self.assertNotIn(13, graph.in_edges)
+        self.assertEqual(graph.network_contractors(1), ({10, 11, 12}, set()))
+        graph.remove_edge(1, 10)
+        graph.remove_edge(1, 11)
+        graph.remove_edge(1, 12)
+        self.assertNotIn(1, graph.out_edges)
+        self.assertEqual(graph.network_contractors(1), (set(), set()))
+        self.assertEqual(graph.version, version + 6)
+
+    def test_unloaded_graphs_ignore_mutations(self):
+        graph = TrustGraph()
+        graph.add_edge(1, 10, 2, 8)
+        graph.remove_edge(1, 11)
+        self.assertFalse(graph.is_loaded)
+        self.assertEqual(graph.out_edges, {})
+
+
+class TrustPathTests(SimpleTestCase):
+    def setUp(self):
+        path_cache.clear()
+
+    def graph(self, edges):
+        """Graph of (user, recommended user, trust level) edges; user n's contractor id is 100 + n"""
+        return TrustGraph().load([(a, 100 + b, b, level) for a, b, level in edges])
+
+    def paths(self, graph, user_id, target, **kwargs):
+        single = find_paths(user_id, 100 + target, graph=graph, **kwargs)
+        # The batched search (one forward BFS) must agree with the bidirectional one
+        bulk = find_paths_bulk(user_id, [100 + target, 999], graph=graph, **kwargs)
+        self.assertEqual(bulk, {100 + target: single, 999: ()})
+        return [(round(weight, 4), path) for weight, path in single]
+
+    def test_shortest_paths_win_then_rank_by_trust(self):
+        graph = self.graph([
+            (1, 2, 2), (2, 5, 2),              # short, barely trusted
+            (1, 6, 9), (6, 5, 9),              # short, trusted
+            (1, 3, 10), (3, 4, 10), (4, 5, 10),  # longer, fully trusted
+        ])
+        self.assertEqual(self.paths(graph, 1, 5, max_paths=3), [(0.81, [1, 6, 5]), (0.04, [1, 2, 5])])
+        self.assertEqual(self.paths(graph, 1, 5, max_paths=1), [(0.81, [1, 6, 5])])
+        self.assertEqual(self.paths(graph, 1, 4, max_paths=3), [(1.0, [1, 3, 4])])
+
+    def test_max_depth(self):
+        graph = self.graph([(1, 2, 10), (2, 3, 10), (3, 4, 10), (4, 5, 5)])
+        self.assertEqual(self.paths(graph, 1, 5, max_depth=4), [(0.5, [1, 2, 3, 4, 5])])
+        self.assertEqual(self.paths(graph, 1, 5, max_depth=3), [])
+        self.assertEqual(self.paths(graph, 1, 4, max_depth=3), [(1.0, [1, 2, 3, 4])])
+        with override_settings(TRUST_PATH_MAX_DEPTH=2):
+            self.assertEqual(self.paths(graph, 1, 4), [])
+            self.assertEqual(self.paths(graph, 1, 3), [(1.0, [1, 2, 3])])
+
+    def test_cycles(self):
+        graph = self.graph([(1, 2, 10), (2, 1, 10), (2, 3, 5), (3, 2, 5), (3, 1, 8), (3, 4, 10)])
+        self.assertEqual(self.paths(graph, 1, 4), [(0.5, [1, 2, 3, 4])])
+        self.assertEqual(self.paths(graph, 3, 1), [(0.8, [3, 1])])
+        # No path to oneself, nor to a contractor nobody recommended
+        self.assertEqual(self.paths(graph, 1, 1), [])
+        self.assertEqual(self.paths(graph, 1, 9), [])
+
+    def test_cached_paths_are_dropped_when_the_graph_changes(self):
+        graph = self.graph([(1, 2, 10), (2, 3, 10)])
+        self.assertEqual(self.paths(graph, 1, 3), [(1.0, [1, 2, 3])])
+        hits = path_cache.hits
+        find_paths(1, 103, graph=graph)
+        self.assertEqual(path_cache.hits, hits + 1)
+
+        graph.add_edge(1, 103, 3, 7)
+        self.assertEqual(self.paths(graph, 1, 3), [(0.7, [1, 3])])
+        graph.remove_edge(1, 102)
+        graph.remove_edge(1, 103)
+        self.assertEqual(self.paths(graph, 1, 3), [])
+
+
+class TrustGraphSyncTests(TestCase):
+    """The process graph follows TrustConnection writes, here and in other processes"""
+
+    def setUp(self):
+        caches['default'].delete(TrustGraph.VERSION_KEY)
+        trust_graph.reset()
+        self.users = [
+            User.objects.create_user(email=f'graph{i}@example.com', first_name=f'Graph{i}') for i in range(2)
+        ]
+        self.contractors = [
+            Contractor.objects.create(
+                user=User.objects.create_user(
+                    email=f'graphpro{i}@example.com', first_name=f'GraphPro{i}', role=User.Roles.CONTRACTOR
+                ),
+                city='Pune', state='Maharashtra', address='Main road'
+            )
+            for i in range(3)
+        ]
+        trust_graph.ensure_loaded()
+
+    def write(self, action):
+        with self.captureOnCommitCallbacks(execute=True):
+            return action()
+
+    def recommend(self, user, contractor, trust_level):
+        return self.write(
+            lambda: TrustConnection.objects.create(recommender=user, contractor=contractor, trust_level=trust_level)
+        )
+
+    def assert_graph_matches_table(self, graph):
+        fresh = TrustGraph().load()
+        self.assertEqual(graph.out_edges, fresh.out_edges)
+        self.assertEqual(graph.in_edges, fresh.in_edges)
+
+    def test_signals_keep_the_graph_in_sync(self):
+        a, b = self.users
+        p0, p1, p2 = self.contractors
+        connections = [
+            self.recommend(a, p0, 8), self.recommend(a, p1, 6), self.recommend(b, p1, 7),
+            self.recommend(p0.user, p2, 5),
+        ]
+        self.assert_graph_matches_table(trust_graph)
+        self.assertEqual(trust_graph.network_contractors(a.id), ({p0.id, p1.id}, {p2.id}))
+
+        connections[0].trust_level = 3
+        self.write(connections[0].save)
+        # Moved to another contractor
+        connections[2].contractor = p2
+        self.write(connections[2].save)
+        self.assert_graph_matches_table(trust_graph)
+
+        self.write(connections[1].delete)
+        self.write(lambda: TrustConnection.objects.filter(recommender=p0.user).delete())
+        self.assert_graph_matches_table(trust_graph)
+        self.assertEqual(trust_graph.network_contractors(a.id), ({p0.id}, set()))
+
+        # Every change was applied in place: nothing to reload
+        with self.assertNumQueries(0):
+            trust_graph.ensure_loaded()
+
+    def test_other_processes_reload_after_a_write(self):
+        a, _ = self.users
+        other_process = TrustGraph(ttl=60, cache_alias='default').ensure_loaded()
+
+        self.recommend(a, self.contractors[0], 8)
+        with self.assertNumQueries(1):
+            other_process.ensure_loaded()
+        self.assert_graph_matches_table(other_process)
+        with self.assertNumQueries(0):
+            other_process.ensure_loaded()
+
+    def test_writes_without_signals_reload_after_mark_changed(self):
+        a, _ = self.users
+        self.recommend(a, self.contractors[0], 8)
+        TrustConnection.objects.update(trust_level=2)
+        trust_graph.mark_changed()
+
+        trust_graph.ensure_loaded()
+        self.assertEqual(trust_graph.trust_level(a.id, self.contractors[0].id), 2)
+
+    def test_reloads_after_the_ttl(self):
+        with self.assertNumQueries(0):
+            trust_graph.ensure_loaded()
+        trust_graph.loaded_at -= trust_graph.ttl + 1
+        with self.assertNumQueries(1):
+            trust_graph.ensure_loaded()
+
+
+class KeysetPaginationTests(TestCase):
+    url = '/api/trust-network/my-quick-jobs/'
+
+    def setUp(self):
+        self.user = User.objects.create_user(email='cara@example.com', first_name='Cara')
+        Customer.objects.create(user=self.user, city='Pune', state='Maharashtra')
+        service = Services.objects.create(name='Plumbing', description='Pipes')
+        for i in range(7):
+            QuickJob.objects.create(
+                customer=self.user, service=service, title=f'Job {i}', description='-', location='Pune'
+            )
+        # Two runs of jobs sharing a created_at, so pages must break ties on id
+        self.ids = list(QuickJob.objects.order_by('id').values_list('id', flat=True))
+        earlier = timezone.now() - timezone.timedelta(hours=1)
+        QuickJob.objects.filter(id__in=self.ids[:4]).update(created_at=earlier)
+        QuickJob.objects.filter(id__in=self.ids[4:]).update(created_at=timezone.now())
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_descending_pages_continue_across_equal_sort_keys(self):
+        seen, cursor = [], ''
+        while cursor is not None:
+            response = self.client.get(self.url, {'cursor': cursor, 'limit': 3, 'count': 'exact'})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response['X-Total-Count'], '7')
+            seen += [job['id'] for job in response.data['results']]
+            cursor = response.data['next_cursor']
+            if cursor is not None:
+                self.assertIn(f'cursor={cursor}', response.data['next'])
+        self.assertEqual(seen, self.ids[4:][::-1] + self.ids[:4][::-1])
+
+        # Without a cursor parameter the view returns a plain list
+        self.assertEqual(len(self.client.get(self.url).data), 7)
+
+    def test_ascending_pages(self):
+        seen, cursor = [], None
+        while True:
+            rows, cursor = keyset_page(QuickJob.objects.all(), ('created_at',), cursor, limit=2)
+            seen += [job.id for job in rows]
+            if cursor is None:
+                break
+        self.assertEqual(seen, self.ids)
+
+        rows, cursor = keyset_page(QuickJob.objects.all(), ('created_at', 'id'), None, limit=7)
+        self.assertEqual(([job.id for job in rows], cursor), (self.ids, None))
+
+    def test_invalid_cursors(self):
+        cursors = [
+            'not a cursor',
+            encode_cursor([1]),
+            encode_cursor([5, 'x']),
+            encode_cursor([True, 1]),
+            encode_cursor(['2025-13-45T00:00:00', 1]),
+            encode_cursor(['2025-01-01T00:00:00', [1]]),
+        ]
+        for cursor in cursors:
+            with self.subTest(cursor=cursor):
+                self.assertEqual(self.client.get(self.url, {'cursor': cursor}).status_code, 400)
+                with self.assertRaises(ValueError):
+                    keyset_page(QuickJob.objects.all(), ('-created_at', '-id'), cursor)
+        response = self.client.get(self.url, {'cursor': '', 'limit': 'ten'})
+        self.assertEqual(response.status_code, 400)
+
+
+class WorkHistoryTests(TestCase):
+    """The signal-maintained work history must match a rebuild from Tenders and QuickJob"""
+
+    def setUp(self):
+        self.customers = [
+            Customer.objects.create(
+                user=User.objects.create_user(email=f'client{i}@example.com', first_name=f'Client{i}'),
+                city='Pune', state='Maharashtra'
+            )
+            for i in range(2)
+        ]
+        self.contractors = [
+            Contractor.objects.create(
+                user=User.objects.create_user(
+                    email=f'builder{i}@example.com', first_name=f'Builder{i}', role=User.Roles.CONTRACTOR
+                ),
+                city='Pune', state='Maharashtra', address='Main road'
+            )
+            for i in range(2)
+        ]
+        self.supervisor = Supervisor.objects.create(
+            user=User.objects.create_user(email='sam@example.com', first_name='Sam', role=User.Roles.SUPERVISOR),
+            city='Pune', state='Maharashtra', address='Main road'
+        )
+        self.service = Services.objects.create(name='Plumbing', description='Pipes')
+
+    def tender(self, customer, contractor, status='completed'):
+        return Tenders.objects.create(
+            title='Bathroom refit', description='-', customer=customer, supervisor=self.supervisor,
+            service=self.service, location='Pune', budget=5000, selected_contractor=contractor, status=status
+        )
+
+    def quick_job(self, customer, contractor, status=QuickJob.JobStatus.COMPLETED):
+        return QuickJob.objects.create(
+            customer=customer.user, service=self.service, title='Tap fix', description='-', location='Pune',
+            assigned_contractor=contractor, status=status, completed_at=timezone.now()
+        )
+
+    def snapshot(self):
+        summary_fields = ('completed_tenders', 'completed_quick_jobs', 'last_completed_at', 'recent_work')
+        return (
+            sorted(CompletedWork.objects.values_list(
+                'work_type', 'work_id', 'contractor_id', 'customer_id', 'service_name', 'customer_name'
+            )),
+            sorted(
+                (summary.contractor_id, [getattr(summary, field) for field in summary_fields])
+                for summary in ContractorWorkSummary.objects.exclude(last_completed_at=None)
+            ),
+            sorted(
+                (summary.customer_id, summary.contractor_id, [getattr(summary, field) for field in summary_fields])
+                for summary in CustomerContractorWorkSummary.objects.all()
+            ),
+        )
+
+    def assert_matches_rebuild(self):
+        incremental = self.snapshot()
+        rebuild_work_summaries()
+        self.assertEqual(incremental, self.snapshot())
+
+    def summary(self, contractor):
+        return ContractorWorkSummary.objects.get(contractor=contractor)
+
+    def test_completion(self):
+        first, second = self.customers
+        self.tender(first, self.contractors[0])
+        self.quick_job(first, self.contractors[0])
+        self.quick_job(second, self.contractors[0])
+        self.tender(first, self.contractors[1], status='published')
+        self.quick_job(second, self.contractors[1], status=QuickJob.JobStatus.ASSIGNED)
+
+        summary = self.summary(self.contractors[0])
+        self.assertEqual((summary.completed_tenders, summary.completed_quick_jobs), (1, 2))
+        self.assertEqual(len(summary.recent_work), 3)
+        self.assertFalse(ContractorWorkSummary.objects.filter(contractor=self.contractors[1]).exists())
+        self.assertEqual(CustomerContractorWorkSummary.objects.count(), 2)
+        self.assert_matches_rebuild()
+
+    def test_uncompleted_and_reassigned_work(self):
+        customer = self.customers[0]
+        tender = self.tender(customer, self.contractors[0])
+        job = self.quick_job(customer, self.contractors[0])
+
+        tender.status = 'in_progress'
+        tender.save()
+        self.assertEqual(self.summary(self.contractors[0]).completed_tenders, 0)
+        self.assert_matches_rebuild()
+
+        job.assigned_contractor = self.contractors[1]
+        job.save()
+        self.assertEqual(self.summary(self.contractors[0]).completed_quick_jobs, 0)
+        self.assertEqual(self.summary(self.contractors[1]).completed_quick_jobs, 1)
+        self.assertEqual(
+            list(CustomerContractorWorkSummary.objects.values_list('contractor_id', flat=True)),
+            [self.contractors[1].id]
+        )
+        self.assert_matches_rebuild()
+
+    def test_deletes(self):
+        first, second = self.customers
+        tender = self.tender(first, self.contractors[0])
+        job = self.quick_job(first, self.contractors[0])
+        self.tender(second, self.contractors[0])
+        self.quick_job(second, self.contractors[1])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            tender.delete()
+            job.delete()
+        self.assertEqual(self.summary(self.contractors[0]).completed_tenders, 1)
+        self.assert_matches_rebuild()
+
+        # The customer's tenders, quick jobs and work history rows go with them
+        with self.captureOnCommitCallbacks(execute=True):
+            second.user.delete()
+        self.assertEqual(CompletedWork.objects.count(), 0)
+        self.assertEqual(CustomerContractorWorkSummary.objects.count(), 0)
+        for contractor in self.contractors:
+            summary = self.summary(contractor)
+            self.assertEqual(
+                (summary.completed_tenders, summary.completed_quick_jobs, summary.recent_work), (0, 0, [])
+            )
+        self.assert_matches_rebuild()
+
+    def test_renames(self):
+        customer = self.customers[0]
+        self.tender(customer, self.contractors[0])
+        self.quick_job(customer, self.contractors[1])
+
+        self.service.name = 'Plumbing and Sanitation'
+        self.service.save()
+        customer.user.last_name = 'Sharma'
+        customer.user.save()
+        # Saves that do not touch the name leave the rows alone
+        with self.assertNumQueries(1):
+            customer.user.save(update_fields=['last_login'])
+
+        self.assertEqual(
+            set(CompletedWork.objects.values_list('service_name', 'customer_name')),
+            {('Plumbing and Sanitation', 'Client0 Sharma')}
+        )
+        self.assertEqual(self.summary(self.contractors[0]).recent_work[0]['customer_name'], 'Client0 Sharma')
+        self.assert_matches_rebuild()
+
+    def test_paginated_endpoints(self):
+        customer = self.customers[0]
+        for contractor in self.contractors:
+            self.tender(customer, contractor)
+        jobs = [self.quick_job(customer, self.contractors[0]) for _ in range(4)]
+        # Two jobs completed at the same moment, so pages must break ties on id
+        QuickJob.objects.filter(id__in=[jobs[1].id, jobs[2].id]).update(completed_at=jobs[0].completed_at)
+        rebuild_work_summaries()
+
+        client = APIClient()
+        client.force_authenticate(customer.user)
+        url = f'/api/trust-network/contractor-work-history/{self.contractors[0].id}/'
+        seen, cursor = [], ''
+        while cursor is not None:
+            response = client.get(url, {'cursor': cursor, 'limit': 2})
+            self.assertEqual(response.status_code, 200)
+            totals = (response.data['total_completed_tenders'], response.data['total_completed_quick_jobs'])
+            self.assertEqual(totals, (1, 4))
+            seen += [(work['type'], work['id']) for work in response.data['recent_work']]
+            cursor = response.data['next_cursor']
+        expected = CompletedWork.objects.filter(contractor=self.contractors[0]).order_by('-completed_at', '-id')
+        self.assertEqual(seen, list(expected.values_list('work_type', 'work_id')))
+        self.assertEqual(client.get(url, {'cursor': 'garbage'}).status_code, 400)
+
+        url = '/api/trust-network/customer-worked-contractors/'
+        response = client.get(url, {'limit': 1})
+        self.assertEqual(response.data['total_contractors'], 2)
+        second = client.get(url, {'limit': 1, 'cursor': response.data['next_cursor']})
+        self.assertIsNone(second.data['next_cursor'])
+        self.assertEqual(
+            [page.data['worked_contractors'][0]['id'] for page in (response, second)],
+            list(CustomerContractorWorkSummary.objects.filter(customer=customer.user).order_by(
+                '-last_completed_at', '-id'
+            ).values_list('contractor_id', flat=True))
+        )
+
+
+class LocalityTests(TestCase):
+    # Pimpri is 14 km from Pune, Lonavala 54 km and Mumbai 120 km
+    PLACES = {
+        'Pune': (18.5204, 73.8567), 'Pimpri': (18.6298, 73.7997),
+        'Lonavala': (18.7546, 73.4062), 'Mumbai': (19.0760, 72.8777),
+    }
+
+    def place(self, city, coordinates=True):
+        latitude, longitude = self.PLACES[city] if coordinates else (None, None)
+        return Locality.objects.create(city=city, state='Maharashtra', latitude=latitude, longitude=longitude)
+
+    def test_geohash(self):
+        self.assertEqual(geohash_encode(57.64911, 10.40744, 11), 'u4pruydqqvj')
+        for latitude, longitude in self.PLACES.values():
+            geohash = geohash_encode(latitude, longitude)
+            (min_lat, max_lat), (min_lon, max_lon) = geohash_bounds(geohash)
+            self.assertTrue(min_lat <= latitude <= max_lat and min_lon <= longitude <= max_lon)
+            self.assertEqual(geohash_encode((min_lat + max_lat) / 2, (min_lon + max_lon) / 2), geohash)
+
+            centre = geohash[:4]
+            (min_lat, max_lat), (min_lon, max_lon) = geohash_bounds(centre)
+            block = geohash_block(centre)
+            self.assertEqual(len(block), 9)
+            self.assertIn(centre, block)
+            # Every neighbour touches the centre cell
+            for cell in block - {centre}:
+                (cell_min_lat, cell_max_lat), (cell_min_lon, cell_max_lon) = geohash_bounds(cell)
+                self.assertTrue(cell_min_lat <= max_lat and cell_max_lat >= min_lat)
+                self.assertTrue(cell_min_lon <= max_lon and cell_max_lon >= min_lon)
+
+    def destination(self, latitude, longitude, distance_km, bearing):
+        """The point distance_km away from (latitude, longitude) on a bearing"""
+        phi, theta = math.radians(latitude), math.radians(bearing)
+        delta = distance_km / 6371.0
+        phi2 = math.asin(math.sin(phi) * math.cos(delta) + math.cos(phi) * math.sin(delta) * math.cos(theta))
+        lambda2 = math.radians(longitude) + math.atan2(
+            math.sin(theta) * math.sin(delta) * math.cos(phi), math.cos(delta) - math.sin(phi) * math.sin(phi2)
+        )
+        return math.degrees(phi2), math.degrees(lambda2)
+
+    def test_radius_blocks_cover_every_direction(self):
+        # Cells narrow away from the equator: at Delhi a precision 5 cell is
+        # only 4.3 km wide, too narrow for a 4.5 km radius
+        self.assertEqual(precision_for_radius(4.5), 5)
+        self.assertEqual(precision_for_radius(4.5, 28.6), 4)
+
+        rng = random.Random(5)
+        for _ in range(300):
+            latitude, longitude = rng.uniform(8, 35), rng.uniform(68, 97)
+            radius_km = rng.choice([rng.uniform(0.3, 10), rng.uniform(10, 100)])
+            precision = precision_for_radius(radius_km, latitude)
+            block = geohash_block(geohash_encode(latitude, longitude, precision))
+            for bearing in range(0, 360, 15):
+                point = self.destination(latitude, longitude, 0.999 * radius_km, bearing)
+                cell = geohash_encode(*point, precision)
+                self.assertIn(cell, block, (latitude, longitude, radius_km, bearing))
+
+    def test_place_key(self):
+        self.assertEqual({place_key(city) for city in ('New  Delhi', 'new delhi.', ' NEW DELHI ')}, {'new delhi'})
+        self.assertEqual(place_key(None), '')
+        self.assertEqual(get_locality('New Delhi', 'Delhi'), get_locality('new  delhi.', 'DELHI'))
+        self.assertIsNone(get_locality(' ', 'Delhi'))
+        self.assertIsNone(get_locality('Agra', 'UP', create=False))
+
+    def test_nearby_localities_within_radius(self):
+        pune, pimpri, lonavala, mumbai = (self.place(city) for city in ('Pune', 'Pimpri', 'Lonavala', 'Mumbai'))
+        self.assertEqual(nearby_locality_ids(pune), [pune.id])
+        self.assertEqual(set(nearby_locality_ids(pune, 10)), {pune.id})
+        self.assertEqual(set(nearby_locality_ids(pune, 20)), {pune.id, pimpri.id})
+        self.assertEqual(set(nearby_locality_ids(pune, 60)), {pune.id, pimpri.id, lonavala.id})
+        # Capped at QUICK_JOB_FEED_MAX_RADIUS_KM (100)
+        self.assertEqual(set(nearby_locality_ids(pune, 500)), {pune.id, pimpri.id, lonavala.id})
+        self.assertIn(mumbai.id, nearby_locality_ids(lonavala, 100))
+
+    def test_localities_without_coordinates_match_themselves(self):
+        self.place('Pune')
+        unplaced = Locality.objects.create(city='Wakad', state='Maharashtra')
+        self.assertEqual(unplaced.geohash, '')
+        self.assertEqual(nearby_locality_ids(unplaced, 100), [unplaced.id])
+
+    def make_customer(self, city):
+        user = User.objects.create_user(email=f'customer{User.objects.count()}@example.com', first_name='Cara')
+        Customer.objects.create(user=user, city=city, state='Maharashtra')
+        return user
+
+    def post_job(self, user, service):
+        return QuickJob.objects.create(customer=user, service=service, title='Tap', description='-', location='-')
+
+    def test_new_jobs_are_filed_under_the_customer_locality(self):
+        service = Services.objects.create(name='Plumbing', description='Pipes')
+        pune = self.place('Pune')
+        job = self.post_job(self.make_customer(' pune. '), service)
+        self.assertEqual(job.locality, pune)
+
+        job = self.post_job(self.make_customer('Pimpri'), service)
+        self.assertEqual((job.locality.city, job.locality.city_key), ('Pimpri', 'pimpri'))
+
+        without_profile = User.objects.create_user(email='guest@example.com', first_name='Guest')
+        self.assertIsNone(self.post_job(without_profile, service).locality)
+
+    def test_backfill_migration(self):
+        service = Services.objects.create(name='Plumbing', description='Pipes')
+        jobs = [self.post_job(self.make_customer(city), service) for city in ('Pune', 'PUNE ', 'Mumbai')]
+        QuickJob.objects.update(locality=None)
+        Locality.objects.all().delete()
+
+        migration = importlib.import_module('trust_network.migrations.0007_quick_job_localities')
+        migration.backfill_localities(apps, None)
+
+        localities = [QuickJob.objects.get(id=job.id).locality for job in jobs]
+        self.assertEqual(localities[0], localities[1])
+        self.assertEqual([locality.city_key for locality in localities], ['pune', 'pune', 'mumbai'])
+        self.assertEqual(Locality.objects.count(), 2)
+
+    def test_list_and_stream_feeds_agree_for_a_new_locality(self):
+        service = Services.objects.create(name='Plumbing', description='Pipes')
+        pune = self.place('Pune')
+        user = User.objects.create_user(email='pro@example.com', first_name='Pro', role=User.Roles.CONTRACTOR)
+        contractor = Contractor.objects.create(user=user, city='Pimpri', state='Maharashtra', address='Main road')
+        ContractorServices.objects.create(contractor=contractor, service=service)
+
+        # No job was posted in Pimpri yet: both feeds create its locality
+        service_ids, locality_ids = contractor_feed(contractor, 20)
+        pimpri = Locality.objects.get(city_key='pimpri')
+        self.assertEqual((service_ids, locality_ids), ([service.id], [pimpri.id]))
+        self.assertEqual(_stream_feed(user, 20), (service_ids, locality_ids))
+
+        # Once it has coordinates, radius search reaches Pune's jobs
+        pimpri.latitude, pimpri.longitude = self.PLACES['Pimpri']
+        pimpri.save()
+        job = self.post_job(self.make_customer('Pune'), service)
+        client = APIClient()
+        client.force_authenticate(user)
+        response = client.get('/api/trust-network/quick-jobs/', {'radius_km': 20})
+        self.assertEqual([row['id'] for row in response.data], [job.id])
+        self.assertEqual(set(_stream_feed(user, 20)[1]), {pimpri.id, pune.id})
+
+
+class QuickJobStreamTests(TestCase):
+    url = '/api/trust-network/quick-jobs/stream/'
+
+    def setUp(self):
+        self.plumbing = Services.objects.create(name='Plumbing', description='Pipes')
+        self.painting = Services.objects.create(name='Painting', description='Walls')
+        user = User.objects.create_user(
+            email='pro@example.com', first_name='Pro', role=User.Roles.CONTRACTOR
+        )
+        contractor = Contractor.objects.create(user=user, city='Pune', state='Maharashtra', address='Main road')
+        ContractorServices.objects.create(contractor=contractor, service=self.plumbing)
+        self.token = str(AccessToken.for_user(user))
+        self.ticket = str(StreamTicket.for_user(user))
+        self.customers = {
+            city: Customer.objects.create(
+                user=User.objects.create_user(email=f'{city.lower()}@example.com', first_name=city),
+                city=city, state='Maharashtra'
+            )
+            for city in ('Pune', 'Mumbai')
+        }
+
+    def post_job(self, city, service, title):
+        with self.captureOnCommitCallbacks(execute=True):
+            return QuickJob.objects.create(
+                customer=self.customers[city].user, service=service, title=title,
+                description='Today please', location=city
+            )
+
+    async def next_event(self, stream):
+        while True:
+            chunk = (await anext(stream)).decode()
+            if chunk.startswith('id:'):
+                return json.loads(chunk.split('data: ', 1)[1])
+
+    async def test_pushes_matching_jobs_only(self):
+        response = await AsyncClient().get(self.url, {'ticket': self.ticket})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        stream = aiter(response.streaming_content)
+        self.assertTrue((await anext(stream)).startswith(b'retry:'))
+
+        await sync_to_async(self.post_job)('Mumbai', self.plumbing, 'Elsewhere')
+        await sync_to_async(self.post_job)('Pune', self.painting, 'Other service')
+        job = await sync_to_async(self.post_job)('Pune', self.plumbing, 'Leaking tap')
+
+        message = await self.next_event(stream)
+        self.assertEqual((message['id'], message['title']), (job.id, 'Leaking tap'))
+        await response.streaming_content.aclose()
+
+    async def test_replays_missed_jobs(self):
+        first = await sync_to_async(self.post_job)('Pune', self.plumbing, 'Seen')
+        missed = await sync_to_async(self.post_job)('Pune', self.plumbing, 'Missed')
+        response = await AsyncClient().get(
+            self.url, headers={'Authorization': f'Bearer {self.token}', 'Last-Event-ID': str(first.id)}
+        )
+        stream = aiter(response.streaming_content)
+        self.assertEqual((await self.next_event(stream))['id'], missed.id)
+        await response.streaming_content.aclose()
+
+    async def test_requires_contractor_token(self):
+        response = await AsyncClient().get(self.url)
+        self.assertEqual(response.status_code, 401)
+        customer_token = str(AccessToken.for_user(self.customers['Pune'].user))
+        response = await AsyncClient().get(self.url, headers={'Authorization': f'Bearer {customer_token}'})
+        self.assertEqual(response.status_code, 403)
+
+    async def test_query_string_takes_stream_tickets_only(self):
+        # Access tokens are not accepted in the URL, and tickets are not accepted by the API
+        response = await AsyncClient().get(self.url, {'token': self.token})
+        self.assertEqual(response.status_code, 401)
+        response = await AsyncClient().get(self.url, {'ticket': self.token})
+        self.assertEqual(response.status_code, 401)
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.ticket}')
+        response = await sync_to_async(client.get)('/api/trust-network/my-quick-jobs/')
+        self.assertEqual(response.status_code, 401)
+
+    def test_ticket_endpoint(self):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.token}')
+        response = client.post(f'{self.url}ticket/')
+        self.assertEqual(response.status_code, 200)
+        ticket = StreamTicket(response.data['ticket'])
+        self.assertEqual(ticket['user_id'], str(User.objects.get(email='pro@example.com').id))
+        self.assertLessEqual(ticket['exp'] - ticket['iat'], response.data['expires_in'])
+
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.customers['Pune'].user)}")
+        self.assertEqual(client.post(f'{self.url}ticket/').status_code, 403)
+
+
+class SearchTests(TestCase):
+    """Full-text search on the SQLite FTS5 index the tests run on"""
+
+    def setUp(self):
+        self.plumbing = Services.objects.create(name='Plumbing', description='Pipes')
+        self.painting = Services.objects.create(name='Painting', description='Walls')
+        self.customer = Customer.objects.create(
+            user=User.objects.create_user(email='cara@example.com', first_name='Cara'),
+            city='Pune', state='Maharashtra'
+        )
+        self.supervisor = Supervisor.objects.create(
+            user=User.objects.create_user(
+                email='sam@example.com', first_name='Sam', role=User.Roles.SUPERVISOR
+            ),
+            city='Pune', state='Maharashtra', address='Main road'
+        )
+
+    def tender(self, title, description, service, location='Pune'):
+        return Tenders.objects.create(
+            title=title, description=description, customer=self.customer, supervisor=self.supervisor,
+            service=service, location=location, status='published'
+        )
+
+    def job(self, title, description, service, location='Pune'):
+        return QuickJob.objects.create(
+            customer=self.customer.user, service=service, title=title, description=description,
+            location=location
+        )
+
+    def titles(self, index, model, text):
+        return [row.title for row in index.search(model.objects.all(), text).order_by('-search_rank', '-id')]
+
+    def test_ranking_and_highlight(self):
+        in_title = self.tender('Leaking pipe', 'Water under the kitchen sink', self.plumbing)
+        in_description = self.tender('Bathroom work', 'Replace the old pipe fittings', self.plumbing)
+        self.tender('Paint walls', 'Two rooms', self.painting)
+
+        self.assertEqual(self.titles(tender_search, Tenders, 'pipe'), ['Leaking pipe', 'Bathroom work'])
+        results = {row.id: row for row in tender_search.search(Tenders.objects.all(), 'pipe')}
+        self.assertGreater(results[in_title.id].search_rank, results[in_description.id].search_rank)
+        self.assertIn('<b>pipe</b>', results[in_description.id].search_highlight)
+
+        self.job('Fix tap', 'Tap drips all night', self.plumbing)
+        self.job('Tap and pipe', 'Quick check', self.plumbing)
+        self.job('Ceiling', 'Paint over the tap stain', self.painting)
+        self.assertEqual(self.titles(quick_job_search, QuickJob, 'tap'), ['Tap and pipe', 'Fix tap', 'Ceiling'])
+
+    def test_every_term_matches_as_prefix(self):
+        self.tender('Leaking pipe', 'Water under the kitchen sink', self.plumbing)
+        self.tender('Kitchen paint', 'Fresh coat', self.painting)
+        self.job('Leaking pipe', 'Under the sink', self.plumbing, location='Mumbai')
+
+        self.assertEqual(self.titles(tender_search, Tenders, 'leak'), ['Leaking pipe'])
+        self.assertEqual(self.titles(tender_search, Tenders, 'kitch pip'), ['Leaking pipe'])
+        self.assertEqual(self.titles(tender_search, Tenders, 'plumb'), ['Leaking pipe'])
+        self.assertEqual(self.titles(quick_job_search, QuickJob, 'mumb leak'), ['Leaking pipe'])
+        self.assertEqual(self.titles(quick_job_search, QuickJob, 'pune leak'), [])
+
+    def test_triggers_follow_renames(self):
+        tender = self.tender('Leaking pipe', 'Water under the sink', self.plumbing)
+        job = self.job('Leaking pipe', 'Under the sink', self.plumbing)
+
+        Tenders.objects.filter(id=tender.id).update(title='Broken boiler')
+        job.title = 'Broken boiler'
+        job.save()
+        self.assertEqual(self.titles(tender_search, Tenders, 'boiler'), ['Broken boiler'])
+        self.assertEqual(self.titles(tender_search, Tenders, 'leaking'), [])
+        self.assertEqual(self.titles(quick_job_search, QuickJob, 'boiler'), ['Broken boiler'])
+
+        self.plumbing.name = 'Sanitation'
+        self.plumbing.save()
+        self.assertEqual(self.titles(tender_search, Tenders, 'sanitation'), ['Broken boiler'])
+        self.assertEqual(self.titles(quick_job_search, QuickJob, 'sanitation'), ['Broken boiler'])
+        self.assertEqual(self.titles(tender_search, Tenders, 'plumbing'), [])
+
+        tender.delete()
+        self.assertEqual(self.titles(tender_search, Tenders, 'boiler'), [])
+
+    def test_unindexed_databases_fall_back_to_contains(self):
+        self.tender('Leaking pipe', 'Water under the kitchen sink', self.plumbing)
+        self.tender('Kitchen paint', 'Fresh coat', self.painting)
+
+        with mock.patch.object(connections['default'], 'vendor', 'mysql'):
+            results = list(tender_search.search(Tenders.objects.all(), 'kitchen PLUMB'))
+        self.assertEqual([row.title for row in results], ['Leaking pipe'])
+        self.assertEqual((results[0].search_rank, results[0].search_highlight), (0.0, None))
+
+
+class KeywordMatcherTests(SimpleTestCase):
+    def test_overlapping_keywords(self):
+        automaton = KeywordAutomaton(['he', 'she', 'his', 'hers'])
+        self.assertEqual(automaton.find('ushers'), {'she', 'he', 'hers'})
+        self.assertEqual(automaton.find('ahishe'), {'his', 'she', 'he'})
+        self.assertEqual(automaton.find('hi'), set())
+
+    def test_keywords_that_prefix_others(self):
+        automaton = KeywordAutomaton(['a', 'ac', 'ach', 'ache', '', 'ac'])
+        self.assertEqual(automaton.find('ach'), {'a', 'ac', 'ach'})
+        self.assertEqual(automaton.find('xacx'), {'a', 'ac'})
+        self.assertEqual(automaton.find('acache'), {'a', 'ac', 'ach', 'ache'})
+
+    def test_devanagari(self):
+        # Vowel signs are separate code points, so 'नल' is also found inside 'नलका'
+        automaton = KeywordAutomaton(['नल', 'नलका', 'पानी', 'पान'])
+        self.assertEqual(automaton.find('मुझे नलका और पानी चाहिए'), {'नल', 'नलका', 'पानी', 'पान'})
+        self.assertEqual(automaton.find('नली'), {'नल'})
+        self.assertEqual(automaton.find('पाणी'), set())
+
+    def test_groups(self):
+        matcher = KeywordMatcher(
+            {'service': {'electrical': ['ac', 'fan'], 'cleaning': ['clean', 'ac']}},
+            ['fan', 'ac', 'clean', 'ac']
+        )
+        match = matcher.match('clean the ac and the fan')
+        self.assertEqual(match.first_group('service', 'other'), 'electrical')
+        self.assertEqual(match.best_group('service', 'other'), 'electrical')
+        self.assertEqual(match.keywords(), ['fan', 'ac', 'clean', 'ac'])
+        self.assertEqual(matcher.match('clean').best_group('service', 'other'), 'cleaning')
+        self.assertEqual(matcher.match('tap').first_group('service', 'other'), 'other')
+
+    def test_same_results_as_keyword_scans(self):
+        rng = random.Random(7)
+        keywords = [
+            keyword for patterns in (SERVICE_PATTERNS, URGENCY_KEYWORDS, LANGUAGE_PATTERNS)
+            for words in patterns.values() for keyword in words
+        ] + PARSER_KEYWORDS
+        alphabet = sorted(set(''.join(keywords))) + [' ', ',']
+        queries = list(CORPUS)
+        for _ in range(2000):
+            parts = []
+            for _ in range(rng.randint(1, 6)):
+                keyword = rng.choice(keywords)
+                # Whole keywords, their fragments and noise, run together or not
+                start, stop = sorted(rng.sample(range(len(keyword) + 1), 2))
+                parts.append(rng.choice([keyword, keyword.upper(), keyword[start:stop]]))
+                parts.append(''.join(rng.choices(alphabet, k=rng.randint(0, 3))))
+            queries.append(''.join(parts))
+
+        for query in queries:
+            self.assertEqual(matcher_analyse(query), loop_analyse(query), query)
+
+
+class NormalizeQueryTests(SimpleTestCase):
+    def assert_same_key(self, *queries):
+        self.assertEqual(len({normalize_query(query) for query in queries}), 1, queries)
+
+    def assert_different_keys(self, *queries):
+        self.assertEqual(len({normalize_query(query) for query in queries}), len(queries), queries)
+
+    def test_spelling_variants_share_a_key(self):
+        self.assert_same_key('AC theek karne wala chahiye', 'ac thik karne vala chaiye', 'AC  theek karne waala chahie!')
+        self.assert_same_key('Paani ki tanki saaf karwana hai', 'pani ki tankii saf karvana hai')
+        self.assert_same_key('bijli wala jaldi', 'Bijly vaala jaldy')
+        self.assert_same_key('plumbr needed', 'Plumber needed.')
+        self.assert_same_key('नल ठीक करना है', 'नल  ठीक करना है।')
+        # Nukta and chandrabindu are spelling variants too
+        self.assert_same_key('ज़रूरी काम', 'जरूरी काम')
+        self.assert_same_key('पँखा', 'पंखा')
+
+    def test_english_words_are_not_folded(self):
+        self.assert_different_keys('pool cleaning', 'pull cleaning')
+        self.assert_different_keys('wall repair', 'vall repair')
+        self.assert_different_keys('feet massage', 'fit massage')
+        self.assert_different_keys('wood polish', 'vud polish')
+        self.assertEqual(normalize_query('Wall  REPAIR, please!'), 'wall repair please')
+        # Hindi words whose folds would meet stay apart too
+        self.assert_different_keys('kaam', 'kam')
+
+
+@override_settings(GEMINI_SERVICE_SHORTLIST_SIZE=2)
+class ServiceCatalogTests(TestCase):
+    SERVICES = [
+        ('Plumbing', 'Pipes, taps and water leaks'),
+        ('Electrical', 'Wiring, switches, lights and fans'),
+        ('AC Repair', 'Air conditioner servicing and gas refill'),
+        ('House Cleaning', 'Deep cleaning of kitchens and bathrooms'),
+        ('Painting', 'Interior and exterior wall painting'),
+        ('Carpentry', 'Doors, furniture and other wood work'),
+    ]
+
+    def setUp(self):
+        self.services = {
+            name: Services.objects.create(name=name, description=description)
+            for name, description in self.SERVICES
+        }
+        service_catalog.invalidate()
+        self.addCleanup(service_catalog.invalidate)
+
+    def names(self, services):
+        return [service['name'] for service in services]
+
+    def test_shortlist_ranks_matching_services(self):
+        self.assertEqual(self.names(service_catalog.shortlist('Plumber chahiye, tap leak')), ['Plumbing'])
+        self.assertEqual(self.names(service_catalog.shortlist('AC theek karna hai'))[0], 'AC Repair')
+        self.assertEqual(self.names(service_catalog.shortlist('deewar ka rang')), ['Painting'])
+        self.assertEqual(self.names(service_catalog.shortlist('नल खराब है'))[0], 'Plumbing')
+        # A name match outranks a description match
+        self.assertEqual(
+            self.names(service_catalog.shortlist('cleaning of the bathroom pipes', k=3)),
+            ['House Cleaning', 'Plumbing']
+        )
+
+    def test_unmatched_queries_fall_back_to_service_names(self):
+        gemini = GeminiNLPService(cache=QueryCache(LocalMemoryBackend(100), 60))
+        text, sent = gemini._prompt_services(['kuch bhi xyz'], 'shortlist')
+        self.assertEqual((text, sent), (service_catalog.names(), len(self.SERVICES)))
+        self.assertNotIn('Pipes', text)
+
+        text, sent = gemini._prompt_services(['tap leak', 'wiring'], 'shortlist')
+        self.assertEqual(sent, 2)
+        self.assertIn('Pipes, taps and water leaks', text)
+        self.assertIn('Wiring, switches', text)
+
+    def test_renames_and_deletes_rebuild_the_digest(self):
+        plumbing, painting = self.services['Plumbing'], self.services['Painting']
+        service_catalog.ensure_loaded()
+        plumbing.name = 'Pipe Fitting'
+        plumbing.save()
+        self.assertEqual(service_catalog.get(plumbing.id)['name'], 'Pipe Fitting')
+        self.assertIn(f'{plumbing.id} | Pipe Fitting', service_catalog.names())
+
+        painting.delete()
+        self.assertIsNone(service_catalog.get(painting.id))
+        self.assertNotIn('Painting', self.names(service_catalog.shortlist('deewar ka rang')))
+
+    def test_reloads_after_the_ttl(self):
+        carpentry = self.services['Carpentry']
+        service_catalog.ensure_loaded()
+        # No signal: picked up once the TTL has passed
+        Services.objects.filter(id=carpentry.id).update(name='Woodwork')
+        self.assertEqual(service_catalog.get(carpentry.id)['name'], 'Carpentry')
+        service_catalog.built_at -= service_catalog.ttl + 1
+        self.assertEqual(service_catalog.get(carpentry.id)['name'], 'Woodwork')
+
+
+class FakeParser:
+    """Stands in for GeminiNLPService behind a GeminiClient; calls wait for `release`"""
+
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.calls = 0
+        self.release = threading.Event()
+        self.release.set()
+
+    def _call_gemini(self, query, timeout=None):
+        self.calls += 1
+        self.release.wait(5)
+        if self.fail:
+            raise ConnectionError('Gemini is down')
+        return {'service_category': 'plumbing', 'original_query': query}
+
+    def _fallback_parse(self, query):
+        return {'service_category': 'other', 'source': 'fallback', 'original_query': query}
+
+
+class GeminiClientTests(SimpleTestCase):
+    def setUp(self):
+        self.clock = [1000.0]
+        patcher = mock.patch('trust_network.gemini_client.time.monotonic', lambda: self.clock[0])
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def make_client(self, parser, timeout=5, failures=2):
+        client = GeminiClient(
+            parser, timeout=timeout, max_workers=4, breaker=CircuitBreaker(failures, 30),
+            cache=QueryCache(LocalMemoryBackend(100), 60),
+        )
+        self.addCleanup(client._executor.shutdown)
+        return client
+
+    def wait_for(self, condition):
+        deadline = time.perf_counter() + 5
+        while not condition():
+            self.assertLess(time.perf_counter(), deadline, 'timed out')
+            time.sleep(0.005)
+
+    def test_circuit_breaker(self):
+        breaker = CircuitBreaker(2, 30)
+        breaker.record_failure()
+        self.assertEqual((breaker.state, breaker.allow()), (CircuitBreaker.CLOSED, True))
+        breaker.record_failure()
+        self.assertEqual((breaker.state, breaker.allow()), (CircuitBreaker.OPEN, False))
+
+        # One probe once the reset timeout has passed; a failed probe reopens
+        self.clock[0] += 30
+        self.assertEqual(breaker.state, CircuitBreaker.HALF_OPEN)
+        self.assertEqual([breaker.allow(), breaker.allow()], [True, False])
+        breaker.record_failure()
+        self.assertEqual((breaker.state, breaker.allow()), (CircuitBreaker.OPEN, False))
+
+        self.clock[0] += 30
+        self.assertTrue(breaker.allow())
+        breaker.record_success()
+        self.assertEqual((breaker.state, breaker.failures), (CircuitBreaker.CLOSED, 0))
+        breaker.record_failure()
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+
+    def test_open_breaker_short_circuits_to_the_fallback(self):
+        parser = FakeParser(fail=True)
+        client = self.make_client(parser)
+        for _ in range(2):
+            self.assertEqual(client.parse('tap leaking')['source'], 'fallback')
+        self.wait_for(lambda: client.breaker.state == CircuitBreaker.OPEN)
+
+        self.assertEqual(client.parse('pipe burst')['source'], 'fallback')
+        self.assertEqual(parser.calls, 2)
+        self.assertEqual(client.stats()['errors'], 2)
+        self.assertEqual(client.stats()['short_circuited'], 1)
+
+    def test_deadline_falls_back_and_keeps_the_late_answer(self):
+        parser = FakeParser()
+        parser.release.clear()
+        client = self.make_client(parser, timeout=0.05)
+
+        self.assertEqual(client.parse('tap leaking')['source'], 'fallback')
+        self.assertEqual(client.stats()['timeouts'], 1)
+
+        self.clock[0] += 1
+        parser.release.set()
+        self.wait_for(lambda: client.stats()['in_flight'] == 0)
+        # The answer came after the deadline: cached, but held against the model
+        self.assertEqual(client.parse('Tap leaking!')['service_category'], 'plumbing')
+        self.assertEqual(parser.calls, 1)
+        self.assertEqual(client.breaker.failures, 1)
+
+    def test_identical_in_flight_queries_share_one_call(self):
+        parser = FakeParser()
+        parser.release.clear()
+        client = self.make_client(parser)
+        results = {}
+
+        def parse(query):
+            results[query] = client.parse(query)
+
+        threads = [threading.Thread(target=parse, args=(query,)) for query in ('Tap leaking', 'tap  LEAKING!')]
+        for thread in threads:
+            thread.start()
+        self.wait_for(lambda: client.stats()['coalesced'] == 1)
+        parser.release.set()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(parser.calls, 1)
+        self.assertEqual(client.stats()['model_calls'], 1)
+        for query, result in results.items():
+            self.assertEqual((result['service_category'], result['original_query']), ('plumbing', query))
+
+    def test_pool_threads_recycle_their_connections(self):
+        client = self.make_client(FakeParser())
+        with mock.patch('trust_network.gemini_client.close_old_connections') as close_old_connections:
+            client.parse('tap leaking')
+            self.wait_for(lambda: client.stats()['in_flight'] == 0)
+        self.assertEqual(close_old_connections.call_count, 2)
+
+
+class FakeGeminiModel:
+    """
+    Answers batch prompts the way Gemini does. Prompts listing a query with
+    'boom' fail, and queries with 'skip' are left out of the answer.
+    """
+    _numbered_query = re.compile(r'^\s+(\d+)\. (".*")$')
+
+    def __init__(self):
+        self.prompts = 0
+
+    def generate_content(self, prompt, request_options=None):
+        self.prompts += 1
+        queries = {
+            int(match[1]): json.loads(match[2])
+            for match in map(self._numbered_query.match, prompt.splitlines()) if match
+        }
+        if any('boom' in query for query in queries.values()):
+            raise ConnectionError('Gemini is down')
+        return SimpleNamespace(text=json.dumps([
+            {'index': index, 'service_category': 'plumbing', 'urgency': 'HIGH',
+             'suggested_title': f'Parsed {query}', 'confidence': 0.9}
+            for index, query in queries.items() if 'skip' not in query
+        ]))
+
+
+@override_settings(GEMINI_BATCH_SIZE=2, VOICE_BATCH_MAX_QUERIES=6)
+class VoiceQueryBatchTests(TestCase):
+    url = '/api/trust-network/parse-voice-queries/'
+
+    def setUp(self):
+        Services.objects.create(name='Plumbing', description='Pipes and taps')
+        service_catalog.ensure_loaded()
+        self.gemini = GeminiNLPService(cache=QueryCache(LocalMemoryBackend(100), 60))
+        self.gemini.model = FakeGeminiModel()
+        patcher = mock.patch('trust_network.views.gemini_service', self.gemini)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user(email='cara@example.com', first_name='Cara'))
+
+    def post(self, queries):
+        response = self.client.post(self.url, {'queries': queries}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        lines = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+        return {line['index']: line for line in lines[:-1]}, lines[-1]['summary'], [line.get('index') for line in lines]
+
+    def test_one_line_per_query_then_summary(self):
+        queries = ['Tap leaking', 'pipe burst', 'TAP  leaking!', 'geyser repair']
+        results, summary, order = self.post(queries)
+
+        self.assertEqual(sorted(results), [0, 1, 2, 3])
+        self.assertIsNone(order[-1])
+        for index, line in results.items():
+            self.assertEqual((line['query'], line['source']), (queries[index], 'gemini'))
+            self.assertEqual(line['parsed_intent']['original_query'], queries[index])
+        # Equivalent queries are parsed once, in two prompts of GEMINI_BATCH_SIZE
+        self.assertEqual(results[2]['parsed_intent']['suggested_title'], 'Parsed Tap leaking')
+        self.assertEqual(self.gemini.model.prompts, 2)
+        self.assertEqual(summary, {'queries': 4, 'unique': 3, 'sources': {'gemini': 4}})
+
+        results, summary, _ = self.post(queries)
+        self.assertEqual({line['source'] for line in results.values()}, {'cache'})
+        self.assertEqual(self.gemini.model.prompts, 2)
+
+    def test_failed_chunks_fall_back_per_query(self):
+        queries = ['boom tap', 'pipe burst', 'paint the wall', 'skip this plumber']
+        results, summary, _ = self.post(queries)
+
+        sources = {line['query']: line['source'] for line in results.values()}
+        self.assertEqual(sources, {
+            'boom tap': 'fallback', 'pipe burst': 'fallback',
+            'paint the wall': 'gemini', 'skip this plumber': 'fallback',
+        })
+        self.assertEqual(results[3]['parsed_intent']['service_category'], 'plumbing')
+        self.assertEqual(summary['sources'], {'fallback': 3, 'gemini': 1})
+
+    def test_single_and_batch_prompts_read_fenced_answers_alike(self):
+        answer = {'service_category': 'plumbing', 'urgency': 'HIGH', 'suggested_title': 'Fix tap', 'confidence': 0.9}
+        fenced = SimpleNamespace(text=f"```json\n{json.dumps(answer)}\n```")
+        self.gemini.model.generate_content = lambda prompt, request_options=None: fenced
+        self.assertEqual(self.gemini._call_gemini('tap leaking')['suggested_title'], 'Fix tap')
+
+        fenced.text = f"```json\n{json.dumps([dict(answer, index=0)])}\n```"
+        self.assertEqual(self.gemini._call_gemini_batch(['tap leaking'])[0]['suggested_title'], 'Fix tap')
+
+    def test_rejects_invalid_batches(self):
+        for data in ({}, {'queries': []}, {'queries': 'tap'}, {'queries': ['tap', '  ']},
+                     {'queries': ['tap', 3]}, {'queries': ['tap'] * 7}):
+            with self.subTest(data=data):
+                response = self.client.post(self.url, data, format='json')
+                self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.gemini.model.prompts, 0)
+
+
+class QueryBudgetTests(QueryBudgetTestMixin, TestCase):
+    def setUp(self):
+        self.users = [
+            User.objects.create_user(email=f'user{i}@example.com', first_name='User') for i in range(8)
+        ]
+
+    def one_query_per_user(self, request=None):
+        for user in self.users:
+            User.objects.get(id=user.id)
+        return HttpResponse()
+
+    def test_flags_repeated_query_shapes(self):
+        middleware = QueryBudgetMiddleware(self.one_query_per_user)
+        request = RequestFactory().get('/')
+        with self.settings(QUERY_BUDGET_ACTION='raise'):
+            with self.assertRaisesMessage(QueryBudgetExceeded, '8 x SELECT ... FROM "accounts_user"'):
+                middleware(request)
+        with self.settings(QUERY_BUDGET_ACTION='log'), self.assertLogs('lk_backend.query_budget', 'WARNING'):
+            middleware(request)
+
+    def test_declared_budget(self):
+        @query_budget(2)
+        def view(request):
+            return self.one_query_per_user(request)
+
+        request = RequestFactory().get('/')
+        request.resolver_match = ResolverMatch(view, (), {})
+        self.assertEqual(view_budget(request), 2)
+        with self.settings(QUERY_BUDGET_ACTION='raise', QUERY_BUDGET_REPEAT_LIMIT=10):
+            with self.assertRaisesMessage(QueryBudgetExceeded, '8 queries, budget 2'):
+                QueryBudgetMiddleware(view)(request)
+
+    def test_assert_query_budget(self):
+        with self.assertRaisesMessage(AssertionError, '8 x SELECT'):
+            with self.assertQueryBudget():
+                self.one_query_per_user()
+        with self.assertQueryBudget(1):
+            User.objects.filter(id__in=[user.id for user in self.users]).count()
+
+    def test_query_report(self):
+        out = StringIO()
+        call_command('query_report', filter='trusted-contractors', stdout=out, no_color=True)
+        self.assertRegex(out.getvalue(), r'/api/trust-network/trusted-contractors/ +200 .* ok \(6\)')
+        self.assertIn('0 of 1 endpoints over budget', out.getvalue())
+
+
+class BenchmarkComparisonTests(SimpleTestCase):
+    def result(self, p95, rps, queries):
+        return {'p95_ms': p95, 'throughput_rps': rps, 'queries_max': queries}
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual([percentile(values, p) for p in (50, 95, 99, 100)], [50, 95, 99, 100])
+        self.assertEqual(percentile([7], 99), 7)
+
+    def test_compare_against_baseline(self):
+        baseline = {'scenarios': {
+            'tender_list': self.result(20, 100, 3),
+            'quick_job_feed': self.result(10, 200, 2),
+            'voice_parsing': self.result(300, 3, 1),
+        }}
+        results = {'scenarios': {
+            'tender_list': self.result(23, 90, 3),
+            'quick_job_feed': self.result(13, 150, 4),
+            'appointment_lists': self.result(5, 400, 2),
+        }}
+        self.assertEqual(compare(results, baseline, 0.2), [
+            ('tender_list', []),
+            ('quick_job_feed', ['p95 10 -> 13 ms', 'throughput 200 -> 150/s', 'queries 2 -> 4']),
+        ])
+
+
+@skipUnless(importlib.util.find_spec('faker'), 'seed_data needs faker')
+class ExplainHotQueriesTests(TestCase):
+    def test_reports_a_verdict_per_query(self):
+        out = StringIO()
+        call_command('explain_hot_queries', '--analyze', stdout=out, no_color=True)
+        lines = out.getvalue().splitlines()
+
+        names = [name for name, _ in hot_queries()]
+        for name in names:
+            verdicts = [line[len(name):].strip() for line in lines if line.startswith(name + ' ')]
+            self.assertEqual(len(verdicts), 1, name)
+            self.assertRegex(verdicts[0], r'^(indexed|seq scan on \w+)', name)
+        self.assertRegex(lines[-1], rf'^\d+ of {len(names)} queries avoid sequential scans$')
+
+    def test_analyse_plan(self):
+        postgres = (
+            'Sort  (cost=8.30..8.31 rows=1 width=8)\n'
+            '  ->  Nested Loop\n'
+            '        ->  Index Scan Backward using tenders_created_idx on works_tenders\n'
+            '        ->  Bitmap Index Scan on quickjob_status_idx\n'
+            '        ->  Seq Scan on accounts_customer'
+        )
+        self.assertEqual(
+            analyse_plan(postgres), (['quickjob_status_idx', 'tenders_created_idx'], ['accounts_customer'])
+        )
+        sqlite = (
+            '4 0 0 SEARCH works_tenders USING INDEX works_tende_status_idx (status=?)\n'
+            '11 0 0 SEARCH works_tenderrequirement USING INTEGER PRIMARY KEY (rowid=?)\n'
+            '14 0 0 SEARCH U0 USING COVERING INDEX needs_uniq (contractor_id=?)\n'
+            '20 0 0 SCAN accounts_contractor'
+        )
+        self.assertEqual(
+            analyse_plan(sqlite),
+            (['INTEGER PRIMARY KEY', 'needs_uniq', 'works_tende_status_idx'], ['accounts_contractor'])
+        )
+
+
+class BulkSeedTests(TestCase):
+    counts = {
+        'customers': 12, 'contractors': 8, 'supervisors': 4, 'virtual_appointments': 10,
+        'physical_visits': 4, 'tender_assistance': 3, 'standalone_tenders': 3,
+        'trust_connections': 30, 'quick_jobs': 9,
+    }
+
+    def seeder(self, **options):
+        from seed_data.bulk import BulkSeeder
+        return BulkSeeder(self.counts, chunk_size=5, **options)
+
+    def test_bulk_seed(self):
+        from works.models import Tenders, TenderRequirement, PhysicalVisit
+
+        with redirect_stdout(StringIO()):
+            written = self.seeder().run()
+
+        self.assertEqual(User.objects.count(), 24)
+        self.assertEqual(Contractor.objects.count(), 8)
+        self.assertEqual(Tenders.objects.count(), 6)
+        self.assertEqual(PhysicalVisit.objects.count(), 4)
+        self.assertEqual(TenderRequirement.objects.count(), 24)
+        self.assertEqual(QuickJob.objects.filter(locality__isnull=True).count(), 0)
+        self.assertEqual(written['trust_connections'], TrustConnection.objects.count())
+        self.assertFalse(TrustConnection.objects.filter(recommender=models.F('contractor__user')).exists())
+        self.assertTrue(User.objects.filter(role=User.Roles.CONTRACTOR).first().check_password('password123'))
+
+        # What the skipped signals maintain was rebuilt
+        self.assertEqual(
+            sum(ContractorTrustAggregate.objects.values_list('recommendation_count', flat=True)),
+            TrustConnection.objects.count()
+        )
+        self.assertEqual(
+            CompletedWork.objects.count(),
+            Tenders.objects.filter(status='completed', selected_contractor__isnull=False).count()
+            + QuickJob.objects.filter(status='COMPLETED').count()
+        )
+
+        # New rows go after the existing ones
+        with redirect_stdout(StringIO()):
+            self.seeder(seed=7).run()
+        self.assertEqual(User.objects.count(), 48)
+
+    def test_chunks_are_deterministic(self):
+        from seed_data.bulk import STEPS, build_chunk
+
+        with redirect_stdout(StringIO()):
+            plan, same, other = self.seeder().prepare(), self.seeder().prepare(), self.seeder(seed=7).prepare()
+        for step in STEPS:
+            self.assertEqual(build_chunk(plan, step, 5, 10), build_chunk(same, step, 5, 10))
+        self.assertNotEqual(build_chunk(plan, 'tenders', 0, 5), build_chunk(other, 'tenders', 0, 5))
+
+    def test_power_law_trust_graph(self):
+        from seed_data.bulk import TrustGraphShape
+
+        rng = random.Random(1)
+        shape = TrustGraphShape()
+        degrees = [shape.degree(rng, 2) for _ in range(20000)]
+        self.assertAlmostEqual(sum(degrees) / len(degrees), 2, delta=0.3)
+        self.assertGreater(max(degrees), 40)
+
+        ranks = [shape.rank(rng, 1000) for _ in range(20000)]
+        self.assertGreater(ranks.count(0), 20 * ranks.count(500))
+        uniform = TrustGraphShape('uniform')
+        self.assertEqual({uniform.degree(rng, 2) for _ in range(100)}, {2})
+        with self.assertRaises(ValueError):
+            TrustGraphShape(degree_exponent=1.5)
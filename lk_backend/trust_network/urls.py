@@ -7,6 +7,8 @@ urlpatterns = [
     
     # Quick jobs
     path('quick-jobs/', views.QuickJobListCreateView.as_view(), name='quick-jobs'),
+    path('quick-jobs/stream/', views.quick_job_stream, name='quick-job-stream'),
+    path('quick-jobs/stream/ticket/', views.quick_job_stream_ticket, name='quick-job-stream-ticket'),
     path('quick-jobs/<int:pk>/', views.QuickJobDetailView.as_view(), name='quick-job-detail'),
     path('quick-jobs/<int:job_id>/assign/', views.assign_quick_job, name='assign-quick-job'),
     path('my-quick-jobs/', views.MyQuickJobsView.as_view(), name='my-quick-jobs'),
@@ -25,6 +27,7 @@ urlpatterns = [
     
     # NLP integration
     path('parse-voice-query/', views.parse_voice_query, name='parse-voice-query'),
+    path('parse-voice-queries/', views.parse_voice_queries_batch, name='parse-voice-queries'),
     path('service-suggestions/', views.get_service_suggestions, name='service-suggestions'),
     path('test-voice-parsing/', views.test_voice_parsing, name='test-voice-parsing'),
 ]
@@ -1,9 +1,13 @@
 """
 Trust network utility functions for calculating trust scores and recommendations.
 """
-from django.db.models import Q, Count, Avg
-from .models import TrustConnection, TrustScoreLog
-from accounts.models import Contractor
+from django.db.models import Q, Count, Avg, F, Case, When, FloatField, OuterRef, Subquery
+from .models import TrustConnection
+from .graph import trust_graph
+from . import scoring
+from .propagation import hop_weight
+from .paths import find_paths_bulk
+from accounts.models import Contractor, User
 
 
 def calculate_network_trust_score(contractor, requesting_user):
@@ -11,87 +15,128 @@ def calculate_network_trust_score(contractor, requesting_user):
     Calculate trust score for a contractor based on the requesting user's network.
     
     Algorithm:
-    - 1st degree connections (direct recommendations): weight 10
-    - 2nd degree connections (recommendations from trusted people): weight 3
+    - 1st degree connections (direct recommendations): hop_weight(1), 10 by default
+    - 2nd degree connections (recommendations from trusted people): hop_weight(2), 3 by default
     - Base trust score: contractor's overall trust_score
     
     Returns: Calculated network trust score
     """
     base_score = contractor.trust_score or 0.0
+    graph = trust_graph.ensure_loaded()
     
-    # Get 1st degree recommendations (direct from requesting user)
-    first_degree_recs = TrustConnection.objects.filter(
-        recommender=requesting_user,
-        contractor=contractor
-    )
-    
-    if first_degree_recs.exists():
-        # User has directly recommended this contractor
-        direct_trust = first_degree_recs.first().trust_level
-        return direct_trust * 10 + base_score
-    
-    # Get 2nd degree recommendations
-    # First, find people the requesting user has recommended
-    user_trusted_people = TrustConnection.objects.filter(
-        recommender=requesting_user
-    ).values_list('contractor__user_id', flat=True)
+    # 1st degree: user has directly recommended this contractor
+    direct_trust = graph.trust_level(requesting_user.id, contractor.id)
+    if direct_trust is not None:
+        return direct_trust * hop_weight(1) + base_score
     
-    # Then find recommendations from those people for this contractor
-    second_degree_recs = TrustConnection.objects.filter(
-        recommender__id__in=user_trusted_people,
-        contractor=contractor
-    )
-    
-    if second_degree_recs.exists():
+    # 2nd degree: recommendations from people the user has recommended
+    second_degree_levels = graph.second_degree_levels(requesting_user.id, contractor.id)
+    if second_degree_levels:
         # Calculate weighted average of 2nd degree recommendations
-        avg_trust = second_degree_recs.aggregate(Avg('trust_level'))['trust_level__avg']
-        return (avg_trust * 3) + base_score
+        avg_trust = sum(second_degree_levels.values()) / len(second_degree_levels)
+        return (avg_trust * hop_weight(2)) + base_score
     
     # No network connection found, return base score
     return base_score
 
 
+def network_scores_queryset(requesting_user, contractor_ids=None):
+    """
+    Contractors annotated with the requesting user's network trust, in a single
+    aggregate query grouped by contractor.
+
+    Annotations:
+    - direct_trust_level: the user's own trust level for the contractor, or None
+    - indirect_recommendations / indirect_trust_avg: recommendations made by the
+      people the user has recommended (2nd degree)
+    - connector_name: first name of the most trusted 2nd degree recommender
+    - network_trust_score: same formula as calculate_network_trust_score
+
+    If contractor_ids is None, every contractor in the user's 1st and 2nd degree
+    network is returned.
+    """
+    user_recommendations = TrustConnection.objects.filter(recommender=requesting_user)
+    user_trusted_people = user_recommendations.values('contractor__user_id')
+    second_degree = Q(received_recommendations__recommender_id__in=user_trusted_people)
+
+    queryset = Contractor.objects.all()
+    if contractor_ids is None:
+        queryset = queryset.filter(
+            Q(id__in=user_recommendations.values('contractor_id')) |
+            Q(id__in=TrustConnection.objects.filter(
+                recommender_id__in=user_trusted_people
+            ).values('contractor_id'))
+        )
+    else:
+        queryset = queryset.filter(id__in=contractor_ids)
+
+    direct_trust = user_recommendations.filter(
+        contractor_id=OuterRef('pk')
+    ).values('trust_level')[:1]
+    connector = TrustConnection.objects.filter(
+        contractor_id=OuterRef('pk'),
+        recommender_id__in=user_trusted_people
+    ).order_by('-trust_level', 'recommender_id').values('recommender__first_name')[:1]
+
+    return queryset.annotate(
+        direct_trust_level=Subquery(direct_trust),
+        connector_name=Subquery(connector),
+        indirect_recommendations=Count('received_recommendations', filter=second_degree),
+        indirect_trust_avg=Avg('received_recommendations__trust_level', filter=second_degree),
+    ).annotate(
+        network_trust_score=Case(
+            When(direct_trust_level__isnull=False,
+                 then=F('direct_trust_level') * hop_weight(1) + F('trust_score')),
+            When(indirect_recommendations__gt=0,
+                 then=F('indirect_trust_avg') * hop_weight(2) + F('trust_score')),
+            default=F('trust_score'),
+            output_field=FloatField(),
+        )
+    )
+
+
+def score_contractors_bulk(requesting_user, contractor_ids=None):
+    """
+    Score many contractors against the requesting user's network at once.
+    
+    Unlike calling calculate_network_trust_score in a loop, the requesting
+    user's 1st degree set is derived once and every candidate is scored in
+    one aggregate query.
+    
+    Returns: {contractor_id: {...}} with the contractor (user preloaded),
+    its network trust score and the 1st/2nd degree breakdown.
+    """
+    scores = {}
+    for contractor in network_scores_queryset(requesting_user, contractor_ids).select_related('user'):
+        scores[contractor.id] = {
+            'contractor': contractor,
+            'network_trust_score': contractor.network_trust_score,
+            'is_first_degree': contractor.direct_trust_level is not None,
+            'direct_trust_level': contractor.direct_trust_level,
+            'indirect_recommendations': contractor.indirect_recommendations,
+            'indirect_trust_avg': contractor.indirect_trust_avg,
+            'connector_name': contractor.connector_name,
+        }
+    return scores
+
+
 def find_trusted_contractors_for_service(requesting_user, service=None, max_results=10):
     """
     Find contractors trusted within the user's network for a specific service.
     
     Returns list of contractors with their network trust scores.
     """
-    # Get all contractors in the network (1st and 2nd degree)
-    first_degree_contractors = TrustConnection.objects.filter(
-        recommender=requesting_user
-    ).values_list('contractor_id', flat=True)
-    
-    user_trusted_people = TrustConnection.objects.filter(
-        recommender=requesting_user
-    ).values_list('contractor__user_id', flat=True)
-    
-    second_degree_contractors = TrustConnection.objects.filter(
-        recommender__id__in=user_trusted_people
-    ).exclude(
-        contractor_id__in=first_degree_contractors
-    ).values_list('contractor_id', flat=True)
-    
-    # Combine all network contractors
-    network_contractor_ids = list(first_degree_contractors) + list(second_degree_contractors)
-    
-    if not network_contractor_ids:
-        return []
-    
-    # Get contractor objects
-    contractors = Contractor.objects.filter(
-        id__in=network_contractor_ids
-    ).select_related('user')
-    
-    # Calculate network trust scores
-    trusted_contractors = []
-    for contractor in contractors:
-        network_score = calculate_network_trust_score(contractor, requesting_user)
-        trusted_contractors.append({
-            'contractor': contractor,
-            'network_trust_score': network_score,
-            'is_first_degree': contractor.id in first_degree_contractors
-        })
+    # Score every contractor in the network (1st and 2nd degree) in one query
+    scores = score_contractors_bulk(requesting_user)
+    
+    trusted_contractors = [
+        {
+            'contractor': score['contractor'],
+            'network_trust_score': score['network_trust_score'],
+            'is_first_degree': score['is_first_degree']
+        }
+        for score in scores.values()
+    ]
     
     # Sort by network trust score
     trusted_contractors.sort(key=lambda x: x['network_trust_score'], reverse=True)
@@ -101,78 +146,50 @@ def find_trusted_contractors_for_service(requesting_user, service=None, max_resu
 
 def update_contractor_trust_score(contractor):
     """
-    Recalculate and update contractor's overall trust score based on all recommendations.
+    Recalculate contractor's overall trust score from all recommendations.
+
+    Trust scores are normally kept current incrementally (see scoring.py);
+    this does a full recomputation for one contractor and resets its aggregate.
     """
-    recommendations = TrustConnection.objects.filter(contractor=contractor)
-    
-    if not recommendations.exists():
-        new_score = 0.0
-    else:
-        # Weighted average calculation
-        total_weighted_score = 0
-        total_weight = 0
-        
-        for rec in recommendations:
-            # Weight recommendations based on recommender's own trust network
-            recommender_network_size = TrustConnection.objects.filter(
-                recommender=rec.recommender
-            ).count()
-            
-            # Recommenders with larger networks get slightly higher weight
-            weight = 1.0 + (recommender_network_size * 0.1)
-            
-            total_weighted_score += rec.trust_level * weight
-            total_weight += weight
-        
-        new_score = total_weighted_score / total_weight if total_weight > 0 else 0.0
-    
-    old_score = contractor.trust_score or 0.0
-    contractor.trust_score = new_score
-    contractor.save()
-    
-    # Log the change
-    TrustScoreLog.objects.create(
-        contractor=contractor,
-        old_score=old_score,
-        new_score=new_score,
-        reason="Trust score recalculation",
-        calculation_details={
-            'total_recommendations': recommendations.count(),
-            'calculation_method': 'weighted_average_with_network_bonus'
-        }
+    sums, network_sizes = scoring.compute_trust_aggregates([contractor.id])
+    scoring.apply_trust_aggregates(
+        [contractor.id], sums, network_sizes, reason="Trust score recalculation"
     )
-    
-    return new_score
+    contractor.refresh_from_db(fields=['trust_score'])
+    return contractor.trust_score
 
 
 def get_recommendation_path(recommender, contractor):
     """
     Find the path of recommendations between a user and contractor.
-    """
-    # Check direct connection
-    direct = TrustConnection.objects.filter(
-        recommender=recommender,
-        contractor=contractor
-    ).first()
-    
-    if direct:
-        return [recommender.first_name, contractor.user.first_name]
-    
-    # Check 2nd degree connection
-    user_trusted_people = TrustConnection.objects.filter(
-        recommender=recommender
-    ).values_list('contractor__user_id', flat=True)
     
-    indirect = TrustConnection.objects.filter(
-        recommender__id__in=user_trusted_people,
-        contractor=contractor
-    ).first()
-    
-    if indirect:
-        return [
-            recommender.first_name,
-            indirect.recommender.first_name,
-            contractor.user.first_name
-        ]
+    Returns the first names along the most trusted shortest path, or [].
+    """
+    paths = get_recommendation_paths(recommender, [contractor.id])[contractor.id]
+    return paths[0] if paths else []
+
+
+def get_recommendation_paths(recommender, contractor_ids, max_paths=1):
+    """
+    Recommendation paths from a user to many contractors in one call, e.g. for a
+    page of results.
     
-    return []
+    Returns: {contractor_id: [[first names along the path], ...]} with up to
+    max_paths shortest paths each, most trusted first.
+    """
+    paths = find_paths_bulk(recommender.id, contractor_ids, max_paths=max_paths)
+    
+    user_ids = {
+        user_id
+        for contractor_paths in paths.values()
+        for _, path in contractor_paths
+        for user_id in path
+    }
+    user_ids.discard(recommender.id)
+    names = dict(User.objects.filter(id__in=user_ids).values_list('id', 'first_name')) if user_ids else {}
+    names[recommender.id] = recommender.first_name
+    
+    return {
+        contractor_id: [[names.get(user_id) for user_id in path] for _, path in contractor_paths]
+        for contractor_id, contractor_paths in paths.items()
+    }
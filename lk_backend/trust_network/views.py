@@ -2,11 +2,20 @@ from django.shortcuts import render
 from rest_framework import generics, status, permissions, serializers
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
-from django.db.models import Q, Count, Avg, F
+from django.db.models import Q, Count, Avg, Exists, F
 from django.db import transaction
 from django.conf import settings
+from django.http import JsonResponse, StreamingHttpResponse
+from django.core.handlers.asgi import ASGIRequest
+from asgiref.sync import sync_to_async
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
 from django.utils import timezone
-from .models import TrustConnection, QuickJob, QuickJobInterest, TrustScoreLog
+from .models import (
+    TrustConnection, QuickJob, QuickJobInterest, TrustIndexEntry,
+    CompletedWork, CustomerContractorWorkSummary
+)
 from .serializers import (
     TrustConnectionSerializer, QuickJobSerializer, QuickJobCreateSerializer,
     QuickJobInterestSerializer, TrustScoreLogSerializer,
@@ -15,7 +24,20 @@ from .serializers import (
 from accounts.models import Contractor
 from accounts.serializers import ContractorSerializer
 from .gemini_service import gemini_service
+from .nlp_cache import query_cache
+from .service_catalog import prompt_stats
+from .utils import network_scores_queryset, get_recommendation_paths
+from .pagination import KeysetPagination, keyset_page
+from .propagation import pending_changes
+from .search import quick_job_search
+from .localities import get_locality, nearby_locality_ids
+from . import job_feed
+from .work_history import work_item
+from lk_backend.query_budget import query_budget
 import json
+import logging
+
+logger = logging.getLogger(__name__)
 
 
 class TrustConnectionListCreateView(generics.ListCreateAPIView):
@@ -31,9 +53,8 @@ class TrustConnectionListCreateView(generics.ListCreateAPIView):
     
     def perform_create(self, serializer):
         # Set the recommender to the current user
-        trust_connection = serializer.save(recommender=self.request.user)
-        # Update contractor's trust score
-        self.update_contractor_trust_score(trust_connection.contractor)
+        # The contractor's trust score is updated by the TrustConnection signals
+        serializer.save(recommender=self.request.user)
     
     def create(self, request, *args, **kwargs):
         """Override create to provide better error messages"""
@@ -41,9 +62,9 @@ class TrustConnectionListCreateView(generics.ListCreateAPIView):
             return super().create(request, *args, **kwargs)
         except serializers.ValidationError as e:
             # Handle validation errors from our custom validator
-            print(f"Validation error creating trust connection: {e}")
-            print(f"Request data: {request.data}")
-            print(f"User: {request.user}")
+            logger.info(
+                "Validation error creating trust connection for user %s: %s", request.user.id, e
+            )
             
             # Return the validation error as-is for better user feedback
             return Response(
@@ -51,9 +72,7 @@ class TrustConnectionListCreateView(generics.ListCreateAPIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
         except Exception as e:
-            print(f"Error creating trust connection: {e}")
-            print(f"Request data: {request.data}")
-            print(f"User: {request.user}")
+            logger.exception("Error creating trust connection for user %s", request.user.id)
             
             # Check if it's a duplicate recommendation
             contractor_id = request.data.get('contractor')
@@ -70,36 +89,28 @@ class TrustConnectionListCreateView(generics.ListCreateAPIView):
             
             # Return original error for other cases
             raise e
-    
-    def update_contractor_trust_score(self, contractor):
-        """Calculate and update contractor's trust score"""
-        # Get all recommendations for this contractor
-        recommendations = TrustConnection.objects.filter(contractor=contractor)
-        
-        if recommendations.exists():
-            # Simple weighted average for now
-            total_score = sum(rec.trust_level for rec in recommendations)
-            new_score = total_score / recommendations.count()
-            
-            old_score = contractor.trust_score
-            contractor.trust_score = new_score
-            contractor.save()
-            
-            # Log the change
-            TrustScoreLog.objects.create(
-                contractor=contractor,
-                old_score=old_score,
-                new_score=new_score,
-                reason="New recommendation received",
-                calculation_details={
-                    'total_recommendations': recommendations.count(),
-                    'average_trust_level': new_score
-                }
-            )
+
+
+def contractor_feed(contractor, radius_km=0):
+    """
+    (service ids, locality ids) of the quick jobs a contractor is shown, in the
+    list and in the stream alike. The contractor's locality is created if no job
+    was posted in it yet, so that radius search starts from it once it has
+    coordinates (import_localities) and the stream can follow it.
+    """
+    from needs.models import ContractorServices
+    service_ids = list(ContractorServices.objects.filter(
+        contractor=contractor
+    ).values_list('service_id', flat=True))
+    locality = get_locality(contractor.city, contractor.state)
+    locality_ids = nearby_locality_ids(locality, radius_km) if locality else []
+    return service_ids, locality_ids
 
 
 class QuickJobListCreateView(generics.ListCreateAPIView):
     permission_classes = [permissions.IsAuthenticated]
+    query_budget = 6
+    pagination_class = KeysetPagination
     
     def get_serializer_class(self):
         if self.request.method == 'POST':
@@ -111,23 +122,18 @@ class QuickJobListCreateView(generics.ListCreateAPIView):
             'customer', 'service', 'assigned_contractor__user'
         ).prefetch_related('interests__contractor__user')
         
-        # For contractors viewing jobs, filter by location AND services they provide
+        # For contractors viewing jobs, filter by location AND services they provide:
+        # jobs posted in the contractor's locality (and, with radius_km, the
+        # localities around it) for services the contractor provides
         if hasattr(self.request.user, 'contractor'):
-            contractor = self.request.user.contractor
-            
-            # Get the services this contractor provides
-            from needs.models import ContractorServices
-            contractor_service_ids = ContractorServices.objects.filter(
-                contractor=contractor
-            ).values_list('service_id', flat=True)
-            
-            # Filter jobs to show only those in the contractor's city and state
-            # AND for services that the contractor provides
-            queryset = queryset.filter(
-                customer__customer__city=contractor.city,
-                customer__customer__state=contractor.state,
-                service_id__in=contractor_service_ids  # Only show jobs for services contractor provides
-            )
+            try:
+                radius_km = float(self.request.query_params.get('radius_km', 0))
+            except ValueError:
+                raise serializers.ValidationError({'error': 'radius_km must be a number'})
+            service_ids, locality_ids = contractor_feed(self.request.user.contractor, radius_km)
+            if not service_ids or not locality_ids:
+                return queryset.none()
+            queryset = queryset.filter(service_id__in=service_ids, locality_id__in=locality_ids)
         
         # Filter by status if provided
         status_filter = self.request.query_params.get('status')
@@ -144,6 +150,11 @@ class QuickJobListCreateView(generics.ListCreateAPIView):
         if service_filter:
             queryset = queryset.filter(service_id=service_filter)
         
+        # Full-text search, best matches first
+        search = self.request.query_params.get('search')
+        if search:
+            return quick_job_search.search(queryset, search).order_by('-search_rank', '-id')
+        
         return queryset.order_by('-created_at')
 
 
@@ -230,89 +241,108 @@ def assign_quick_job(request, job_id):
         )
 
 
+@query_budget(6)
 @api_view(['GET'])
 @permission_classes([permissions.IsAuthenticated])
 def trusted_contractors(request):
     """Get trusted contractors based on social network recommendations"""
     user = request.user
     service_id = request.query_params.get('service')
+    indirect_factor = settings.TRUST_NETWORK_INDIRECT_SCORE_FACTOR
     
-    # Get contractors recommended by user's network (1st and 2nd degree)
-    # 1st degree: Direct recommendations from user
-    first_degree_recommendations = TrustConnection.objects.filter(
-        recommender=user
-    ).values_list('contractor_id', flat=True)
-    
-    # 2nd degree: Recommendations from people user has recommended
-    user_trusted_people = TrustConnection.objects.filter(
-        recommender=user
-    ).values_list('contractor__user_id', flat=True)
+    # Handle pagination
+    try:
+        page = max(int(request.query_params.get('page', 1)), 1)
+        limit = min(max(int(request.query_params.get('limit', 20)), 1), 100)
+    except ValueError:
+        return Response(
+            {'error': 'page and limit must be integers'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    start = (page - 1) * limit
+    end = start + limit
     
-    second_degree_recommendations = TrustConnection.objects.filter(
-        recommender__id__in=user_trusted_people
-    ).exclude(
-        contractor_id__in=first_degree_recommendations
-    ).values_list('contractor_id', flat=True)
+    # Precomputed top-K from the trust propagation job (build_trust_index), one indexed read.
+    # Until the next refresh picks up a change in the user's own or 1st degree
+    # recommendations, the index is stale and the network is scored live instead.
+    index = TrustIndexEntry.objects.filter(user=user)
+    index_entries = list(
+        index.select_related('contractor__user', 'connector').annotate(
+            stale=Exists(pending_changes(user.id))
+        ).order_by('rank')[start:end]
+    )
+    if index_entries:
+        indexed = not index_entries[0].stale
+    else:
+        indexed = page > 1 and index.filter(~Exists(pending_changes(user.id))).exists()
     
-    # Build contractor recommendations with trust scores
     recommendations = []
-    
-    # Process 1st degree recommendations (weight: 10)
-    for contractor_id in first_degree_recommendations:
-        try:
-            contractor = Contractor.objects.select_related('user').get(id=contractor_id)
-            direct_recs = TrustConnection.objects.filter(
-                recommender=user, contractor=contractor
-            ).count()
-            
-            recommendations.append({
-                'contractor': contractor,
-                'trust_score': contractor.trust_score,
-                'recommendation_count': direct_recs,
-                'direct_recommendations': direct_recs,
-                'indirect_recommendations': 0,
-                'connection_path': [user.first_name, contractor.user.first_name]
-            })
-        except Contractor.DoesNotExist:
-            continue
-    
-    # Process 2nd degree recommendations (weight: 3)
-    for contractor_id in second_degree_recommendations:
-        try:
-            contractor = Contractor.objects.select_related('user').get(id=contractor_id)
-            indirect_recs = TrustConnection.objects.filter(
-                recommender__id__in=user_trusted_people,
-                contractor=contractor
-            ).count()
-            
-            # Find connection path
-            connector = TrustConnection.objects.filter(
-                recommender__id__in=user_trusted_people,
-                contractor=contractor
-            ).first()
-            
-            path = [user.first_name]
-            if connector:
-                path.extend([connector.recommender.first_name, contractor.user.first_name])
-            
-            recommendations.append({
-                'contractor': contractor,
-                'trust_score': contractor.trust_score * 0.7,  # Reduced for 2nd degree
-                'recommendation_count': indirect_recs,
-                'direct_recommendations': 0,
-                'indirect_recommendations': indirect_recs,
-                'connection_path': path
-            })
-        except Contractor.DoesNotExist:
-            continue
+    if indexed:
+        for entry in index_entries:
+            contractor = entry.contractor
+            if entry.hops == 1:
+                recommendations.append({
+                    'contractor': contractor,
+                    'trust_score': contractor.trust_score,
+                    'recommendation_count': 1,
+                    'direct_recommendations': 1,
+                    'indirect_recommendations': 0,
+                    'connection_path': [user.first_name, contractor.user.first_name]
+                })
+            else:
+                path = [user.first_name]
+                if entry.connector is not None:
+                    path.extend([entry.connector.first_name, contractor.user.first_name])
+                
+                recommendations.append({
+                    'contractor': contractor,
+                    'trust_score': contractor.trust_score * indirect_factor ** (entry.hops - 1),
+                    'recommendation_count': entry.recommendation_count,
+                    'direct_recommendations': 0,
+                    'indirect_recommendations': entry.recommendation_count,
+                    'connection_path': path
+                })
+    else:
+        # Not indexed (or stale): score the user's 1st and 2nd degree network in one
+        # annotated query, ranked and paginated in the database
+        contractors = network_scores_queryset(user).select_related('user').order_by(
+            '-network_trust_score', 'id'
+        )[start:end]
+        for contractor in contractors:
+            if contractor.direct_trust_level is not None:
+                recommendations.append({
+                    'contractor': contractor,
+                    'trust_score': contractor.trust_score,
+                    'recommendation_count': 1,
+                    'direct_recommendations': 1,
+                    'indirect_recommendations': 0,
+                    'connection_path': [user.first_name, contractor.user.first_name]
+                })
+            else:
+                indirect_recs = contractor.indirect_recommendations
+                path = [user.first_name]
+                if contractor.connector_name is not None:
+                    path.extend([contractor.connector_name, contractor.user.first_name])
+                
+                recommendations.append({
+                    'contractor': contractor,
+                    'trust_score': contractor.trust_score * indirect_factor,  # Reduced for 2nd degree
+                    'recommendation_count': indirect_recs,
+                    'direct_recommendations': 0,
+                    'indirect_recommendations': indirect_recs,
+                    'connection_path': path
+                })
     
     # Filter by service if specified
     if service_id:
         # This would need service-contractor mapping logic
         pass
     
-    # Sort by trust score
-    recommendations.sort(key=lambda x: x['trust_score'], reverse=True)
+    # Full "recommended via" chain for every card, looked up in one batch
+    paths = get_recommendation_paths(user, [rec['contractor'].id for rec in recommendations])
+    for rec in recommendations:
+        if paths[rec['contractor'].id]:
+            rec['connection_path'] = paths[rec['contractor'].id][0]
     
     serializer = TrustedContractorRecommendationSerializer(recommendations, many=True)
     return Response(serializer.data, status=status.HTTP_200_OK)
@@ -423,7 +453,7 @@ def parse_voice_query(request):
         parsed_intent['detected_language'] = detected_language
         
         # Get service suggestions if available
-        service_suggestions = gemini_service.get_service_suggestions(raw_query)
+        service_suggestions = gemini_service.get_service_suggestions(raw_query, parsed=parsed_intent)
         
         # Find best matching service using improved logic
         service_id = None
@@ -484,9 +514,8 @@ def parse_voice_query(request):
                         service_id = service.id
                         service_name = service.name
                         
-            except Exception as e:
-                print(f"Error finding service from category: {e}")
-                pass
+            except Exception:
+                logger.exception("Error finding service from category %r", category)
         
         # Create suggested quick job data
         suggested_quick_job = {
@@ -527,6 +556,51 @@ def parse_voice_query(request):
         }, status=status.HTTP_200_OK)
 
 
+@api_view(['POST'])
+@permission_classes([permissions.IsAuthenticated])
+def parse_voice_queries_batch(request):
+    """
+    Parse a list of text queries, streaming one NDJSON line per query as results
+    complete (not in request order), followed by a summary line.
+    """
+    queries = request.data.get('queries')
+    if not isinstance(queries, list) or not queries:
+        return Response(
+            {'error': 'queries must be a non-empty list of strings'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    if len(queries) > settings.VOICE_BATCH_MAX_QUERIES:
+        return Response(
+            {'error': f'At most {settings.VOICE_BATCH_MAX_QUERIES} queries per batch'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    if not all(isinstance(query, str) and query.strip() for query in queries):
+        return Response(
+            {'error': 'queries must be a non-empty list of strings'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    def stream():
+        sources = {}
+        unique = 0
+        for indices, parsed_intent, source in gemini_service.parse_voice_queries(queries):
+            unique += 1
+            sources[source] = sources.get(source, 0) + len(indices)
+            for index in indices:
+                parsed_intent['original_query'] = queries[index]
+                yield json.dumps({
+                    'index': index,
+                    'query': queries[index],
+                    'source': source,
+                    'parsed_intent': parsed_intent,
+                }, ensure_ascii=False) + '\n'
+        yield json.dumps({
+            'summary': {'queries': len(queries), 'unique': unique, 'sources': sources}
+        }) + '\n'
+    
+    return StreamingHttpResponse(stream(), content_type='application/x-ndjson')
+
+
 @api_view(['POST'])
 @permission_classes([permissions.IsAuthenticated])
 def get_service_suggestions(request):
@@ -567,7 +641,10 @@ def test_voice_parsing(request):
             'gemini_available': gemini_service.model is not None,
             'query': query,
             'parsed_intent': parsed_intent,
-            'api_key_configured': bool(getattr(settings, 'GEMINI_API_KEY', None))
+            'api_key_configured': bool(getattr(settings, 'GEMINI_API_KEY', None)),
+            'query_cache': query_cache.stats(),
+            'prompt_stats': prompt_stats.summary(),
+            'gemini_client': gemini_service.client.stats()
         }, status=status.HTTP_200_OK)
         
     except Exception as e:
@@ -583,16 +660,136 @@ class MyQuickJobsView(generics.ListAPIView):
     """Get current user's quick jobs"""
     serializer_class = QuickJobSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetPagination
     
     def get_queryset(self):
         return QuickJob.objects.filter(
             customer=self.request.user
         ).select_related(
-            'service', 'assigned_contractor__user'
-        ).prefetch_related('interests__contractor__user')
+            'customer', 'service', 'assigned_contractor__user'
+        ).prefetch_related('interests__contractor__user').order_by('-created_at')
     #Pramodh Edit
 
 
+@api_view(['POST'])
+@permission_classes([permissions.IsAuthenticated])
+def quick_job_stream_ticket(request):
+    """Stream-only ticket for EventSource clients, which cannot send the access token as a header"""
+    if not Contractor.objects.filter(user=request.user).exists():
+        return Response(
+            {'error': 'Only contractors can subscribe to the quick job feed'}, status=status.HTTP_403_FORBIDDEN
+        )
+    return Response({
+        'ticket': str(job_feed.StreamTicket.for_user(request.user)),
+        'expires_in': settings.QUICK_JOB_STREAM_TICKET_SECONDS,
+    })
+
+
+def _stream_user(request):
+    """User of the JWT in the Authorization header or, for EventSource clients, of the stream ticket"""
+    authentication = JWTAuthentication()
+    try:
+        header = authentication.get_header(request)
+        if header:
+            raw_token = authentication.get_raw_token(header)
+            return authentication.get_user(authentication.get_validated_token(raw_token)) if raw_token else None
+        ticket = request.GET.get('ticket')
+        return authentication.get_user(job_feed.StreamTicket(ticket)) if ticket else None
+    except (InvalidToken, TokenError, AuthenticationFailed):
+        return None
+
+
+def _stream_feed(user, radius_km):
+    """(service ids, locality ids) of a contractor's feed, None for other users"""
+    contractor = Contractor.objects.filter(user=user).first()
+    return contractor_feed(contractor, radius_km) if contractor else None
+
+
+def _missed_jobs(service_ids, locality_ids, last_event_id):
+    """Open jobs of the feed created after the last one a reconnecting client received"""
+    jobs = QuickJob.objects.filter(
+        service_id__in=service_ids, locality_id__in=locality_ids,
+        status=QuickJob.JobStatus.OPEN, id__gt=last_event_id,
+    ).select_related('service').order_by('id')[:settings.QUICK_JOB_FEED_MAX_PENDING]
+    return [job_feed.job_message(job) for job in jobs]
+
+
+def _sse_event(message):
+    return f"id: {message['id']}\nevent: quick_job\ndata: {json.dumps(message, ensure_ascii=False)}\n\n"
+
+
+async def quick_job_stream(request):
+    """
+    Server-sent events stream of new quick jobs for the authenticated contractor:
+    the jobs the quick job list would show them (same radius_km parameter), pushed
+    as they are posted. Clients reconnecting with Last-Event-ID get the open jobs
+    posted meanwhile first.
+
+    A plain async Django view, since DRF views are synchronous, so only served by
+    the ASGI application (lk_backend.asgi).
+    """
+    if request.method != 'GET':
+        return JsonResponse({'error': 'Method not allowed'}, status=status.HTTP_405_METHOD_NOT_ALLOWED)
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse(
+            {'error': 'The quick job stream is served by the ASGI application'},
+            status=status.HTTP_501_NOT_IMPLEMENTED
+        )
+    user = await sync_to_async(_stream_user)(request)
+    if user is None:
+        return JsonResponse(
+            {'error': 'Authentication credentials were not provided or are invalid'},
+            status=status.HTTP_401_UNAUTHORIZED
+        )
+    try:
+        radius_km = float(request.GET.get('radius_km', 0))
+        last_event_id = int(request.headers.get('Last-Event-ID') or request.GET.get('last_event_id') or 0)
+    except ValueError:
+        return JsonResponse(
+            {'error': 'radius_km and last_event_id must be numbers'}, status=status.HTTP_400_BAD_REQUEST
+        )
+    feed = await sync_to_async(_stream_feed)(user, radius_km)
+    if feed is None:
+        return JsonResponse(
+            {'error': 'Only contractors can subscribe to the quick job feed'}, status=status.HTTP_403_FORBIDDEN
+        )
+
+    service_ids, locality_ids = feed
+    # Subscribe before reading missed jobs so none falls in between
+    subscription = job_feed.broker.subscribe(
+        (service_id, locality_id) for service_id in service_ids for locality_id in locality_ids
+    )
+    missed = []
+    if last_event_id and service_ids and locality_ids:
+        missed = await sync_to_async(_missed_jobs)(service_ids, locality_ids, last_event_id)
+    replayed = {message['id'] for message in missed}
+
+    async def events():
+        try:
+            yield f'retry: {settings.QUICK_JOB_FEED_RETRY_MS}\n\n'
+            for message in missed:
+                yield _sse_event(message)
+            while True:
+                message = await subscription.get(settings.QUICK_JOB_FEED_HEARTBEAT_SECONDS)
+                if message is None:
+                    yield ': keep-alive\n\n'
+                elif message['id'] not in replayed:
+                    yield _sse_event(message)
+        finally:
+            job_feed.broker.unsubscribe(subscription)
+
+    response = StreamingHttpResponse(events(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+def _keyset_params(request, default_limit):
+    """limit/cursor query parameters for keyset paginated endpoints"""
+    limit = min(max(int(request.query_params.get('limit', default_limit)), 1), 100)
+    return limit, request.query_params.get('cursor')
+
+
 @api_view(['GET'])
 @permission_classes([permissions.IsAuthenticated])
 def contractor_work_history(request, contractor_id):
@@ -600,66 +797,32 @@ def contractor_work_history(request, contractor_id):
     Get recent work history for a specific contractor
     """
     try:
-        contractor = Contractor.objects.get(id=contractor_id)
-        
-        # Get completed tenders
-        from works.models import Tenders
-        completed_tenders = Tenders.objects.filter(
-            selected_contractor=contractor,
-            status='completed'
-        ).select_related('customer__user', 'service').order_by('-updated_at')[:5]
-        
-        # Get completed quick jobs
-        completed_quick_jobs = QuickJob.objects.filter(
-            assigned_contractor=contractor,
-            status='COMPLETED'
-        ).select_related('customer', 'service').order_by('-updated_at')[:5]
-        
-        # Prepare tender data
-        tender_data = []
-        for tender in completed_tenders:
-            tender_data.append({
-                'id': tender.id,
-                'type': 'tender',
-                'title': tender.title,
-                'service': tender.service.name,
-                'customer_name': f"{tender.customer.user.first_name} {tender.customer.user.last_name}",
-                'location': tender.location,
-                'completed_date': tender.updated_at,
-                'budget': float(tender.budget) if tender.budget else None
-            })
-        
-        # Prepare quick job data
-        quick_job_data = []
-        for job in completed_quick_jobs:
-            quick_job_data.append({
-                'id': job.id,
-                'type': 'quick_job',
-                'title': job.title,
-                'service': job.service.name,
-                'customer_name': f"{job.customer.first_name} {job.customer.last_name}",
-                'location': job.location,
-                'completed_date': job.completed_at or job.updated_at,
-                'budget': float(job.budget_suggestion) if job.budget_suggestion else None
-            })
-        
-        # Combine and sort by completion date
-        all_work = tender_data + quick_job_data
-        all_work.sort(key=lambda x: x['completed_date'], reverse=True)
-        
-        return Response({
-            'contractor_id': contractor_id,
-            'contractor_name': f"{contractor.user.first_name} {contractor.user.last_name}",
-            'recent_work': all_work[:10],  # Return latest 10 completed works
-            'total_completed_tenders': completed_tenders.count(),
-            'total_completed_quick_jobs': completed_quick_jobs.count()
-        })
-        
+        contractor = Contractor.objects.select_related('user', 'work_summary').get(id=contractor_id)
     except Contractor.DoesNotExist:
         return Response(
             {'error': 'Contractor not found'}, 
             status=status.HTTP_404_NOT_FOUND
         )
+    
+    try:
+        limit, cursor = _keyset_params(request, default_limit=10)
+        # Completed tenders and quick jobs, newest first, from the work history table
+        recent_work, next_cursor = keyset_page(
+            CompletedWork.objects.filter(contractor=contractor), ('-completed_at', '-id'), cursor, limit
+        )
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    
+    summary = getattr(contractor, 'work_summary', None)
+    return Response({
+        'contractor_id': contractor_id,
+        'contractor_name': f"{contractor.user.first_name} {contractor.user.last_name}",
+        'recent_work': [work_item(work) for work in recent_work],
+        'total_completed_tenders': summary.completed_tenders if summary else 0,
+        'total_completed_quick_jobs': summary.completed_quick_jobs if summary else 0,
+        'last_completed_date': summary.last_completed_at if summary else None,
+        'next_cursor': next_cursor
+    })
 
 
 @api_view(['GET'])
@@ -669,78 +832,19 @@ def customer_worked_contractors(request):
     Get contractors that the current customer has completed work with
     """
     try:
-        # Try to get customer profile, create if doesn't exist
-        try:
-            customer = request.user.customer
-        except:
-            # User doesn't have customer profile, return empty
-            return Response({
-                'worked_contractors': [],
-                'total_contractors': 0
-            })
-        
+        limit, cursor = _keyset_params(request, default_limit=20)
+        summaries = CustomerContractorWorkSummary.objects.filter(customer=request.user)
+        # Most recently worked-with contractors first
+        page, next_cursor = keyset_page(
+            summaries.select_related('contractor__user'), ('-last_completed_at', '-id'), cursor, limit
+        )
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    
+    try:
         worked_contractors = []
-        
-        # Get contractors from completed tenders
-        from works.models import Tenders
-        completed_tenders = Tenders.objects.filter(
-            customer=customer,
-            status='completed',
-            selected_contractor__isnull=False
-        ).select_related('selected_contractor__user', 'service')
-        
-        # Get contractors from completed quick jobs
-        completed_quick_jobs = QuickJob.objects.filter(
-            customer=request.user,
-            status='COMPLETED',
-            assigned_contractor__isnull=False
-        ).select_related('assigned_contractor__user', 'service')
-        
-        # Build contractor data with work history
-        contractor_work_map = {}
-        
-        # Process tenders
-        for tender in completed_tenders:
-            contractor = tender.selected_contractor
-            if contractor.id not in contractor_work_map:
-                contractor_work_map[contractor.id] = {
-                    'contractor': contractor,
-                    'tenders': [],
-                    'quick_jobs': []
-                }
-            contractor_work_map[contractor.id]['tenders'].append({
-                'id': tender.id,
-                'title': tender.title,
-                'service': tender.service.name,
-                'location': tender.location,
-                'completed_date': tender.updated_at,
-                'budget': float(tender.budget) if tender.budget else None
-            })
-        
-        # Process quick jobs
-        for job in completed_quick_jobs:
-            contractor = job.assigned_contractor
-            if contractor.id not in contractor_work_map:
-                contractor_work_map[contractor.id] = {
-                    'contractor': contractor,
-                    'tenders': [],
-                    'quick_jobs': []
-                }
-            contractor_work_map[contractor.id]['quick_jobs'].append({
-                'id': job.id,
-                'title': job.title,
-                'service': job.service.name,
-                'location': job.location,
-                'completed_date': job.completed_at or job.updated_at,
-                'budget': float(job.budget_suggestion) if job.budget_suggestion else None
-            })
-        
-        # Format response
-        for contractor_id, work_data in contractor_work_map.items():
-            contractor = work_data['contractor']
-            all_work = work_data['tenders'] + work_data['quick_jobs']
-            all_work.sort(key=lambda x: x['completed_date'], reverse=True)
-            
+        for summary in page:
+            contractor = summary.contractor
             worked_contractors.append({
                 'id': contractor.id,
                 'user': {
@@ -754,16 +858,17 @@ def customer_worked_contractors(request):
                 'trust_score': contractor.trust_score,
                 'address': contractor.address,
                 'work_history': {
-                    'total_tenders': len(work_data['tenders']),
-                    'total_quick_jobs': len(work_data['quick_jobs']),
-                    'recent_work': all_work[:5],  # Latest 5 projects
-                    'all_work': all_work
+                    'total_tenders': summary.completed_tenders,
+                    'total_quick_jobs': summary.completed_quick_jobs,
+                    'last_completed_date': summary.last_completed_at,
+                    'recent_work': summary.recent_work[:5],  # Latest 5 projects
                 }
             })
         
         return Response({
             'worked_contractors': worked_contractors,
-            'total_contractors': len(worked_contractors)
+            'total_contractors': summaries.count(),
+            'next_cursor': next_cursor
         })
         
     except Exception as e:
@@ -823,9 +928,7 @@ def contractor_assigned_jobs(request):
         return Response(jobs_data)
         
     except Exception as e:
-        print(f"Error in contractor_assigned_jobs: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error in contractor_assigned_jobs")
         return Response(
             {'error': str(e)}, 
             status=status.HTTP_500_INTERNAL_SERVER_ERROR
@@ -883,9 +986,7 @@ def contractor_completed_jobs(request):
         return Response(jobs_data)
         
     except Exception as e:
-        print(f"Error in contractor_completed_jobs: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error in contractor_completed_jobs")
         return Response(
             {'error': str(e)}, 
             status=status.HTTP_500_INTERNAL_SERVER_ERROR
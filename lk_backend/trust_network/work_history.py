@@ -0,0 +1,219 @@
+"""
+Denormalised contractor work history.
+
+Completed tenders and quick jobs are copied into CompletedWork when they are
+saved, and ContractorWorkSummary / CustomerContractorWorkSummary keep the
+counts, last completion date and most recent items per contractor and per
+(customer, contractor). The work history endpoints read these tables instead of
+merging every completed Tenders and QuickJob row on each request.
+
+CompletedWork copies the service and customer names, so renaming a service or
+a user rewrites their rows and summaries too (see signals.py). Writes that
+send no signals (queryset.update(), bulk imports) need rebuild_work_history.
+"""
+from django.apps import apps as global_apps
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Max, Q
+from rest_framework import serializers
+
+TENDER = 'tender'
+QUICK_JOB = 'quick_job'
+
+_datetime_field = serializers.DateTimeField()
+
+
+def work_item(work):
+    """API representation of a CompletedWork row"""
+    return {
+        'id': work.work_id,
+        'type': work.work_type,
+        'title': work.title,
+        'service': work.service_name,
+        'customer_name': work.customer_name,
+        'location': work.location,
+        'completed_date': _datetime_field.to_representation(work.completed_at),
+        'budget': work.budget,
+    }
+
+
+def customer_name(user):
+    return f"{user.first_name} {user.last_name}"
+
+
+def tender_work_fields(tender):
+    """CompletedWork fields for a tender, or None if it is not completed work"""
+    if tender.status != 'completed' or tender.selected_contractor_id is None:
+        return None
+    customer_user = tender.customer.user
+    return {
+        'contractor_id': tender.selected_contractor_id,
+        'customer_id': customer_user.id,
+        'title': tender.title,
+        'service_name': tender.service.name,
+        'customer_name': customer_name(customer_user),
+        'location': tender.location,
+        'budget': float(tender.budget) if tender.budget else None,
+        'completed_at': tender.updated_at,
+    }
+
+
+def quick_job_work_fields(job):
+    """CompletedWork fields for a quick job, or None if it is not completed work"""
+    if job.status != 'COMPLETED' or job.assigned_contractor_id is None:
+        return None
+    return {
+        'contractor_id': job.assigned_contractor_id,
+        'customer_id': job.customer_id,
+        'title': job.title,
+        'service_name': job.service.name,
+        'customer_name': customer_name(job.customer),
+        'location': job.location,
+        'budget': float(job.budget_suggestion) if job.budget_suggestion else None,
+        'completed_at': job.completed_at or job.updated_at,
+    }
+
+
+def sync_completed_work(work_type, work_id, fields):
+    """
+    Record (fields) or forget (fields=None) one piece of completed work, then
+    refresh the summaries it belonged to before and after.
+    """
+    CompletedWork = global_apps.get_model('trust_network', 'CompletedWork')
+    with transaction.atomic():
+        existing = CompletedWork.objects.filter(work_type=work_type, work_id=work_id).first()
+        if existing is None and fields is None:
+            return
+
+        affected = set()
+        if existing is not None:
+            affected.add((existing.customer_id, existing.contractor_id))
+            if fields is None:
+                existing.delete()
+        if fields is not None:
+            CompletedWork.objects.update_or_create(
+                work_type=work_type, work_id=work_id, defaults=fields
+            )
+            affected.add((fields['customer_id'], fields['contractor_id']))
+
+        refresh_work_summaries(affected)
+
+
+def forget_completed_work(work_type, work_id, contractor_id=None):
+    """
+    Drop a deleted tender/quick job from the work history. Run after the delete
+    commits, so cascaded rows are already gone and only survivors are refreshed.
+    """
+    CompletedWork = global_apps.get_model('trust_network', 'CompletedWork')
+    with transaction.atomic():
+        affected = set()
+        existing = CompletedWork.objects.filter(work_type=work_type, work_id=work_id).first()
+        if existing is not None:
+            affected.add((existing.customer_id, existing.contractor_id))
+            existing.delete()
+        refresh_work_summaries(affected, contractor_ids=[contractor_id] if contractor_id else ())
+
+
+def rename_service(old_name, new_name):
+    """Rewrite the service name of the completed work filed under old_name"""
+    _rename(Q(service_name=old_name), service_name=new_name)
+
+
+def rename_customer(user):
+    """Rewrite the customer name of a user's completed work"""
+    name = customer_name(user)
+    _rename(Q(customer_id=user.id) & ~Q(customer_name=name), customer_name=name)
+
+
+def _rename(condition, **names):
+    CompletedWork = global_apps.get_model('trust_network', 'CompletedWork')
+    with transaction.atomic():
+        renamed = CompletedWork.objects.filter(condition)
+        pairs = set(renamed.values_list('customer_id', 'contractor_id').distinct())
+        if pairs:
+            renamed.update(**names)
+            refresh_work_summaries(pairs)
+
+
+def _summary_values(work_queryset, recent_items):
+    totals = work_queryset.aggregate(
+        completed_tenders=Count('id', filter=Q(work_type=TENDER)),
+        completed_quick_jobs=Count('id', filter=Q(work_type=QUICK_JOB)),
+        last_completed_at=Max('completed_at'),
+    )
+    totals['recent_work'] = [
+        work_item(work) for work in work_queryset.order_by('-completed_at', '-id')[:recent_items]
+    ]
+    return totals
+
+
+def refresh_work_summaries(pairs, registry=None, contractor_ids=()):
+    """
+    Recompute the summaries for the given (customer user id, contractor id)
+    pairs, and the contractor summaries of those and of contractor_ids.
+    """
+    registry = registry or global_apps
+    Contractor = registry.get_model('accounts', 'Contractor')
+    CompletedWork = registry.get_model('trust_network', 'CompletedWork')
+    ContractorWorkSummary = registry.get_model('trust_network', 'ContractorWorkSummary')
+    CustomerContractorWorkSummary = registry.get_model('trust_network', 'CustomerContractorWorkSummary')
+    recent_items = settings.WORK_SUMMARY_RECENT_ITEMS
+
+    contractor_ids = {contractor_id for _, contractor_id in pairs} | set(contractor_ids)
+    if not contractor_ids:
+        return
+    for contractor_id in Contractor.objects.filter(id__in=contractor_ids).values_list('id', flat=True):
+        ContractorWorkSummary.objects.update_or_create(
+            contractor_id=contractor_id,
+            defaults=_summary_values(
+                CompletedWork.objects.filter(contractor_id=contractor_id), recent_items
+            )
+        )
+
+    for customer_id, contractor_id in pairs:
+        values = _summary_values(
+            CompletedWork.objects.filter(customer_id=customer_id, contractor_id=contractor_id),
+            recent_items
+        )
+        if values['last_completed_at'] is None:
+            CustomerContractorWorkSummary.objects.filter(
+                customer_id=customer_id, contractor_id=contractor_id
+            ).delete()
+        else:
+            CustomerContractorWorkSummary.objects.update_or_create(
+                customer_id=customer_id, contractor_id=contractor_id, defaults=values
+            )
+
+
+def rebuild_work_summaries(registry=None):
+    """
+    Rebuild CompletedWork and every summary from Tenders and QuickJob.
+    Takes an app registry so it can also run from a data migration.
+    """
+    registry = registry or global_apps
+    Tenders = registry.get_model('works', 'Tenders')
+    QuickJob = registry.get_model('trust_network', 'QuickJob')
+    CompletedWork = registry.get_model('trust_network', 'CompletedWork')
+    ContractorWorkSummary = registry.get_model('trust_network', 'ContractorWorkSummary')
+    CustomerContractorWorkSummary = registry.get_model('trust_network', 'CustomerContractorWorkSummary')
+
+    rows = []
+    tenders = Tenders.objects.filter(
+        status='completed', selected_contractor__isnull=False
+    ).select_related('customer__user', 'service')
+    for tender in tenders.iterator(chunk_size=2000):
+        rows.append(CompletedWork(work_type=TENDER, work_id=tender.id, **tender_work_fields(tender)))
+    jobs = QuickJob.objects.filter(
+        status='COMPLETED', assigned_contractor__isnull=False
+    ).select_related('customer', 'service')
+    for job in jobs.iterator(chunk_size=2000):
+        rows.append(CompletedWork(work_type=QUICK_JOB, work_id=job.id, **quick_job_work_fields(job)))
+
+    with transaction.atomic():
+        CompletedWork.objects.all().delete()
+        ContractorWorkSummary.objects.all().delete()
+        CustomerContractorWorkSummary.objects.all().delete()
+        CompletedWork.objects.bulk_create(rows, batch_size=1000)
+        pairs = {(row.customer_id, row.contractor_id) for row in rows}
+        refresh_work_summaries(pairs, registry)
+    return len(rows)
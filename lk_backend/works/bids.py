@@ -0,0 +1,144 @@
+"""
+Bid ingest for the "submit all bids" tender endpoint.
+
+A contractor's submission is all or nothing: one bid for every requirement of
+the tender, none placed before. It is validated as a set (one query for the
+tender's requirements, one for the contractor's existing bids) and inserted
+with a single bulk_create, inside a transaction that holds the contractor's
+TenderContractor row locked so that two parallel submissions by the same
+contractor are serialised instead of racing into the unique constraint.
+"""
+import logging
+
+from django.db import transaction
+from django.utils import timezone
+from rest_framework import serializers
+from rest_framework.exceptions import PermissionDenied
+
+from .leaderboard import invalidate_leaderboard
+from .models import TenderContractor, TenderRequirement, TenderBids
+
+logger = logging.getLogger(__name__)
+
+# Per-requirement result statuses
+CREATED = 'created'
+INVALID = 'invalid'
+UNKNOWN_REQUIREMENT = 'unknown_requirement'
+DUPLICATE = 'duplicate'
+ALREADY_BID = 'already_bid'
+MISSING = 'missing'
+# A valid bid not placed because others in the submission were rejected
+NOT_SUBMITTED = 'not_submitted'
+
+_bid_amount = serializers.DecimalField(max_digits=10, decimal_places=2, min_value=0)
+
+
+def bidding_period_error(tender, now=None):
+    """Why the tender does not accept bids right now, or None if it does"""
+    now = now or timezone.now()
+    if tender.start_time and tender.end_time:
+        if not tender.start_time <= now <= tender.end_time:
+            return "Tender is not in active bidding period."
+    elif tender.start_date and tender.end_date:
+        # Fallback to date fields if time fields are not set
+        if not tender.start_date <= now.date() <= tender.end_date:
+            return "Tender is not in active bidding period."
+    else:
+        return "Tender bidding period is not properly configured."
+    return None
+
+
+def _parse_bid(bid):
+    """(requirement_id, amount, error) of one submitted bid"""
+    if not isinstance(bid, dict):
+        return None, None, 'Each bid must be an object with requirement_id and bid_amount.'
+    requirement_id = bid.get('requirement_id')
+    try:
+        requirement_id = int(requirement_id)
+    except (TypeError, ValueError):
+        return requirement_id, None, 'requirement_id must be an integer.'
+    try:
+        return requirement_id, _bid_amount.to_internal_value(bid.get('bid_amount')), None
+    except serializers.ValidationError as e:
+        return requirement_id, None, f"bid_amount: {' '.join(e.detail)}"
+
+
+def submit_tender_bids(contractor, tender_id, bids):
+    """
+    Place contractor's bids on every requirement of a tender.
+
+    Returns (accepted, results): results has one entry per submitted bid, plus
+    one per requirement left out, each {requirement_id, status[, bid_id | error]}.
+    Bids are only created when every entry is valid (accepted is True).
+    Raises PermissionDenied if the contractor is not on the tender or bidding
+    is closed.
+    """
+    if not isinstance(bids, list):
+        bids = []
+    parsed = [_parse_bid(bid) for bid in bids]
+
+    with transaction.atomic():
+        tender_contractor = TenderContractor.objects.select_for_update(of=('self',)).select_related(
+            'tender'
+        ).filter(tender_id=tender_id, contractor=contractor).first()
+        if tender_contractor is None:
+            raise PermissionDenied("You are not assigned to this tender.")
+        period_error = bidding_period_error(tender_contractor.tender)
+        if period_error:
+            raise PermissionDenied(period_error)
+
+        requirement_ids = set(
+            TenderRequirement.objects.filter(tender_id=tender_id).values_list('id', flat=True)
+        )
+        already_bid = set(TenderBids.objects.filter(
+            contractor=contractor, tender_requirement_id__in=requirement_ids
+        ).values_list('tender_requirement_id', flat=True))
+
+        results, seen, new_bids = [], set(), []
+        for requirement_id, amount, error in parsed:
+            if error:
+                results.append({'requirement_id': requirement_id, 'status': INVALID, 'error': error})
+            elif requirement_id not in requirement_ids:
+                results.append({
+                    'requirement_id': requirement_id, 'status': UNKNOWN_REQUIREMENT,
+                    'error': 'Not a requirement of this tender.'
+                })
+            elif requirement_id in seen:
+                results.append({
+                    'requirement_id': requirement_id, 'status': DUPLICATE,
+                    'error': 'More than one bid for this requirement.'
+                })
+            elif requirement_id in already_bid:
+                results.append({
+                    'requirement_id': requirement_id, 'status': ALREADY_BID,
+                    'error': 'You have already placed a bid for this requirement.'
+                })
+            else:
+                results.append({'requirement_id': requirement_id, 'status': CREATED})
+                new_bids.append(TenderBids(
+                    contractor=contractor, tender_requirement_id=requirement_id, bid_amount=amount
+                ))
+            if requirement_id in requirement_ids:
+                seen.add(requirement_id)
+        for requirement_id in sorted(requirement_ids - seen):
+            results.append({
+                'requirement_id': requirement_id, 'status': MISSING,
+                'error': 'A bid is required for this requirement.'
+            })
+
+        if any(result['status'] != CREATED for result in results) or not new_bids:
+            for result in results:
+                if result['status'] == CREATED:
+                    result['status'] = NOT_SUBMITTED
+            return False, results
+
+        created = TenderBids.objects.bulk_create(new_bids)
+        # bulk_create sends no post_save signals
+        invalidate_leaderboard(tender_id)
+
+    for result, bid in zip(results, created):
+        result['bid_id'] = bid.id
+    logger.info(
+        "Contractor %s placed %s bids on tender %s", contractor.id, len(created), tender_id
+    )
+    return True, results
@@ -0,0 +1,172 @@
+"""
+Bid leaderboard of a tender: per-contractor totals, rank, coverage, lowest
+bids and deviation from the median total, for the customer's bid summary.
+
+The aggregation is one SQL query over the tender's bids: window functions give
+each bid its subtotal (bid_amount * quantity), its contractor's total and
+number of requirements covered, and the lowest bid on its requirement. Ranks,
+the median and the weighted scores are then derived from the per-contractor
+totals of that result; SQL cannot nest window functions and has no portable
+median.
+
+The leaderboard is cached per tender (BID_LEADERBOARD_CACHE_ALIAS) and dropped
+when a bid or requirement of the tender is written (see works.signals and
+works.bids). Contractor rating and trust score changes are picked up when the
+entry expires (BID_LEADERBOARD_CACHE_TTL).
+"""
+import statistics
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, Min, Subquery, Sum, Window
+
+from .models import TenderBids, TenderRequirement
+
+CENTS = Decimal('0.01')
+SORTS = ('total', 'score')
+MAX_RATING = 5
+MAX_TRUST_SCORE = 10
+
+
+def _cache():
+    return caches[settings.BID_LEADERBOARD_CACHE_ALIAS]
+
+
+def _cache_key(tender_id):
+    return f'bid-leaderboard:{tender_id}'
+
+
+def _money(value):
+    return str(Decimal(value).quantize(CENTS))
+
+
+def bid_rows(tender_id):
+    """One row per bid of the tender, with its window aggregates"""
+    subtotal = ExpressionWrapper(
+        F('bid_amount') * F('tender_requirement__quantity'),
+        output_field=DecimalField(max_digits=20, decimal_places=4)
+    )
+    by_contractor = [F('contractor_id')]
+    requirement_count = TenderRequirement.objects.filter(
+        tender_id=tender_id
+    ).values('tender_id').annotate(count=Count('id')).values('count')
+    return TenderBids.objects.filter(tender_requirement__tender_id=tender_id).annotate(
+        subtotal=subtotal,
+        contractor_total=Window(Sum(subtotal), partition_by=by_contractor),
+        requirements_covered=Window(Count('id'), partition_by=by_contractor),
+        lowest_bid=Window(Min('bid_amount'), partition_by=[F('tender_requirement_id')]),
+        requirement_count=Subquery(requirement_count),
+    ).values(
+        'contractor_id', 'contractor__user__first_name', 'contractor__user__last_name',
+        'contractor__city', 'contractor__state', 'contractor__rating', 'contractor__experience',
+        'contractor__trust_score', 'tender_requirement_id', 'tender_requirement__requirement__name',
+        'tender_requirement__quantity', 'bid_amount', 'subtotal', 'contractor_total',
+        'requirements_covered', 'lowest_bid', 'requirement_count',
+    ).order_by('contractor_id', 'tender_requirement_id')
+
+
+def build_leaderboard(tender_id):
+    """Contractor entries of the tender ranked by total, without scores"""
+    contractors = {}
+    for row in bid_rows(tender_id):
+        entry = contractors.get(row['contractor_id'])
+        if entry is None:
+            covered, count = row['requirements_covered'], row['requirement_count'] or 1
+            entry = contractors[row['contractor_id']] = {
+                'contractor_id': row['contractor_id'],
+                'name': f"{row['contractor__user__first_name']} {row['contractor__user__last_name']}".strip(),
+                'city': row['contractor__city'],
+                'state': row['contractor__state'],
+                'rating': str(row['contractor__rating']),
+                'experience': row['contractor__experience'],
+                'trust_score': row['contractor__trust_score'],
+                'bids': [],
+                'total': Decimal(row['contractor_total']),
+                'requirements_covered': covered,
+                'coverage_percent': round(100 * covered / count, 1),
+                'lowest_bid_count': 0,
+                # Lowest bid / own bid, averaged over all requirements (0 for those not bid on)
+                'price_index': 0.0,
+                '_requirement_count': count,
+            }
+        is_lowest = row['bid_amount'] == row['lowest_bid']
+        entry['lowest_bid_count'] += is_lowest
+        entry['price_index'] += (
+            1.0 if is_lowest else float(row['lowest_bid'] / row['bid_amount'])
+        ) / entry['_requirement_count']
+        entry['bids'].append({
+            'requirement_id': row['tender_requirement_id'],
+            'requirement': row['tender_requirement__requirement__name'],
+            'quantity': str(row['tender_requirement__quantity']),
+            'bid_amount': _money(row['bid_amount']),
+            'subtotal': _money(row['subtotal']),
+            'lowest_bid': _money(row['lowest_bid']),
+            'is_lowest': is_lowest,
+        })
+
+    entries = list(contractors.values())
+    # Full coverage first, then cheapest; ties share a rank
+    entries.sort(key=lambda entry: (-entry['requirements_covered'], entry['total']))
+    median = statistics.median(entry['total'] for entry in entries) if entries else None
+    previous_key, rank = None, 0
+    for position, entry in enumerate(entries, start=1):
+        key = (entry['requirements_covered'], entry['total'])
+        if key != previous_key:
+            rank, previous_key = position, key
+        entry['rank'] = rank
+        deviation = entry['total'] - median
+        entry['deviation_from_median'] = _money(deviation)
+        entry['deviation_percent'] = round(float(100 * deviation / median), 1) if median else 0.0
+        entry['total_bid'] = _money(entry.pop('total'))
+        entry['price_index'] = round(entry['price_index'], 4)
+        del entry['_requirement_count']
+    return {'median_total': None if median is None else _money(median), 'contractors': entries}
+
+
+def get_leaderboard(tender_id):
+    cache = _cache()
+    leaderboard = cache.get(_cache_key(tender_id))
+    if leaderboard is None:
+        leaderboard = build_leaderboard(tender_id)
+        cache.set(_cache_key(tender_id), leaderboard, settings.BID_LEADERBOARD_CACHE_TTL)
+    return leaderboard
+
+
+def invalidate_leaderboard(tender_id):
+    """Drop the cached leaderboard once the current transaction commits"""
+    transaction.on_commit(lambda: _cache().delete(_cache_key(tender_id)))
+
+
+def default_weights():
+    return {
+        'price': settings.BID_SCORE_PRICE_WEIGHT,
+        'rating': settings.BID_SCORE_RATING_WEIGHT,
+        'trust': settings.BID_SCORE_TRUST_WEIGHT,
+    }
+
+
+def ranked_contractors(leaderboard, sort='total', weights=None):
+    """
+    Leaderboard entries with a weighted score (0-100) from price index, rating
+    and trust score, ordered by rank (sort='total') or by score (sort='score').
+    """
+    weights = weights or default_weights()
+    total_weight = sum(weights.values())
+    entries = []
+    for entry in leaderboard['contractors']:
+        parts = {
+            'price': entry['price_index'],
+            'rating': float(entry['rating']) / MAX_RATING,
+            'trust': min(entry['trust_score'] / MAX_TRUST_SCORE, 1.0),
+        }
+        score = sum(weights[name] * parts[name] for name in weights) / total_weight
+        entries.append({
+            **entry,
+            'median_total': leaderboard['median_total'],
+            'score': round(100 * score, 2),
+        })
+    if sort == 'score':
+        entries.sort(key=lambda entry: (-entry['score'], entry['rank']))
+    return entries
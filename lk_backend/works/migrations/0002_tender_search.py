@@ -0,0 +1,25 @@
+# Full-text search index for tenders (see trust_network/search.py)
+
+from django.db import migrations
+
+
+def install_search(apps, schema_editor):
+    from trust_network.search import tender_search
+    tender_search.install(schema_editor, apps)
+
+
+def uninstall_search(apps, schema_editor):
+    from trust_network.search import tender_search
+    tender_search.uninstall(schema_editor, apps)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('needs', '0001_initial'),
+        ('works', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(install_search, uninstall_search),
+    ]
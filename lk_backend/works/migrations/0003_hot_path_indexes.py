@@ -0,0 +1,63 @@
+# Generated by Django 5.2.1 on 2026-10-18 00:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_hot_path_indexes'),
+        ('needs', '0001_initial'),
+        ('works', '0002_tender_search'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='physicalvisit',
+            index=models.Index(fields=['supervisor', 'scheduled_date', 'scheduled_time'], name='works_physi_supervi_4fd16f_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='physicalvisit',
+            index=models.Index(fields=['customer', '-scheduled_date'], name='works_physi_custome_e4e862_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tenderbids',
+            index=models.Index(fields=['contractor', 'tender_requirement'], name='works_tende_contrac_93b1e5_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tenderbids',
+            index=models.Index(condition=models.Q(('is_final', True)), fields=['tender_requirement', 'contractor'], name='tenderbids_final_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tendercontractor',
+            index=models.Index(fields=['contractor', 'status'], name='works_tende_contrac_6c10ba_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tendercontractor',
+            index=models.Index(condition=models.Q(('status', 'accepted')), fields=['contractor', 'added_at'], name='tendercontractor_accepted_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tenders',
+            index=models.Index(fields=['status', '-created_at'], name='works_tende_status_9e8ab1_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tenders',
+            index=models.Index(fields=['customer', '-created_at'], name='works_tende_custome_7c2022_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tenders',
+            index=models.Index(fields=['supervisor', '-created_at'], name='works_tende_supervi_a151e8_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='virtualappointment',
+            index=models.Index(fields=['supervisor', 'status', 'scheduled_time'], name='works_virtu_supervi_4c1836_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='virtualappointment',
+            index=models.Index(fields=['customer', '-scheduled_time'], name='works_virtu_custome_e726fa_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='virtualappointment',
+            index=models.Index(condition=models.Q(('status__in', ['scheduled', 'confirmed'])), fields=['customer', 'scheduled_time'], name='virtualappointment_active_idx'),
+        ),
+    ]
@@ -67,6 +67,11 @@ class Tenders(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', '-created_at']),
+            models.Index(fields=['customer', '-created_at']),
+            models.Index(fields=['supervisor', '-created_at']),
+        ]
         
     def __str__(self):
         return f"{self.title} - {self.get_status_display()}"
@@ -101,6 +106,15 @@ class TenderContractor(models.Model):
     class Meta:
         unique_together = ('tender', 'contractor')
         ordering = ['added_at']
+        indexes = [
+            models.Index(fields=['contractor', 'status']),
+            # Tenders a contractor has accepted, in the order they were added
+            models.Index(
+                fields=['contractor', 'added_at'],
+                condition=models.Q(status='accepted'),
+                name='tendercontractor_accepted_idx',
+            ),
+        ]
 
     def __str__(self):
         return f"{self.contractor.user.get_full_name()} - {self.tender.title}"
@@ -166,6 +180,15 @@ class TenderBids(models.Model):
 
     class Meta:
         unique_together = ('tender_requirement', 'contractor')
+        indexes = [
+            models.Index(fields=['contractor', 'tender_requirement']),
+            # Final bid counts per tender requirement
+            models.Index(
+                fields=['tender_requirement', 'contractor'],
+                condition=models.Q(is_final=True),
+                name='tenderbids_final_idx',
+            ),
+        ]
 
 class TenderMilestone(models.Model):
     """Model for tracking tender progress through milestones"""
@@ -275,6 +298,18 @@ class VirtualAppointment(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    class Meta:
+        indexes = [
+            models.Index(fields=['supervisor', 'status', 'scheduled_time']),
+            models.Index(fields=['customer', '-scheduled_time']),
+            # A customer's upcoming appointments
+            models.Index(
+                fields=['customer', 'scheduled_time'],
+                condition=models.Q(status__in=['scheduled', 'confirmed']),
+                name='virtualappointment_active_idx',
+            ),
+        ]
+    
     def __str__(self):
         return f"Virtual appointment: {self.customer.user.first_name} with {self.supervisor.user.first_name} on {self.scheduled_time}"
 
@@ -312,6 +347,12 @@ class PhysicalVisit(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    class Meta:
+        indexes = [
+            models.Index(fields=['supervisor', 'scheduled_date', 'scheduled_time']),
+            models.Index(fields=['customer', '-scheduled_date']),
+        ]
+    
     def __str__(self):
         return f"Physical visit: {self.customer.user.first_name} with {self.supervisor.user.first_name} on {self.scheduled_date}"
 
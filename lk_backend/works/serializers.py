@@ -1,8 +1,14 @@
+import logging
+
 from rest_framework import serializers
+from django.db.models import Count, IntegerField, OuterRef, Prefetch, Subquery
+from django.db.models.functions import Coalesce
 from django.utils import timezone
 import pytz
 from accounts.models import Customer, Supervisor, Contractor
 from needs.models import Services
+from trust_network.search import SearchResultMixin
+from lk_backend.instrumentation import TimedSerializerMixin
 from django.contrib.auth import get_user_model
 from .models import (
     Tenders, TenderRequirement, TenderBids, TenderAttachment,
@@ -12,6 +18,7 @@ from .models import (
 )
 
 User = get_user_model()
+logger = logging.getLogger(__name__)
 
 def get_user_full_name(user):
     """Helper function to get user's full name"""
@@ -85,7 +92,7 @@ class SupervisorServicesSerializer(serializers.ModelSerializer):
             'supervisor_image': obj.supervisor.supervisor_image.url if obj.supervisor.supervisor_image else None
         }
 
-class VirtualAppointmentSerializer(serializers.ModelSerializer):
+class VirtualAppointmentSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     customer_name = serializers.SerializerMethodField()
     supervisor_name = serializers.SerializerMethodField()
     service_name = serializers.CharField(source='service.name', read_only=True)
@@ -157,7 +164,7 @@ class ComplexityAssessmentSerializer(serializers.ModelSerializer):
             )
         return attrs
 
-class PhysicalVisitSerializer(serializers.ModelSerializer):
+class PhysicalVisitSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     customer_name = serializers.SerializerMethodField()
     supervisor_name = serializers.SerializerMethodField()
     service_name = serializers.CharField(source='service.name', read_only=True)
@@ -417,7 +424,7 @@ class TenderAuditLogSerializer(serializers.ModelSerializer):
             return get_user_full_name(obj.user)
         return None
 
-class TenderSerializer(serializers.ModelSerializer):
+class TenderSerializer(TimedSerializerMixin, SearchResultMixin, serializers.ModelSerializer):
     customer = serializers.SerializerMethodField()
     selected_contractor = serializers.SerializerMethodField()
     tender_requirements = serializers.SerializerMethodField()
@@ -548,11 +555,38 @@ class TenderSerializer(serializers.ModelSerializer):
         ]
     
     def get_bid_count(self, obj):
+        # Annotated by setup_eager_loading on list endpoints
+        if hasattr(obj, 'final_bid_count'):
+            return obj.final_bid_count
         return TenderBids.objects.filter(
             tender_requirement__tender=obj,
             is_final=True
         ).values('contractor').distinct().count()
     
+    @staticmethod
+    def setup_eager_loading(queryset):
+        """
+        Load everything the serializer reads for a list of tenders up front, so
+        a page costs a fixed number of queries however many tenders it holds.
+        """
+        final_bidders = TenderBids.objects.filter(
+            tender_requirement__tender=OuterRef('pk'),
+            is_final=True
+        ).order_by().values('tender_requirement__tender').annotate(
+            count=Count('contractor', distinct=True)
+        ).values('count')
+        return queryset.select_related(
+            'customer__user', 'supervisor__user', 'selected_contractor__user', 'service', 'progress'
+        ).prefetch_related(
+            Prefetch(
+                'tender_requirements',
+                queryset=TenderRequirement.objects.select_related('requirement', 'category')
+            ),
+            Prefetch('attachments', queryset=TenderAttachment.objects.select_related('uploaded_by')),
+        ).annotate(
+            final_bid_count=Coalesce(Subquery(final_bidders, output_field=IntegerField()), 0)
+        )
+    
     def create(self, validated_data):
         """Create tender with proper timezone handling"""
         start_time = validated_data.get('start_time')
@@ -564,14 +598,14 @@ class TenderSerializer(serializers.ModelSerializer):
             kolkata_tz = pytz.timezone('Asia/Kolkata')
             start_time_aware = kolkata_tz.localize(start_time)
             validated_data['start_time'] = start_time_aware.astimezone(pytz.utc)
-            print(f"DEBUG: Converted start_time from IST {start_time} to UTC {validated_data['start_time']}")
+            logger.debug("Converted start_time from IST %s to UTC %s", start_time, validated_data['start_time'])
         
         if end_time and timezone.is_naive(end_time):
             # Assume the datetime is in IST and convert to UTC
             kolkata_tz = pytz.timezone('Asia/Kolkata')
             end_time_aware = kolkata_tz.localize(end_time)
             validated_data['end_time'] = end_time_aware.astimezone(pytz.utc)
-            print(f"DEBUG: Converted end_time from IST {end_time} to UTC {validated_data['end_time']}")
+            logger.debug("Converted end_time from IST %s to UTC %s", end_time, validated_data['end_time'])
         
         return super().create(validated_data)
     
@@ -586,14 +620,14 @@ class TenderSerializer(serializers.ModelSerializer):
             kolkata_tz = pytz.timezone('Asia/Kolkata')
             start_time_aware = kolkata_tz.localize(start_time)
             validated_data['start_time'] = start_time_aware.astimezone(pytz.utc)
-            print(f"DEBUG: Converted start_time from IST {start_time} to UTC {validated_data['start_time']}")
+            logger.debug("Converted start_time from IST %s to UTC %s", start_time, validated_data['start_time'])
         
         if end_time and timezone.is_naive(end_time):
             # Assume the datetime is in IST and convert to UTC
             kolkata_tz = pytz.timezone('Asia/Kolkata')
             end_time_aware = kolkata_tz.localize(end_time)
             validated_data['end_time'] = end_time_aware.astimezone(pytz.utc)
-            print(f"DEBUG: Converted end_time from IST {end_time} to UTC {validated_data['end_time']}")
+            logger.debug("Converted end_time from IST %s to UTC %s", end_time, validated_data['end_time'])
         
         return super().update(instance, validated_data)
 
@@ -678,6 +712,49 @@ class TenderContractorSerializer(serializers.ModelSerializer):
                  'contractor_rating', 'status', 'added_at', 'updated_at']
         read_only_fields = ['added_at', 'updated_at']
 
+class ContractorTenderBidStatusSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    """A contractor's tender invitation with whether they have bid on every requirement"""
+    tender_id = serializers.IntegerField(read_only=True)
+    title = serializers.CharField(source='tender.title', read_only=True)
+    service = serializers.SerializerMethodField()
+    location = serializers.CharField(source='tender.location', read_only=True)
+    start_time = serializers.DateTimeField(source='tender.start_time', read_only=True)
+    end_time = serializers.DateTimeField(source='tender.end_time', read_only=True)
+    description = serializers.CharField(source='tender.description', read_only=True)
+    status = serializers.CharField(source='tender.status', read_only=True)
+    assignment_status = serializers.CharField(source='status', read_only=True)
+    requirement_count = serializers.IntegerField(read_only=True)
+    placed_bid_count = serializers.IntegerField(read_only=True)
+    bid_status = serializers.SerializerMethodField()
+
+    class Meta:
+        model = TenderContractor
+        fields = [
+            'tender_id', 'title', 'service', 'location', 'start_time', 'end_time', 'bid_status',
+            'status', 'assignment_status', 'description', 'requirement_count', 'placed_bid_count'
+        ]
+
+    def get_service(self, obj):
+        return obj.tender.service.name if obj.tender.service else "Unknown Service"
+
+    def get_bid_status(self, obj):
+        return "placed" if obj.placed_bid_count == obj.requirement_count else "not_placed"
+
+    @staticmethod
+    def setup_eager_loading(queryset):
+        """Tender, service and both counts in the list query itself"""
+        requirements = TenderRequirement.objects.filter(
+            tender=OuterRef('tender_id')
+        ).order_by().values('tender').annotate(count=Count('id')).values('count')
+        placed_bids = TenderBids.objects.filter(
+            contractor=OuterRef('contractor_id'),
+            tender_requirement__tender=OuterRef('tender_id')
+        ).order_by().values('contractor').annotate(count=Count('id')).values('count')
+        return queryset.select_related('tender__service').annotate(
+            requirement_count=Coalesce(Subquery(requirements, output_field=IntegerField()), 0),
+            placed_bid_count=Coalesce(Subquery(placed_bids, output_field=IntegerField()), 0),
+        )
+
 class TenderContractorAssignSerializer(serializers.Serializer):
     tender_id = serializers.IntegerField()
     contractor_ids = serializers.ListField(
@@ -781,8 +858,8 @@ class TenderSelectContractorSerializer(serializers.ModelSerializer):
         due_date = validated_data.get('due_date')
         comment = validated_data.get('comment', '')
         
-        print(f"DEBUG: Updating tender {instance.id} with contractor {selected_contractor.id if selected_contractor else 'None'}")
-        print(f"DEBUG: Start date: {start_date}, Due date: {due_date}")
+        logger.debug("Updating tender %s with contractor %s", instance.id, selected_contractor.id if selected_contractor else 'None')
+        logger.debug("Start date: %s, Due date: %s", start_date, due_date)
         
         # Store old values for audit log
         old_data = {
@@ -801,7 +878,7 @@ class TenderSelectContractorSerializer(serializers.ModelSerializer):
         instance.version = next_version
         instance.save()
         
-        print(f"DEBUG: Tender updated successfully")
+        logger.debug("Tender updated successfully")
 
         # Create version record
         TenderVersion.objects.create(
@@ -860,7 +937,7 @@ class TenderSelectContractorSerializer(serializers.ModelSerializer):
             contractor=selected_contractor
         ).update(status='declined')
         
-        print(f"DEBUG: Contractor selection completed successfully")
+        logger.debug("Contractor selection completed successfully")
         return instance
 
 
@@ -884,7 +961,7 @@ class TenderCreationAssistanceSerializer(serializers.ModelSerializer):
 
     def to_internal_value(self, data):
         """Override to auto-populate customer, supervisor, service before validation"""
-        print(f"DEBUG: to_internal_value called with data: {data}")
+        logger.debug("to_internal_value called with data: %s", data)
         
         # Make a copy so we don't modify the original
         data = data.copy()
@@ -899,9 +976,9 @@ class TenderCreationAssistanceSerializer(serializers.ModelSerializer):
                 data['supervisor'] = virtual_appointment.supervisor.id  
                 data['service'] = virtual_appointment.service.id
                 data['source'] = 'virtual_only'
-                print(f"DEBUG: Auto-populated from virtual appointment: customer={data['customer']}, supervisor={data['supervisor']}, service={data['service']}")
+                logger.debug("Auto-populated from virtual appointment: customer=%s, supervisor=%s, service=%s", data['customer'], data['supervisor'], data['service'])
             except Exception as e:
-                print(f"DEBUG: Error getting virtual appointment {virtual_appointment_id}: {e}")
+                logger.warning("Error getting virtual appointment %s: %s", virtual_appointment_id, e)
         
         # Auto-populate from physical_visit if provided
         physical_visit_id = data.get('physical_visit')
@@ -913,11 +990,11 @@ class TenderCreationAssistanceSerializer(serializers.ModelSerializer):
                 data['supervisor'] = physical_visit.supervisor.id
                 data['service'] = physical_visit.service.id
                 data['source'] = 'physical_visit'
-                print(f"DEBUG: Auto-populated from physical visit: customer={data['customer']}, supervisor={data['supervisor']}, service={data['service']}")
+                logger.debug("Auto-populated from physical visit: customer=%s, supervisor=%s, service=%s", data['customer'], data['supervisor'], data['service'])
             except Exception as e:
-                print(f"DEBUG: Error getting physical visit {physical_visit_id}: {e}")
+                logger.warning("Error getting physical visit %s: %s", physical_visit_id, e)
         
-        print(f"DEBUG: Final data before parent to_internal_value: {data}")
+        logger.debug("Final data before parent to_internal_value: %s", data)
         return super().to_internal_value(data)
 
     def get_requirements_text_display(self, obj):
@@ -948,7 +1025,7 @@ class TenderCreationAssistanceSerializer(serializers.ModelSerializer):
 
     def create(self, validated_data):
         """Create tender assistance with text-to-JSON conversion"""
-        print(f"DEBUG: TenderCreationAssistanceSerializer create called with data: {validated_data}")
+        logger.debug("TenderCreationAssistanceSerializer create called with data: %s", validated_data)
         
         # Extract requirements_text before processing
         requirements_text = validated_data.pop('requirements_text', '')
@@ -957,16 +1034,16 @@ class TenderCreationAssistanceSerializer(serializers.ModelSerializer):
         if requirements_text:
             requirements_list = [req.strip() for req in requirements_text.split('\n') if req.strip()]
             validated_data['requirements_discussed'] = requirements_list
-            print(f"DEBUG: Converted requirements text to list: {requirements_list}")
+            logger.debug("Converted requirements text to list: %s", requirements_list)
         
-        print(f"DEBUG: Final validated_data before create: {validated_data}")
+        logger.debug("Final validated_data before create: %s", validated_data)
         
         try:
             instance = super().create(validated_data)
-            print(f"DEBUG: TenderCreationAssistance created successfully with ID: {instance.id}")
+            logger.debug("TenderCreationAssistance created successfully with ID: %s", instance.id)
             return instance
         except Exception as e:
-            print(f"DEBUG: Error creating TenderCreationAssistance: {str(e)}")
+            logger.warning("Error creating TenderCreationAssistance: %s", e)
             raise
 
 
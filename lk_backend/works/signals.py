@@ -0,0 +1,28 @@
+"""
+Signal handlers that drop a tender's cached bid leaderboard when its bids or
+requirements change. Bids placed with bulk_create are handled by works.bids.
+"""
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .leaderboard import invalidate_leaderboard
+from .models import TenderBids, TenderRequirement
+
+
+@receiver(post_save, sender=TenderBids)
+@receiver(post_delete, sender=TenderBids)
+def tender_bid_changed(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    tender_id = TenderRequirement.objects.filter(
+        id=instance.tender_requirement_id
+    ).values_list('tender_id', flat=True).first()
+    if tender_id is not None:
+        invalidate_leaderboard(tender_id)
+
+
+@receiver(post_save, sender=TenderRequirement)
+@receiver(post_delete, sender=TenderRequirement)
+def tender_requirement_changed(sender, instance, raw=False, **kwargs):
+    if not raw:
+        invalidate_leaderboard(instance.tender_id)
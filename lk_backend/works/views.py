@@ -1,6 +1,8 @@
 import logging
+import math
 from decimal import Decimal
 from django.db import models
+from django.db.models.functions import Coalesce
 from django.utils import timezone
 import pytz
 from rest_framework import generics, permissions, status
@@ -10,7 +12,12 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 from http import HTTPStatus
 
+from trust_network.pagination import KeysetPagination
+from trust_network.search import tender_search
+
 from .permissions import IsSupervisor
+from . import leaderboard
+from .bids import submit_tender_bids
 from .models import (
     Tenders, TenderRequirement, TenderBids, TenderAttachment,
     TenderAuditLog, TenderVersion, TenderAssignment, TenderContractor,
@@ -30,7 +37,8 @@ from .serializers import (
     SupervisorServicesSerializer,
     ComplexityAssessmentSerializer, TenderMilestoneSerializer,
     TenderProgressSerializer, ProgressNoteSerializer,
-    ContractorRatingSerializer, ContractorRatingListSerializer
+    ContractorRatingSerializer, ContractorRatingListSerializer,
+    ContractorTenderBidStatusSerializer
 )
 
 logger = logging.getLogger(__name__)
@@ -46,8 +54,8 @@ class TenderMilestoneListCreateView(generics.ListCreateAPIView):
 
     def perform_create(self, serializer):
         tender_id = self.kwargs['tender_id']
-        print(f"DEBUG: Creating milestone for tender {tender_id}")
-        print(f"DEBUG: Milestone data: {self.request.data}")
+        logger.debug("Creating milestone for tender %s", tender_id)
+        logger.debug("Milestone data: %s", self.request.data)
         
         tender = Tenders.objects.get(id=tender_id)
         
@@ -57,13 +65,13 @@ class TenderMilestoneListCreateView(generics.ListCreateAPIView):
             raise PermissionDenied(f"Cannot add milestones for tenders in '{tender.status}' state. Only 'in_progress' tenders can have milestones added.")
         
         serializer.save(tender=tender)
-        print(f"DEBUG: Milestone created successfully")
+        logger.debug("Milestone created successfully")
     
     def create(self, request, *args, **kwargs):
         try:
             return super().create(request, *args, **kwargs)
         except Exception as e:
-            print(f"DEBUG: Milestone creation error: {e}")
+            logger.warning("Milestone creation error: %s", e)
             raise
 
 class TenderMilestoneDetailView(generics.RetrieveUpdateDestroyAPIView):
@@ -89,7 +97,7 @@ class TenderProgressView(generics.RetrieveUpdateAPIView):
 
     def get_object(self):
         tender_id = self.kwargs['tender_id']
-        print(f"DEBUG: Getting progress for tender {tender_id}")
+        logger.debug("Getting progress for tender %s", tender_id)
         
         # Get the tender first to check its status
         tender = Tenders.objects.get(id=tender_id)
@@ -102,21 +110,21 @@ class TenderProgressView(generics.RetrieveUpdateAPIView):
         
         try:
             progress = TenderProgress.objects.get(tender_id=tender_id)
-            print(f"DEBUG: Found existing progress: {progress}")
+            logger.debug("Found existing progress: %s", progress)
             return progress
         except TenderProgress.DoesNotExist:
-            print(f"DEBUG: No progress found, creating new one")
+            logger.debug("No progress found, creating new one")
             # Create a progress record if it doesn't exist
             progress = TenderProgress.objects.create(tender=tender)
-            print(f"DEBUG: Created new progress: {progress}")
+            logger.debug("Created new progress: %s", progress)
             return progress
     
     def update(self, request, *args, **kwargs):
-        print(f"DEBUG: Update request data: {request.data}")
+        logger.debug("Update request data: %s", request.data)
         try:
             return super().update(request, *args, **kwargs)
         except Exception as e:
-            print(f"DEBUG: Update error: {e}")
+            logger.warning("Update error: %s", e)
             raise
 
 # --- Tender Attachment Views ---
@@ -254,58 +262,57 @@ class TenderListView(generics.ListAPIView):
     """List all tenders"""
     serializer_class = TenderSerializer
     permission_classes = [permissions.IsAuthenticated]
+    query_budget = 6
+    pagination_class = KeysetPagination
+    
+    PRIORITY_RANK = models.Case(
+        models.When(priority='urgent', then=0),
+        models.When(priority='high', then=1),
+        models.When(priority='medium', then=2),
+        models.When(priority='low', then=3),
+        default=4,
+        output_field=models.IntegerField(),
+    )
+    # Composite sort keys, usable for keyset pagination
+    SORT_KEYS = {
+        'date_desc': ('-created_at', '-id'),
+        'date_asc': ('created_at', 'id'),
+        'budget_desc': ('-budget_key', '-id'),
+        'budget_asc': ('budget_key', 'id'),
+        'priority_desc': ('priority_rank', '-created_at', '-id'),
+        'priority_asc': ('-priority_rank', '-created_at', '-id'),
+        'relevance': ('-search_rank', '-id'),
+    }
     
     def get_queryset(self):
-        queryset = Tenders.objects.all()
+        queryset = TenderSerializer.setup_eager_loading(Tenders.objects.all())
         
         # Filter by status
         status = self.request.query_params.get('status')
         if status and status != 'all':
             queryset = queryset.filter(status=status)
         
-        # Filter by search term
+        # Full-text search; results are ranked by relevance unless a sort is given
         search = self.request.query_params.get('search')
         if search:
-            queryset = queryset.filter(
-                models.Q(title__icontains=search) |
-                models.Q(description__icontains=search) |
-                models.Q(location__icontains=search)
-            )
+            queryset = tender_search.search(queryset, search)
         
-        # Sort by given field
-        sort = self.request.query_params.get('sort', 'date_desc')
-        if sort == 'date_desc':
-            queryset = queryset.order_by('-created_at')
-        elif sort == 'date_asc':
-            queryset = queryset.order_by('created_at')
-        elif sort == 'budget_desc':
-            queryset = queryset.order_by('-budget')
-        elif sort == 'budget_asc':
-            queryset = queryset.order_by('budget')
-        elif sort == 'priority_desc':
-            queryset = queryset.order_by(
-                models.Case(
-                    models.When(priority='urgent', then=0),
-                    models.When(priority='high', then=1),
-                    models.When(priority='medium', then=2),
-                    models.When(priority='low', then=3),
-                    default=4,
-                    output_field=models.IntegerField(),
-                )
-            )
-        elif sort == 'priority_asc':
-            queryset = queryset.order_by(
-                models.Case(
-                    models.When(priority='low', then=0),
-                    models.When(priority='medium', then=1),
-                    models.When(priority='high', then=2),
-                    models.When(priority='urgent', then=3),
-                    default=4,
-                    output_field=models.IntegerField(),
-                )
+        # Sort by given field; every sort ends in id so pages are stable
+        sort = self.request.query_params.get('sort', 'relevance' if search else 'date_desc')
+        if sort == 'relevance' and not search:
+            sort = 'date_desc'
+        if sort.startswith('budget_'):
+            # Tenders without a budget sort as zero
+            queryset = queryset.annotate(
+                budget_key=Coalesce('budget', models.Value(Decimal('0')), output_field=models.DecimalField())
             )
+        elif sort.startswith('priority_'):
+            queryset = queryset.annotate(priority_rank=self.PRIORITY_RANK)
+        queryset = queryset.order_by(*self.SORT_KEYS.get(sort, self.SORT_KEYS['date_desc']))
         
-        # Handle pagination
+        # Page by cursor if one was sent, otherwise by page/limit
+        if KeysetPagination.requested(self.request):
+            return queryset
         page = int(self.request.query_params.get('page', 1))
         limit = int(self.request.query_params.get('limit', 10))
         if page and limit:
@@ -323,7 +330,7 @@ class TenderCreateView(generics.CreateAPIView):
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
         if not serializer.is_valid():
-            print("Tender create failed:", serializer.errors)
+            logger.info("Tender create failed: %s", serializer.errors)
             return Response(serializer.errors, status=HTTPStatus.BAD_REQUEST)
 
         customer = getattr(request.user, 'customer', None)
@@ -354,12 +361,14 @@ class CustomerTendersView(generics.ListAPIView):
     """
     serializer_class = TenderSerializer
     permission_classes = [IsAuthenticated]
+    query_budget = 6
+    pagination_class = KeysetPagination
 
     def get_queryset(self):
         customer = getattr(self.request.user, 'customer', None)
         if not customer:
             raise PermissionDenied("Only customers can access this endpoint.")
-        return Tenders.objects.filter(customer=customer)
+        return TenderSerializer.setup_eager_loading(Tenders.objects.filter(customer=customer))
 
 class TenderBidListForCustomerView(generics.ListAPIView):
     """
@@ -389,60 +398,62 @@ class TenderBidListForCustomerView(generics.ListAPIView):
 # views.py
 
 class ContractorTenderRequirementBidStatusView(APIView):
+    """
+    Requirements of a tender the contractor was added to, each with the
+    contractor's bid on it, in two queries.
+    """
     permission_classes = [IsAuthenticated]
+    query_budget = 4
 
     def get(self, request, tender_id):
         contractor = getattr(request.user, 'contractor', None)
         if not contractor:
             raise PermissionDenied("Only contractors can access this.")
 
-        if not TenderContractor.objects.filter(
+        link = TenderContractor.objects.filter(
             tender_id=tender_id, contractor=contractor
-        ).exists():
+        ).select_related('tender__service').first()
+        if link is None:
             raise PermissionDenied("You are not assigned to this tender.")
+        tender = link.tender
 
-        # Get tender details first
-        try:
-            tender = Tenders.objects.select_related('service').get(id=tender_id)
-        except Tenders.DoesNotExist:
-            return Response({"detail": "Tender not found"}, status=404)
-
+        own_bid = TenderBids.objects.filter(
+            contractor=contractor, tender_requirement=models.OuterRef('pk')
+        )
         requirements = TenderRequirement.objects.filter(
             tender_id=tender_id
-        ).select_related('requirement')
-
-        bid_map = {
-            bid.tender_requirement_id: bid
-            for bid in TenderBids.objects.filter(
-                contractor=contractor,
-                tender_requirement__tender_id=tender_id
-            )
-        }
+        ).select_related('requirement', 'category').annotate(
+            bid_id=models.Subquery(own_bid.values('id')[:1]),
+            bid_amount=models.Subquery(
+                own_bid.values('bid_amount')[:1],
+                output_field=models.DecimalField(max_digits=10, decimal_places=2)
+            ),
+            has_attachments=models.Exists(
+                TenderAttachment.objects.filter(requirement=models.OuterRef('pk'))
+            ),
+        ).order_by('id')
 
-        # Add tender details to response
         response_data = {
             "tender_id": tender.id,
             "tender_title": tender.title,
             "service_name": tender.service.name if tender.service else None,
-            "requirements": []
+            "requirements": [
+                {
+                    "requirement_id": req.id,
+                    "requirement_name": req.requirement.name,
+                    "category_name": req.category.name,
+                    "quantity": req.quantity,
+                    "units": req.units,
+                    "description": req.description,
+                    "is_critical": req.is_critical,
+                    "bid_status": "placed" if req.bid_id else "not_placed",
+                    "bid_amount": str(req.bid_amount.quantize(Decimal('0.01'))) if req.bid_id else None,
+                    "bid_id": req.bid_id,
+                    "has_attachments": req.has_attachments if req.bid_id else False
+                }
+                for req in requirements
+            ]
         }
-
-        for req in requirements:
-            bid = bid_map.get(req.id)
-            response_data["requirements"].append({
-                "requirement_id": req.id,
-                "requirement_name": req.requirement.name,
-                "category_name": req.category.name,
-                "quantity": req.quantity,
-                "units": req.units,
-                "description": req.description,
-                "is_critical": req.is_critical,
-                "bid_status": "placed" if bid else "not_placed",
-                "bid_amount": str(bid.bid_amount) if bid else None,
-                "bid_id": bid.id if bid else None,
-                "has_attachments": bool(req.attachments.exists()) if bid else False
-            })
-        
         return Response(response_data)
 
 
@@ -469,89 +480,13 @@ class SubmitAllTenderBidsView(APIView):
         if not contractor:
             raise PermissionDenied("Only contractors can place bids.")
 
-        tender_contractor = TenderContractor.objects.filter(
-            tender_id=tender_id, contractor=contractor
-        ).first()
-        
-        if not tender_contractor:
-            raise PermissionDenied("You are not assigned to this tender.")
-            
-        print(f"DEBUG: Contractor status for tender {tender_id}: {tender_contractor.status}")
-
-        try:
-            tender = Tenders.objects.get(id=tender_id)
-        except Tenders.DoesNotExist:
-            return Response({"detail": "Tender not found"}, status=404)
-
-        # Check if tender is in active bidding period using start_time and end_time
-        now = timezone.now()  # Keep in current timezone (IST) as configured in settings
-        
-        print(f"DEBUG: Current time (timezone.now()): {now}")
-        print(f"DEBUG: Current timezone: {now.tzinfo}")
-        print(f"DEBUG: Tender start_time: {tender.start_time}")
-        print(f"DEBUG: Tender end_time: {tender.end_time}")
-        print(f"DEBUG: Tender start_date: {tender.start_date}")
-        print(f"DEBUG: Tender end_date: {tender.end_date}")
-        
-        if tender.start_time and tender.end_time:
-            print(f"DEBUG: Using start_time and end_time fields")
-            print(f"DEBUG: start_time <= now: {tender.start_time <= now}")
-            print(f"DEBUG: now <= end_time: {now <= tender.end_time}")
-            print(f"DEBUG: Full condition: {tender.start_time <= now <= tender.end_time}")
-            
-            if not (tender.start_time <= now <= tender.end_time):
-                print(f"DEBUG: Tender is not in active bidding period - TIME CHECK FAILED")
-                print(f"DEBUG: Now: {now}")
-                print(f"DEBUG: Start: {tender.start_time}")
-                print(f"DEBUG: End: {tender.end_time}")
-                raise PermissionDenied("Tender is not in active bidding period.")
-        elif tender.start_date and tender.end_date:
-            print(f"DEBUG: Using start_date and end_date fields (fallback)")
-            # Fallback to date fields if time fields are not set
-            today = timezone.now().date()  # Use current timezone's date
-            print(f"DEBUG: Today: {today}")
-            print(f"DEBUG: start_date <= today: {tender.start_date <= today}")
-            print(f"DEBUG: today <= end_date: {today <= tender.end_date}")
-            
-            if not (tender.start_date <= today <= tender.end_date):
-                print(f"DEBUG: Tender is not in active bidding period - DATE CHECK FAILED")
-                raise PermissionDenied("Tender is not in active bidding period.")
-        else:
-            print(f"DEBUG: Tender bidding period is not properly configured")
-            raise PermissionDenied("Tender bidding period is not properly configured.")
-
-        requirements = TenderRequirement.objects.filter(tender=tender)
-        requirement_ids = set(req.id for req in requirements)
-
-        data = request.data.get("bids", [])
-        if len(data) != len(requirements):
-            return Response({"detail": "You must submit bids for all requirements."}, status=400)
-
-        submitted_ids = set(b["requirement_id"] for b in data)
-        if submitted_ids != requirement_ids:
-            return Response({"detail": "Missing bids for some requirements."}, status=400)
-
-        # Check for existing bids
-        existing_bids = TenderBids.objects.filter(
-            contractor=contractor,
-            tender_requirement_id__in=submitted_ids
-        )
-        
-        if existing_bids.exists():
-            print(f"DEBUG: Found existing bids for requirements: {[b.tender_requirement_id for b in existing_bids]}")
-            return Response({"detail": "You have already placed bids for some or all requirements of this tender."}, status=400)
-
-        # Bulk create
-        bid_objects = []
-        for bid in data:
-            bid_objects.append(TenderBids(
-                contractor=contractor,
-                tender_requirement_id=bid["requirement_id"],
-                bid_amount=bid["bid_amount"]
-            ))
-
-        TenderBids.objects.bulk_create(bid_objects)
-        return Response({"message": "All bids submitted successfully."})
+        accepted, results = submit_tender_bids(contractor, tender_id, request.data.get("bids", []))
+        if not accepted:
+            return Response({
+                "detail": "You must submit exactly one new bid for every requirement of this tender.",
+                "results": results,
+            }, status=400)
+        return Response({"message": "All bids submitted successfully.", "results": results})
 
 
 class ContractorTenderBidListView(generics.ListAPIView):
@@ -626,6 +561,7 @@ class ContractorTenderListView(APIView):
     Allows a contractor to view all tenders they are assigned to.
     """
     permission_classes = [IsAuthenticated]
+    query_budget = 6
 
     def get(self, request):
         user = request.user
@@ -633,66 +569,50 @@ class ContractorTenderListView(APIView):
             return Response({"detail": "Only contractors can access this."}, status=403)
 
         contractor = user.contractor
-        tender_links = TenderContractor.objects.filter(
+        tender_ids = list(TenderContractor.objects.filter(
             contractor=contractor, 
             status='accepted'
-        ).select_related('tender')
-        tenders = [link.tender for link in tender_links]
+        ).values_list('tender_id', flat=True))
+        tenders = TenderSerializer.setup_eager_loading(Tenders.objects.filter(id__in=tender_ids)).in_bulk()
+        # Keep the order in which the contractor was added to each tender
+        tenders = [tenders[tender_id] for tender_id in tender_ids]
 
         serializer = TenderSerializer(tenders, many=True)
         return Response(serializer.data)
     
 #Basanth edit
 # the below view just returns bids the status where they placed or not 
-class ContractorTenderListWithBidStatusView(APIView):
+class ContractorTenderListWithBidStatusView(generics.ListAPIView):
+    """
+    Tenders the contractor was added to, oldest first, each with its
+    requirement count, the contractor's bid count and bid_status ("placed" once
+    every requirement has a bid). Filters: status (tender), assignment_status
+    and bid_status.
+    """
+    serializer_class = ContractorTenderBidStatusSerializer
     permission_classes = [IsAuthenticated]
+    query_budget = 4
+    pagination_class = KeysetPagination
 
-    def get(self, request):
-        contractor = getattr(request.user, 'contractor', None)
+    def get_queryset(self):
+        contractor = getattr(self.request.user, 'contractor', None)
         if not contractor:
             raise PermissionDenied("Only contractors can access this.")
 
-        print(f"DEBUG: Fetching tenders for contractor ID: {contractor.id}")
-        
-        assigned_links = TenderContractor.objects.filter(
-            contractor=contractor
-        ).select_related("tender", "tender__service")
-
-        print(f"DEBUG: Found {assigned_links.count()} assigned tenders")
-
-        data = []
-        for link in assigned_links:
-            tender = link.tender
-            requirements = TenderRequirement.objects.filter(tender=tender)
-            requirement_ids = set(req.id for req in requirements)
-
-            print(f"DEBUG: Processing tender ID: {tender.id}")
-            print(f"DEBUG: Found {len(requirement_ids)} requirements")
-
-            placed_bids = TenderBids.objects.filter(
-                contractor=contractor,
-                tender_requirement_id__in=requirement_ids
-            ).count()
-
-            print(f"DEBUG: Found {placed_bids} placed bids")
-
-            bid_status = "placed" if placed_bids == len(requirement_ids) else "not_placed"
-            tender_status = tender.status if hasattr(tender, 'status') else 'unknown'
-
-            data.append({
-                "tender_id": tender.id,
-                "title": tender.title,
-                "service": tender.service.name if tender.service else "Unknown Service",
-                "location": tender.location,
-                "start_time": tender.start_time,
-                "end_time": tender.end_time,
-                "bid_status": bid_status,
-                "status": tender_status,
-                "assignment_status": link.status,
-                "description": tender.description
-            })
-
-        return Response(data)
+        queryset = ContractorTenderBidStatusSerializer.setup_eager_loading(
+            TenderContractor.objects.filter(contractor=contractor)
+        )
+        params = self.request.query_params
+        if params.get('status'):
+            queryset = queryset.filter(tender__status=params['status'])
+        if params.get('assignment_status'):
+            queryset = queryset.filter(status=params['assignment_status'])
+        bid_status = params.get('bid_status')
+        if bid_status == 'placed':
+            queryset = queryset.filter(placed_bid_count=models.F('requirement_count'))
+        elif bid_status == 'not_placed':
+            queryset = queryset.exclude(placed_bid_count=models.F('requirement_count'))
+        return queryset.order_by('added_at', 'id')
 
     
 # 1. Customer selects contractor for a tender
@@ -726,7 +646,14 @@ from django.db.models import Prefetch
 from decimal import Decimal
 
 class ContractorBidSummaryForTenderView(APIView):
+    """
+    Bid leaderboard of the customer's tender: one entry per bidding contractor
+    with their bids, total, rank, coverage and weighted score (see
+    works.leaderboard). ?sort=total (default) or ?sort=score; price_weight,
+    rating_weight and trust_weight override the score weights.
+    """
     permission_classes = [IsAuthenticated]
+    query_budget = 4
 
     def get(self, request, tender_id):
         user = request.user
@@ -734,55 +661,31 @@ class ContractorBidSummaryForTenderView(APIView):
         if not customer:
             raise PermissionDenied("Only customers can access this endpoint.")
 
-        try:
-            tender = Tenders.objects.prefetch_related(
-                'tender_requirements__requirement'
-            ).get(id=tender_id)
-        except Tenders.DoesNotExist:
+        owner_id = Tenders.objects.filter(id=tender_id).values_list('customer_id', flat=True).first()
+        if owner_id is None:
             return Response({"detail": "Tender not found"}, status=404)
-
-        if tender.customer != customer:
+        if owner_id != customer.id:
             raise PermissionDenied("You can only view bids for your own tenders.")
 
-        requirements = tender.tender_requirements.all()
-        bids = TenderBids.objects.filter(tender_requirement__in=requirements).select_related(
-            'contractor', 'tender_requirement__requirement'
-        )
-
-        contractor_map = {}
-
-        for bid in bids:
-            contractor = bid.contractor
-            req = bid.tender_requirement
-            req_name = req.requirement.name
-            quantity = req.quantity
-            subtotal = Decimal(bid.bid_amount) * quantity
-
-            if contractor.id not in contractor_map:
-                contractor_map[contractor.id] = {
-                    "contractor_id": contractor.id,
-                    "name": f"{contractor.user.first_name} {contractor.user.last_name}".strip(),
-                    "city": contractor.city,
-                    "state": contractor.state,
-                    "rating": contractor.rating,
-                    "experience": contractor.experience,
-                    "bids": [],
-                    "total_bid": Decimal("0.00")
-                }
-
-            contractor_map[contractor.id]["bids"].append({
-                "requirement": req_name,
-                "quantity": quantity,
-                "bid_amount": str(bid.bid_amount),
-                "subtotal": str(subtotal)
-            })
-            contractor_map[contractor.id]["total_bid"] += subtotal
-
-        result = list(contractor_map.values())
-        for c in result:
-            c["total_bid"] = str(c["total_bid"])
-
-        return Response(result)
+        sort = request.query_params.get('sort', 'total')
+        if sort not in leaderboard.SORTS:
+            return Response({"detail": f"sort must be one of {', '.join(leaderboard.SORTS)}"}, status=400)
+        weights = leaderboard.default_weights()
+        try:
+            for name in weights:
+                if f'{name}_weight' in request.query_params:
+                    weights[name] = float(request.query_params[f'{name}_weight'])
+        except ValueError:
+            return Response({"detail": "Weights must be numbers"}, status=400)
+        # nan and inf parse as floats but would make every score nan
+        if not math.isfinite(sum(weights.values())):
+            return Response({"detail": "Weights must be finite numbers"}, status=400)
+        if min(weights.values()) < 0 or sum(weights.values()) <= 0:
+            return Response({"detail": "Weights must be non-negative and not all zero"}, status=400)
+
+        return Response(leaderboard.ranked_contractors(
+            leaderboard.get_leaderboard(tender_id), sort, weights
+        ))
 
 class CustomerTenderAssignmentsView(generics.ListAPIView):
     serializer_class = TenderAssignmentSerializer
@@ -972,6 +875,7 @@ class CustomerVirtualAppointmentsView(generics.ListAPIView):
     """List all virtual appointments for a customer"""
     serializer_class = VirtualAppointmentSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination
     
     def get_queryset(self):
         customer = getattr(self.request.user, 'customer', None)
@@ -986,6 +890,7 @@ class SupervisorVirtualAppointmentsView(generics.ListAPIView):
     """List all virtual appointments for a supervisor"""
     serializer_class = VirtualAppointmentSerializer
     permission_classes = [IsAuthenticated, IsSupervisor]
+    pagination_class = KeysetPagination
     
     def get_queryset(self):
         supervisor = getattr(self.request.user, 'supervisor', None)
@@ -1042,6 +947,7 @@ class CustomerPhysicalVisitsView(generics.ListAPIView):
     """List all physical visits for a customer"""
     serializer_class = PhysicalVisitSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination
     
     def get_queryset(self):
         customer = getattr(self.request.user, 'customer', None)
@@ -1056,6 +962,7 @@ class SupervisorPhysicalVisitsView(generics.ListAPIView):
     """List all physical visits for a supervisor"""
     serializer_class = PhysicalVisitSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination
     
     def get_queryset(self):
         supervisor = getattr(self.request.user, 'supervisor', None)
@@ -1122,27 +1029,27 @@ class TenderCreationAssistanceCreateView(generics.CreateAPIView):
     
     def create(self, request, *args, **kwargs):
         try:
-            print(f"DEBUG: Create tender assistance request data: {request.data}")
-            print(f"DEBUG: Request data keys: {list(request.data.keys())}")
+            logger.debug("Create tender assistance request data: %s", request.data)
+            logger.debug("Request data keys: %s", list(request.data.keys()))
             
             # Pre-process the data to populate required fields from virtual appointment
             data = request.data.copy()
-            print(f"DEBUG: Data copy created: {data}")
+            logger.debug("Data copy created: %s", data)
             
             if 'virtual_appointment' in data:
-                print(f"DEBUG: virtual_appointment found in data: {data['virtual_appointment']}")
+                logger.debug("virtual_appointment found in data: %s", data['virtual_appointment'])
                 try:
                     from appointments.models import VirtualAppointment
-                    print(f"DEBUG: About to query VirtualAppointment with id: {data['virtual_appointment']}")
+                    logger.debug("About to query VirtualAppointment with id: %s", data['virtual_appointment'])
                     virtual_appointment = VirtualAppointment.objects.get(id=data['virtual_appointment'])
-                    print(f"DEBUG: Found virtual appointment: {virtual_appointment.id}")
+                    logger.debug("Found virtual appointment: %s", virtual_appointment.id)
                     
                     # Auto-populate required fields
                     data['customer'] = virtual_appointment.customer.id
                     data['supervisor'] = virtual_appointment.supervisor.id
                     data['service'] = virtual_appointment.service.id
                     
-                    print(f"DEBUG: Auto-populated fields - customer: {data['customer']}, supervisor: {data['supervisor']}, service: {data['service']}")
+                    logger.debug("Auto-populated fields - customer: %s, supervisor: %s, service: %s", data['customer'], data['supervisor'], data['service'])
                     
                     # Handle requirements as JSON
                     if 'requirements_text' in data:
@@ -1152,29 +1059,27 @@ class TenderCreationAssistanceCreateView(generics.CreateAPIView):
                             if req:
                                 requirements.append({'description': req})
                         data['requirements'] = requirements
-                        print(f"DEBUG: Converted requirements: {data['requirements']}")
+                        logger.debug("Converted requirements: %s", data['requirements'])
                     
                     # Update request data
-                    print(f"DEBUG: About to update request.data")
+                    logger.debug("About to update request.data")
                     request._mutable = True
                     request.data.update(data)
                     request._mutable = False
-                    print(f"DEBUG: Updated request.data: {request.data}")
+                    logger.debug("Updated request.data: %s", request.data)
                     
                 except VirtualAppointment.DoesNotExist:
-                    print(f"DEBUG: Virtual appointment not found: {data['virtual_appointment']}")
+                    logger.warning("Virtual appointment not found: %s", data['virtual_appointment'])
                     return Response(
                         {'error': 'Virtual appointment not found'}, 
                         status=status.HTTP_400_BAD_REQUEST
                     )
                 except Exception as e:
-                    print(f"DEBUG: Error processing virtual appointment: {str(e)}")
-                    print(f"DEBUG: Exception type: {type(e)}")
+                    logger.exception("Error processing virtual appointment")
             else:
-                print(f"DEBUG: virtual_appointment NOT found in data keys: {list(data.keys())}")
+                logger.debug("virtual_appointment NOT found in data keys: %s", list(data.keys()))
         except Exception as e:
-            print(f"DEBUG: Error in create method: {str(e)}")
-            print(f"DEBUG: Exception type: {type(e)}")
+            logger.exception("Error in create method")
             return Response(
                 {'error': f'Processing error: {str(e)}'}, 
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
@@ -1183,12 +1088,11 @@ class TenderCreationAssistanceCreateView(generics.CreateAPIView):
         try:
             return super().create(request, *args, **kwargs)
         except Exception as e:
-            print(f"DEBUG: Create tender assistance error: {str(e)}")
-            print(f"DEBUG: Exception type: {type(e)}")
+            logger.warning("Create tender assistance error: %s", e)
             raise
     
     def perform_create(self, serializer):
-        print(f"DEBUG: Serializer validated data: {serializer.validated_data}")
+        logger.debug("Serializer validated data: %s", serializer.validated_data)
         # supervisor = getattr(self.request.user, 'supervisor', None)
         # if not supervisor:
         #     raise PermissionDenied("Only supervisors can create tender assistance.")
@@ -1316,17 +1220,16 @@ class TenderCreationAssistanceCreateView(generics.CreateAPIView):
     permission_classes = [IsAuthenticated]
 
     def create(self, request, *args, **kwargs):
-        print(f"DEBUG: Create tender assistance request data: {request.data}")
+        logger.debug("Create tender assistance request data: %s", request.data)
         
         try:
             response = super().create(request, *args, **kwargs)
-            print(f"DEBUG: Create tender assistance success: {response.data}")
+            logger.debug("Create tender assistance success: %s", response.data)
             return response
         except Exception as e:
-            print(f"DEBUG: Create tender assistance error: {e}")
-            print(f"DEBUG: Exception type: {type(e)}")
+            logger.warning("Create tender assistance error: %s", e)
             if hasattr(e, 'detail'):
-                print(f"DEBUG: Exception detail: {e.detail}")
+                logger.debug("Exception detail: %s", e.detail)
             raise
 
 